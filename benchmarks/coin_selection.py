@@ -0,0 +1,99 @@
+import random
+import secrets
+import sys
+from time import time
+from typing import List
+
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.wallet.coin_selection import CoinAmountIndex, CoinSelectionStrategy, select_coins_from_index
+from hddcoin.wallet.util.wallet_types import WalletType
+from hddcoin.wallet.wallet_coin_record import WalletCoinRecord
+
+NUM_SELECTIONS = 100
+WALLET_SIZES = [1000, 10000, 100000, 1000000]
+
+# farming rewards, in mojos
+FARMER_REWARD = 250000000000
+POOL_REWARD = 1750000000000
+
+
+def rand_hash() -> bytes32:
+    return bytes32(secrets.token_bytes(32))
+
+
+def make_records(num: int) -> List[WalletCoinRecord]:
+    """Mostly farming rewards, plus some change coins of random amounts"""
+    records: List[WalletCoinRecord] = []
+    for i in range(num):
+        kind = random.random()
+        if kind < 0.45:
+            amount = FARMER_REWARD
+        elif kind < 0.9:
+            amount = POOL_REWARD
+        else:
+            amount = random.randint(1, POOL_REWARD * 10)
+        coin = Coin(rand_hash(), rand_hash(), uint64(amount))
+        records.append(WalletCoinRecord(coin, uint32(i), uint32(0), False, True, WalletType.STANDARD_WALLET, 1))
+    return records
+
+
+def legacy_select(records: List[WalletCoinRecord], amount: int) -> List[WalletCoinRecord]:
+    """The selection Wallet.select_coins used to do: sort every spendable coin, then take the largest ones"""
+    unspent = list(records)
+    unspent.sort(reverse=True, key=lambda r: r.coin.amount)
+    selected: List[WalletCoinRecord] = []
+    sum_value = 0
+    for record in unspent:
+        if sum_value >= amount and len(selected) > 0:
+            break
+        sum_value += record.coin.amount
+        selected.append(record)
+    return selected
+
+
+def run_coin_selection_benchmark() -> None:
+    sizes = WALLET_SIZES if "--large" in sys.argv else WALLET_SIZES[:-1]
+    for size in sizes:
+        records = make_records(size)
+        start = time()
+        index = CoinAmountIndex()
+        for record in records:
+            index.add(record.name(), record)
+        print(f"{size} coins: built index in {time() - start:0.4f}s")
+
+        amounts = [random.randint(1, POOL_REWARD * 20) for _ in range(NUM_SELECTIONS)]
+
+        start = time()
+        coin_count = 0
+        for amount in amounts:
+            coin_count += len(legacy_select(records, amount))
+        print(
+            f"  {'legacy sort':>20}: {(time() - start) * 1000 / NUM_SELECTIONS:0.3f}ms per selection, "
+            f"{coin_count / NUM_SELECTIONS:0.1f} coins"
+        )
+
+        for strategy in CoinSelectionStrategy:
+            start = time()
+            coin_count = 0
+            change = 0
+            for amount in amounts:
+                selected = select_coins_from_index(index, amount, set(), strategy)
+                coin_count += len(selected)
+                change += sum(record.coin.amount for record in selected) - amount
+            print(
+                f"  {strategy.value:>20}: {(time() - start) * 1000 / NUM_SELECTIONS:0.3f}ms per selection, "
+                f"{coin_count / NUM_SELECTIONS:0.1f} coins, average change {change // NUM_SELECTIONS}"
+            )
+
+        # Keeping the index up to date as coins are spent and received
+        start = time()
+        for record in records[:NUM_SELECTIONS]:
+            index.remove(record.name())
+            index.add(record.name(), record)
+        print(f"  {'index update':>20}: {(time() - start) * 1000 / NUM_SELECTIONS:0.3f}ms per coin")
+
+
+if __name__ == "__main__":
+    run_coin_selection_benchmark()
@@ -0,0 +1,101 @@
+import random
+import secrets
+import sys
+from time import time
+from typing import Dict, List, Tuple
+
+from sortedcontainers import SortedDict
+
+from hddcoin.full_node.fee_rate_index import FeeRateIndex
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+
+MEMPOOL_SIZES = [10000, 100000]
+NUM_QUERIES = 1000
+
+
+def make_items(num_items: int) -> List[Tuple[bytes32, float, int]]:
+    rng = random.Random(num_items)
+    return [
+        (bytes32(secrets.token_bytes(32)), rng.randrange(0, 10000) / 100, rng.randrange(5000000, 50000000))
+        for _ in range(num_items)
+    ]
+
+
+def sorted_dict_fee_rate_to_free(sorted_spends: SortedDict, costs: Dict[bytes32, int], cost: int) -> float:
+    """The linear walk the mempool used to do"""
+    for fee_per_cost, spends_with_fpc in sorted_spends.items():
+        for name in spends_with_fpc:
+            cost -= costs[name]
+            if cost <= 0:
+                return fee_per_cost
+    raise ValueError()
+
+
+def benchmark_sorted_dict(items: List[Tuple[bytes32, float, int]], queries: List[int]) -> Tuple[float, float, float]:
+    start = time()
+    sorted_spends: SortedDict = SortedDict()
+    costs: Dict[bytes32, int] = {}
+    for name, fee_per_cost, cost in items:
+        if fee_per_cost not in sorted_spends:
+            sorted_spends[fee_per_cost] = {}
+        sorted_spends[fee_per_cost][name] = True
+        costs[name] = cost
+    insert_time = time() - start
+
+    start = time()
+    for cost in queries:
+        sorted_dict_fee_rate_to_free(sorted_spends, costs, cost)
+    query_time = time() - start
+
+    start = time()
+    for _ in range(NUM_QUERIES):
+        fee_per_cost, spends_with_fpc = sorted_spends.peekitem(index=0)
+        del spends_with_fpc[next(iter(spends_with_fpc))]
+        if len(spends_with_fpc) == 0:
+            del sorted_spends[fee_per_cost]
+    evict_time = time() - start
+    return insert_time, query_time, evict_time
+
+
+def benchmark_fee_index(items: List[Tuple[bytes32, float, int]], queries: List[int]) -> Tuple[float, float, float]:
+    start = time()
+    index = FeeRateIndex()
+    for name, fee_per_cost, cost in items:
+        index.add(name, fee_per_cost, cost)
+    insert_time = time() - start
+
+    start = time()
+    for cost in queries:
+        index.fee_rate_to_free(cost)
+    query_time = time() - start
+
+    start = time()
+    for _ in range(NUM_QUERIES):
+        lowest = index.lowest()
+        assert lowest is not None
+        index.remove(lowest)
+    evict_time = time() - start
+    return insert_time, query_time, evict_time
+
+
+def run_benchmarks(sizes: List[int]) -> None:
+    for num_items in sizes:
+        items = make_items(num_items)
+        total_cost = sum(cost for _, _, cost in items)
+        rng = random.Random(0)
+        # Minimum fee to enter for transactions that need up to a tenth of the mempool to be evicted
+        queries = [rng.randrange(1, total_cost // 10) for _ in range(NUM_QUERIES)]
+        for name, benchmark in [("SortedDict", benchmark_sorted_dict), ("FeeRateIndex", benchmark_fee_index)]:
+            insert_time, query_time, evict_time = benchmark(items, queries)
+            print(
+                f"{num_items} items, {name}: insert {insert_time * 1000:0.1f} ms, "
+                f"{NUM_QUERIES} min fee rate queries {query_time * 1000:0.1f} ms, "
+                f"{NUM_QUERIES} evictions {evict_time * 1000:0.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    sizes = MEMPOOL_SIZES
+    if "--large" in sys.argv:
+        sizes = sizes + [1000000]
+    run_benchmarks(sizes)
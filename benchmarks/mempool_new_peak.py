@@ -0,0 +1,124 @@
+import asyncio
+import os
+import secrets
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from time import time
+from typing import List, Optional, cast
+
+import aiosqlite
+from blspy import G2Element
+
+from hddcoin.consensus.block_record import BlockRecord
+from hddcoin.consensus.cost_calculator import NPCResult
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.mempool_manager import MempoolManager, get_npc_multiprocess
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.program import Program, SerializedProgram
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.coin_record import CoinRecord
+from hddcoin.types.coin_spend import CoinSpend
+from hddcoin.types.condition_opcodes import ConditionOpcode
+from hddcoin.types.spend_bundle import SpendBundle
+from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.util.hash import std_hash
+from hddcoin.util.ints import uint32, uint64
+
+MEMPOOL_SIZES = [1000, 10000]
+# Items confirmed by each new peak
+SPENDS_PER_BLOCK = 100
+NUM_PEAKS = 5
+
+# Anyone can spend a coin with this puzzle, the solution is the list of conditions
+IDENTITY_PUZZLE = Program.to(1)
+IDENTITY_PUZZLE_HASH = IDENTITY_PUZZLE.get_tree_hash()
+
+
+@dataclass
+class PeakRecord:
+    """The fields of a BlockRecord that the mempool reads"""
+
+    height: uint32
+    timestamp: uint64
+    header_hash: bytes32
+    prev_transaction_block_hash: Optional[bytes32]
+    prev_transaction_block_height: uint32
+    is_transaction_block: bool = True
+
+
+def make_peak(height: int, prev: Optional[PeakRecord]) -> PeakRecord:
+    prev_hash = None if prev is None else prev.header_hash
+    return PeakRecord(
+        uint32(height), uint64(1000 + height), std_hash(secrets.token_bytes(32)), prev_hash, uint32(height - 1)
+    )
+
+
+def make_spend(coin: Coin) -> SpendBundle:
+    conditions = [
+        [ConditionOpcode.CREATE_COIN, std_hash(coin.name()), coin.amount - 10],
+        # Time locks are checked when the items are validated again
+        [ConditionOpcode.ASSERT_SECONDS_ABSOLUTE, 1000],
+    ]
+    coin_spend = CoinSpend(
+        coin, SerializedProgram.from_program(IDENTITY_PUZZLE), SerializedProgram.from_program(Program.to(conditions))
+    )
+    return SpendBundle([coin_spend], G2Element())
+
+
+async def fill_mempool(num_items: int, incremental: bool) -> float:
+    """Time spent in new_peak for NUM_PEAKS blocks that confirm SPENDS_PER_BLOCK items of the mempool each"""
+    db_filename = Path("mempool-benchmark.db")
+    if db_filename.exists():
+        os.unlink(db_filename)
+    connection = await aiosqlite.connect(db_filename)
+    coin_store = await CoinStore.create(DBWrapper(connection))
+    mempool_manager = MempoolManager(coin_store, DEFAULT_CONSTANTS)
+    try:
+        coins = [Coin(secrets.token_bytes(32), IDENTITY_PUZZLE_HASH, uint64(1000)) for _ in range(num_items)]
+        await coin_store._add_coin_records(
+            [CoinRecord(coin, uint32(1), uint32(0), False, False, uint64(1001)) for coin in coins]
+        )
+        peak = make_peak(1, None)
+        await mempool_manager.new_peak(cast(BlockRecord, peak))
+        for coin in coins:
+            spend_bundle = make_spend(coin)
+            npc_result = NPCResult.from_bytes(
+                get_npc_multiprocess(
+                    bytes(spend_bundle), DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM, DEFAULT_CONSTANTS.COST_PER_BYTE
+                )
+            )
+            await mempool_manager.add_spendbundle(spend_bundle, npc_result, spend_bundle.name(), False)
+        assert len(mempool_manager.mempool.spends) == num_items
+
+        total = 0.0
+        for i in range(NUM_PEAKS):
+            confirmed: List[Coin] = coins[i * SPENDS_PER_BLOCK : (i + 1) * SPENDS_PER_BLOCK]
+            await coin_store._set_spent([coin.name() for coin in confirmed], uint32(peak.height + 1))
+            # A peak that doesn't follow the mempool's peak makes it validate all its items again
+            peak = make_peak(peak.height + 1, peak if incremental else None)
+            start = time()
+            await mempool_manager.new_peak(cast(BlockRecord, peak))
+            total += time() - start
+        assert len(mempool_manager.mempool.spends) == num_items - NUM_PEAKS * SPENDS_PER_BLOCK
+        return total / NUM_PEAKS
+    finally:
+        mempool_manager.shut_down()
+        await connection.close()
+        os.unlink(db_filename)
+
+
+async def run_benchmarks(sizes: List[int]) -> None:
+    for num_items in sizes:
+        full = await fill_mempool(num_items, False)
+        incremental = await fill_mempool(num_items, True)
+        print(f"{num_items} items, new_peak: revalidate all {full * 1000:0.1f} ms, ", end="")
+        print(f"incremental {incremental * 1000:0.1f} ms")
+
+
+if __name__ == "__main__":
+    sizes = MEMPOOL_SIZES
+    if "--large" in sys.argv:
+        sizes = sizes + [50000]
+    asyncio.run(run_benchmarks(sizes))
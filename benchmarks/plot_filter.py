@@ -0,0 +1,60 @@
+import sys
+import tempfile
+from pathlib import Path
+from secrets import token_bytes
+from time import time
+from typing import List, Tuple
+
+from blspy import G1Element
+
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.plotting.util import PlotFilterIndex, PlotInfo
+from hddcoin.types.blockchain_format.proof_of_space import ProofOfSpace
+
+NUM_SIGNAGE_POINTS = 5
+
+
+class FakeProver:
+    def __init__(self, plot_id: bytes):
+        self.plot_id = plot_id
+
+    def get_id(self) -> bytes:
+        return self.plot_id
+
+
+def legacy_passing_plots(plots: List[Tuple[Path, PlotInfo]], challenge_hash: bytes, sp_hash: bytes) -> int:
+    """What the harvester did on each signage point before the plot filter index"""
+    passed = 0
+    for path, plot_info in plots:
+        if path.exists():
+            if ProofOfSpace.passes_plot_filter(DEFAULT_CONSTANTS, plot_info.prover.get_id(), challenge_hash, sp_hash):
+                passed += 1
+    return passed
+
+
+def run_benchmark(num_plots: int, path: Path) -> None:
+    # All plots point to the same file, the legacy loop checks that it exists for each of them
+    plots = [
+        (path, PlotInfo(FakeProver(token_bytes(32)), None, None, G1Element(), 0, 0))  # type: ignore
+        for _ in range(num_plots)
+    ]
+    start = time()
+    index = PlotFilterIndex([], b"").updated(set(), plots)
+    print(f"{num_plots} plots, index built in {time() - start:0.3f}s")
+
+    signage_points = [(token_bytes(32), token_bytes(32)) for _ in range(NUM_SIGNAGE_POINTS)]
+    start = time()
+    passed = [len(index.passing_plots(DEFAULT_CONSTANTS, challenge, sp)) for challenge, sp in signage_points]
+    index_time = (time() - start) / NUM_SIGNAGE_POINTS
+    print(f"  plot filter index: {index_time * 1000:0.1f} ms per signage point")
+    if num_plots <= 100000:
+        start = time()
+        assert [legacy_passing_plots(plots, challenge, sp) for challenge, sp in signage_points] == passed
+        legacy_time = (time() - start) / NUM_SIGNAGE_POINTS
+        print(f"  per plot loop: {legacy_time * 1000:0.1f} ms per signage point, {legacy_time / index_time:0.1f}x")
+
+
+if __name__ == "__main__":
+    with tempfile.NamedTemporaryFile(suffix=".plot") as plot_file:
+        for num_plots in [10000, 100000, 1000000] if "--long" in sys.argv else [10000, 100000]:
+            run_benchmark(num_plots, Path(plot_file.name))
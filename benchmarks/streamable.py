@@ -0,0 +1,135 @@
+import io
+import random
+import struct
+import sys
+from time import time
+from typing import Any, Callable, Dict, List, Set, Tuple, Type
+
+from blspy import AugSchemeMPL, G1Element, G2Element, PrivateKey
+
+from hddcoin.protocols.wallet_protocol import CoinState, RespondToPhUpdates
+from hddcoin.types.blockchain_format.program import Program, SerializedProgram
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.condition_opcodes import ConditionOpcode
+from hddcoin.types.full_block import FullBlock
+from hddcoin.types.header_block import HeaderBlock
+from hddcoin.types.weight_proof import WeightProof
+from hddcoin.util.ints import int512, uint32, uint128
+from hddcoin.util.streamable import PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS, Streamable
+from hddcoin.util.struct_stream import StructStream
+from hddcoin.util.type_checking import is_type_List, is_type_SpecificOptional, is_type_Tuple
+
+if sys.version_info < (3, 8):
+
+    def get_args(t: Type[Any]) -> Tuple[Any, ...]:
+        return getattr(t, "__args__", ())
+
+
+else:
+
+    from typing import get_args
+
+
+class FieldByFieldStream(io.BytesIO):
+    """Streamable.parse() reads subclasses of BytesIO field by field, as it did before parsing from memoryviews"""
+
+
+SECRET_KEY = AugSchemeMPL.key_gen(bytes([1] * 32))
+
+
+def random_value(f_type: Any, rng: random.Random, list_size: int) -> Any:
+    """A random value of a streamable field type, lists have list_size items"""
+    if f_type is bool:
+        return rng.random() < 0.5
+    if is_type_SpecificOptional(f_type):
+        return random_value(get_args(f_type)[0], rng, list_size)
+    if is_type_List(f_type):
+        return [random_value(get_args(f_type)[0], rng, list_size) for _ in range(list_size)]
+    if is_type_Tuple(f_type):
+        return tuple(random_value(inner_type, rng, list_size) for inner_type in get_args(f_type))
+    if f_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS:
+        fields = getattr(f_type, "__annotations__", {})
+        return f_type(**{name: random_value(field_type, rng, list_size) for name, field_type in fields.items()})
+    if issubclass(f_type, StructStream):
+        return f_type(rng.randrange(0, 2 ** (8 * struct.calcsize(f_type.PACK) - 1)))
+    if f_type in (uint128, int512):
+        return f_type(rng.randrange(0, 2 ** 100))
+    if issubclass(f_type, bytes) and hasattr(f_type, "SIZE"):
+        return f_type(rng.randbytes(f_type.SIZE))
+    if f_type is bytes:
+        return rng.randbytes(100)
+    if f_type is str:
+        return "streamable"
+    if f_type is G1Element:
+        return SECRET_KEY.get_g1()
+    if f_type is G2Element:
+        return AugSchemeMPL.sign(SECRET_KEY, b"streamable")
+    if f_type is PrivateKey:
+        return SECRET_KEY
+    if f_type is ConditionOpcode:
+        return ConditionOpcode.CREATE_COIN
+    if f_type is Program:
+        return Program.to([rng.randbytes(32), rng.randrange(0, 1000), [rng.randbytes(48)]])
+    if f_type is SerializedProgram:
+        return SerializedProgram.from_program(random_value(Program, rng, list_size))
+    raise NotImplementedError(f"No random value for {f_type}")
+
+
+def benchmark(name: str, iterations: int, f: Callable[[], Any]) -> float:
+    start = time()
+    for _ in range(iterations):
+        f()
+    per_call = (time() - start) / iterations
+    print(f"  {name}: {per_call * 1000:0.3f} ms")
+    return per_call
+
+
+def run_benchmarks(iterations: int) -> None:
+    rng = random.Random(0)
+    coin_states = [random_value(CoinState, rng, 1) for _ in range(10000)]
+    cases: List[Tuple[str, Type[Streamable], Streamable]] = [
+        ("FullBlock", FullBlock, random_value(FullBlock, rng, 4)),
+        ("HeaderBlock", HeaderBlock, random_value(HeaderBlock, rng, 4)),
+        ("RespondToPhUpdates, 10000 CoinStates", RespondToPhUpdates, RespondToPhUpdates([], uint32(1), coin_states)),
+        ("WeightProof", WeightProof, random_value(WeightProof, rng, 8)),
+    ]
+    for name, cls, obj in cases:
+        blob = bytes(obj)
+        assert cls.from_bytes(blob) == obj
+        print(f"{name}, {len(blob)} bytes")
+        legacy = benchmark("field by field parse", iterations, lambda: cls.parse(FieldByFieldStream(blob)))
+        view = benchmark("from_bytes", iterations, lambda: cls.from_bytes(blob))
+        benchmark("from_bytes_lazy, lists not accessed", iterations, lambda: cls.from_bytes_lazy(blob))
+        print(f"  from_bytes speedup: {legacy / view:0.1f}x")
+
+
+def process_coin_states(coin_states: List[CoinState]) -> None:
+    """The hashing the wallet does for each received coin state, see validate_received_state_from_peer"""
+    validated: Dict[bytes32, CoinState] = {}
+    removals: Set[bytes32] = set()
+    for coin_state in coin_states:
+        coin_state.coin.name()
+        if coin_state.get_hash() in validated:
+            continue
+        if coin_state.spent_height is not None:
+            removals.add(coin_state.coin.name())
+    for coin_state in coin_states:
+        validated[coin_state.get_hash()] = coin_state
+
+
+def run_serialization_benchmarks(iterations: int) -> None:
+    rng = random.Random(0)
+    coin_states = [random_value(CoinState, rng, 1) for _ in range(10000)]
+    message = RespondToPhUpdates([], uint32(1), coin_states)
+    blob = bytes(message)
+    print("10000 CoinStates")
+    benchmark("serialize new message", iterations, lambda: bytes(RespondToPhUpdates([], uint32(1), coin_states)))
+    received = [RespondToPhUpdates.from_bytes(blob).coin_states for _ in range(iterations)]
+    per_call = benchmark("process received states", iterations, lambda: process_coin_states(received.pop()))
+    print(f"  {len(coin_states) / per_call:0.0f} coin states/s")
+    benchmark("process again", iterations, lambda: process_coin_states(coin_states))
+
+
+if __name__ == "__main__":
+    run_benchmarks(100 if "--long" in sys.argv else 20)
+    run_serialization_benchmarks(100 if "--long" in sys.argv else 20)
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import random
+import secrets
+import sys
+import tempfile
+from pathlib import Path
+from time import time
+from typing import Any, List, Tuple
+
+import aiosqlite
+
+from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.wallet.util.wallet_types import WalletType
+from hddcoin.wallet.wallet_coin_store import WalletCoinStore
+from hddcoin.wallet.wallet_puzzle_store import WalletPuzzleStore
+
+NUM_LOOKUPS = 10000
+WALLET_SIZES = [10000, 100000, 1000000]
+# Share of the coins that are still unspent
+UNSPENT_SHARE = 0.1
+
+
+def make_rows(num: int) -> Tuple[List[Tuple], List[Tuple]]:
+    """Coin records and derivation paths of a wallet with `num` coins, in the version 1 layout"""
+    coins: List[Tuple] = []
+    derivations: List[Tuple] = []
+    for i in range(num):
+        spent = random.random() > UNSPENT_SHARE
+        coins.append(
+            (
+                secrets.token_bytes(32).hex(),
+                i,
+                i + 10 if spent else 0,
+                int(spent),
+                0,
+                secrets.token_bytes(32).hex(),
+                secrets.token_bytes(32).hex(),
+                random.randint(1, 10 ** 12).to_bytes(8, "big"),
+                WalletType.STANDARD_WALLET,
+                1,
+            )
+        )
+        derivations.append(
+            (i, secrets.token_bytes(48).hex(), secrets.token_bytes(32).hex(), WalletType.STANDARD_WALLET, 1, 0, 0)
+        )
+    return coins, derivations
+
+
+async def create_v1(path: Path, coins: List[Tuple], derivations: List[Tuple]) -> None:
+    """The version 1 tables and indexes, with hex strings for ids and hashes"""
+    db = await aiosqlite.connect(path)
+    await db.execute(
+        "CREATE TABLE coin_record(coin_name text PRIMARY KEY, confirmed_height bigint, spent_height bigint,"
+        " spent int, coinbase int, puzzle_hash text, coin_parent text, amount blob, wallet_type int, wallet_id int)"
+    )
+    for index in [
+        "coin_confirmed_height on coin_record(confirmed_height)",
+        "coin_spent_height on coin_record(spent_height)",
+        "coin_spent on coin_record(spent)",
+        "coin_puzzlehash on coin_record(puzzle_hash)",
+        "wallet_type on coin_record(wallet_type)",
+        "wallet_id on coin_record(wallet_id)",
+    ]:
+        await db.execute(f"CREATE INDEX {index}")
+    await db.execute(
+        "CREATE TABLE derivation_paths(derivation_index int, pubkey text, puzzle_hash text PRIMARY_KEY,"
+        " wallet_type int, wallet_id int, used tinyint, hardened tinyint)"
+    )
+    for index in [
+        "derivation_index_index on derivation_paths(derivation_index)",
+        "ph on derivation_paths(puzzle_hash)",
+        "pubkey on derivation_paths(pubkey)",
+        "derivation_wallet_type on derivation_paths(wallet_type)",
+        "derivation_wallet_id on derivation_paths(wallet_id)",
+        "used on derivation_paths(wallet_type)",
+    ]:
+        await db.execute(f"CREATE INDEX {index}")
+    await db.executemany("INSERT INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", coins)
+    await db.executemany("INSERT INTO derivation_paths VALUES(?, ?, ?, ?, ?, ?, ?)", derivations)
+    await db.commit()
+    await db.execute("VACUUM")
+    await db.close()
+
+
+async def time_queries(path: Path, coin_names: List[Any], puzzle_hashes: List[Any], check_height: int) -> None:
+    db = await aiosqlite.connect(path)
+
+    start = time()
+    for name in coin_names:
+        cursor = await db.execute("SELECT * from coin_record WHERE coin_name=?", (name,))
+        await cursor.fetchone()
+        await cursor.close()
+    print(f"    coin record by name:   {(time() - start) / len(coin_names) * 1e6:8.1f}us")
+
+    start = time()
+    for puzzle_hash in puzzle_hashes:
+        cursor = await db.execute("SELECT 1 from derivation_paths WHERE puzzle_hash=?", (puzzle_hash,))
+        await cursor.fetchone()
+        await cursor.close()
+    print(f"    puzzle hash exists:    {(time() - start) / len(puzzle_hashes) * 1e6:8.1f}us")
+
+    start = time()
+    cursor = await db.execute(
+        "SELECT * from coin_record where spent_height=0 or spent_height>? or confirmed_height>?",
+        (check_height, check_height),
+    )
+    rows = list(await cursor.fetchall())
+    await cursor.close()
+    print(f"    coins to check:        {(time() - start) * 1000:8.1f}ms ({len(rows)} coins)")
+
+    start = time()
+    cursor = await db.execute("SELECT * from coin_record WHERE spent=0")
+    rows = list(await cursor.fetchall())
+    await cursor.close()
+    print(f"    load unspent coins:    {(time() - start) * 1000:8.1f}ms ({len(rows)} coins)")
+    await db.close()
+
+
+async def run_wallet_db_schema_benchmark() -> None:
+    sizes = WALLET_SIZES if "--large" in sys.argv else WALLET_SIZES[:-1]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = Path(tmp_dir) / f"wallet_{size}.sqlite"
+            coins, derivations = make_rows(size)
+            await create_v1(path, coins, derivations)
+            lookups = random.sample(range(size), min(NUM_LOOKUPS, size))
+            check_height = size - size // 100
+
+            print(f"{size} coins, version 1: {os.path.getsize(path) / 2 ** 20:0.1f}MiB")
+            await time_queries(path, [coins[i][0] for i in lookups], [derivations[i][2] for i in lookups], check_height)
+
+            db = await aiosqlite.connect(path)
+            wrapper = DBWrapper(db)
+            start = time()
+            await WalletCoinStore.create(wrapper)
+            await WalletPuzzleStore.create(wrapper)
+            print(f"  migrated and loaded in {time() - start:0.2f}s")
+            await db.execute("VACUUM")
+            await db.close()
+
+            print(f"{size} coins, version 2: {os.path.getsize(path) / 2 ** 20:0.1f}MiB")
+            await time_queries(
+                path,
+                [bytes.fromhex(coins[i][0]) for i in lookups],
+                [bytes.fromhex(derivations[i][2]) for i in lookups],
+                check_height,
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(run_wallet_db_schema_benchmark())
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+from time import time
+
+import aiosqlite
+
+from hddcoin.full_node.weight_proof import WeightProofHandler
+from hddcoin.util.block_cache import BlockCache
+from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.wallet.key_val_store import KeyValStore
+from hddcoin.wallet.wallet_blockchain import WalletBlockchain
+from hddcoin.wallet.wallet_weight_proof_handler import WalletWeightProofHandler
+from tests.block_tools import test_constants
+from tests.util.blockchain import persistent_blocks
+from tests.weight_proof.test_weight_proof import load_blocks_dont_validate
+
+NUM_ITERS = 5
+
+
+async def time_to_ready(store: KeyValStore, handler: WalletWeightProofHandler) -> float:
+    start = time()
+    chain = await WalletBlockchain.create(store, test_constants, handler)
+    assert chain.get_peak_height() > 0
+    return time() - start
+
+
+async def run_startup_benchmark(num_blocks: int) -> None:
+    blocks = persistent_blocks(num_blocks, f"test_blocks_{num_blocks}_bench.db")
+    header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(blocks)
+    wpf = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+    weight_proof = await wpf.get_proof_of_weight(blocks[-1].header_hash)
+    assert weight_proof is not None
+
+    db_filename = Path("wallet-startup-benchmark.db")
+    try:
+        os.unlink(db_filename)
+    except FileNotFoundError:
+        pass
+    connection = await aiosqlite.connect(db_filename)
+    handler = WalletWeightProofHandler(test_constants)
+    try:
+        store = await KeyValStore.create(DBWrapper(connection))
+        chain = await WalletBlockchain.create(store, test_constants, handler)
+        await chain.new_weight_proof(weight_proof)
+        state = chain.synced_weight_proof_state
+        assert state is not None
+        print(f"{num_blocks} blocks, weight proof of {len(bytes(weight_proof))} bytes")
+
+        total = 0.0
+        for _ in range(NUM_ITERS):
+            # Without the stored state, or with an older wallet database, the weight proof is validated again
+            await store.remove_object("SYNCED_WEIGHT_PROOF_STATE")
+            await store.remove_object("PEAK_BLOCK")
+            total += await time_to_ready(store, handler)
+        print(f"  validating the stored weight proof: {total / NUM_ITERS:0.3f}s")
+
+        await store.set_object("SYNCED_WEIGHT_PROOF_STATE", state)
+        total = 0.0
+        for _ in range(NUM_ITERS):
+            total += await time_to_ready(store, handler)
+        print(f"  loading the validated state: {total / NUM_ITERS:0.3f}s")
+    finally:
+        handler.cancel_weight_proof_tasks()
+        await connection.close()
+        db_filename.unlink()
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(run_startup_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
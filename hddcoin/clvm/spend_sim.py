@@ -49,6 +49,8 @@ class SimBlockRecord:
         self.timestamp = timestamp
         self.is_transaction_block = True
         self.header_hash = std_hash(bytes(height))
+        # Blocks are rewound without telling the mempool, it always validates its items again
+        self.prev_transaction_block_hash = None
 
 
 class SpendSim:
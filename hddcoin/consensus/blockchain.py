@@ -20,6 +20,7 @@ from hddcoin.consensus.full_block_to_block_record import block_to_block_record
 from hddcoin.consensus.multiprocess_validation import PreValidationResult, pre_validate_blocks_multiprocessing
 from hddcoin.full_node.block_store import BlockStore
 from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.header_block_store import HeaderBlockStore
 from hddcoin.full_node.hint_store import HintStore
 from hddcoin.full_node.mempool_check_conditions import get_name_puzzle_conditions
 from hddcoin.types.blockchain_format.coin import Coin
@@ -88,10 +89,16 @@ class Blockchain(BlockchainInterface):
     lock: asyncio.Lock
     compact_proof_lock: asyncio.Lock
     hint_store: HintStore
+    # Wallet facing header blocks of the peak path, optional
+    header_block_store: Optional[HeaderBlockStore]
 
     @staticmethod
     async def create(
-        coin_store: CoinStore, block_store: BlockStore, consensus_constants: ConsensusConstants, hint_store: HintStore
+        coin_store: CoinStore,
+        block_store: BlockStore,
+        consensus_constants: ConsensusConstants,
+        hint_store: HintStore,
+        header_block_store: Optional[HeaderBlockStore] = None,
     ):
         """
         Initializes a blockchain with the BlockRecords from disk, assuming they have all been
@@ -116,6 +123,7 @@ class Blockchain(BlockchainInterface):
         await self._load_chain_from_store()
         self._seen_compact_proofs = set()
         self.hint_store = hint_store
+        self.header_block_store = header_block_store
         return self
 
     def shut_down(self):
@@ -349,6 +357,10 @@ class Blockchain(BlockchainInterface):
                     )
                 else:
                     added, _ = [], []
+                if self.header_block_store is not None:
+                    await self.header_block_store.add_header_blocks(
+                        [get_block_header(block, tx_additions, tx_removals)]
+                    )
                 await self.block_store.set_peak(block_record.header_hash)
                 return uint32(0), uint32(0), [block_record], (added, {})
             return None, None, [], ([], {})
@@ -368,6 +380,8 @@ class Blockchain(BlockchainInterface):
                 roll_changes: List[CoinRecord] = await self.coin_store.rollback_to_block(fork_height)
                 for coin_record in roll_changes:
                     lastest_coin_state[coin_record.name] = coin_record
+                if self.header_block_store is not None:
+                    await self.header_block_store.rollback_to_block(fork_height)
 
             # Rollback sub_epoch_summaries
             heights_to_delete = []
@@ -394,9 +408,12 @@ class Blockchain(BlockchainInterface):
                 curr = fetched_block_record.prev_hash
 
             records_to_add = []
+            header_blocks_to_add: List[HeaderBlock] = []
             for fetched_full_block, fetched_block_record in reversed(blocks_to_add):
                 records_to_add.append(fetched_block_record)
-                if fetched_full_block.is_transaction_block():
+                if not fetched_full_block.is_transaction_block():
+                    header_blocks_to_add.append(get_block_header(fetched_full_block, [], []))
+                else:
                     if fetched_block_record.header_hash == block_record.header_hash:
                         tx_removals, tx_additions, npc_res = await self.get_tx_removals_and_additions(
                             fetched_full_block, npc_result
@@ -417,6 +434,7 @@ class Blockchain(BlockchainInterface):
                     removed_rec: List[Optional[CoinRecord]] = [
                         await self.coin_store.get_coin_record(name) for name in tx_removals
                     ]
+                    header_blocks_to_add.append(get_block_header(fetched_full_block, tx_additions, tx_removals))
 
                     # Set additions first, then removals in order to handle ephemeral coin state
                     # Add in height order is also required
@@ -438,6 +456,9 @@ class Blockchain(BlockchainInterface):
                                 hint_coin_state[key] = {}
                             hint_coin_state[key][coin_id] = lastest_coin_state[coin_id]
 
+            if self.header_block_store is not None:
+                await self.header_block_store.add_header_blocks(header_blocks_to_add)
+
             # Changes the peak to be the new peak
             await self.block_store.set_peak(block_record.header_hash)
             return (
@@ -746,6 +767,19 @@ class Blockchain(BlockchainInterface):
                 header_hash: bytes32 = self.height_to_hash(uint32(height))
                 hashes.append(header_hash)
 
+        header_blocks: Dict[bytes32, HeaderBlock] = {}
+        use_header_block_store = tx_filter and self.header_block_store is not None
+        if use_header_block_store:
+            assert self.header_block_store is not None
+            stored = await self.header_block_store.get_header_blocks_in_range(start, stop)
+            # Rows of blocks that are not in the peak path anymore are rebuilt below
+            for header_hash in hashes.copy():
+                if header_hash in stored:
+                    header_blocks[header_hash] = stored[header_hash]
+                    hashes.remove(header_hash)
+            if len(hashes) == 0:
+                return header_blocks
+
         blocks: List[FullBlock] = []
         for hash in hashes.copy():
             block = self.block_store.block_cache.get(hash)
@@ -754,7 +788,7 @@ class Blockchain(BlockchainInterface):
                 hashes.remove(hash)
         blocks_on_disk: List[FullBlock] = await self.block_store.get_blocks_by_hash(hashes)
         blocks.extend(blocks_on_disk)
-        header_blocks: Dict[bytes32, HeaderBlock] = {}
+        built: List[HeaderBlock] = []
 
         for block in blocks:
             if self.height_to_hash(block.height) != block.header_hash:
@@ -770,7 +804,14 @@ class Blockchain(BlockchainInterface):
                     block, [record.coin for record in tx_additions], [record.coin.name() for record in removed]
                 )
             header_blocks[header.header_hash] = header
+            built.append(header)
 
+        if use_header_block_store:
+            assert self.header_block_store is not None
+            # Fills in the blocks that were added before the store was enabled
+            async with self.block_store.db_wrapper.lock:
+                await self.header_block_store.add_header_blocks(built)
+                await self.block_store.db_wrapper.commit_transaction()
         return header_blocks
 
     async def get_header_block_by_height(
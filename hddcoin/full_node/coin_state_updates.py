@@ -0,0 +1,62 @@
+import zlib
+from typing import Dict, Iterable, List
+
+from hddcoin.protocols.protocol_message_types import ProtocolMessageTypes
+from hddcoin.protocols.wallet_protocol import CoinState, CoinStateUpdate, CompressedCoinStateUpdate
+from hddcoin.server.outbound_message import Message, make_msg
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint8, uint32
+
+# Updates smaller than this are sent uncompressed, compressing them saves little and costs both sides
+COMPRESSION_THRESHOLD = 64 * 1024
+# Same as the maximum websocket message size, a compressed update can't be inflated beyond what could be sent plain
+MAX_DECOMPRESSED_SIZE = 50 * 1024 * 1024
+
+
+class CoinStateUpdateEncoder:
+    """
+    Serializes the CoinStateUpdate messages of a new peak for many wallet peers. Each distinct CoinState is serialized
+    once and its bytes are shared by the updates of all the peers it's sent to, the message is assembled by
+    concatenation, the same way Streamable serializes the list.
+    """
+
+    _prefix: bytes
+    _encoded_states: Dict[CoinState, bytes]
+
+    def __init__(self, height: uint32, fork_height: uint32, peak_hash: bytes32):
+        self._prefix = bytes(height) + bytes(fork_height) + bytes(peak_hash)
+        self._encoded_states = {}
+
+    def _encode_state(self, state: CoinState) -> bytes:
+        encoded = self._encoded_states.get(state)
+        if encoded is None:
+            encoded = bytes(state)
+            self._encoded_states[state] = encoded
+        return encoded
+
+    def encode(self, states: Iterable[CoinState]) -> bytes:
+        """The serialized CoinStateUpdate with the states."""
+        encoded_states: List[bytes] = [self._encode_state(state) for state in states]
+        return b"".join([self._prefix, bytes(uint32(len(encoded_states)))] + encoded_states)
+
+    def message(self, states: Iterable[CoinState], compress: bool) -> Message:
+        """
+        The coin_state_update message with the states, or a compressed_coin_state_update if the peer supports it, the
+        update is large and compressing makes it smaller.
+        """
+        data = self.encode(states)
+        if compress and len(data) >= COMPRESSION_THRESHOLD:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return make_msg(
+                    ProtocolMessageTypes.compressed_coin_state_update, CompressedCoinStateUpdate(compressed)
+                )
+        return Message(uint8(ProtocolMessageTypes.coin_state_update.value), None, data)
+
+
+def decompress_coin_state_update(compressed: CompressedCoinStateUpdate) -> CoinStateUpdate:
+    decompressor = zlib.decompressobj()
+    data = decompressor.decompress(compressed.data, MAX_DECOMPRESSED_SIZE)
+    if decompressor.unconsumed_tail != b"" or not decompressor.eof:
+        raise ValueError("Invalid compressed coin state update")
+    return CoinStateUpdate.from_bytes(data)
@@ -0,0 +1,106 @@
+from bisect import bisect_right
+from collections import deque
+from typing import Collection, Deque, Dict, List, Optional, Tuple
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint32
+
+# Lower bounds of the fee per cost buckets, in mojos per cost, 20% apart
+FEE_RATE_BUCKETS: List[float] = [0.0] + [1.2 ** i for i in range(100)]
+# Estimates are for confirmations within 1 to MAX_TARGET_BLOCKS transaction blocks
+MAX_TARGET_BLOCKS = 60
+# Number of transaction blocks whose confirmations the estimates are based on
+HISTORY_BLOCKS = 1000
+# Share of the items of a fee per cost range that must have been confirmed within the target
+SUCCESS_THRESHOLD = 0.85
+# Items needed in a fee per cost range to tell whether it's enough
+MIN_SAMPLES = 10
+
+
+def fee_rate_bucket(fee_per_cost: float) -> int:
+    return bisect_right(FEE_RATE_BUCKETS, fee_per_cost) - 1
+
+
+class FeeEstimator:
+    """
+    Estimates the fee per cost a transaction needs to be confirmed within a number of blocks, from the fee per cost of
+    the mempool items that the recent blocks confirmed and how many blocks they waited. The confirmations of each block
+    are kept in a ring buffer of the last HISTORY_BLOCKS blocks, and the estimates for all the targets are computed
+    when a block is added, so getting an estimate is a lookup.
+    """
+
+    def __init__(self, history_blocks: int = HISTORY_BLOCKS, max_target: int = MAX_TARGET_BLOCKS):
+        self.max_target = max_target
+        # Height of the peak when the items entered the mempool, and their bucket
+        self._tracked: Dict[bytes32, Tuple[uint32, int]] = {}
+        # (bucket, blocks waited) of the items confirmed by each block
+        self._blocks: Deque[List[Tuple[int, int]]] = deque(maxlen=history_blocks)
+        # Items confirmed by the blocks of the ring buffer, by bucket and blocks waited, capped at max_target + 1
+        self._confirmed: List[List[int]] = [[0] * (max_target + 2) for _ in FEE_RATE_BUCKETS]
+        # Fee per cost to be confirmed within 1 to max_target blocks (index 0 is unused), None without enough data
+        self._estimates: List[Optional[float]] = [None] * (max_target + 1)
+        self.height: Optional[uint32] = None
+
+    def add_item(self, name: bytes32, fee_per_cost: float, height: uint32) -> None:
+        """Starts tracking an item that entered the mempool when the peak was at height"""
+        if name not in self._tracked:
+            self._tracked[name] = (height, fee_rate_bucket(fee_per_cost))
+
+    def new_block(self, height: uint32, confirmed: List[bytes32], mempool_items: Collection[bytes32]) -> None:
+        """
+        Records the items confirmed by the transaction block at height, stops tracking the items that left the mempool
+        without being confirmed, and computes the estimates again.
+        """
+        block: List[Tuple[int, int]] = []
+        for name in confirmed:
+            entry = self._tracked.pop(name, None)
+            if entry is not None:
+                entry_height, bucket = entry
+                block.append((bucket, min(max(height - entry_height, 1), self.max_target + 1)))
+        if len(self._blocks) == self._blocks.maxlen:
+            for bucket, waited in self._blocks[0]:
+                self._confirmed[bucket][waited] -= 1
+        self._blocks.append(block)
+        for bucket, waited in block:
+            self._confirmed[bucket][waited] += 1
+
+        for name in [name for name in self._tracked if name not in mempool_items]:
+            del self._tracked[name]
+        self.height = height
+        self._update_estimates()
+
+    def _update_estimates(self) -> None:
+        assert self.height is not None
+        num_waits = self.max_target + 2
+        # Items still in the mempool, by bucket and blocks waited so far
+        waiting: List[List[int]] = [[0] * num_waits for _ in FEE_RATE_BUCKETS]
+        for entry_height, bucket in self._tracked.values():
+            waiting[bucket][min(max(self.height - entry_height, 0), self.max_target + 1)] += 1
+
+        estimates: List[Optional[float]] = [None] * (self.max_target + 1)
+        for target in range(1, self.max_target + 1):
+            # Buckets are grouped from the highest fee per cost down until the group has enough items. The estimate is
+            # the lowest fee per cost of the last group where enough of them were confirmed within the target
+            group_success = 0
+            group_total = 0
+            for bucket in reversed(range(len(FEE_RATE_BUCKETS))):
+                confirmed = self._confirmed[bucket]
+                group_success += sum(confirmed[1 : target + 1])
+                # Items that waited longer than the target, confirmed or still waiting, failed it
+                group_total += sum(confirmed) + sum(waiting[bucket][target + 1 :])
+                if group_total >= MIN_SAMPLES:
+                    if group_success / group_total < SUCCESS_THRESHOLD:
+                        break
+                    estimates[target] = FEE_RATE_BUCKETS[bucket]
+                    group_success = 0
+                    group_total = 0
+            # Waiting more blocks never needs a higher fee
+            previous = estimates[target - 1]
+            current = estimates[target]
+            if previous is not None and (current is None or current > previous):
+                estimates[target] = previous
+        self._estimates = estimates
+
+    def estimate(self, target_blocks: int) -> Optional[float]:
+        """Fee per cost to be confirmed within target_blocks transaction blocks, None without enough data"""
+        return self._estimates[min(max(target_blocks, 1), self.max_target)]
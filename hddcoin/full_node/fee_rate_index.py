@@ -0,0 +1,141 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+
+# Items are kept in sorted sublists of at most twice this length
+SUBLIST_LOAD = 256
+
+
+class FeeRateIndex:
+    """
+    The mempool items ordered by fee per cost, items with the same fee per cost in the order they were added.
+
+    The items are kept in short sorted sublists, like in sortedcontainers.SortedList, so adding and removing an item is
+    O(log n) plus a small copy. The total cost of each sublist is kept in a Fenwick tree, so the fee per cost under
+    which the items add up to a given cost, that is the minimum fee per cost to enter a full mempool, is also found in
+    O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._keys: Dict[bytes32, Tuple[float, int]] = {}
+        self._costs: Dict[bytes32, int] = {}
+        # Sorted lists of (fee_per_cost, sequence number, name), the last key of each, and the total cost of each
+        self._lists: List[List[Tuple[float, int, bytes32]]] = []
+        self._maxes: List[Tuple[float, int]] = []
+        self._list_costs: List[int] = []
+        self._tree: List[int] = [0]
+        self._sequence = 0
+        self.total_cost = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, name: bytes32) -> bool:
+        return name in self._keys
+
+    def add(self, name: bytes32, fee_per_cost: float, cost: int) -> None:
+        assert name not in self._keys
+        key = (fee_per_cost, self._sequence)
+        self._sequence += 1
+        self._keys[name] = key
+        self._costs[name] = cost
+        self.total_cost += cost
+
+        entry = (fee_per_cost, key[1], name)
+        if len(self._lists) == 0:
+            self._lists.append([entry])
+            self._maxes.append(key)
+            self._list_costs.append(cost)
+            self._rebuild_tree()
+            return
+        index = bisect_left(self._maxes, key)
+        if index == len(self._lists):
+            index -= 1
+        sublist = self._lists[index]
+        insort(sublist, entry)
+        self._maxes[index] = sublist[-1][:2]
+        self._list_costs[index] += cost
+        if len(sublist) > 2 * SUBLIST_LOAD:
+            half = len(sublist) // 2
+            upper = sublist[half:]
+            del sublist[half:]
+            upper_cost = sum(self._costs[upper_name] for _, _, upper_name in upper)
+            self._lists.insert(index + 1, upper)
+            self._maxes[index] = sublist[-1][:2]
+            self._maxes.insert(index + 1, upper[-1][:2])
+            self._list_costs[index] -= upper_cost
+            self._list_costs.insert(index + 1, upper_cost)
+            self._rebuild_tree()
+        else:
+            self._tree_add(index, cost)
+
+    def remove(self, name: bytes32) -> None:
+        key = self._keys.pop(name)
+        cost = self._costs.pop(name)
+        self.total_cost -= cost
+
+        index = bisect_left(self._maxes, key)
+        sublist = self._lists[index]
+        del sublist[bisect_left(sublist, (key[0], key[1], name))]
+        self._list_costs[index] -= cost
+        if len(sublist) == 0:
+            del self._lists[index]
+            del self._maxes[index]
+            del self._list_costs[index]
+            self._rebuild_tree()
+        else:
+            self._maxes[index] = sublist[-1][:2]
+            self._tree_add(index, -cost)
+
+    def lowest(self) -> Optional[bytes32]:
+        """The item with the lowest fee per cost, the first one to evict."""
+        if len(self._lists) == 0:
+            return None
+        return self._lists[0][0][2]
+
+    def ascending(self) -> Iterator[bytes32]:
+        for sublist in self._lists:
+            for _, _, name in sublist:
+                yield name
+
+    def descending(self) -> Iterator[bytes32]:
+        for sublist in reversed(self._lists):
+            for _, _, name in reversed(sublist):
+                yield name
+
+    def fee_rate_to_free(self, cost: int) -> float:
+        """
+        The fee per cost of the item at which the items with the lowest fee per cost add up to at least cost, the items
+        that would be evicted to make room for it. Raises ValueError if all the items together cost less.
+        """
+        if cost > self.total_cost or cost <= 0:
+            raise ValueError(f"Can't free {cost} from items of total cost {self.total_cost}")
+        # Finds the first sublist at which the cumulative cost reaches cost, by descending the Fenwick tree
+        index = 0
+        remaining = cost
+        step = 1 << (len(self._lists).bit_length() - 1)
+        while step > 0:
+            if index + step <= len(self._lists) and self._tree[index + step] < remaining:
+                index += step
+                remaining -= self._tree[index]
+            step >>= 1
+        for fee_per_cost, _, name in self._lists[index]:
+            remaining -= self._costs[name]
+            if remaining <= 0:
+                return fee_per_cost
+        raise AssertionError("Fenwick tree out of sync with the sublists")
+
+    def _tree_add(self, index: int, cost: int) -> None:
+        position = index + 1
+        while position < len(self._tree):
+            self._tree[position] += cost
+            position += position & -position
+
+    def _rebuild_tree(self) -> None:
+        tree = [0] + self._list_costs
+        for position in range(1, len(tree)):
+            parent = position + (position & -position)
+            if parent < len(tree):
+                tree[parent] += tree[position]
+        self._tree = tree
@@ -22,11 +22,15 @@ from hddcoin.consensus.multiprocess_validation import PreValidationResult
 from hddcoin.consensus.pot_iterations import calculate_sp_iters
 from hddcoin.full_node.block_store import BlockStore
 from hddcoin.full_node.bundle_tools import detect_potential_template_generator
+from hddcoin.full_node.coin_state_updates import CoinStateUpdateEncoder
 from hddcoin.full_node.coin_store import CoinStore
 from hddcoin.full_node.full_node_store import FullNodeStore
+from hddcoin.full_node.header_block_store import HeaderBlockStore
 from hddcoin.full_node.hint_store import HintStore
 from hddcoin.full_node.mempool_manager import MempoolManager
+from hddcoin.full_node.merkle_set_cache import MerkleSetCache
 from hddcoin.full_node.signage_point import SignagePoint
+from hddcoin.full_node.subscriptions import PeerSubscriptions
 from hddcoin.full_node.sync_store import SyncStore
 from hddcoin.full_node.weight_proof import WeightProofHandler
 from hddcoin.protocols import farmer_protocol, full_node_protocol, timelord_protocol, wallet_protocol
@@ -37,7 +41,8 @@ from hddcoin.protocols.full_node_protocol import (
     RespondSignagePoint,
 )
 from hddcoin.protocols.protocol_message_types import ProtocolMessageTypes
-from hddcoin.protocols.wallet_protocol import CoinState, CoinStateUpdate
+from hddcoin.protocols.shared_protocol import Capability
+from hddcoin.protocols.wallet_protocol import CoinState
 from hddcoin.server.node_discovery import FullNodePeers
 from hddcoin.server.outbound_message import Message, NodeType, make_msg
 from hddcoin.server.server import HDDcoinServer
@@ -71,6 +76,7 @@ class FullNode:
     full_node_peers: Optional[FullNodePeers]
     sync_store: Any
     coin_store: CoinStore
+    header_block_store: Optional[HeaderBlockStore]
     mempool_manager: MempoolManager
     connection: aiosqlite.Connection
     _sync_task: Optional[asyncio.Task]
@@ -107,6 +113,8 @@ class FullNode:
         self.sync_store = None
         self.signage_point_times = [time.time() for _ in range(self.constants.NUM_SPS_SUB_SLOT)]
         self.full_node_store = FullNodeStore(self.constants)
+        self.merkle_set_cache = MerkleSetCache(self.config.get("merkle_set_cache_size", 100))
+        self.max_queued_wallet_messages = self.config.get("max_queued_wallet_messages", 1000)
         self.uncompact_task = None
         self.compact_vdf_requests: Set[bytes32] = set()
         self.log = logging.getLogger(name if name else __name__)
@@ -115,11 +123,7 @@ class FullNode:
 
         db_path_replaced: str = config["database_path"].replace("CHALLENGE", config["selected_network"])
         self.db_path = path_from_root(root_path, db_path_replaced)
-        self.coin_subscriptions: Dict[bytes32, Set[bytes32]] = {}  # Puzzle Hash : Set[Peer ID]
-        self.ph_subscriptions: Dict[bytes32, Set[bytes32]] = {}  # Puzzle Hash : Set[Peer ID]
-        self.peer_coin_ids: Dict[bytes32, Set[bytes32]] = {}  # Peer ID: Set[Coin ids]
-        self.peer_puzzle_hash: Dict[bytes32, Set[bytes32]] = {}  # Peer ID: Set[puzzle_hash]
-        self.peer_sub_counter: Dict[bytes32, int] = {}  # Peer ID: int (subscription count)
+        self.subscriptions = PeerSubscriptions()
         mkdir(self.db_path.parent)
 
     def _set_state_changed_callback(self, callback: Callable):
@@ -153,10 +157,21 @@ class FullNode:
         self.sync_store = await SyncStore.create()
         self.hint_store = await HintStore.create(self.db_wrapper)
         self.coin_store = await CoinStore.create(self.db_wrapper)
+        self.header_block_store = None
+        if self.config.get("store_header_blocks", True):
+            self.header_block_store = await HeaderBlockStore.create(self.db_wrapper)
         self.log.info("Initializing blockchain from disk")
         start_time = time.time()
-        self.blockchain = await Blockchain.create(self.coin_store, self.block_store, self.constants, self.hint_store)
-        self.mempool_manager = MempoolManager(self.coin_store, self.constants)
+        self.blockchain = await Blockchain.create(
+            self.coin_store, self.block_store, self.constants, self.hint_store, self.header_block_store
+        )
+        self.mempool_manager = MempoolManager(
+            self.coin_store,
+            self.constants,
+            self.config.get("mempool_prevalidation_workers", 2),
+            self.config.get("mempool_prevalidation_queue_size", 2000),
+            self.config.get("mempool_prevalidation_queue_size_per_peer", 200),
+        )
         self.weight_proof_handler = None
         self._init_weight_proof = asyncio.create_task(self.initialize_weight_proof())
 
@@ -580,23 +595,7 @@ class FullNode:
 
     def remove_subscriptions(self, peer: ws.WSHDDcoinConnection):
         # Remove all ph | coin id subscription for this peer
-        node_id = peer.peer_node_id
-        if node_id in self.peer_puzzle_hash:
-            puzzle_hashes = self.peer_puzzle_hash[node_id]
-            for ph in puzzle_hashes:
-                if ph in self.ph_subscriptions:
-                    if node_id in self.ph_subscriptions[ph]:
-                        self.ph_subscriptions[ph].remove(node_id)
-
-        if node_id in self.peer_coin_ids:
-            coin_ids = self.peer_coin_ids[node_id]
-            for coin_id in coin_ids:
-                if coin_id in self.coin_subscriptions:
-                    if node_id in self.coin_subscriptions[coin_id]:
-                        self.coin_subscriptions[coin_id].remove(node_id)
-
-        if peer.peer_node_id in self.peer_sub_counter:
-            self.peer_sub_counter.pop(peer.peer_node_id)
+        self.subscriptions.remove_peer(peer.peer_node_id)
 
     def _num_needed_peers(self) -> int:
         assert self.server is not None
@@ -872,41 +871,23 @@ class FullNode:
         peak_hash: bytes32,
         state_update: Tuple[List[CoinRecord], Dict[bytes, Dict[bytes32, CoinRecord]]],
     ):
-        changes_for_peer: Dict[bytes32, Set[CoinState]] = {}
-
         states, hint_state = state_update
+        changes_for_peer: Dict[bytes32, Set[CoinState]] = self.subscriptions.changes_for_peers(states, hint_state)
 
-        for coin_record in states:
-            if coin_record.name in self.coin_subscriptions:
-                subscribed_peers = self.coin_subscriptions[coin_record.name]
-                for peer in subscribed_peers:
-                    if peer not in changes_for_peer:
-                        changes_for_peer[peer] = set()
-                    changes_for_peer[peer].add(coin_record.coin_state)
-
-            if coin_record.coin.puzzle_hash in self.ph_subscriptions:
-                subscribed_peers = self.ph_subscriptions[coin_record.coin.puzzle_hash]
-                for peer in subscribed_peers:
-                    if peer not in changes_for_peer:
-                        changes_for_peer[peer] = set()
-                    changes_for_peer[peer].add(coin_record.coin_state)
-
-        for hint, records in hint_state.items():
-            if hint in self.ph_subscriptions:
-                subscribed_peers = self.ph_subscriptions[hint]
-                for peer in subscribed_peers:
-                    if peer not in changes_for_peer:
-                        changes_for_peer[peer] = set()
-                    for record in records.values():
-                        changes_for_peer[peer].add(record.coin_state)
-
+        encoder = CoinStateUpdateEncoder(height, fork_height, peak_hash)
         for peer, changes in changes_for_peer.items():
             if peer not in self.server.all_connections:
                 continue
             ws_peer: ws.WSHDDcoinConnection = self.server.all_connections[peer]
-            state = CoinStateUpdate(height, fork_height, peak_hash, list(changes))
-            msg = make_msg(ProtocolMessageTypes.coin_state_update, state)
-            await ws_peer.send_message(msg)
+            # A wallet that doesn't keep up would make its queue, and our memory, grow without bound
+            if ws_peer.outgoing_queue.qsize() > self.max_queued_wallet_messages:
+                self.log.warning(
+                    f"Disconnecting wallet {ws_peer.peer_host}, {ws_peer.outgoing_queue.qsize()} messages are queued"
+                )
+                asyncio.create_task(ws_peer.close())
+                continue
+            compress = Capability.ZLIB_COIN_STATE_UPDATES in ws_peer.peer_capabilities
+            await ws_peer.send_message(encoder.message(changes, compress))
 
     async def receive_block_batch(
         self,
@@ -1117,6 +1098,8 @@ class FullNode:
         if fork_height != block.height - 1 and block.height != 0:
             # This is a reorg
             fork_block = self.blockchain.block_record(self.blockchain.height_to_hash(fork_height))
+            self.merkle_set_cache.remove_above(fork_height)
+        self.log.debug(f"Merkle set cache hit rates: {self.merkle_set_cache.hit_rates()}")
 
         added_eos, new_sps, new_ips = self.full_node_store.new_peak(
             record,
@@ -1766,7 +1749,12 @@ class FullNode:
             self.mempool_manager.remove_seen(spend_name)
         else:
             try:
-                cost_result = await self.mempool_manager.pre_validate_spendbundle(transaction, spend_name)
+                cost_result = await self.mempool_manager.pre_validate_spendbundle(
+                    transaction, spend_name, None if peer is None else peer.peer_node_id
+                )
+            except asyncio.QueueFull:
+                self.mempool_manager.remove_seen(spend_name)
+                return MempoolInclusionStatus.FAILED, Err.TRANSACTION_QUEUE_FULL
             except Exception as e:
                 self.mempool_manager.remove_seen(spend_name)
                 raise e
@@ -1774,7 +1762,10 @@ class FullNode:
                 if self.mempool_manager.get_spendbundle(spend_name) is not None:
                     self.mempool_manager.remove_seen(spend_name)
                     return MempoolInclusionStatus.FAILED, Err.ALREADY_INCLUDING_TRANSACTION
-                cost, status, error = await self.mempool_manager.add_spendbundle(transaction, cost_result, spend_name)
+                # The signature was checked by the pre-validation
+                cost, status, error = await self.mempool_manager.add_spendbundle(
+                    transaction, cost_result, spend_name, validate_signature=False
+                )
             if status == MempoolInclusionStatus.SUCCESS:
                 self.log.debug(
                     f"Added transaction to mempool: {spend_name} mempool size: "
@@ -1933,6 +1924,9 @@ class FullNode:
                 continue
             async with self.db_wrapper.lock:
                 await self.block_store.add_full_block(new_block.header_hash, new_block, block_record)
+                if self.header_block_store is not None:
+                    # Same header hash, the stored header block would keep the old proof
+                    await self.header_block_store.remove_header_block(height)
                 await self.block_store.db_wrapper.commit_transaction()
                 replaced = True
         return replaced
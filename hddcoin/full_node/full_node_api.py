@@ -15,6 +15,7 @@ from hddcoin.consensus.pot_iterations import calculate_ip_iters, calculate_itera
 from hddcoin.full_node.bundle_tools import best_solution_generator_from_template, simple_solution_generator
 from hddcoin.full_node.full_node import FullNode
 from hddcoin.full_node.mempool_check_conditions import get_puzzle_and_solution_for_coin
+from hddcoin.full_node.merkle_set_cache import BlockAdditions, BlockRemovals
 from hddcoin.full_node.signage_point import SignagePoint
 from hddcoin.protocols import farmer_protocol, full_node_protocol, introducer_protocol, timelord_protocol, wallet_protocol
 from hddcoin.protocols.full_node_protocol import RejectBlock, RejectBlocks
@@ -44,7 +45,6 @@ from hddcoin.util.api_decorators import api_request, peer_required, bytes_requir
 from hddcoin.util.generator_tools import get_block_header
 from hddcoin.util.hash import std_hash
 from hddcoin.util.ints import uint8, uint32, uint64, uint128
-from hddcoin.util.merkle_set import MerkleSet
 
 
 class FullNodeAPI:
@@ -244,6 +244,9 @@ class FullNodeAPI:
         if not self.full_node.blockchain.contains_block(request.tip):
             self.log.error(f"got weight proof request for unknown peak {request.tip}")
             return None
+        message: Optional[Message] = self.full_node.full_node_store.serialized_wp_messages.get(request.tip)
+        if message is not None:
+            return message
         if request.tip in self.full_node.pow_creation:
             event = self.full_node.pow_creation[request.tip]
             await event.wait()
@@ -265,16 +268,12 @@ class FullNodeAPI:
             return None
 
         # Serialization of wp is slow
-        if (
-            self.full_node.full_node_store.serialized_wp_message_tip is not None
-            and self.full_node.full_node_store.serialized_wp_message_tip == request.tip
-        ):
-            return self.full_node.full_node_store.serialized_wp_message
-        message = make_msg(
-            ProtocolMessageTypes.respond_proof_of_weight, full_node_protocol.RespondProofOfWeight(wp, request.tip)
-        )
-        self.full_node.full_node_store.serialized_wp_message_tip = request.tip
-        self.full_node.full_node_store.serialized_wp_message = message
+        message = self.full_node.full_node_store.serialized_wp_messages.get(request.tip)
+        if message is None:
+            message = make_msg(
+                ProtocolMessageTypes.respond_proof_of_weight, full_node_protocol.RespondProofOfWeight(wp, request.tip)
+            )
+            self.full_node.full_node_store.serialized_wp_messages.put(request.tip, message)
         return message
 
     @api_request
@@ -1077,50 +1076,26 @@ class FullNodeAPI:
 
     @api_request
     async def request_additions(self, request: wallet_protocol.RequestAdditions) -> Optional[Message]:
-        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(request.header_hash)
-
-        # We lock so that the coin store does not get modified
-        if (
-            block is None
-            or block.is_transaction_block() is False
-            or self.full_node.blockchain.height_to_hash(block.height) != request.header_hash
-        ):
+        additions: Optional[BlockAdditions] = self.full_node.merkle_set_cache.get_additions(request.header_hash)
+        if additions is None or self.full_node.blockchain.height_to_hash(additions.height) != request.header_hash:
+            additions = await self._load_block_additions(request.header_hash)
+        if additions is None:
             reject = wallet_protocol.RejectAdditionsRequest(request.height, request.header_hash)
 
             msg = make_msg(ProtocolMessageTypes.reject_additions_request, reject)
             return msg
 
-        assert block is not None and block.foliage_transaction_block is not None
-
-        # Note: this might return bad data if there is a reorg in this time
-        additions = await self.full_node.coin_store.get_coins_added_at_height(block.height)
-
-        if self.full_node.blockchain.height_to_hash(block.height) != request.header_hash:
-            raise ValueError(f"Block {block.header_hash} no longer in chain")
-
-        puzzlehash_coins_map: Dict[bytes32, List[Coin]] = {}
-        for coin_record in additions:
-            if coin_record.coin.puzzle_hash in puzzlehash_coins_map:
-                puzzlehash_coins_map[coin_record.coin.puzzle_hash].append(coin_record.coin)
-            else:
-                puzzlehash_coins_map[coin_record.coin.puzzle_hash] = [coin_record.coin]
-
+        puzzlehash_coins_map = additions.puzzlehash_coins_map
         coins_map: List[Tuple[bytes32, List[Coin]]] = []
         proofs_map: List[Tuple[bytes32, bytes, Optional[bytes]]] = []
 
         if request.puzzle_hashes is None:
             for puzzle_hash, coins in puzzlehash_coins_map.items():
                 coins_map.append((puzzle_hash, coins))
-            response = wallet_protocol.RespondAdditions(block.height, block.header_hash, coins_map, None)
+            response = wallet_protocol.RespondAdditions(additions.height, request.header_hash, coins_map, None)
         else:
-            # Create addition Merkle set
-            addition_merkle_set = MerkleSet()
             # Addition Merkle set contains puzzlehash and hash of all coins with that puzzlehash
-            for puzzle, coins in puzzlehash_coins_map.items():
-                addition_merkle_set.add_already_hashed(puzzle)
-                addition_merkle_set.add_already_hashed(hash_coin_list(coins))
-
-            assert addition_merkle_set.get_root() == block.foliage_transaction_block.additions_root
+            addition_merkle_set = additions.merkle_set()
             for puzzle_hash in request.puzzle_hashes:
                 result, proof = addition_merkle_set.is_included_already_hashed(puzzle_hash)
                 if puzzle_hash in puzzlehash_coins_map:
@@ -1134,59 +1109,72 @@ class FullNodeAPI:
                     coins_map.append((puzzle_hash, []))
                     assert not result
                     proofs_map.append((puzzle_hash, proof, None))
-            response = wallet_protocol.RespondAdditions(block.height, block.header_hash, coins_map, proofs_map)
+            response = wallet_protocol.RespondAdditions(additions.height, request.header_hash, coins_map, proofs_map)
         msg = make_msg(ProtocolMessageTypes.respond_additions, response)
         return msg
 
-    @api_request
-    async def request_removals(self, request: wallet_protocol.RequestRemovals) -> Optional[Message]:
-        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(request.header_hash)
+    async def _load_block_additions(self, header_hash: bytes32) -> Optional[BlockAdditions]:
+        """
+        Reads the additions of a transaction block in the current chain and caches them, returns None if there is
+        no such block.
+        """
+        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(header_hash)
 
         # We lock so that the coin store does not get modified
         if (
             block is None
             or block.is_transaction_block() is False
-            or block.height != request.height
-            or block.height > self.full_node.blockchain.get_peak_height()
-            or self.full_node.blockchain.height_to_hash(block.height) != request.header_hash
+            or self.full_node.blockchain.height_to_hash(block.height) != header_hash
         ):
-            reject = wallet_protocol.RejectRemovalsRequest(request.height, request.header_hash)
-            msg = make_msg(ProtocolMessageTypes.reject_removals_request, reject)
-            return msg
+            return None
 
         assert block is not None and block.foliage_transaction_block is not None
 
         # Note: this might return bad data if there is a reorg in this time
-        all_removals: List[CoinRecord] = await self.full_node.coin_store.get_coins_removed_at_height(block.height)
+        coin_records = await self.full_node.coin_store.get_coins_added_at_height(block.height)
 
-        if self.full_node.blockchain.height_to_hash(block.height) != request.header_hash:
+        if self.full_node.blockchain.height_to_hash(block.height) != header_hash:
             raise ValueError(f"Block {block.header_hash} no longer in chain")
 
-        all_removals_dict: Dict[bytes32, Coin] = {}
-        for coin_record in all_removals:
-            all_removals_dict[coin_record.coin.name()] = coin_record.coin
+        puzzlehash_coins_map: Dict[bytes32, List[Coin]] = {}
+        for coin_record in coin_records:
+            if coin_record.coin.puzzle_hash in puzzlehash_coins_map:
+                puzzlehash_coins_map[coin_record.coin.puzzle_hash].append(coin_record.coin)
+            else:
+                puzzlehash_coins_map[coin_record.coin.puzzle_hash] = [coin_record.coin]
+
+        additions = BlockAdditions(block.height, block.foliage_transaction_block.additions_root, puzzlehash_coins_map)
+        self.full_node.merkle_set_cache.add_additions(header_hash, additions)
+        return additions
 
+    @api_request
+    async def request_removals(self, request: wallet_protocol.RequestRemovals) -> Optional[Message]:
+        removals: Optional[BlockRemovals] = self.full_node.merkle_set_cache.get_removals(request.header_hash)
+        if removals is None or self.full_node.blockchain.height_to_hash(removals.height) != request.header_hash:
+            removals = await self._load_block_removals(request.header_hash)
+        if removals is None or removals.height != request.height:
+            reject = wallet_protocol.RejectRemovalsRequest(request.height, request.header_hash)
+            msg = make_msg(ProtocolMessageTypes.reject_removals_request, reject)
+            return msg
+
+        all_removals_dict = removals.removals
         coins_map: List[Tuple[bytes32, Optional[Coin]]] = []
         proofs_map: List[Tuple[bytes32, bytes]] = []
 
         # If there are no transactions, respond with empty lists
-        if block.transactions_generator is None:
+        if not removals.has_transactions_generator:
             proofs: Optional[List]
             if request.coin_names is None:
                 proofs = None
             else:
                 proofs = []
-            response = wallet_protocol.RespondRemovals(block.height, block.header_hash, [], proofs)
+            response = wallet_protocol.RespondRemovals(removals.height, request.header_hash, [], proofs)
         elif request.coin_names is None or len(request.coin_names) == 0:
             for removed_name, removed_coin in all_removals_dict.items():
                 coins_map.append((removed_name, removed_coin))
-            response = wallet_protocol.RespondRemovals(block.height, block.header_hash, coins_map, None)
+            response = wallet_protocol.RespondRemovals(removals.height, request.header_hash, coins_map, None)
         else:
-            assert block.transactions_generator
-            removal_merkle_set = MerkleSet()
-            for removed_name, removed_coin in all_removals_dict.items():
-                removal_merkle_set.add_already_hashed(removed_name)
-            assert removal_merkle_set.get_root() == block.foliage_transaction_block.removals_root
+            removal_merkle_set = removals.merkle_set()
             for coin_name in request.coin_names:
                 result, proof = removal_merkle_set.is_included_already_hashed(coin_name)
                 proofs_map.append((coin_name, proof))
@@ -1197,11 +1185,48 @@ class FullNodeAPI:
                 else:
                     coins_map.append((coin_name, None))
                     assert not result
-            response = wallet_protocol.RespondRemovals(block.height, block.header_hash, coins_map, proofs_map)
+            response = wallet_protocol.RespondRemovals(removals.height, request.header_hash, coins_map, proofs_map)
 
         msg = make_msg(ProtocolMessageTypes.respond_removals, response)
         return msg
 
+    async def _load_block_removals(self, header_hash: bytes32) -> Optional[BlockRemovals]:
+        """
+        Reads the removals of a transaction block in the current chain and caches them, returns None if there is
+        no such block.
+        """
+        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(header_hash)
+
+        # We lock so that the coin store does not get modified
+        if (
+            block is None
+            or block.is_transaction_block() is False
+            or block.height > self.full_node.blockchain.get_peak_height()
+            or self.full_node.blockchain.height_to_hash(block.height) != header_hash
+        ):
+            return None
+
+        assert block is not None and block.foliage_transaction_block is not None
+
+        # Note: this might return bad data if there is a reorg in this time
+        all_removals: List[CoinRecord] = await self.full_node.coin_store.get_coins_removed_at_height(block.height)
+
+        if self.full_node.blockchain.height_to_hash(block.height) != header_hash:
+            raise ValueError(f"Block {block.header_hash} no longer in chain")
+
+        all_removals_dict: Dict[bytes32, Coin] = {}
+        for coin_record in all_removals:
+            all_removals_dict[coin_record.coin.name()] = coin_record.coin
+
+        removals = BlockRemovals(
+            block.height,
+            block.foliage_transaction_block.removals_root,
+            block.transactions_generator is not None,
+            all_removals_dict,
+        )
+        self.full_node.merkle_set_cache.add_removals(header_hash, removals)
+        return removals
+
     @api_request
     async def send_transaction(self, request: wallet_protocol.SendTransaction) -> Optional[Message]:
         spend_name = request.transaction.name()
@@ -1264,15 +1289,18 @@ class FullNodeAPI:
                 return msg
             header_hashes.append(self.full_node.blockchain.height_to_hash(uint32(i)))
 
-        blocks: List[FullBlock] = await self.full_node.block_store.get_blocks_by_hash(header_hashes)
-        header_blocks = []
-        for block in blocks:
-            added_coins_records = await self.full_node.coin_store.get_coins_added_at_height(block.height)
-            removed_coins_records = await self.full_node.coin_store.get_coins_removed_at_height(block.height)
-            added_coins = [record.coin for record in added_coins_records if not record.coinbase]
-            removal_names = [record.coin.name() for record in removed_coins_records]
-            header_block = get_block_header(block, added_coins, removal_names)
-            header_blocks.append(header_block)
+        # Served from the header block store when it's enabled, built from the full blocks otherwise
+        try:
+            header_blocks_by_hash = await self.full_node.blockchain.get_header_blocks_in_range(
+                request.start_height, request.end_height
+            )
+        except ValueError:
+            # The peak changed while the blocks were read
+            header_blocks_by_hash = {}
+        if any(header_hash not in header_blocks_by_hash for header_hash in header_hashes):
+            reject = RejectHeaderBlocks(request.start_height, request.end_height)
+            return make_msg(ProtocolMessageTypes.reject_header_blocks, reject)
+        header_blocks = [header_blocks_by_hash[header_hash] for header_hash in header_hashes]
 
         msg = make_msg(
             ProtocolMessageTypes.respond_header_blocks,
@@ -1334,26 +1362,9 @@ class FullNodeAPI:
     async def register_interest_in_puzzle_hash(
         self, request: wallet_protocol.RegisterForPhUpdates, peer: ws.WSHDDcoinConnection
     ):
-        if peer.peer_node_id not in self.full_node.peer_puzzle_hash:
-            self.full_node.peer_puzzle_hash[peer.peer_node_id] = set()
-
-        if peer.peer_node_id not in self.full_node.peer_sub_counter:
-            self.full_node.peer_sub_counter[peer.peer_node_id] = 0
-
-        hint_coin_ids = []
         # Add peer to the "Subscribed" dictionary
-        for puzzle_hash in request.puzzle_hashes:
-            ph_hint_coins = await self.full_node.hint_store.get_coin_ids(puzzle_hash)
-            hint_coin_ids.extend(ph_hint_coins)
-            if puzzle_hash not in self.full_node.ph_subscriptions:
-                self.full_node.ph_subscriptions[puzzle_hash] = set()
-            if (
-                peer.peer_node_id not in self.full_node.ph_subscriptions[puzzle_hash]
-                and self.full_node.peer_sub_counter[peer.peer_node_id] < 100000
-            ):
-                self.full_node.ph_subscriptions[puzzle_hash].add(peer.peer_node_id)
-                self.full_node.peer_puzzle_hash[peer.peer_node_id].add(puzzle_hash)
-                self.full_node.peer_sub_counter[peer.peer_node_id] += 1
+        self.full_node.subscriptions.add_puzzle_hash_subscriptions(peer.peer_node_id, request.puzzle_hashes)
+        hint_coin_ids = await self.full_node.hint_store.get_coin_ids_many(request.puzzle_hashes)
 
         # Send all coins with requested puzzle hash that have been created after the specified height
         states: List[CoinState] = await self.full_node.coin_store.get_coin_states_by_puzzle_hashes(
@@ -1375,22 +1386,7 @@ class FullNodeAPI:
     async def register_interest_in_coin(
         self, request: wallet_protocol.RegisterForCoinUpdates, peer: ws.WSHDDcoinConnection
     ):
-        if peer.peer_node_id not in self.full_node.peer_coin_ids:
-            self.full_node.peer_coin_ids[peer.peer_node_id] = set()
-
-        if peer.peer_node_id not in self.full_node.peer_sub_counter:
-            self.full_node.peer_sub_counter[peer.peer_node_id] = 0
-
-        for coin_id in request.coin_ids:
-            if coin_id not in self.full_node.coin_subscriptions:
-                self.full_node.coin_subscriptions[coin_id] = set()
-            if (
-                peer.peer_node_id not in self.full_node.coin_subscriptions[coin_id]
-                and self.full_node.peer_sub_counter[peer.peer_node_id] < 100000
-            ):
-                self.full_node.coin_subscriptions[coin_id].add(peer.peer_node_id)
-                self.full_node.peer_coin_ids[peer.peer_node_id].add(coin_id)
-                self.full_node.peer_sub_counter[peer.peer_node_id] += 1
+        self.full_node.subscriptions.add_coin_subscriptions(peer.peer_node_id, request.coin_ids)
 
         states: List[CoinState] = await self.full_node.coin_store.get_coin_state_by_ids(
             include_spent_coins=True, coin_ids=request.coin_ids, start_height=request.min_height
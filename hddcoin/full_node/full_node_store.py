@@ -12,8 +12,8 @@ from hddcoin.consensus.make_sub_epoch_summary import next_sub_epoch_summary
 from hddcoin.consensus.multiprocess_validation import PreValidationResult
 from hddcoin.consensus.pot_iterations import calculate_sp_interval_iters
 from hddcoin.full_node.signage_point import SignagePoint
+from hddcoin.full_node.weight_proof import WEIGHT_PROOF_CACHE_SIZE
 from hddcoin.protocols import timelord_protocol
-from hddcoin.server.outbound_message import Message
 from hddcoin.types.blockchain_format.classgroup import ClassgroupElement
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.blockchain_format.sub_epoch_summary import SubEpochSummary
@@ -73,8 +73,8 @@ class FullNodeStore:
     pending_tx_request: Dict[bytes32, bytes32]  # tx_id: peer_id
     peers_with_tx: Dict[bytes32, Set[bytes32]]  # tx_id: Set[peer_ids}
     tx_fetch_tasks: Dict[bytes32, asyncio.Task]  # Task id: task
-    serialized_wp_message: Optional[Message]
-    serialized_wp_message_tip: Optional[bytes32]
+    # Serialized weight proof messages by tip, serialization of weight proofs is slow
+    serialized_wp_messages: LRUCache
 
     def __init__(self, constants: ConsensusConstants):
         self.candidate_blocks = {}
@@ -96,8 +96,7 @@ class FullNodeStore:
         self.pending_tx_request = {}
         self.peers_with_tx = {}
         self.tx_fetch_tasks = {}
-        self.serialized_wp_message = None
-        self.serialized_wp_message_tip = None
+        self.serialized_wp_messages = LRUCache(WEIGHT_PROOF_CACHE_SIZE)
 
     def add_candidate_block(
         self, quality_string: bytes32, height: uint32, unfinished_block: UnfinishedBlock, backup: bool = False
@@ -0,0 +1,61 @@
+import logging
+from typing import Dict, List
+
+import aiosqlite
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.header_block import HeaderBlock
+from hddcoin.util.db_wrapper import DBWrapper
+
+log = logging.getLogger(__name__)
+
+
+class HeaderBlockStore:
+    """
+    The wallet facing header blocks of the main chain, with their transactions filter, by height. They are written
+    when blocks are added to the peak, so header block requests are served without reading the full blocks and the
+    coins of each height. Replacing a proof with a compact one doesn't change the header hash, so the row of that height
+    is removed and built again on the next request. Rows can also be missing after a crash, or from a fork, the caller
+    checks the header hashes against the chain and falls back to building the header blocks.
+    """
+
+    db: aiosqlite.Connection
+    db_wrapper: DBWrapper
+
+    @classmethod
+    async def create(cls, db_wrapper: DBWrapper):
+        self = cls()
+        self.db_wrapper = db_wrapper
+        self.db = db_wrapper.db
+        await self.db.execute(
+            "CREATE TABLE IF NOT EXISTS header_blocks(height bigint PRIMARY KEY, header_hash blob, block blob)"
+        )
+        await self.db.commit()
+        return self
+
+    async def add_header_blocks(self, header_blocks: List[HeaderBlock]) -> None:
+        """Replaces the header blocks at the same heights. Does not commit, the caller handles the transaction."""
+        cursor = await self.db.executemany(
+            "INSERT OR REPLACE INTO header_blocks VALUES(?, ?, ?)",
+            [(header_block.height, header_block.header_hash, bytes(header_block)) for header_block in header_blocks],
+        )
+        await cursor.close()
+
+    async def get_header_blocks_in_range(self, start: int, stop: int) -> Dict[bytes32, HeaderBlock]:
+        """Returns the stored header blocks from start to stop included, by header hash."""
+        cursor = await self.db.execute(
+            "SELECT header_hash, block from header_blocks WHERE height>=? AND height<=?", (start, stop)
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return {bytes32(row[0]): HeaderBlock.from_bytes(row[1]) for row in rows}
+
+    async def remove_header_block(self, height: int) -> None:
+        """Removes the header block at height. Does not commit, the caller handles the transaction."""
+        cursor = await self.db.execute("DELETE FROM header_blocks WHERE height=?", (height,))
+        await cursor.close()
+
+    async def rollback_to_block(self, block_index: int) -> None:
+        """Removes the header blocks above block_index. Does not commit, the caller handles the transaction."""
+        cursor = await self.db.execute("DELETE FROM header_blocks WHERE height>?", (block_index,))
+        await cursor.close()
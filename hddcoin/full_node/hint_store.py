@@ -6,6 +6,9 @@ import logging
 
 log = logging.getLogger(__name__)
 
+# Hints per query in get_coin_ids_many, below the default SQLite limit of host parameters
+HINTS_PER_QUERY = 900
+
 
 class HintStore:
     coin_record_db: aiosqlite.Connection
@@ -19,7 +22,9 @@ class HintStore:
         await self.coin_record_db.execute(
             "CREATE TABLE IF NOT EXISTS hints(id INTEGER PRIMARY KEY AUTOINCREMENT, coin_id blob,  hint blob)"
         )
-        await self.coin_record_db.execute("CREATE INDEX IF NOT EXISTS hint_index on hints(hint)")
+        # Covers the coin ids, so hint lookups don't read the table
+        await self.coin_record_db.execute("CREATE INDEX IF NOT EXISTS hint_coin_id_index on hints(hint, coin_id)")
+        await self.coin_record_db.execute("DROP INDEX IF EXISTS hint_index")
         await self.coin_record_db.commit()
         return self
 
@@ -32,6 +37,20 @@ class HintStore:
             coin_ids.append(row[1])
         return coin_ids
 
+    async def get_coin_ids_many(self, hints: List[bytes]) -> List[bytes32]:
+        """Returns the ids of the coins with any of the hints, with a query per HINTS_PER_QUERY hints."""
+        coin_ids: List[bytes32] = []
+        unique_hints = list(set(hints))
+        for i in range(0, len(unique_hints), HINTS_PER_QUERY):
+            batch = unique_hints[i : i + HINTS_PER_QUERY]
+            cursor = await self.coin_record_db.execute(
+                f'SELECT coin_id from hints WHERE hint in ({"?," * (len(batch) - 1)}?)', batch
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+            coin_ids.extend(row[0] for row in rows)
+        return coin_ids
+
     async def add_hints(self, coin_hint_list: List[Tuple[bytes32, bytes]]) -> None:
         cursor = await self.coin_record_db.executemany(
             "INSERT INTO hints VALUES(?, ?, ?)",
@@ -1,7 +1,6 @@
 from typing import Dict, List
 
-from sortedcontainers import SortedDict
-
+from hddcoin.full_node.fee_rate_index import FeeRateIndex
 from hddcoin.types.blockchain_format.coin import Coin
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.mempool_item import MempoolItem
@@ -10,7 +9,7 @@ from hddcoin.types.mempool_item import MempoolItem
 class Mempool:
     def __init__(self, max_size_in_cost: int):
         self.spends: Dict[bytes32, MempoolItem] = {}
-        self.sorted_spends: SortedDict = SortedDict()
+        self.fee_index: FeeRateIndex = FeeRateIndex()
         self.additions: Dict[bytes32, MempoolItem] = {}
         self.removals: Dict[bytes32, MempoolItem] = {}
         self.max_size_in_cost: int = max_size_in_cost
@@ -22,18 +21,14 @@ class Mempool:
         """
 
         if self.at_full_capacity(cost):
-            current_cost = self.total_mempool_cost
-
-            # Iterates through all spends in increasing fee per cost
-            for fee_per_cost, spends_with_fpc in self.sorted_spends.items():
-                for spend_name, item in spends_with_fpc.items():
-                    current_cost -= item.cost
-                    # Removing one at a time, until our transaction of size cost fits
-                    if current_cost + cost <= self.max_size_in_cost:
-                        return fee_per_cost
-            raise ValueError(
-                f"Transaction with cost {cost} does not fit in mempool of max cost {self.max_size_in_cost}"
-            )
+            # The items with the lowest fee per cost are kicked out, until our transaction of size cost fits
+            cost_to_free = self.total_mempool_cost + cost - self.max_size_in_cost
+            try:
+                return self.fee_index.fee_rate_to_free(cost_to_free)
+            except ValueError:
+                raise ValueError(
+                    f"Transaction with cost {cost} does not fit in mempool of max cost {self.max_size_in_cost}"
+                )
         else:
             return 0
 
@@ -48,10 +43,7 @@ class Mempool:
         for add in additions:
             del self.additions[add.name()]
         del self.spends[item.name]
-        del self.sorted_spends[item.fee_per_cost][item.name]
-        dic = self.sorted_spends[item.fee_per_cost]
-        if len(dic.values()) == 0:
-            del self.sorted_spends[item.fee_per_cost]
+        self.fee_index.remove(item.name)
         self.total_mempool_cost -= item.cost
         assert self.total_mempool_cost >= 0
 
@@ -64,18 +56,12 @@ class Mempool:
         """
 
         while self.at_full_capacity(item.cost):
-            # Val is Dict[hash, MempoolItem]
-            fee_per_cost, val = self.sorted_spends.peekitem(index=0)
-            to_remove = list(val.values())[0]
-            self.remove_from_pool(to_remove)
+            lowest = self.fee_index.lowest()
+            assert lowest is not None
+            self.remove_from_pool(self.spends[lowest])
 
         self.spends[item.name] = item
-
-        # sorted_spends is Dict[float, Dict[bytes32, MempoolItem]]
-        if item.fee_per_cost not in self.sorted_spends:
-            self.sorted_spends[item.fee_per_cost] = {}
-
-        self.sorted_spends[item.fee_per_cost][item.name] = item
+        self.fee_index.add(item.name, item.fee_per_cost, item.cost)
 
         for add in item.additions:
             self.additions[add.name()] = item
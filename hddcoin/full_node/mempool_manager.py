@@ -4,8 +4,8 @@ import dataclasses
 import logging
 import time
 from concurrent.futures.process import ProcessPoolExecutor
-from typing import Dict, List, Optional, Set, Tuple
-from blspy import G1Element
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from blspy import G1Element, GTElement
 from chiabip158 import PyBIP158
 
 from hddcoin.util import cached_bls
@@ -14,9 +14,11 @@ from hddcoin.consensus.constants import ConsensusConstants
 from hddcoin.consensus.cost_calculator import NPCResult, calculate_cost_of_program
 from hddcoin.full_node.bundle_tools import simple_solution_generator
 from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.fee_estimator import FeeEstimator
 from hddcoin.full_node.mempool import Mempool
 from hddcoin.full_node.mempool_check_conditions import mempool_check_conditions_dict, get_name_puzzle_conditions
 from hddcoin.full_node.pending_tx_cache import PendingTxCache
+from hddcoin.full_node.transaction_queue import TransactionQueue
 from hddcoin.types.blockchain_format.coin import Coin
 from hddcoin.types.blockchain_format.program import SerializedProgram
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
@@ -30,11 +32,19 @@ from hddcoin.util.clvm import int_from_bytes
 from hddcoin.util.condition_tools import pkm_pairs
 from hddcoin.util.errors import Err
 from hddcoin.util.generator_tools import additions_for_npc
-from hddcoin.util.ints import uint32, uint64
+from hddcoin.util.ints import uint16, uint32, uint64
+from hddcoin.util.lru_cache import LRUCache
 from hddcoin.util.streamable import recurse_jsonify
 
 log = logging.getLogger(__name__)
 
+# Most spend bundles sent to a worker process in one call
+MAX_PRE_VALIDATION_BATCH_SIZE = 50
+# Period over which the pre-validation rate is measured, in seconds
+PRE_VALIDATION_RATE_WINDOW = 60
+# When making a block, stop looking for smaller items that still fit after skipping this many
+MAX_SKIPPED_ITEMS = 100
+
 
 def get_npc_multiprocess(spend_bundle_bytes: bytes, max_cost: int, cost_per_byte: int) -> bytes:
     program = simple_solution_generator(SpendBundle.from_bytes(spend_bundle_bytes))
@@ -42,8 +52,48 @@ def get_npc_multiprocess(spend_bundle_bytes: bytes, max_cost: int, cost_per_byte
     return bytes(get_name_puzzle_conditions(program, max_cost, cost_per_byte=cost_per_byte, safe_mode=True))
 
 
+def validate_clvm_and_signature(
+    spend_bundle_bytes: bytes, max_cost: int, cost_per_byte: int, additional_data: bytes
+) -> Tuple[bytes, List[Tuple[bytes, bytes]]]:
+    """
+    Runs the spend bundle and checks its aggregated signature. Returns the serialized NPCResult, with the error
+    BAD_AGGREGATE_SIGNATURE if the signature is invalid, and the pairings computed for the check, so the caller can
+    add them to its cache and validate a block with the transaction faster.
+    """
+    spend_bundle = SpendBundle.from_bytes(spend_bundle_bytes)
+    program = simple_solution_generator(spend_bundle)
+    npc_result: NPCResult = get_name_puzzle_conditions(program, max_cost, cost_per_byte=cost_per_byte, safe_mode=True)
+    if npc_result.error is not None:
+        return bytes(npc_result), []
+    try:
+        pks, msgs = pkm_pairs(npc_result.npc_list, additional_data)
+        pairings_cache = LRUCache(max(len(pks), 1))
+        valid = cached_bls.aggregate_verify(pks, msgs, spend_bundle.aggregated_signature, True, pairings_cache)
+    except Exception:
+        valid = False
+    if not valid:
+        return bytes(NPCResult(uint16(Err.BAD_AGGREGATE_SIGNATURE.value), [], npc_result.clvm_cost)), []
+    return bytes(npc_result), [(key, bytes(pairing)) for key, pairing in pairings_cache.cache.items()]
+
+
+def validate_clvm_and_signature_batch(
+    spend_bundles: List[bytes], max_cost: int, cost_per_byte: int, additional_data: bytes
+) -> List[Tuple[bytes, List[Tuple[bytes, bytes]]]]:
+    return [
+        validate_clvm_and_signature(spend_bundle, max_cost, cost_per_byte, additional_data)
+        for spend_bundle in spend_bundles
+    ]
+
+
 class MempoolManager:
-    def __init__(self, coin_store: CoinStore, consensus_constants: ConsensusConstants):
+    def __init__(
+        self,
+        coin_store: CoinStore,
+        consensus_constants: ConsensusConstants,
+        num_workers: int = 1,
+        max_queue_size: int = 2000,
+        max_queue_size_per_peer: int = 200,
+    ):
         self.constants: ConsensusConstants = consensus_constants
         self.constants_json = recurse_jsonify(dataclasses.asdict(self.constants))
 
@@ -63,14 +113,29 @@ class MempoolManager:
         # Transactions that were unable to enter mempool, used for retry. (they were invalid)
         self.potential_cache = PendingTxCache(self.constants.MAX_BLOCK_COST_CLVM * 5)
         self.seen_cache_size = 10000
-        self.pool = ProcessPoolExecutor(max_workers=1)
+        self.pool = ProcessPoolExecutor(max_workers=num_workers)
+
+        # Spend bundles waiting for pre-validation. There is one task per worker process that sends them in batches
+        self.num_workers = num_workers
+        self.pre_validation_queue: TransactionQueue[Tuple[SpendBundle, bytes32, asyncio.Future]] = TransactionQueue(
+            max_queue_size, max_queue_size_per_peer
+        )
+        self._pre_validation_tasks: List[asyncio.Task] = []
+        # End time and size of the batches pre-validated in the last PRE_VALIDATION_RATE_WINDOW seconds
+        self._pre_validated_batches: Deque[Tuple[float, int]] = collections.deque()
 
         # The mempool will correspond to a certain peak
         self.peak: Optional[BlockRecord] = None
         self.mempool: Mempool = Mempool(self.mempool_max_total_cost)
         self.lock: asyncio.Lock = asyncio.Lock()
+        self.fee_estimator = FeeEstimator()
 
     def shut_down(self):
+        for task in self._pre_validation_tasks:
+            task.cancel()
+        self._pre_validation_tasks = []
+        for _, _, future in self.pre_validation_queue.pop_all():
+            future.cancel()
         self.pool.shutdown(wait=True)
 
     async def create_bundle_from_mempool(
@@ -83,34 +148,35 @@ class MempoolManager:
         if self.peak is None or self.peak.header_hash != last_tb_header_hash:
             return None
 
+        max_cost = self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM
         cost_sum = 0  # Checks that total cost does not exceed block maximum
         fee_sum = 0  # Checks that total fees don't exceed 64 bits
         spend_bundles: List[SpendBundle] = []
         removals = []
         additions = []
-        broke_from_inner_loop = False
+        skipped_items = 0
         log.info(f"Starting to make block, max cost: {self.constants.MAX_BLOCK_COST_CLVM}")
-        for dic in reversed(self.mempool.sorted_spends.values()):
-            if broke_from_inner_loop:
-                break
-            for item in dic.values():
-                log.info(f"Cumulative cost: {cost_sum}, fee per cost: {item.fee / item.cost}")
-                if (
-                    item.cost + cost_sum <= self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM
-                    and item.fee + fee_sum <= self.constants.MAX_COIN_AMOUNT
-                ):
-                    spend_bundles.append(item.spend_bundle)
-                    cost_sum += item.cost
-                    fee_sum += item.fee
-                    removals.extend(item.removals)
-                    additions.extend(item.additions)
-                else:
-                    broke_from_inner_loop = True
+        # Greedy knapsack: takes the items in decreasing fee per cost, and keeps filling the block with the smaller
+        # items that still fit after one doesn't
+        for spend_name in self.mempool.fee_index.descending():
+            item = self.mempool.spends[spend_name]
+            if item.cost + cost_sum <= max_cost and item.fee + fee_sum <= self.constants.MAX_COIN_AMOUNT:
+                spend_bundles.append(item.spend_bundle)
+                cost_sum += item.cost
+                fee_sum += item.fee
+                removals.extend(item.removals)
+                additions.extend(item.additions)
+                if cost_sum == max_cost:
+                    break
+            else:
+                skipped_items += 1
+                if skipped_items >= MAX_SKIPPED_ITEMS:
                     break
         if len(spend_bundles) > 0:
             log.info(
                 f"Cumulative cost of block (real cost should be less) {cost_sum}. Proportion "
-                f"full: {cost_sum / self.constants.MAX_BLOCK_COST_CLVM}"
+                f"full: {cost_sum / self.constants.MAX_BLOCK_COST_CLVM}, {len(spend_bundles)} spend bundles, "
+                f"{skipped_items} skipped"
             )
             agg = SpendBundle.aggregate(spend_bundles)
             return agg, additions, removals
@@ -199,20 +265,23 @@ class MempoolManager:
         log.info(f"Replacing conflicting tx in mempool. New tx fee: {fees}, old tx fees: {conflicting_fees}")
         return True
 
-    async def pre_validate_spendbundle(self, new_spend: SpendBundle, spend_name: bytes32) -> NPCResult:
+    async def pre_validate_spendbundle(
+        self, new_spend: SpendBundle, spend_name: bytes32, peer_id: Optional[bytes32] = None
+    ) -> NPCResult:
         """
-        Errors are included within the cached_result.
-        This runs in another process so we don't block the main thread
+        Errors are included within the cached_result, an invalid aggregated signature is reported as
+        BAD_AGGREGATE_SIGNATURE. The spend bundle waits in the pre-validation queue and runs in the worker processes,
+        batched with the other bundles, so we don't block the main thread.
+        Raises asyncio.QueueFull if the queue, or the share of the queue of the peer, is full.
         """
         start_time = time.time()
-        cached_result_bytes = await asyncio.get_running_loop().run_in_executor(
-            self.pool,
-            get_npc_multiprocess,
-            bytes(new_spend),
-            int(self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM),
-            self.constants.COST_PER_BYTE,
-        )
-        ret = NPCResult.from_bytes(cached_result_bytes)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.pre_validation_queue.put((new_spend, spend_name, future), peer_id)
+        if len(self._pre_validation_tasks) == 0:
+            self._pre_validation_tasks = [
+                asyncio.create_task(self._pre_validation_loop()) for _ in range(self.num_workers)
+            ]
+        ret: NPCResult = await future
         end_time = time.time()
         log.log(
             logging.WARNING if end_time - start_time > 1 else logging.DEBUG,
@@ -220,6 +289,65 @@ class MempoolManager:
         )
         return ret
 
+    async def _pre_validation_loop(self) -> None:
+        while True:
+            await self.pre_validation_queue.wait()
+            # Under load the batches get larger, but the queue is shared between all the workers
+            batch_size = -(-self.pre_validation_queue.size() // self.num_workers)
+            batch = self.pre_validation_queue.pop_batch(min(batch_size, MAX_PRE_VALIDATION_BATCH_SIZE))
+            # Skip the bundles whose callers stopped waiting
+            batch = [entry for entry in batch if not entry[2].done()]
+            if len(batch) == 0:
+                continue
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.pool,
+                    validate_clvm_and_signature_batch,
+                    [bytes(spend_bundle) for spend_bundle, _, _ in batch],
+                    int(self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM),
+                    self.constants.COST_PER_BYTE,
+                    self.constants.AGG_SIG_ME_ADDITIONAL_DATA,
+                )
+            except asyncio.CancelledError:
+                for _, _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), (npc_result_bytes, pairings) in zip(batch, results):
+                for key, pairing in pairings:
+                    cached_bls.LOCAL_CACHE.put(key, GTElement.from_bytes(pairing))
+                if not future.done():
+                    future.set_result(NPCResult.from_bytes(npc_result_bytes))
+            self._record_pre_validated(len(batch))
+
+    def _record_pre_validated(self, count: int) -> None:
+        now = time.time()
+        self._pre_validated_batches.append((now, count))
+        while self._pre_validated_batches[0][0] < now - PRE_VALIDATION_RATE_WINDOW:
+            self._pre_validated_batches.popleft()
+        log.debug(
+            f"Pre-validated {count} spend bundles, {self.pre_validation_queue.size()} waiting, "
+            f"{self.pre_validation_rate():0.1f} txs/sec"
+        )
+
+    def pre_validation_rate(self) -> float:
+        """Spend bundles pre-validated per second, over the last PRE_VALIDATION_RATE_WINDOW seconds"""
+        cutoff = time.time() - PRE_VALIDATION_RATE_WINDOW
+        return sum(count for end_time, count in self._pre_validated_batches if end_time >= cutoff) / (
+            PRE_VALIDATION_RATE_WINDOW
+        )
+
+    def get_pre_validation_stats(self) -> Dict[str, float]:
+        return {
+            "queue_size": self.pre_validation_queue.size(),
+            "max_queue_size": self.pre_validation_queue.max_size,
+            "txs_per_sec": self.pre_validation_rate(),
+        }
+
     async def add_spendbundle(
         self,
         new_spend: SpendBundle,
@@ -427,6 +555,7 @@ class MempoolManager:
 
         new_item = MempoolItem(new_spend, uint64(fees), npc_result, cost, spend_name, additions, removals, program)
         self.mempool.add_to_pool(new_item)
+        self.fee_estimator.add_item(spend_name, fees_per_cost, self.peak.height)
         now = time.time()
         log.log(
             logging.WARNING if now - start_time > 1 else logging.DEBUG,
@@ -460,6 +589,20 @@ class MempoolManager:
         # 5. If coins can be spent return list of unspents as we see them in local storage
         return None, []
 
+    def get_fee_rate_estimate(self, target_blocks: int, cost: int) -> float:
+        """
+        Fee per cost for a transaction of the given cost to enter the mempool now, and to be confirmed within
+        target_blocks transaction blocks if the recent blocks are anything to go by.
+        """
+        fee_rate: float = 0
+        if self.mempool.at_full_capacity(cost):
+            # A fee per cost over the minimum is needed to kick out other items
+            fee_rate = max(self.mempool.get_min_fee_rate(cost), self.nonzero_fee_minimum_fpc)
+        estimate = self.fee_estimator.estimate(target_blocks)
+        if estimate is not None:
+            fee_rate = max(fee_rate, estimate)
+        return fee_rate
+
     def get_spendbundle(self, bundle_hash: bytes32) -> Optional[SpendBundle]:
         """Returns a full SpendBundle if it's inside one the mempools"""
         if bundle_hash in self.mempool.spends:
@@ -475,6 +618,8 @@ class MempoolManager:
     async def new_peak(self, new_peak: Optional[BlockRecord]) -> List[Tuple[SpendBundle, NPCResult, bytes32]]:
         """
         Called when a new peak is available, we try to recreate a mempool for the new tip.
+        If the new peak directly follows the previous one, only the items spending the coins it spent are removed,
+        otherwise all the items are validated again.
         """
         if new_peak is None:
             return []
@@ -484,21 +629,16 @@ class MempoolManager:
             return []
         assert new_peak.timestamp is not None
 
+        old_peak = self.peak
         self.peak = new_peak
 
-        old_pool = self.mempool
         async with self.lock:
-            self.mempool = Mempool(self.mempool_max_total_cost)
-
-            for item in old_pool.spends.values():
-                _, result, _ = await self.add_spendbundle(
-                    item.spend_bundle, item.npc_result, item.spend_bundle_name, False, item.program
-                )
-                # If the spend bundle was confirmed or conflicting (can no longer be in mempool), it won't be
-                # successfully added to the new mempool. In this case, remove it from seen, so in the case of a reorg,
-                # it can be resubmitted
-                if result != MempoolInclusionStatus.SUCCESS:
-                    self.remove_seen(item.spend_bundle_name)
+            if old_peak is not None and new_peak.prev_transaction_block_hash == old_peak.header_hash:
+                confirmed = await self.remove_spent_items(new_peak.height)
+            else:
+                # After a reorg, the items that are no longer valid can't be told apart from the confirmed ones
+                await self.revalidate_items()
+                confirmed = []
 
             potential_txs = self.potential_cache.drain()
             txs_added = []
@@ -508,28 +648,63 @@ class MempoolManager:
                 )
                 if status == MempoolInclusionStatus.SUCCESS:
                     txs_added.append((item.spend_bundle, item.npc_result, item.spend_bundle_name))
+            self.fee_estimator.new_block(new_peak.height, confirmed, self.mempool.spends.keys())
         log.info(
             f"Size of mempool: {len(self.mempool.spends)} spends, cost: {self.mempool.total_mempool_cost} "
             f"minimum fee to get in: {self.mempool.get_min_fee_rate(100000)}"
         )
         return txs_added
 
+    async def remove_spent_items(self, height: uint32) -> List[bytes32]:
+        """
+        Removes the items spending coins that were spent at height, they were confirmed or conflict with the block,
+        and returns the names of the confirmed ones: the items whose additions were all created at height. The items
+        without additions can't be told apart from conflicting ones and are not returned.
+        The other items stay valid: the coins they spend are still unspent, and time and height conditions only assert
+        that a time or height was reached, which is still true at a later peak.
+        """
+        removed: List[MempoolItem] = []
+        for record in await self.coin_store.get_coins_removed_at_height(height):
+            item = self.mempool.removals.get(record.name)
+            if item is not None:
+                self.mempool.remove_from_pool(item)
+                # Can be resubmitted in the case of a reorg
+                self.remove_seen(item.spend_bundle_name)
+                removed.append(item)
+        if len(removed) == 0:
+            return []
+
+        added = {record.name for record in await self.coin_store.get_coins_added_at_height(height)}
+        return [
+            item.spend_bundle_name
+            for item in removed
+            if len(item.additions) > 0 and all(coin.name() in added for coin in item.additions)
+        ]
+
+    async def revalidate_items(self) -> None:
+        """Validates all the items again against the current peak, in a new mempool."""
+        old_pool = self.mempool
+        self.mempool = Mempool(self.mempool_max_total_cost)
+
+        for item in old_pool.spends.values():
+            _, result, _ = await self.add_spendbundle(
+                item.spend_bundle, item.npc_result, item.spend_bundle_name, False, item.program
+            )
+            # If the spend bundle was confirmed or conflicting (can no longer be in mempool), it won't be
+            # successfully added to the new mempool. In this case, remove it from seen, so in the case of a reorg,
+            # it can be resubmitted
+            if result != MempoolInclusionStatus.SUCCESS:
+                self.remove_seen(item.spend_bundle_name)
+
     async def get_items_not_in_filter(self, mempool_filter: PyBIP158, limit: int = 100) -> List[MempoolItem]:
         items: List[MempoolItem] = []
-        counter = 0
-        broke_from_inner_loop = False
 
         # Send 100 with highest fee per cost
-        for dic in self.mempool.sorted_spends.values():
-            if broke_from_inner_loop:
+        for spend_name in self.mempool.fee_index.descending():
+            if len(items) == limit:
                 break
-            for item in dic.values():
-                if counter == limit:
-                    broke_from_inner_loop = True
-                    break
-                if mempool_filter.Match(bytearray(item.spend_bundle_name)):
-                    continue
-                items.append(item)
-                counter += 1
+            if mempool_filter.Match(bytearray(spend_name)):
+                continue
+            items.append(self.mempool.spends[spend_name])
 
         return items
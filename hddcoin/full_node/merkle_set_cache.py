@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from hddcoin.types.blockchain_format.coin import Coin, hash_coin_list
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint32
+from hddcoin.util.lru_cache import LRUCache
+from hddcoin.util.merkle_set import MerkleSet
+
+
+@dataclass
+class BlockAdditions:
+    """The additions of a transaction block, grouped by puzzle hash, as served to wallets."""
+
+    height: uint32
+    additions_root: bytes32
+    puzzlehash_coins_map: Dict[bytes32, List[Coin]]
+    _merkle_set: Optional[MerkleSet] = field(default=None, repr=False)
+
+    def merkle_set(self) -> MerkleSet:
+        """
+        The addition Merkle set of the block, built the first time it's needed. It contains the puzzle hashes and
+        the hash of the coins of each puzzle hash.
+        """
+        if self._merkle_set is None:
+            merkle_set = MerkleSet()
+            for puzzle, coins in self.puzzlehash_coins_map.items():
+                merkle_set.add_already_hashed(puzzle)
+                merkle_set.add_already_hashed(hash_coin_list(coins))
+            assert merkle_set.get_root() == self.additions_root
+            self._merkle_set = merkle_set
+        return self._merkle_set
+
+
+@dataclass
+class BlockRemovals:
+    """The removals of a transaction block by coin name, as served to wallets."""
+
+    height: uint32
+    removals_root: bytes32
+    has_transactions_generator: bool
+    removals: Dict[bytes32, Coin]
+    _merkle_set: Optional[MerkleSet] = field(default=None, repr=False)
+
+    def merkle_set(self) -> MerkleSet:
+        """The removal Merkle set of the block, built the first time it's needed."""
+        if self._merkle_set is None:
+            merkle_set = MerkleSet()
+            for removed_name in self.removals.keys():
+                merkle_set.add_already_hashed(removed_name)
+            assert merkle_set.get_root() == self.removals_root
+            self._merkle_set = merkle_set
+        return self._merkle_set
+
+
+class MerkleSetCache:
+    """
+    Keeps the additions and removals of the most recently requested blocks, with their Merkle sets, so that many
+    wallets validating the same blocks don't make the full node read the coins and build the same sets again.
+    Entries are keyed by header hash, the caller has to check that the block is still in the chain. Entries above a
+    fork point are dropped on reorgs.
+    """
+
+    additions: LRUCache
+    removals: LRUCache
+    additions_hits: int
+    additions_misses: int
+    removals_hits: int
+    removals_misses: int
+
+    def __init__(self, capacity: int):
+        self.additions = LRUCache(capacity)
+        self.removals = LRUCache(capacity)
+        self.additions_hits = 0
+        self.additions_misses = 0
+        self.removals_hits = 0
+        self.removals_misses = 0
+
+    def get_additions(self, header_hash: bytes32) -> Optional[BlockAdditions]:
+        additions: Optional[BlockAdditions] = self.additions.get(header_hash)
+        if additions is None:
+            self.additions_misses += 1
+        else:
+            self.additions_hits += 1
+        return additions
+
+    def add_additions(self, header_hash: bytes32, additions: BlockAdditions) -> None:
+        self.additions.put(header_hash, additions)
+
+    def get_removals(self, header_hash: bytes32) -> Optional[BlockRemovals]:
+        removals: Optional[BlockRemovals] = self.removals.get(header_hash)
+        if removals is None:
+            self.removals_misses += 1
+        else:
+            self.removals_hits += 1
+        return removals
+
+    def add_removals(self, header_hash: bytes32, removals: BlockRemovals) -> None:
+        self.removals.put(header_hash, removals)
+
+    def remove_above(self, fork_height: uint32) -> None:
+        """Drops the entries of the blocks above the fork point of a reorg."""
+        for cache in [self.additions, self.removals]:
+            for header_hash in [key for key, value in cache.cache.items() if value.height > fork_height]:
+                cache.remove(header_hash)
+
+    def hit_rates(self) -> Dict[str, float]:
+        return {
+            "additions": self.additions_hits / max(1, self.additions_hits + self.additions_misses),
+            "removals": self.removals_hits / max(1, self.removals_hits + self.removals_misses),
+        }
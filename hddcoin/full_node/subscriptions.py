@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List, Set
+
+from hddcoin.protocols.wallet_protocol import CoinState
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.coin_record import CoinRecord
+
+
+class PeerSubscriptions:
+    """
+    The puzzle hashes and coin ids that wallet peers registered interest in. Peer node ids are interned to small ints,
+    so each subscription costs a set entry instead of a reference to the 32 byte id, and the reverse maps let a peer
+    be removed in the number of its own subscriptions. Keys without subscribers are removed, so the maps only grow
+    with the live subscriptions.
+    """
+
+    max_subscriptions_per_peer: int
+    _peer_indexes: Dict[bytes32, int]
+    _peer_ids: Dict[int, bytes32]
+    _next_peer_index: int
+    _puzzle_hash_peers: Dict[bytes32, Set[int]]
+    _coin_id_peers: Dict[bytes32, Set[int]]
+    _peer_puzzle_hashes: Dict[int, Set[bytes32]]
+    _peer_coin_ids: Dict[int, Set[bytes32]]
+
+    def __init__(self, max_subscriptions_per_peer: int = 100000):
+        self.max_subscriptions_per_peer = max_subscriptions_per_peer
+        self._peer_indexes = {}
+        self._peer_ids = {}
+        self._next_peer_index = 0
+        self._puzzle_hash_peers = {}
+        self._coin_id_peers = {}
+        self._peer_puzzle_hashes = {}
+        self._peer_coin_ids = {}
+
+    def _peer_index(self, peer_id: bytes32) -> int:
+        index = self._peer_indexes.get(peer_id)
+        if index is None:
+            index = self._next_peer_index
+            self._next_peer_index += 1
+            self._peer_indexes[peer_id] = index
+            self._peer_ids[index] = peer_id
+            self._peer_puzzle_hashes[index] = set()
+            self._peer_coin_ids[index] = set()
+        return index
+
+    def subscription_count(self, peer_id: bytes32) -> int:
+        index = self._peer_indexes.get(peer_id)
+        if index is None:
+            return 0
+        return len(self._peer_puzzle_hashes[index]) + len(self._peer_coin_ids[index])
+
+    def _add(
+        self,
+        peer_id: bytes32,
+        keys: Iterable[bytes32],
+        key_peers: Dict[bytes32, Set[int]],
+        peer_keys_by_index: Dict[int, Set[bytes32]],
+    ) -> None:
+        index = self._peer_index(peer_id)
+        peer_keys = peer_keys_by_index[index]
+        count = self.subscription_count(peer_id)
+        for key in keys:
+            if key in peer_keys:
+                continue
+            if count >= self.max_subscriptions_per_peer:
+                break
+            key_peers.setdefault(key, set()).add(index)
+            peer_keys.add(key)
+            count += 1
+
+    def add_puzzle_hash_subscriptions(self, peer_id: bytes32, puzzle_hashes: Iterable[bytes32]) -> None:
+        """Subscribes the peer to the puzzle hashes, until it reaches max_subscriptions_per_peer."""
+        self._add(peer_id, puzzle_hashes, self._puzzle_hash_peers, self._peer_puzzle_hashes)
+
+    def add_coin_subscriptions(self, peer_id: bytes32, coin_ids: Iterable[bytes32]) -> None:
+        """Subscribes the peer to the coin ids, until it reaches max_subscriptions_per_peer."""
+        self._add(peer_id, coin_ids, self._coin_id_peers, self._peer_coin_ids)
+
+    def remove_peer(self, peer_id: bytes32) -> None:
+        index = self._peer_indexes.pop(peer_id, None)
+        if index is None:
+            return
+        del self._peer_ids[index]
+        for keys, key_peers in [
+            (self._peer_puzzle_hashes.pop(index), self._puzzle_hash_peers),
+            (self._peer_coin_ids.pop(index), self._coin_id_peers),
+        ]:
+            for key in keys:
+                peers = key_peers[key]
+                peers.discard(index)
+                if len(peers) == 0:
+                    del key_peers[key]
+
+    def changes_for_peers(
+        self, states: List[CoinRecord], hint_state: Dict[bytes, Dict[bytes32, CoinRecord]]
+    ) -> Dict[bytes32, Set[CoinState]]:
+        """
+        The coin states each subscribed peer has to be sent, for the coin records changed by a new peak and the
+        hinted coin records by hint. This is linear in the number of changes, not in the number of subscriptions.
+        """
+        changes_for_peer: Dict[int, Set[CoinState]] = {}
+        for coin_record in states:
+            for peers in [
+                self._coin_id_peers.get(coin_record.name),
+                self._puzzle_hash_peers.get(coin_record.coin.puzzle_hash),
+            ]:
+                if peers is not None:
+                    for index in peers:
+                        changes_for_peer.setdefault(index, set()).add(coin_record.coin_state)
+
+        for hint, records in hint_state.items():
+            hint_peers = self._puzzle_hash_peers.get(hint)
+            if hint_peers is not None:
+                for index in hint_peers:
+                    peer_changes = changes_for_peer.setdefault(index, set())
+                    for record in records.values():
+                        peer_changes.add(record.coin_state)
+
+        return {self._peer_ids[index]: changes for index, changes in changes_for_peer.items()}
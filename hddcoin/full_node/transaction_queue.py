@@ -0,0 +1,65 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, Generic, List, Optional, TypeVar
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+
+T = TypeVar("T")
+
+
+class TransactionQueue(Generic[T]):
+    """
+    Bounded queue of the transactions waiting to be pre-validated. Each peer has its own queue and the peers are
+    served round robin, so a peer that floods the node with transactions only delays its own. Transactions that
+    don't come from a peer (RPC) are queued under None, they are only limited by the total size.
+    """
+
+    def __init__(self, max_size: int, max_size_per_peer: int):
+        self.max_size = max_size
+        self.max_size_per_peer = max_size_per_peer
+        self._queues: "OrderedDict[Optional[bytes32], Deque[T]]" = OrderedDict()
+        self._size = 0
+        self._not_empty = asyncio.Event()
+
+    def size(self) -> int:
+        return self._size
+
+    def peer_size(self, peer_id: Optional[bytes32]) -> int:
+        queue = self._queues.get(peer_id)
+        return 0 if queue is None else len(queue)
+
+    def put(self, item: T, peer_id: Optional[bytes32]) -> None:
+        """Raises asyncio.QueueFull if the queue, or the queue of the peer, is full."""
+        if self._size >= self.max_size:
+            raise asyncio.QueueFull()
+        queue = self._queues.get(peer_id)
+        if queue is None:
+            queue = deque()
+            self._queues[peer_id] = queue
+        elif peer_id is not None and len(queue) >= self.max_size_per_peer:
+            raise asyncio.QueueFull()
+        queue.append(item)
+        self._size += 1
+        self._not_empty.set()
+
+    def pop_batch(self, max_items: int) -> List[T]:
+        """Takes up to max_items, one from each peer in turn."""
+        batch: List[T] = []
+        while len(batch) < max_items and len(self._queues) > 0:
+            peer_id, queue = next(iter(self._queues.items()))
+            batch.append(queue.popleft())
+            if len(queue) == 0:
+                del self._queues[peer_id]
+            else:
+                self._queues.move_to_end(peer_id)
+        self._size -= len(batch)
+        if self._size == 0:
+            self._not_empty.clear()
+        return batch
+
+    def pop_all(self) -> List[T]:
+        return self.pop_batch(self._size)
+
+    async def wait(self) -> None:
+        """Waits until there are items in the queue."""
+        await self._not_empty.wait()
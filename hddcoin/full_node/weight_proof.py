@@ -5,7 +5,7 @@ import math
 import pathlib
 import random
 from concurrent.futures.process import ProcessPoolExecutor
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from hddcoin.consensus.block_header_validation import validate_finished_header_block
 from hddcoin.consensus.block_record import BlockRecord
@@ -38,10 +38,25 @@ from hddcoin.types.weight_proof import (
 from hddcoin.util.block_cache import BlockCache
 from hddcoin.util.hash import std_hash
 from hddcoin.util.ints import uint8, uint32, uint64, uint128
+from hddcoin.util.lru_cache import LRUCache
 from hddcoin.util.streamable import dataclass_from_dict, recurse_jsonify
 
 log = logging.getLogger(__name__)
 
+# How thoroughly a block of the recent chain was validated. A block that was validated at a level doesn't need to be
+# validated again at that level or a lower one
+RECENT_BLOCK_POSPACE = 1
+RECENT_BLOCK_HEADER = 2
+RECENT_BLOCK_HEADER_AND_SES = 3
+
+# Weight proofs are kept for this many recent tips, light wallets ask for proofs of slightly different tips. A proof can
+# be several MB
+WEIGHT_PROOF_CACHE_SIZE = 4
+
+# VDFs are validated in batches in worker processes, a few batches per process and not too small batches
+VDF_BATCHES_PER_PROCESS = 4
+MIN_VDF_BATCH_SIZE = 8
+
 
 class WeightProofHandler:
 
@@ -60,6 +75,12 @@ class WeightProofHandler:
         self.blockchain = blockchain
         self.lock = asyncio.Lock()
         self._num_processes = 4
+        self._proofs = LRUCache(WEIGHT_PROOF_CACHE_SIZE)
+        # The segments of the sampled sub epochs by the hash of the block including their summary, and the header
+        # blocks and records of the last recent chain window, so that the proof of a later tip only loads the new blocks
+        self._segments = LRUCache(self.MAX_SAMPLES * 2)
+        self._recent_headers: Dict[bytes32, HeaderBlock] = {}
+        self._recent_records: Dict[bytes32, BlockRecord] = {}
 
     async def get_proof_of_weight(self, tip: bytes32) -> Optional[WeightProof]:
 
@@ -73,12 +94,12 @@ class WeightProofHandler:
             return None
 
         async with self.lock:
-            if self.proof is not None:
-                if self.proof.recent_chain_data[-1].header_hash == tip:
-                    return self.proof
-            wp = await self._create_proof_of_weight(tip)
+            wp = self._proofs.get(tip)
             if wp is None:
-                return None
+                wp = await self._create_proof_of_weight(tip)
+                if wp is None:
+                    return None
+                self._proofs.put(tip, wp)
             self.proof = wp
             self.tip = tip
             return wp
@@ -139,7 +160,9 @@ class WeightProofHandler:
 
             if _sample_sub_epoch(prev_ses_block.weight, ses_block.weight, weight_to_check):  # type: ignore
                 sample_n += 1
-                segments = await self.blockchain.get_sub_epoch_challenge_segments(ses_block.header_hash)
+                segments = self._segments.get(ses_block.header_hash)
+                if segments is None:
+                    segments = await self.blockchain.get_sub_epoch_challenge_segments(ses_block.header_hash)
                 if segments is None:
                     segments = await self.__create_sub_epoch_segments(ses_block, prev_ses_block, uint32(sub_epoch_n))
                     if segments is None:
@@ -148,6 +171,7 @@ class WeightProofHandler:
                         )
                         return None
                     await self.blockchain.persist_sub_epoch_challenge_segments(ses_block.header_hash, segments)
+                self._segments.put(ses_block.header_hash, segments)
                 log.debug(f"sub epoch {sub_epoch_n} has {len(segments)} segments")
                 sub_epoch_segments.extend(segments)
             prev_ses_block = ses_block
@@ -179,8 +203,17 @@ class WeightProofHandler:
                 min_height = ses_height - 1
                 break
         log.debug(f"start {min_height} end {tip_height}")
-        headers = await self.blockchain.get_header_blocks_in_range(min_height, tip_height, tx_filter=False)
-        blocks = await self.blockchain.get_block_records_in_range(min_height, tip_height)
+        window = [self.blockchain.height_to_hash(uint32(height)) for height in range(min_height, tip_height + 1)]
+        # Only the blocks after the last one of the previous window that is still in the chain are loaded
+        headers = self._recent_headers
+        blocks = self._recent_records
+        for height, header_hash in zip(range(min_height, tip_height + 1), window):
+            if header_hash not in headers or header_hash not in blocks:
+                headers.update(await self.blockchain.get_header_blocks_in_range(height, tip_height, tx_filter=False))
+                blocks.update(await self.blockchain.get_block_records_in_range(height, tip_height))
+                break
+        self._recent_headers = {h: headers[h] for h in window if h in headers}
+        self._recent_records = {h: blocks[h] for h in window if h in blocks}
         ses_count = 0
         curr_height = tip_height
         blocks_n = 0
@@ -606,7 +639,7 @@ class WeightProofHandler:
         if not segments_validated:
             return False, uint32(0), []
 
-        vdf_chunks = chunks(vdfs_to_validate, self._num_processes)
+        vdf_chunks = chunks(vdfs_to_validate, vdf_batch_size(len(vdfs_to_validate), self._num_processes))
         vdf_tasks = []
         for chunk in vdf_chunks:
             byte_chunks = []
@@ -936,47 +969,112 @@ def _validate_summaries_weight(constants: ConsensusConstants, sub_epoch_data_wei
 
 
 def _validate_sub_epoch_segments(
-    constants_dict: Dict,
+    constants_dict: Optional[Dict],
     rng: random.Random,
     weight_proof_bytes: bytes,
     summaries_bytes: List[bytes],
+    validated_summaries: Optional[Set[bytes32]] = None,
 ):
+    """
+    The segments of the sub epochs whose summary hash is in validated_summaries are skipped, they were validated as part
+    of an earlier weight proof. A summary hash commits to all the summaries before it.
+    """
     constants, summaries = bytes_to_vars(constants_dict, summaries_bytes)
     sub_epoch_segments: SubEpochSegments = SubEpochSegments.from_bytes(weight_proof_bytes)
-    rc_sub_slot_hash = constants.GENESIS_CHALLENGE
-    total_blocks, total_ip_iters = 0, 0
-    total_slot_iters, total_slots = 0, 0
-    total_ip_iters = 0
-    prev_ses: Optional[SubEpochSummary] = None
-    segments_by_sub_epoch = map_segments_by_sub_epoch(sub_epoch_segments.challenge_segments)
-    curr_ssi = constants.SUB_SLOT_ITERS_STARTING
     vdfs_to_validate = []
-    for sub_epoch_n, segments in segments_by_sub_epoch.items():
+    for sub_epoch_n, segments, sampled_seg_index, prev_ssi in _sample_sub_epoch_segments(
+        constants, rng, sub_epoch_segments.challenge_segments, summaries, validated_summaries
+    ):
+        valid, vdf_list = _validate_sub_epoch(constants, summaries, sub_epoch_n, segments, sampled_seg_index, prev_ssi)
+        if not valid:
+            return False
+        vdfs_to_validate.extend(vdf_list)
+    return True, vdfs_to_validate
+
+
+def _sample_sub_epoch_segments(
+    constants: ConsensusConstants,
+    rng: random.Random,
+    challenge_segments: List[SubEpochChallengeSegment],
+    summaries: List[SubEpochSummary],
+    validated_summaries: Optional[Set[bytes32]] = None,
+) -> List[Tuple[int, List[SubEpochChallengeSegment], int, uint64]]:
+    """
+    The sub epochs to validate with their segments, the index of the segment sampled for full validation and the sub
+    slot iters of the sub epoch validated before. The sub epochs don't depend on each other once these are known.
+    """
+    sampled = []
+    curr_ssi = constants.SUB_SLOT_ITERS_STARTING
+    for sub_epoch_n, segments in map_segments_by_sub_epoch(challenge_segments).items():
         prev_ssi = curr_ssi
-        curr_difficulty, curr_ssi = _get_curr_diff_ssi(constants, sub_epoch_n, summaries)
-        log.debug(f"validate sub epoch {sub_epoch_n}")
-        # recreate RewardChainSubSlot for next ses rc_hash
+        _, curr_ssi = _get_curr_diff_ssi(constants, sub_epoch_n, summaries)
         sampled_seg_index = rng.choice(range(len(segments)))
-        if sub_epoch_n > 0:
-            rc_sub_slot = __get_rc_sub_slot(constants, segments[0], summaries, curr_ssi)
-            prev_ses = summaries[sub_epoch_n - 1]
-            rc_sub_slot_hash = rc_sub_slot.get_hash()
-        if not summaries[sub_epoch_n].reward_chain_hash == rc_sub_slot_hash:
-            log.error(f"failed reward_chain_hash validation sub_epoch {sub_epoch_n}")
-            return False
-        for idx, segment in enumerate(segments):
-            valid_segment, ip_iters, slot_iters, slots, vdf_list = _validate_segment(
-                constants, segment, curr_ssi, prev_ssi, curr_difficulty, prev_ses, idx == 0, sampled_seg_index == idx
-            )
-            vdfs_to_validate.extend(vdf_list)
-            if not valid_segment:
-                log.error(f"failed to validate sub_epoch {segment.sub_epoch_n} segment {idx} slots")
-                return False
-            prev_ses = None
-            total_blocks += 1
-            total_slot_iters += slot_iters
-            total_slots += slots
-            total_ip_iters += ip_iters
+        if validated_summaries is not None and summaries[sub_epoch_n].get_hash() in validated_summaries:
+            continue
+        sampled.append((sub_epoch_n, segments, sampled_seg_index, prev_ssi))
+    return sampled
+
+
+def _validate_sub_epoch(
+    constants: ConsensusConstants,
+    summaries: List[SubEpochSummary],
+    sub_epoch_n: int,
+    segments: List[SubEpochChallengeSegment],
+    sampled_seg_index: int,
+    prev_ssi: uint64,
+) -> Tuple[bool, List[Tuple[VDFProof, ClassgroupElement, VDFInfo]]]:
+    curr_difficulty, curr_ssi = _get_curr_diff_ssi(constants, sub_epoch_n, summaries)
+    log.debug(f"validate sub epoch {sub_epoch_n}")
+    prev_ses: Optional[SubEpochSummary] = None
+    rc_sub_slot_hash = constants.GENESIS_CHALLENGE
+    # recreate RewardChainSubSlot for next ses rc_hash
+    if sub_epoch_n > 0:
+        rc_sub_slot = __get_rc_sub_slot(constants, segments[0], summaries, curr_ssi)
+        prev_ses = summaries[sub_epoch_n - 1]
+        rc_sub_slot_hash = rc_sub_slot.get_hash()
+    if not summaries[sub_epoch_n].reward_chain_hash == rc_sub_slot_hash:
+        log.error(f"failed reward_chain_hash validation sub_epoch {sub_epoch_n}")
+        return False, []
+    vdfs_to_validate = []
+    for idx, segment in enumerate(segments):
+        valid_segment, ip_iters, slot_iters, slots, vdf_list = _validate_segment(
+            constants, segment, curr_ssi, prev_ssi, curr_difficulty, prev_ses, idx == 0, sampled_seg_index == idx
+        )
+        vdfs_to_validate.extend(vdf_list)
+        if not valid_segment:
+            log.error(f"failed to validate sub_epoch {segment.sub_epoch_n} segment {idx} slots")
+            return False, []
+        prev_ses = None
+    return True, vdfs_to_validate
+
+
+def _validate_sub_epochs_and_get_vdfs(
+    constants_dict: Optional[Dict],
+    summaries_bytes: List[bytes],
+    segments_bytes: bytes,
+    sub_epochs: List[Tuple[int, int, int]],
+    shutdown_file_path: Optional[pathlib.Path] = None,
+) -> Tuple[bool, List[Tuple[bytes, bytes, bytes]]]:
+    """
+    Validates the segments of some sub epochs in a worker process, sub_epochs has the sub epoch number, the sampled
+    segment index and the previous sub slot iters of each. Returns the VDFs left to validate, serialized.
+    """
+    constants, summaries = bytes_to_vars(constants_dict, summaries_bytes)
+    segments_by_sub_epoch = map_segments_by_sub_epoch(SubEpochSegments.from_bytes(segments_bytes).challenge_segments)
+    vdfs_to_validate: List[Tuple[bytes, bytes, bytes]] = []
+    for sub_epoch_n, sampled_seg_index, prev_ssi in sub_epochs:
+        valid, vdf_list = _validate_sub_epoch(
+            constants, summaries, sub_epoch_n, segments_by_sub_epoch[sub_epoch_n], sampled_seg_index, uint64(prev_ssi)
+        )
+        if not valid:
+            return False, []
+        for vdf_proof, classgroup, vdf_info in vdf_list:
+            vdfs_to_validate.append((bytes(vdf_proof), bytes(classgroup), bytes(vdf_info)))
+
+        if shutdown_file_path is not None and not shutdown_file_path.is_file():
+            log.info("cancelling sub epoch validation, shutdown requested")
+            return False, []
+
     return True, vdfs_to_validate
 
 
@@ -1194,7 +1292,13 @@ def validate_recent_blocks(
     recent_chain: RecentChainData,
     summaries: List[SubEpochSummary],
     shutdown_file_path: Optional[pathlib.Path] = None,
+    validated_blocks: Optional[Dict[bytes32, Tuple[int, uint64]]] = None,
 ) -> Tuple[bool, List[bytes]]:
+    """
+    validated_blocks maps the header hashes of blocks validated before to the level they were validated at and their
+    required iters. Blocks validated at the level needed are not validated again, and the blocks validated now are added
+    to it.
+    """
     sub_blocks = BlockCache({})
     first_ses_idx = _get_ses_idx(recent_chain.recent_chain_data)
     ses_idx = len(summaries) - len(first_ses_idx)
@@ -1243,6 +1347,13 @@ def validate_recent_blocks(
             deficit = get_deficit(constants, deficit, prev_block_record, overflow, len(block.finished_sub_slots))
             log.debug(f"wp, validate block {block.height}")
             if sub_slots > 2 and transaction_blocks > 11 and (tip_height - block.height < last_blocks_to_validate):
+                level = RECENT_BLOCK_HEADER_AND_SES if ses_blocks > 2 else RECENT_BLOCK_HEADER
+            else:
+                level = RECENT_BLOCK_POSPACE
+            validated = None if validated_blocks is None else validated_blocks.get(block.header_hash)
+            if validated is not None and validated[0] >= level:
+                required_iters = validated[1]
+            elif level != RECENT_BLOCK_POSPACE:
                 caluclated_required_iters, error = validate_finished_header_block(
                     constants, sub_blocks, block, False, diff, ssi, ses_blocks > 2
                 )
@@ -1257,6 +1368,8 @@ def validate_recent_blocks(
                 )
                 if required_iters is None:
                     return False, []
+            if validated_blocks is not None and (validated is None or validated[0] < level):
+                validated_blocks[block.header_hash] = (level, required_iters)
 
         curr_block_ses = None if not ses else summaries[ses_idx - 1]
         block_record = header_block_to_sub_block_record(
@@ -1292,10 +1405,15 @@ def _validate_recent_blocks_and_get_records(
     recent_chain_bytes: bytes,
     summaries_bytes: List[bytes],
     shutdown_file_path: Optional[pathlib.Path] = None,
-) -> Tuple[bool, List[bytes]]:
+    validated_blocks: Optional[Dict[bytes32, Tuple[int, uint64]]] = None,
+) -> Tuple[bool, List[bytes], Dict[bytes32, Tuple[int, uint64]]]:
+    """Also returns validated_blocks with the blocks validated now, the caller's copy isn't updated in a subprocess"""
     constants, summaries = bytes_to_vars(constants_dict, summaries_bytes)
     recent_chain: RecentChainData = RecentChainData.from_bytes(recent_chain_bytes)
-    return validate_recent_blocks(constants, recent_chain, summaries, shutdown_file_path)
+    if validated_blocks is None:
+        validated_blocks = {}
+    success, records = validate_recent_blocks(constants, recent_chain, summaries, shutdown_file_path, validated_blocks)
+    return success, records, validated_blocks
 
 
 def _validate_pospace_recent_chain(
@@ -1508,10 +1626,33 @@ def bytes_to_vars(constants_dict, summaries_bytes):
     summaries = []
     for summary in summaries_bytes:
         summaries.append(SubEpochSummary.from_bytes(summary))
-    constants: ConsensusConstants = dataclass_from_dict(ConsensusConstants, constants_dict)
+    constants: ConsensusConstants = constants_from_dict(constants_dict)
     return constants, summaries
 
 
+# The constants of a weight proof validation worker process, set once when the process starts so that the tasks sent
+# to it don't carry them
+_worker_constants: Optional[ConsensusConstants] = None
+
+
+def init_weight_proof_worker(constants_dict: Dict) -> None:
+    global _worker_constants
+    _worker_constants = dataclass_from_dict(ConsensusConstants, constants_dict)
+
+
+def constants_from_dict(constants_dict: Optional[Dict]) -> ConsensusConstants:
+    """constants_dict is None in the worker processes started with init_weight_proof_worker"""
+    if constants_dict is None:
+        assert _worker_constants is not None
+        return _worker_constants
+    return dataclass_from_dict(ConsensusConstants, constants_dict)
+
+
+def vdf_batch_size(num_vdfs: int, num_processes: int) -> int:
+    """Splits the VDFs in a few batches per process, so that the processes that finish early pick up more work"""
+    return max(MIN_VDF_BATCH_SIZE, math.ceil(num_vdfs / (num_processes * VDF_BATCHES_PER_PROCESS)))
+
+
 def _get_last_ses_hash(
     constants: ConsensusConstants, recent_reward_chain: List[HeaderBlock]
 ) -> Tuple[Optional[bytes32], uint32]:
@@ -1643,7 +1784,7 @@ def validate_total_iters(
 def _validate_vdf_batch(
     constants_dict, vdf_list: List[Tuple[bytes, bytes, bytes]], shutdown_file_path: Optional[pathlib.Path] = None
 ):
-    constants: ConsensusConstants = dataclass_from_dict(ConsensusConstants, constants_dict)
+    constants: ConsensusConstants = constants_from_dict(constants_dict)
 
     for vdf_proof_bytes, class_group_bytes, info in vdf_list:
         vdf = VDFProof.from_bytes(vdf_proof_bytes)
@@ -73,6 +73,10 @@ class HarvesterAPI:
             # Uses the DiskProver object to lookup qualities. This is a blocking call,
             # so it should be run in a thread pool.
             try:
+                if not filename.exists():
+                    # Removed since the last refresh of the plots, the plot manager drops it on the next one
+                    self.harvester.log.error(f"Error plot file {filename} may no longer exist")
+                    return []
                 plot_id = plot_info.prover.get_id()
                 sp_challenge_hash = ProofOfSpace.calculate_pos_challenge(
                     plot_id,
@@ -179,25 +183,21 @@ class HarvesterAPI:
             return filename, all_responses
 
         awaitables = []
-        passed = 0
-        total = 0
         with self.harvester.plot_manager:
-            for try_plot_filename, try_plot_info in self.harvester.plot_manager.plots.items():
-                try:
-                    if try_plot_filename.exists():
-                        # Passes the plot filter (does not check sp filter yet though, since we have not reached sp)
-                        # This is being executed at the beginning of the slot
-                        total += 1
-                        if ProofOfSpace.passes_plot_filter(
-                            self.harvester.constants,
-                            try_plot_info.prover.get_id(),
-                            new_challenge.challenge_hash,
-                            new_challenge.sp_hash,
-                        ):
-                            passed += 1
-                            awaitables.append(lookup_challenge(try_plot_filename, try_plot_info))
-                except Exception as e:
-                    self.harvester.log.error(f"Error plot file {try_plot_filename} may no longer exist {e}")
+            plot_filter_index = self.harvester.plot_manager.plot_filter_index
+        # Passes the plot filter (does not check sp filter yet though, since we have not reached sp)
+        # This is being executed at the beginning of the slot
+        total = len(plot_filter_index)
+        passing_plots: List[Tuple[Path, PlotInfo]] = await loop.run_in_executor(
+            self.harvester.executor,
+            plot_filter_index.passing_plots,
+            self.harvester.constants,
+            new_challenge.challenge_hash,
+            new_challenge.sp_hash,
+        )
+        passed = len(passing_plots)
+        for try_plot_filename, try_plot_info in passing_plots:
+            awaitables.append(lookup_challenge(try_plot_filename, try_plot_info))
 
         # Concurrently executes all lookups on disk, to take advantage of multiple disk parallelism
         total_proofs_found = 0
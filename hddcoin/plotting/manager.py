@@ -12,6 +12,7 @@ from chiapos import DiskProver
 
 from hddcoin.consensus.pos_quality import UI_ACTUAL_SPACE_CONSTANT_FACTOR, _expected_plot_size
 from hddcoin.plotting.util import (
+    PlotFilterIndex,
     PlotInfo,
     PlotRefreshResult,
     PlotsRefreshParameter,
@@ -116,6 +117,7 @@ class Cache:
 
 class PlotManager:
     plots: Dict[Path, PlotInfo]
+    plot_filter_index: PlotFilterIndex
     plot_filename_paths: Dict[str, Tuple[str, Set[str]]]
     plot_filename_paths_lock: threading.Lock
     failed_to_open_filenames: Dict[Path, int]
@@ -145,6 +147,7 @@ class PlotManager:
     ):
         self.root_path = root_path
         self.plots = {}
+        self.plot_filter_index = PlotFilterIndex([], b"")
         self.plot_filename_paths = {}
         self.plot_filename_paths_lock = threading.Lock()
         self.failed_to_open_filenames = {}
@@ -418,6 +421,7 @@ class PlotManager:
             def plot_removed(test_path: Path):
                 return not test_path.exists() or test_path.parent not in plot_directories
 
+            removed_plots: Set[Path] = set()
             with self.plot_filename_paths_lock:
                 filenames_to_remove: List[str] = []
                 for plot_filename, paths_entry in self.plot_filename_paths.items():
@@ -427,6 +431,7 @@ class PlotManager:
                         filenames_to_remove.append(plot_filename)
                         if loaded_plot in self.plots:
                             del self.plots[loaded_plot]
+                            removed_plots.add(loaded_plot)
                         result.removed += 1
                         # No need to check the duplicates here since we drop the whole entry
                         continue
@@ -446,7 +451,15 @@ class PlotManager:
             for new_plot in executor.map(process_file, plot_paths):
                 if new_plot is not None:
                     plots_refreshed[Path(new_plot.prover.get_filename())] = new_plot
+            # Plots that no longer exist are dropped here, the harvester doesn't check them on each signage point
+            added_plots: List[Tuple[Path, PlotInfo]] = []
+            for plot_path, plot_info in plots_refreshed.items():
+                if self.plots.get(plot_path) is not plot_info:
+                    if plot_path in self.plots:
+                        removed_plots.add(plot_path)
+                    added_plots.append((plot_path, plot_info))
             self.plots.update(plots_refreshed)
+            self.plot_filter_index = self.plot_filter_index.updated(removed_plots, added_plots)
 
         result.duration = time.time() - start_time
 
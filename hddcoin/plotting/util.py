@@ -1,13 +1,15 @@
+import hashlib
 import logging
 
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 from blspy import G1Element, PrivateKey
 from chiapos import DiskProver
 
+from hddcoin.consensus.constants import ConsensusConstants
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.util.config import load_config, save_config
 
@@ -32,6 +34,51 @@ class PlotInfo:
     time_modified: float
 
 
+@dataclass(frozen=True)
+class PlotFilterIndex:
+    """
+    The loaded plots with their ids in one buffer, so that the plot filter is applied to all of them in one pass. The
+    `PlotManager` replaces it with an updated copy when plots are loaded or removed, readers can keep using the old one.
+    """
+
+    plots: List[Tuple[Path, PlotInfo]]
+    plot_ids: bytes
+
+    def __len__(self) -> int:
+        return len(self.plots)
+
+    def updated(self, removed: Set[Path], added: List[Tuple[Path, PlotInfo]]) -> "PlotFilterIndex":
+        plots = self.plots
+        plot_ids = self.plot_ids
+        if len(removed) > 0:
+            kept = [index for index, (path, _) in enumerate(plots) if path not in removed]
+            plots = [plots[index] for index in kept]
+            plot_ids = b"".join(plot_ids[32 * index : 32 * index + 32] for index in kept)
+        if len(added) > 0:
+            plots = plots + added
+            plot_ids = plot_ids + b"".join(plot_info.prover.get_id() for _, plot_info in added)
+        return PlotFilterIndex(plots, plot_ids)
+
+    def passing_plots(
+        self, constants: ConsensusConstants, challenge_hash: bytes32, signage_point: bytes32
+    ) -> List[Tuple[Path, PlotInfo]]:
+        """
+        The plots that pass the plot filter, see `ProofOfSpace.passes_plot_filter`. A hash starts with the required
+        number of zero bits if it is below 2 ** (256 - bits), compared as big endian bytes.
+        """
+        if constants.NUMBER_ZERO_BITS_PLOT_FILTER == 0:
+            return list(self.plots)
+        threshold = (1 << (256 - constants.NUMBER_ZERO_BITS_PLOT_FILTER)).to_bytes(32, "big")
+        suffix = challenge_hash + signage_point
+        plot_ids = self.plot_ids
+        sha256 = hashlib.sha256
+        return [
+            plot
+            for plot, offset in zip(self.plots, range(0, len(plot_ids), 32))
+            if sha256(plot_ids[offset : offset + 32] + suffix).digest() < threshold
+        ]
+
+
 class PlotRefreshEvents(Enum):
     """
     This are the events the `PlotManager` will trigger with the callback during a full refresh cycle:
@@ -97,3 +97,4 @@ class ProtocolMessageTypes(Enum):
     respond_children = 75
     request_ses_hashes = 76
     respond_ses_hashes = 77
+    compressed_coin_state_update = 78
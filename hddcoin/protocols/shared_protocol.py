@@ -17,6 +17,13 @@ Note: When changing this file, also change protocol_message_types.py
 # These are passed in as uint16 into the Handshake
 class Capability(IntEnum):
     BASE = 1  # Base capability just means it supports the hddcoin protocol at mainnet
+    ZLIB_COIN_STATE_UPDATES = 2  # Accepts zlib compressed coin state updates
+
+
+capabilities = [
+    (uint16(Capability.BASE.value), "1"),
+    (uint16(Capability.ZLIB_COIN_STATE_UPDATES.value), "1"),
+]
 
 
 @dataclass(frozen=True)
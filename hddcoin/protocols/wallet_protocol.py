@@ -202,6 +202,13 @@ class CoinStateUpdate(Streamable):
     items: List[CoinState]
 
 
+@dataclass(frozen=True)
+@streamable
+class CompressedCoinStateUpdate(Streamable):
+    # zlib compressed CoinStateUpdate, sent to peers with the ZLIB_COIN_STATE_UPDATES capability
+    data: bytes
+
+
 @dataclass(frozen=True)
 @streamable
 class RequestChildren(Streamable):
@@ -53,6 +53,7 @@ class FullNodeRpcApi:
             "/get_all_mempool_tx_ids": self.get_all_mempool_tx_ids,
             "/get_all_mempool_items": self.get_all_mempool_items,
             "/get_mempool_item_by_tx_id": self.get_mempool_item_by_tx_id,
+            "/get_fee_estimate": self.get_fee_estimate,
         }
 
     async def _state_changed(self, change: str) -> List[WsRpcMessage]:
@@ -140,8 +141,10 @@ class FullNodeRpcApi:
 
         if self.service.mempool_manager is not None:
             mempool_size = len(self.service.mempool_manager.mempool.spends)
+            mempool_prevalidation = self.service.mempool_manager.get_pre_validation_stats()
         else:
             mempool_size = 0
+            mempool_prevalidation = {}
         if self.service.server is not None:
             is_connected = len(self.service.server.get_full_node_connections()) > 0
         else:
@@ -163,6 +166,7 @@ class FullNodeRpcApi:
                 "sub_slot_iters": sub_slot_iters,
                 "space": space["space"],
                 "mempool_size": mempool_size,
+                "mempool_prevalidation": mempool_prevalidation,
             },
         }
         self.cached_blockchain_state = dict(response["blockchain_state"])
@@ -600,3 +604,32 @@ class FullNodeRpcApi:
             raise ValueError(f"Tx id 0x{tx_id.hex()} not in the mempool")
 
         return {"mempool_item": item}
+
+    async def get_fee_estimate(self, request: Dict) -> Optional[Dict]:
+        """
+        Fee per cost to be confirmed within each of the target numbers of transaction blocks, and the fee for a
+        transaction of the given cost if there is one in the request. Estimated from the items confirmed by the recent
+        blocks, and the current mempool.
+        """
+        if "target_blocks" not in request:
+            raise ValueError("No target_blocks in request")
+        target_blocks: List[int] = [int(target) for target in request["target_blocks"]]
+        cost: Optional[int] = None
+        if request.get("cost") is not None:
+            cost = int(request["cost"])
+            if cost < 1:
+                raise ValueError("cost must be positive")
+
+        fee_rates = [
+            self.service.mempool_manager.get_fee_rate_estimate(target, 0 if cost is None else cost)
+            for target in target_blocks
+        ]
+        response: Dict = {
+            "target_blocks": target_blocks,
+            "fee_rates": fee_rates,
+            "peak_height": self.service.mempool_manager.fee_estimator.height,
+        }
+        if cost is not None:
+            # One more mojo, the fee per cost has to be over the minimum to enter a full mempool
+            response["fees"] = [0 if fee_rate == 0 else int(fee_rate * cost) + 1 for fee_rate in fee_rates]
+        return response
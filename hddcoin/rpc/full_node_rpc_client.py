@@ -204,6 +204,12 @@ class FullNodeRpcClient(RpcClient):
         except Exception:
             return None
 
+    async def get_fee_estimate(self, target_blocks: List[int], cost: Optional[int] = None) -> Dict:
+        request: Dict[str, Any] = {"target_blocks": target_blocks}
+        if cost is not None:
+            request["cost"] = cost
+        return await self.fetch("get_fee_estimate", request)
+
     async def get_recent_signage_point_or_eos(
         self, sp_hash: Optional[bytes32], challenge_hash: Optional[bytes32]
     ) -> Optional[Any]:
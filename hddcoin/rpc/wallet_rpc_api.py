@@ -1,11 +1,10 @@
 import asyncio
 import logging
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any
 
 from blspy import PrivateKey, G1Element
 
-from hddcoin.consensus.block_rewards import calculate_base_farmer_reward
 from hddcoin.pools.pool_wallet import PoolWallet
 from hddcoin.pools.pool_wallet_info import create_pool_state, FARMING_TO_POOL, PoolWalletInfo, PoolState
 from hddcoin.protocols.protocol_message_types import ProtocolMessageTypes
@@ -21,6 +20,7 @@ from hddcoin.util.path import path_from_root
 from hddcoin.util.ws_message import WsRpcMessage, create_payload_dict
 from hddcoin.wallet.cc_wallet.cat_constants import DEFAULT_CATS
 from hddcoin.wallet.cc_wallet.cc_wallet import CCWallet
+from hddcoin.wallet.farming_rewards import FARMING_REWARD_HEIGHT_BUCKET, SECONDS_PER_DAY, FarmingRewards
 from hddcoin.wallet.derive_keys import master_sk_to_singleton_owner_sk, master_sk_to_wallet_sk_unhardened
 from hddcoin.wallet.rl_wallet.rl_wallet import RLWallet
 from hddcoin.wallet.derive_keys import master_sk_to_farmer_sk, master_sk_to_pool_sk, master_sk_to_wallet_sk
@@ -37,6 +37,8 @@ from hddcoin.consensus.coinbase import create_puzzlehash_for_pk
 
 # Timeout for response from wallet/full node for sending a transaction
 TIMEOUT = 30
+# Maximum number of transactions in a page of get_transactions when paginating with a cursor
+MAX_TRANSACTIONS_PAGE_SIZE = 1000
 
 log = logging.getLogger(__name__)
 
@@ -311,9 +313,8 @@ class WalletRpcApi:
             wallets: List[WalletInfo] = await self.service.wallet_state_manager.get_all_wallet_info_entries()
             for w in wallets:
                 wallet = self.service.wallet_state_manager.wallets[w.id]
-                unspent = await self.service.wallet_state_manager.coin_store.get_unspent_coins_for_wallet(w.id)
-                balance = await wallet.get_confirmed_balance(unspent)
-                pending_balance = await wallet.get_unconfirmed_balance(unspent)
+                balance = await wallet.get_confirmed_balance()
+                pending_balance = await wallet.get_unconfirmed_balance()
 
                 if (balance + pending_balance) > 0:
                     walletBalance = True
@@ -579,30 +580,32 @@ class WalletRpcApi:
                     "pending_coin_removal_count": 0,
                 }
         else:
+            # Balances come from the coin and transaction store caches, only the max send amount still needs to go
+            # through the coins
+            balance = await wallet.get_confirmed_balance()
+            pending_balance = await wallet.get_unconfirmed_balance()
+            spendable_balance = await wallet.get_spendable_balance()
+            pending_change = await wallet.get_pending_change_balance()
             async with self.service.wallet_state_manager.lock:
-                unspent_records = await self.service.wallet_state_manager.coin_store.get_unspent_coins_for_wallet(
-                    wallet_id
-                )
-                balance = await wallet.get_confirmed_balance(unspent_records)
-                pending_balance = await wallet.get_unconfirmed_balance(unspent_records)
-                spendable_balance = await wallet.get_spendable_balance(unspent_records)
-                pending_change = await wallet.get_pending_change_balance()
-                max_send_amount = await wallet.get_max_send_amount(unspent_records)
-
-                unconfirmed_removals: Dict[
-                    bytes32, Coin
-                ] = await wallet.wallet_state_manager.unconfirmed_removals_for_wallet(wallet_id)
-                wallet_balance = {
-                    "wallet_id": wallet_id,
-                    "confirmed_wallet_balance": balance,
-                    "unconfirmed_wallet_balance": pending_balance,
-                    "spendable_balance": spendable_balance,
-                    "pending_change": pending_change,
-                    "max_send_amount": max_send_amount,
-                    "unspent_coin_count": len(unspent_records),
-                    "pending_coin_removal_count": len(unconfirmed_removals),
-                }
-                self.balance_cache[wallet_id] = wallet_balance
+                max_send_amount = await wallet.get_max_send_amount()
+
+            unspent_coin_count = await self.service.wallet_state_manager.coin_store.get_unspent_coin_count_for_wallet(
+                wallet_id
+            )
+            unconfirmed_removals: Dict[
+                bytes32, Coin
+            ] = await wallet.wallet_state_manager.unconfirmed_removals_for_wallet(wallet_id)
+            wallet_balance = {
+                "wallet_id": wallet_id,
+                "confirmed_wallet_balance": balance,
+                "unconfirmed_wallet_balance": pending_balance,
+                "spendable_balance": spendable_balance,
+                "pending_change": pending_change,
+                "max_send_amount": max_send_amount,
+                "unspent_coin_count": unspent_coin_count,
+                "pending_coin_removal_count": len(unconfirmed_removals),
+            }
+            self.balance_cache[wallet_id] = wallet_balance
 
         return {"wallet_balance": wallet_balance}
 
@@ -622,6 +625,8 @@ class WalletRpcApi:
         assert self.service.wallet_state_manager is not None
 
         wallet_id = int(request["wallet_id"])
+        if "limit" in request or "cursor" in request:
+            return await self._get_transactions_page(wallet_id, request)
         if "start" in request:
             start = request["start"]
         else:
@@ -637,6 +642,47 @@ class WalletRpcApi:
             "wallet_id": wallet_id,
         }
 
+    async def _get_transactions_page(self, wallet_id: int, request: Dict) -> Dict:
+        """
+        Returns a page of transactions, most recent first. Pass the returned next_cursor as cursor to get the next
+        page, next_cursor is None after the last page. Can be filtered by type (one or a list of transaction types),
+        confirmed and to_address.
+        """
+        assert self.service.wallet_state_manager is not None
+
+        limit = int(request.get("limit", MAX_TRANSACTIONS_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        limit = min(limit, MAX_TRANSACTIONS_PAGE_SIZE)
+        after: Optional[Tuple[int, bytes32]] = None
+        if request.get("cursor") is not None:
+            after = (
+                int(request["cursor"]["created_at_time"]),
+                bytes32(hexstr_to_bytes(request["cursor"]["tx_id"])),
+            )
+        types: Optional[List[int]] = None
+        if request.get("type") is not None:
+            types = [int(t) for t in request["type"]] if isinstance(request["type"], list) else [int(request["type"])]
+        confirmed: Optional[bool] = None
+        if request.get("confirmed") is not None:
+            confirmed = bool(request["confirmed"])
+        to_puzzle_hash: Optional[bytes32] = None
+        if request.get("to_address") is not None:
+            to_puzzle_hash = decode_puzzle_hash(request["to_address"])
+
+        transactions = await self.service.wallet_state_manager.tx_store.get_transactions_page(
+            wallet_id, limit, after, types, confirmed, to_puzzle_hash
+        )
+        next_cursor: Optional[Dict] = None
+        if len(transactions) == limit:
+            last = transactions[-1]
+            next_cursor = {"created_at_time": last.created_at_time, "tx_id": last.name.hex()}
+        return {
+            "transactions": [tr.to_json_dict_convenience(self.service.config) for tr in transactions],
+            "wallet_id": wallet_id,
+            "next_cursor": next_cursor,
+        }
+
     async def get_transaction_count(self, request: Dict) -> Dict:
         assert self.service.wallet_state_manager is not None
 
@@ -1071,27 +1117,58 @@ class WalletRpcApi:
         return {"status": "SUCCESS"}
 
     async def get_farmed_amount(self, request):
-        tx_records: List[TransactionRecord] = await self.service.wallet_state_manager.tx_store.get_farming_rewards()
+        """
+        Returns the farming rewards of all the wallets. With "rollup": "day" or "height", also returns the rewards
+        farmed per day (in seconds since the epoch) or per bucket of heights, as a time series.
+        """
+        assert self.service.wallet_state_manager is not None
+        tx_store = self.service.wallet_state_manager.tx_store
+        totals = self._farmed_amount(tx_store.get_farming_reward_totals().items())
+        rollup = request.get("rollup")
+        if rollup is None:
+            return totals
+
+        if rollup == "day":
+            bucket_index, bucket_size = 2, SECONDS_PER_DAY
+        elif rollup == "height":
+            bucket_index, bucket_size = 3, FARMING_REWARD_HEIGHT_BUCKET
+        else:
+            raise ValueError(f"Unknown rollup {rollup}, use day or height")
+        buckets: Dict[int, List[Tuple[Tuple[int, int], FarmingRewards]]] = {}
+        for key, rewards in tx_store.get_farming_reward_rollups().items():
+            buckets.setdefault(key[bucket_index], []).append(((key[0], key[1]), rewards))
+        series = []
+        for bucket in sorted(buckets.keys()):
+            entry = self._farmed_amount(buckets[bucket])
+            if entry["farmed_amount"] == 0:
+                continue
+            entry["start"] = bucket * bucket_size
+            series.append(entry)
+        totals["rollup"] = series
+        return totals
+
+    def _farmed_amount(self, rewards_by_wallet: Iterable[Tuple[Tuple[int, int], FarmingRewards]]) -> Dict:
+        assert self.service.wallet_state_manager is not None
+        wallets = self.service.wallet_state_manager.wallets
         amount = 0
         pool_reward_amount = 0
         farmer_reward_amount = 0
         fee_amount = 0
         last_height_farmed = 0
-        for record in tx_records:
-            if record.wallet_id not in self.service.wallet_state_manager.wallets:
+        for (wallet_id, type), rewards in rewards_by_wallet:
+            if wallet_id not in wallets:
                 continue
-            if record.type == TransactionType.COINBASE_REWARD:
-                if self.service.wallet_state_manager.wallets[record.wallet_id].type() == WalletType.POOLING_WALLET:
+            if type == TransactionType.COINBASE_REWARD:
+                if wallets[uint32(wallet_id)].type() == WalletType.POOLING_WALLET:
                     # Don't add pool rewards for pool wallets.
                     continue
-                pool_reward_amount += record.amount
-            height = record.height_farmed(self.service.constants.GENESIS_CHALLENGE)
-            if record.type == TransactionType.FEE_REWARD:
-                fee_amount += record.amount - calculate_base_farmer_reward(height)
-                farmer_reward_amount += calculate_base_farmer_reward(height)
-            if height > last_height_farmed:
-                last_height_farmed = height
-            amount += record.amount
+                pool_reward_amount += rewards.amount
+            if type == TransactionType.FEE_REWARD:
+                fee_amount += rewards.amount - rewards.base_farmer_reward
+                farmer_reward_amount += rewards.base_farmer_reward
+            if rewards.last_height_farmed > last_height_farmed:
+                last_height_farmed = rewards.last_height_farmed
+            amount += rewards.amount
 
         assert amount == pool_reward_amount + farmer_reward_amount + fee_amount
         return {
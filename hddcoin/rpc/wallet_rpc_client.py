@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 
 from hddcoin.pools.pool_wallet_info import PoolWalletInfo
 from hddcoin.rpc.rpc_client import RpcClient
@@ -120,6 +120,46 @@ class WalletRpcClient(RpcClient):
         )
         return [TransactionRecord.from_json_dict_convenience(tx) for tx in res["transactions"]]
 
+    async def get_transactions_page(
+        self,
+        wallet_id: str,
+        limit: int,
+        cursor: Optional[Dict] = None,
+        type: Optional[List[int]] = None,
+        confirmed: Optional[bool] = None,
+        to_address: Optional[str] = None,
+    ) -> Tuple[List[TransactionRecord], Optional[Dict]]:
+        """Returns a page of transactions, most recent first, and the cursor of the next page."""
+        request: Dict[str, Any] = {"wallet_id": wallet_id, "limit": limit, "cursor": cursor}
+        if type is not None:
+            request["type"] = type
+        if confirmed is not None:
+            request["confirmed"] = confirmed
+        if to_address is not None:
+            request["to_address"] = to_address
+        res = await self.fetch("get_transactions", request)
+        return [TransactionRecord.from_json_dict_convenience(tx) for tx in res["transactions"]], res["next_cursor"]
+
+    async def iter_transactions(
+        self,
+        wallet_id: str,
+        page_size: int = 500,
+        type: Optional[List[int]] = None,
+        confirmed: Optional[bool] = None,
+        to_address: Optional[str] = None,
+    ) -> AsyncIterator[TransactionRecord]:
+        """
+        Yields all the transactions of the wallet, most recent first, fetching them one page at a time so that the
+        whole history is never held in memory.
+        """
+        cursor: Optional[Dict] = None
+        while True:
+            txs, cursor = await self.get_transactions_page(wallet_id, page_size, cursor, type, confirmed, to_address)
+            for tx in txs:
+                yield tx
+            if cursor is None:
+                return
+
     async def get_transaction_count(
         self,
         wallet_id: str,
@@ -181,8 +221,9 @@ class WalletRpcClient(RpcClient):
     async def create_backup(self, file_path: Path) -> None:
         return await self.fetch("create_backup", {"file_path": str(file_path.resolve())})
 
-    async def get_farmed_amount(self) -> Dict:
-        return await self.fetch("get_farmed_amount", {})
+    async def get_farmed_amount(self, rollup: Optional[str] = None) -> Dict:
+        request = {} if rollup is None else {"rollup": rollup}
+        return await self.fetch("get_farmed_amount", request)
 
     async def create_signed_transaction(
         self, additions: List[Dict], coins: List[Coin] = None, fee: uint64 = uint64(0)
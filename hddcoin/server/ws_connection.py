@@ -2,7 +2,7 @@ import asyncio
 import logging
 import time
 import traceback
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from aiohttp import WSCloseCode, WSMessage, WSMsgType
 
@@ -10,7 +10,7 @@ from hddcoin.cmds.init_funcs import hddcoin_full_version_str
 from hddcoin.protocols.protocol_message_types import ProtocolMessageTypes
 from hddcoin.protocols.protocol_state_machine import message_response_ok
 from hddcoin.protocols.protocol_timing import INTERNAL_PROTOCOL_ERROR_BAN_SECONDS
-from hddcoin.protocols.shared_protocol import Capability, Handshake
+from hddcoin.protocols.shared_protocol import Capability, Handshake, capabilities
 from hddcoin.server.outbound_message import Message, NodeType, make_msg
 from hddcoin.server.rate_limits import RateLimiter
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
@@ -25,6 +25,19 @@ from hddcoin.util.network import class_for_type, is_localhost
 LENGTH_BYTES: int = 4
 
 
+def known_active_capabilities(values: List[Tuple[uint16, str]]) -> List[Capability]:
+    """The capabilities that the peer enabled in its handshake and that we know of."""
+    known: List[Capability] = []
+    for value, setting in values:
+        if setting != "1":
+            continue
+        try:
+            known.append(Capability(value))
+        except ValueError:
+            pass
+    return known
+
+
 class WSHDDcoinConnection:
     """
     Represents a connection to another node. Local host and port are ours, while peer host and
@@ -108,6 +121,8 @@ class WSHDDcoinConnection:
         # Used by crawler/dns introducer
         self.version = None
         self.protocol_version = ""
+        # Set after the handshake
+        self.peer_capabilities: List[Capability] = []
 
     async def perform_handshake(self, network_id: str, protocol_version: str, server_port: int, local_type: NodeType):
         if self.is_outbound:
@@ -119,7 +134,7 @@ class WSHDDcoinConnection:
                     hddcoin_full_version_str(),
                     uint16(server_port),
                     uint8(local_type.value),
-                    [(uint16(Capability.BASE.value), "1")],
+                    capabilities,
                 ),
             )
             assert outbound_handshake is not None
@@ -145,6 +160,7 @@ class WSHDDcoinConnection:
             self.protocol_version = inbound_handshake.protocol_version
             self.peer_server_port = inbound_handshake.server_port
             self.connection_type = NodeType(inbound_handshake.node_type)
+            self.peer_capabilities = known_active_capabilities(inbound_handshake.capabilities)
 
         else:
             try:
@@ -175,12 +191,13 @@ class WSHDDcoinConnection:
                     hddcoin_full_version_str(),
                     uint16(server_port),
                     uint8(local_type.value),
-                    [(uint16(Capability.BASE.value), "1")],
+                    capabilities,
                 ),
             )
             await self._send_message(outbound_handshake)
             self.peer_server_port = inbound_handshake.server_port
             self.connection_type = NodeType(inbound_handshake.node_type)
+            self.peer_capabilities = known_active_capabilities(inbound_handshake.capabilities)
 
         self.outbound_task = asyncio.create_task(self.outbound_handler())
         self.inbound_task = asyncio.create_task(self.inbound_handler())
@@ -27,7 +27,13 @@ class Coin(Streamable):
         # significant bit is set, to encode it as a positive number. This
         # despite "amount" being unsigned. This way, a CLVM program can generate
         # these hashes easily.
-        return std_hash(self.parent_coin_info + self.puzzle_hash + int_to_bytes(self.amount))
+
+        # The hash is computed once, like the hashes of other immutable streamables
+        cached = self.__dict__.get("_cached_hash")
+        if cached is None:
+            cached = std_hash(self.parent_coin_info + self.puzzle_hash + int_to_bytes(self.amount))
+            self.__dict__["_cached_hash"] = cached
+        return cached
 
     def name(self) -> bytes32:
         return self.get_hash()
@@ -53,6 +53,7 @@ def make_sized_bytes(size: int):
         return "<%s: %s>" % (self.__class__.__name__, str(self))
 
     namespace = dict(
+        SIZE=size,
         __new__=__new__,
         parse=parse,
         stream=stream,
@@ -153,6 +153,7 @@ class Err(Enum):
     COIN_AMOUNT_NEGATIVE = 124
     INTERNAL_PROTOCOL_ERROR = 125
     INVALID_SPEND_BUNDLE = 126
+    TRANSACTION_QUEUE_FULL = 127
 
 
 class ValidationError(Exception):
@@ -5,16 +5,20 @@ from __future__ import annotations
 import dataclasses
 import io
 import pprint
+import struct
 import sys
 from enum import Enum
-from typing import Any, BinaryIO, Dict, List, Tuple, Type, Callable, Optional, Iterator
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Tuple, Type, Callable, Optional, Iterator
 
 from blspy import G1Element, G2Element, PrivateKey
+from clvm_rs import serialized_length
 
+from hddcoin.types.blockchain_format.program import Program, SerializedProgram
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.util.byte_types import hexstr_to_bytes
 from hddcoin.util.hash import std_hash
 from hddcoin.util.ints import int64, int512, uint32, uint64, uint128
+from hddcoin.util.struct_stream import StructStream
 from hddcoin.util.type_checking import is_type_List, is_type_SpecificOptional, is_type_Tuple, strictdataclass
 
 if sys.version_info < (3, 8):
@@ -257,6 +261,455 @@ def parse_str(f: BinaryIO) -> str:
     return bytes.decode(str_read_bytes, "utf-8")
 
 
+# Parsers that read an item from a memoryview at a position, and return it with the position after it. Slices are only
+# copied into the bytes of the parsed items, not into a stream. The parsers are built once per type and cached.
+ViewParser = Callable[[memoryview, int], Tuple[Any, int]]
+# Functions that return the position after the item at a position, without building it
+ViewSkipper = Callable[[memoryview, int], int]
+
+VIEW_PARSERS_FOR_TYPE: Dict[Any, ViewParser] = {}
+LAZY_VIEW_PARSERS_FOR_STREAMABLE_CLASS: Dict[Any, ViewParser] = {}
+VIEW_SKIPPERS_FOR_TYPE: Dict[Any, ViewSkipper] = {}
+# Programs are measured in chunks of at least this size, so a program doesn't copy the rest of the buffer
+PROGRAM_LENGTH_CHUNK_SIZE = 1024
+
+
+def view_parse_uint32(buf: memoryview, pos: int) -> Tuple[int, int]:
+    end = pos + 4
+    assert end <= len(buf)  # Checks for EOF
+    return int.from_bytes(buf[pos:end], "big"), end
+
+
+def view_parse_bool(buf: memoryview, pos: int) -> Tuple[bool, int]:
+    assert pos < len(buf)  # Checks for EOF
+    bool_byte = buf[pos]
+    if bool_byte == 0:
+        return False, pos + 1
+    elif bool_byte == 1:
+        return True, pos + 1
+    else:
+        raise ValueError("Bool byte must be 0 or 1")
+
+
+def view_parse_bytes(buf: memoryview, pos: int) -> Tuple[bytes, int]:
+    size, pos = view_parse_uint32(buf, pos)
+    end = pos + size
+    assert end <= len(buf)
+    return bytes(buf[pos:end]), end
+
+
+def view_parse_str(buf: memoryview, pos: int) -> Tuple[str, int]:
+    size, pos = view_parse_uint32(buf, pos)
+    end = pos + size
+    assert end <= len(buf)  # Checks for EOF
+    return str(buf[pos:end], "utf-8"), end
+
+
+def program_length(buf: memoryview, pos: int) -> int:
+    """Length of the serialized CLVM program at pos"""
+    chunk_size = PROGRAM_LENGTH_CHUNK_SIZE
+    while True:
+        end = min(pos + chunk_size, len(buf))
+        try:
+            return serialized_length(bytes(buf[pos:end]))
+        except Exception:
+            # The program is longer than the chunk, unless the chunk already goes to the end
+            if end == len(buf):
+                raise
+            chunk_size *= 4
+
+
+def fixed_size_of_type(f_type: Type) -> Optional[int]:
+    """The size of the serialization of the type if it's always the same, None otherwise"""
+    if f_type is bool:
+        return 1
+    if isinstance(f_type, type) and issubclass(f_type, StructStream):
+        return struct.calcsize(f_type.PACK)
+    if f_type is uint128:
+        return 16
+    if f_type is int512:
+        return 65
+    if isinstance(f_type, type) and issubclass(f_type, bytes) and hasattr(f_type, "SIZE"):
+        return f_type.SIZE  # type: ignore
+    if is_type_Tuple(f_type):
+        sizes = [fixed_size_of_type(inner_type) for inner_type in get_args(f_type)]
+        return None if None in sizes else sum(sizes)  # type: ignore
+    if f_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS:
+        sizes = [fixed_size_of_type(field_type) for field_type in getattr(f_type, "__annotations__", {}).values()]
+        return None if None in sizes else sum(sizes)  # type: ignore
+    if getattr(f_type, "__name__", None) in size_hints:
+        return size_hints[f_type.__name__]
+    return None
+
+
+def view_parser_for_type(f_type: Type) -> ViewParser:
+    parse_f = VIEW_PARSERS_FOR_TYPE.get(f_type)
+    if parse_f is None:
+        parse_f = build_view_parser(f_type)
+        VIEW_PARSERS_FOR_TYPE[f_type] = parse_f
+    return parse_f
+
+
+def build_view_parser(f_type: Type) -> ViewParser:
+    """Same dispatch as Streamable.function_to_parse_one_item"""
+    if f_type is bool:
+        return view_parse_bool
+    if is_type_SpecificOptional(f_type):
+        parse_inner_f = view_parser_for_type(get_args(f_type)[0])
+
+        def parse_optional_view(buf: memoryview, pos: int) -> Tuple[Any, int]:
+            assert pos < len(buf)  # Checks for EOF
+            is_present = buf[pos]
+            if is_present == 0:
+                return None, pos + 1
+            elif is_present == 1:
+                return parse_inner_f(buf, pos + 1)
+            else:
+                raise ValueError("Optional must be 0 or 1")
+
+        return parse_optional_view
+    if hasattr(f_type, "parse"):
+        if f_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS:
+            return class_view_parser(f_type)
+        size = fixed_size_of_type(f_type)
+        if isinstance(f_type, type) and issubclass(f_type, StructStream):
+            unpack_from = struct.Struct(f_type.PACK).unpack_from
+            assert size is not None
+
+            def parse_struct_stream_view(buf: memoryview, pos: int) -> Tuple[Any, int]:
+                end = pos + size  # type: ignore
+                assert end <= len(buf)
+                # The unpacked value always fits, no need for the range check of StructStream.__new__
+                return int.__new__(f_type, unpack_from(buf, pos)[0]), end
+
+            return parse_struct_stream_view
+        if isinstance(f_type, type) and issubclass(f_type, bytes) and size is not None:
+
+            def parse_sized_bytes_view(buf: memoryview, pos: int) -> Tuple[Any, int]:
+                end = pos + size  # type: ignore
+                assert end <= len(buf)
+                return bytes.__new__(f_type, buf[pos:end]), end
+
+            return parse_sized_bytes_view
+        if isinstance(f_type, type) and issubclass(f_type, (Program, SerializedProgram)):
+
+            def parse_program_view(buf: memoryview, pos: int) -> Tuple[Any, int]:
+                end = pos + program_length(buf, pos)
+                return f_type.from_bytes(bytes(buf[pos:end])), end
+
+            return parse_program_view
+
+        def parse_custom_view(buf: memoryview, pos: int) -> Tuple[Any, int]:
+            if size is not None:
+                end = pos + size
+                assert end <= len(buf)
+                f = io.BytesIO(buf[pos:end])
+            else:
+                f = io.BytesIO(buf[pos:])
+            return f_type.parse(f), pos + f.tell()
+
+        return parse_custom_view
+    if f_type == bytes:
+        return view_parse_bytes
+    if is_type_List(f_type):
+        parse_inner_f = view_parser_for_type(get_args(f_type)[0])
+
+        def parse_list_view(buf: memoryview, pos: int) -> Tuple[List[Any], int]:
+            list_size, pos = view_parse_uint32(buf, pos)
+            full_list = []
+            for _ in range(list_size):
+                item, pos = parse_inner_f(buf, pos)
+                full_list.append(item)
+            return full_list, pos
+
+        return parse_list_view
+    if is_type_Tuple(f_type):
+        parse_inner_fs = [view_parser_for_type(inner_type) for inner_type in get_args(f_type)]
+
+        def parse_tuple_view(buf: memoryview, pos: int) -> Tuple[Tuple[Any, ...], int]:
+            items = []
+            for parse_f in parse_inner_fs:
+                item, pos = parse_f(buf, pos)
+                items.append(item)
+            return tuple(items), pos
+
+        return parse_tuple_view
+    if hasattr(f_type, "from_bytes") and f_type.__name__ in size_hints:
+        bytes_to_read = size_hints[f_type.__name__]
+
+        def parse_size_hints_view(buf: memoryview, pos: int) -> Tuple[Any, int]:
+            end = pos + bytes_to_read
+            assert end <= len(buf)
+            return f_type.from_bytes(bytes(buf[pos:end])), end
+
+        return parse_size_hints_view
+    if f_type is str:
+        return view_parse_str
+    raise NotImplementedError(f"Type {f_type} does not have parse")
+
+
+def view_skipper_for_type(f_type: Type) -> ViewSkipper:
+    skip_f = VIEW_SKIPPERS_FOR_TYPE.get(f_type)
+    if skip_f is None:
+        skip_f = build_view_skipper(f_type)
+        VIEW_SKIPPERS_FOR_TYPE[f_type] = skip_f
+    return skip_f
+
+
+def build_view_skipper(f_type: Type) -> ViewSkipper:
+    size = fixed_size_of_type(f_type)
+    if size is not None:
+
+        def skip_fixed_size(buf: memoryview, pos: int) -> int:
+            end = pos + size  # type: ignore
+            assert end <= len(buf)
+            return end
+
+        return skip_fixed_size
+    if is_type_SpecificOptional(f_type):
+        skip_inner_f = view_skipper_for_type(get_args(f_type)[0])
+
+        def skip_optional(buf: memoryview, pos: int) -> int:
+            assert pos < len(buf)
+            if buf[pos] == 0:
+                return pos + 1
+            return skip_inner_f(buf, pos + 1)
+
+        return skip_optional
+    if f_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS or is_type_Tuple(f_type):
+        if is_type_Tuple(f_type):
+            inner_types = list(get_args(f_type))
+        else:
+            inner_types = list(getattr(f_type, "__annotations__", {}).values())
+        skip_inner_fs = [view_skipper_for_type(inner_type) for inner_type in inner_types]
+
+        def skip_items(buf: memoryview, pos: int) -> int:
+            for skip_f in skip_inner_fs:
+                pos = skip_f(buf, pos)
+            return pos
+
+        return skip_items
+    if f_type == bytes or f_type is str:
+
+        def skip_sized(buf: memoryview, pos: int) -> int:
+            length, pos = view_parse_uint32(buf, pos)
+            assert pos + length <= len(buf)
+            return pos + length
+
+        return skip_sized
+    if is_type_List(f_type):
+        inner_type = get_args(f_type)[0]
+        inner_size = fixed_size_of_type(inner_type)
+        if inner_size is not None:
+
+            def skip_fixed_size_list(buf: memoryview, pos: int) -> int:
+                list_size, pos = view_parse_uint32(buf, pos)
+                end = pos + list_size * inner_size  # type: ignore
+                assert end <= len(buf)
+                return end
+
+            return skip_fixed_size_list
+        skip_inner_f = view_skipper_for_type(inner_type)
+
+        def skip_list(buf: memoryview, pos: int) -> int:
+            list_size, pos = view_parse_uint32(buf, pos)
+            for _ in range(list_size):
+                pos = skip_inner_f(buf, pos)
+            return pos
+
+        return skip_list
+    if isinstance(f_type, type) and issubclass(f_type, (Program, SerializedProgram)):
+        return lambda buf, pos: pos + program_length(buf, pos)
+    # Anything else is skipped by parsing it
+    parse_f = view_parser_for_type(f_type)
+    return lambda buf, pos: parse_f(buf, pos)[1]
+
+
+def is_lazy_field_type(f_type: Type) -> bool:
+    """Lists of streamables are decoded on access, when parsed lazily"""
+    return is_type_List(f_type) and get_args(f_type)[0] in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS
+
+
+def build_class_view_parser(cls: Type, lazy: bool) -> ViewParser:
+    """
+    Generates the parser of a streamable class, with a line per field that stores the parsed value in the __dict__ of the
+    new object, without the checks of __init__ and __setattr__ of strictdataclass. If lazy, the fields that are lists
+    of streamables are only skipped over, the position where they start is stored in _lazy_fields for __getattr__.
+    """
+    fields = getattr(cls, "__annotations__", {})
+    lines = ["def parse(buf, pos):", "    obj = new_object(cls)", "    d = obj.__dict__"]
+    namespace: Dict[str, Any] = {"cls": cls, "new_object": object.__new__}
+    has_lazy_fields = False
+    for index, (field_name, field_type) in enumerate(fields.items()):
+        if lazy and is_lazy_field_type(field_type):
+            if not has_lazy_fields:
+                lines.append("    lazy = {}")
+                has_lazy_fields = True
+            namespace[f"parse_{index}"] = view_parser_for_type(field_type)
+            namespace[f"skip_{index}"] = view_skipper_for_type(field_type)
+            lines.append(f"    lazy[{field_name!r}] = (parse_{index}, buf, pos)")
+            lines.append(f"    pos = skip_{index}(buf, pos)")
+        else:
+            namespace[f"parse_{index}"] = view_parser_for_type(field_type)
+            lines.append(f"    d[{field_name!r}], pos = parse_{index}(buf, pos)")
+    if has_lazy_fields:
+        lines.append("    d['_lazy_fields'] = lazy")
+    lines.append("    return obj, pos")
+    exec("\n".join(lines), namespace)
+    return namespace["parse"]
+
+
+def class_view_parser(cls: Type) -> ViewParser:
+    parse_f = VIEW_PARSERS_FOR_TYPE.get(cls)
+    if parse_f is None:
+        parse_f = build_class_view_parser(cls, lazy=False)
+        VIEW_PARSERS_FOR_TYPE[cls] = parse_f
+    return parse_f
+
+
+def lazy_class_view_parser(cls: Type) -> ViewParser:
+    parse_f = LAZY_VIEW_PARSERS_FOR_STREAMABLE_CLASS.get(cls)
+    if parse_f is None:
+        parse_f = build_class_view_parser(cls, lazy=True)
+        LAZY_VIEW_PARSERS_FOR_STREAMABLE_CLASS[cls] = parse_f
+    return parse_f
+
+
+# Functions that write an item of a type to a stream, built once per type like the view parsers
+Writer = Callable[[Any, BinaryIO], None]
+
+WRITERS_FOR_TYPE: Dict[Any, Writer] = {}
+CACHES_SERIALIZATION_FOR_STREAMABLE_CLASS: Dict[Any, bool] = {}
+
+
+def caches_serialization(cls: Type) -> bool:
+    """
+    Whether the instances of a streamable class keep their serialization and hash once computed. Only frozen classes
+    whose fields can't be changed in place do, lists can be appended to after the object was hashed.
+    """
+    cached = CACHES_SERIALIZATION_FOR_STREAMABLE_CLASS.get(cls)
+    if cached is None:
+        params = getattr(cls, "__dataclass_params__", None)
+        fields = getattr(cls, "__annotations__", {}).values()
+        cached = params is not None and params.frozen and all(is_immutable_type(f_type) for f_type in fields)
+        CACHES_SERIALIZATION_FOR_STREAMABLE_CLASS[cls] = cached
+    return cached
+
+
+def is_immutable_type(f_type: Type) -> bool:
+    if is_type_List(f_type):
+        return False
+    if is_type_SpecificOptional(f_type) or is_type_Tuple(f_type):
+        return all(is_immutable_type(inner_type) for inner_type in get_args(f_type))
+    if f_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS:
+        return caches_serialization(f_type)
+    return True
+
+
+def writer_for_type(f_type: Type) -> Writer:
+    write_f = WRITERS_FOR_TYPE.get(f_type)
+    if write_f is None:
+        write_f = build_writer(f_type)
+        WRITERS_FOR_TYPE[f_type] = write_f
+    return write_f
+
+
+def build_writer(f_type: Type) -> Writer:
+    """Same dispatch as Streamable.stream_one_item"""
+    if is_type_SpecificOptional(f_type):
+        write_inner_f = writer_for_type(get_args(f_type)[0])
+
+        def write_optional(item: Any, f: BinaryIO) -> None:
+            if item is None:
+                f.write(b"\x00")
+            else:
+                f.write(b"\x01")
+                write_inner_f(item, f)
+
+        return write_optional
+    if f_type == bytes:
+
+        def write_bytes(item: bytes, f: BinaryIO) -> None:
+            f.write(len(item).to_bytes(4, "big"))
+            f.write(item)
+
+        return write_bytes
+    if hasattr(f_type, "stream"):
+        if f_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS:
+            return class_writer(f_type)
+        if isinstance(f_type, type) and issubclass(f_type, StructStream):
+            pack = struct.Struct(f_type.PACK).pack
+            return lambda item, f: f.write(pack(item))  # type: ignore
+        if isinstance(f_type, type) and issubclass(f_type, bytes) and hasattr(f_type, "SIZE"):
+            return lambda item, f: f.write(item)  # type: ignore
+        return lambda item, f: item.stream(f)
+    if hasattr(f_type, "__bytes__"):
+        return lambda item, f: f.write(bytes(item))  # type: ignore
+    if is_type_List(f_type):
+        write_inner_f = writer_for_type(get_args(f_type)[0])
+
+        def write_list(item: List[Any], f: BinaryIO) -> None:
+            f.write(len(item).to_bytes(4, "big"))
+            for element in item:
+                write_inner_f(element, f)
+
+        return write_list
+    if is_type_Tuple(f_type):
+        write_inner_fs = [writer_for_type(inner_type) for inner_type in get_args(f_type)]
+
+        def write_tuple(item: Tuple[Any, ...], f: BinaryIO) -> None:
+            assert len(item) == len(write_inner_fs)
+            for element, write_f in zip(item, write_inner_fs):
+                write_f(element, f)
+
+        return write_tuple
+    if f_type is str:
+
+        def write_str(item: str, f: BinaryIO) -> None:
+            str_bytes = item.encode("utf-8")
+            f.write(len(str_bytes).to_bytes(4, "big"))
+            f.write(str_bytes)
+
+        return write_str
+    if f_type is bool:
+        return lambda item, f: f.write(b"\x01" if item else b"\x00")  # type: ignore
+    raise NotImplementedError(f"can't stream {f_type}")
+
+
+def build_class_writer(cls: Type) -> Writer:
+    """
+    Generates the writer of a streamable class, with a line per field. Fields of fixed size ints and bytes are written
+    inline, and the cached serialization of fields that have one is reused.
+    """
+    fields = getattr(cls, "__annotations__", {})
+    lines = ["def stream(obj, f):", "    write = f.write"]
+    namespace: Dict[str, Any] = {}
+    for index, (field_name, field_type) in enumerate(fields.items()):
+        if isinstance(field_type, type) and issubclass(field_type, StructStream):
+            namespace[f"pack_{index}"] = struct.Struct(field_type.PACK).pack
+            lines.append(f"    write(pack_{index}(obj.{field_name}))")
+        elif isinstance(field_type, type) and issubclass(field_type, bytes) and hasattr(field_type, "SIZE"):
+            lines.append(f"    write(obj.{field_name})")
+        elif field_type in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS and caches_serialization(field_type):
+            namespace[f"write_{index}"] = class_writer(field_type)
+            lines.append(f"    item = obj.{field_name}")
+            lines.append("    cached = item.__dict__.get('_cached_bytes')")
+            lines.append(f"    write_{index}(item, f) if cached is None else write(cached)")
+        else:
+            namespace[f"write_{index}"] = writer_for_type(field_type)
+            lines.append(f"    write_{index}(obj.{field_name}, f)")
+    exec("\n".join(lines), namespace)
+    return namespace["stream"]
+
+
+def class_writer(cls: Type) -> Writer:
+    write_f = WRITERS_FOR_TYPE.get(cls)
+    if write_f is None:
+        write_f = build_class_writer(cls)
+        WRITERS_FOR_TYPE[cls] = write_f
+    return write_f
+
+
 class Streamable:
     @classmethod
     def function_to_parse_one_item(cls: Type[cls.__name__], f_type: Type):  # type: ignore
@@ -292,6 +745,13 @@ class Streamable:
 
     @classmethod
     def parse(cls: Type[cls.__name__], f: BinaryIO) -> cls.__name__:  # type: ignore
+        if type(f) is io.BytesIO:
+            # Parses from the buffer of the stream, the parsed items don't keep references to it. Subclasses may
+            # override read(), so they are parsed field by field
+            with f.getbuffer() as buf:
+                parsed, pos = class_view_parser(cls)(buf, f.tell())
+            f.seek(pos)
+            return parsed
         # Create the object without calling __init__() to avoid unnecessary post-init checks in strictdataclass
         obj: Streamable = object.__new__(cls)
         fields: Iterator[str] = iter(getattr(cls, "__annotations__", {}))
@@ -345,27 +805,73 @@ class Streamable:
             raise NotImplementedError(f"can't stream {item}, {f_type}")
 
     def stream(self, f: BinaryIO) -> None:
-        try:
-            fields = self.__annotations__  # pylint: disable=no-member
-        except Exception:
-            fields = {}
-        for f_name, f_type in fields.items():
-            self.stream_one_item(f_type, getattr(self, f_name), f)
+        cached = self.__dict__.get("_cached_bytes")
+        if cached is not None:
+            f.write(cached)
+        else:
+            class_writer(type(self))(self, f)
+
+    def _serialize(self) -> bytes:
+        cached = self.__dict__.get("_cached_bytes")
+        if cached is not None:
+            return cached
+        f = io.BytesIO()
+        class_writer(type(self))(self, f)
+        blob = f.getvalue()
+        if caches_serialization(type(self)):
+            self.__dict__["_cached_bytes"] = blob
+        return blob
 
     def get_hash(self) -> bytes32:
-        return bytes32(std_hash(bytes(self)))
+        cached = self.__dict__.get("_cached_hash")
+        if cached is not None:
+            return cached
+        hash_value = bytes32(std_hash(self._serialize()))
+        if caches_serialization(type(self)):
+            self.__dict__["_cached_hash"] = hash_value
+        return hash_value
 
     @classmethod
     def from_bytes(cls: Any, blob: bytes) -> Any:
-        f = io.BytesIO(blob)
-        parsed = cls.parse(f)
-        assert f.read() == b""
+        parsed, pos = class_view_parser(cls)(memoryview(blob), 0)
+        assert pos == len(blob)
+        # The blob isn't cached as the serialization, some fields like programs accept more than one encoding of the
+        # same value and equal objects must serialize and hash the same
         return parsed
 
+    @classmethod
+    def from_bytes_lazy(cls: Any, blob: bytes) -> Any:
+        """
+        Like from_bytes, but the fields that are lists of streamables are only decoded when they are first accessed.
+        Until then the object keeps a reference to blob.
+        """
+        parsed, pos = lazy_class_view_parser(cls)(memoryview(blob), 0)
+        assert pos == len(blob)
+        return parsed
+
+    if not TYPE_CHECKING:
+        # Hidden from type checkers, so that they still report unknown attributes of streamables
+
+        def __getattr__(self, name: str) -> Any:
+            # Only called for attributes that aren't set, the fields not decoded yet by from_bytes_lazy
+            lazy_fields = self.__dict__.get("_lazy_fields")
+            if lazy_fields is None or name not in lazy_fields:
+                raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+            parse_f, buf, pos = lazy_fields.pop(name)
+            value, _ = parse_f(buf, pos)
+            self.__dict__[name] = value
+            if len(lazy_fields) == 0:
+                del self.__dict__["_lazy_fields"]
+            return value
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Decodes the lazy fields, their parsers and buffers can't be pickled or copied
+        for name in list(self.__dict__.get("_lazy_fields", {})):
+            getattr(self, name)
+        return self.__dict__
+
     def __bytes__(self: Any) -> bytes:
-        f = io.BytesIO()
-        self.stream(f)
-        return bytes(f.getvalue())
+        return self._serialize()
 
     def __str__(self: Any) -> str:
         return pp.pformat(recurse_jsonify(dataclasses.asdict(self)))
@@ -0,0 +1,202 @@
+from bisect import bisect_left
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedList
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.wallet.wallet_coin_record import WalletCoinRecord
+
+# Only the largest coins that are not bigger than the target are considered for an exact match
+EXACT_MATCH_MAX_CANDIDATES = 1000
+# Bounds the work done by the branch and bound search before falling back
+EXACT_MATCH_MAX_TRIES = 2000
+# An exact match may not use more coins than this
+EXACT_MATCH_MAX_COINS = 100
+# Nor more than this many coins over the smallest sufficient selection it replaces, avoiding change is not worth a
+# much bigger spend
+EXACT_MATCH_EXTRA_COINS = 2
+# Dust consolidation will not make spends with more coins than this
+DUST_CONSOLIDATION_MAX_COINS = 100
+
+_MAX_NAME = bytes32(b"\xff" * 32)
+_MIN_NAME = bytes32(b"\x00" * 32)
+
+
+class CoinSelectionStrategy(Enum):
+    # Use the largest coins first, this is how coins have always been selected
+    LARGEST_FIRST = "largest_first"
+    # Use the smallest coin that covers the amount, or the largest coins first if there is no such coin
+    SMALLEST_SUFFICIENT = "smallest_sufficient"
+    # Look for a set of coins that adds up to the amount exactly, so no change is needed, otherwise smallest sufficient
+    EXACT_MATCH = "exact_match"
+    # Same as smallest sufficient, but also spends the smallest coins of the wallet, to reduce their number
+    CONSOLIDATE_DUST = "consolidate_dust"
+
+
+DEFAULT_COIN_SELECTION_STRATEGY = CoinSelectionStrategy.LARGEST_FIRST
+
+
+class CoinAmountIndex:
+    """
+    Keeps the unspent coin records of a wallet sorted by amount, so that coins can be selected without sorting all of
+    them. Records are added and removed as the coin store changes.
+    """
+
+    _keys: SortedList
+    _records: Dict[bytes32, WalletCoinRecord]
+
+    def __init__(self) -> None:
+        self._keys = SortedList()
+        self._records = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, name: bytes32) -> bool:
+        return name in self._records
+
+    def add(self, name: bytes32, record: WalletCoinRecord) -> None:
+        previous = self._records.get(name)
+        if previous is not None:
+            self._keys.remove((previous.coin.amount, name))
+        self._keys.add((record.coin.amount, name))
+        self._records[name] = record
+
+    def remove(self, name: bytes32) -> None:
+        record = self._records.pop(name, None)
+        if record is not None:
+            self._keys.remove((record.coin.amount, name))
+
+    def ascending(self, min_amount: int = 0) -> Iterator[Tuple[bytes32, WalletCoinRecord]]:
+        """Yields the records with an amount of at least `min_amount`, smallest first."""
+        for _, name in self._keys.irange((min_amount, _MIN_NAME), None):
+            yield name, self._records[name]
+
+    def descending(self, max_amount: Optional[int] = None) -> Iterator[Tuple[bytes32, WalletCoinRecord]]:
+        """Yields the records with an amount of at most `max_amount`, largest first."""
+        maximum = None if max_amount is None else (max_amount, _MAX_NAME)
+        for _, name in self._keys.irange(None, maximum, reverse=True):
+            yield name, self._records[name]
+
+
+def _largest_first(index: CoinAmountIndex, amount: int, excluded: Set[bytes32]) -> List[WalletCoinRecord]:
+    selected: List[WalletCoinRecord] = []
+    sum_value = 0
+    for name, record in index.descending():
+        if sum_value >= amount and len(selected) > 0:
+            break
+        if name in excluded:
+            continue
+        sum_value += record.coin.amount
+        selected.append(record)
+    return selected
+
+
+def _smallest_sufficient(index: CoinAmountIndex, amount: int, excluded: Set[bytes32]) -> List[WalletCoinRecord]:
+    for name, record in index.ascending(amount):
+        if name not in excluded:
+            return [record]
+    # No single coin is big enough, use as few coins as possible
+    return _largest_first(index, amount, excluded)
+
+
+def _exact_match(
+    index: CoinAmountIndex, amount: int, excluded: Set[bytes32], max_coins: int
+) -> Optional[List[WalletCoinRecord]]:
+    """
+    Branch and bound search for at most `max_coins` coins that add up to `amount`, among the largest coins that are not
+    bigger than it. Returns None if no such set was found within the search bounds.
+    """
+    if amount == 0:
+        return None
+    candidates: List[WalletCoinRecord] = []
+    for name, record in index.descending(amount):
+        if name in excluded:
+            continue
+        if record.coin.amount == amount:
+            return [record]
+        candidates.append(record)
+        if len(candidates) >= EXACT_MATCH_MAX_CANDIDATES:
+            break
+
+    amounts: List[int] = [record.coin.amount for record in candidates]
+    # Candidates are sorted largest first, negated amounts are sorted in ascending order for bisect
+    negated_amounts: List[int] = [-candidate_amount for candidate_amount in amounts]
+    # remaining_sums[i] is the sum of the amounts of candidates[i:]
+    remaining_sums: List[int] = [0] * (len(amounts) + 1)
+    # next_amount[i] is the index of the first candidate after i with a smaller amount
+    next_amount: List[int] = [len(amounts)] * (len(amounts) + 1)
+    for i in range(len(amounts) - 1, -1, -1):
+        remaining_sums[i] = remaining_sums[i + 1] + amounts[i]
+        if i + 1 < len(amounts) and amounts[i + 1] == amounts[i]:
+            next_amount[i] = next_amount[i + 1]
+        else:
+            next_amount[i] = i + 1
+
+    chosen: List[int] = []
+    tries = 0
+
+    def search(start: int, remaining: int) -> bool:
+        nonlocal tries
+        # Skip the coins that are bigger than what is left to match
+        i = bisect_left(negated_amounts, -remaining, start)
+        while i < len(amounts):
+            if remaining_sums[i] < remaining or tries >= EXACT_MATCH_MAX_TRIES or len(chosen) >= max_coins:
+                return False
+            tries += 1
+            current = amounts[i]
+            chosen.append(i)
+            if current == remaining or search(i + 1, remaining - current):
+                return True
+            chosen.pop()
+            # Leaving out a coin also leaves out the ones with the same amount, they would give the same results
+            i = next_amount[i]
+        return False
+
+    if not search(0, amount):
+        return None
+    return [candidates[i] for i in chosen]
+
+
+def _consolidate_dust(index: CoinAmountIndex, amount: int, excluded: Set[bytes32]) -> List[WalletCoinRecord]:
+    selected = _smallest_sufficient(index, amount, excluded)
+    if len(selected) >= DUST_CONSOLIDATION_MAX_COINS:
+        return selected
+    selected_names = {record.name() for record in selected}
+    smallest_selected = min(record.coin.amount for record in selected) if len(selected) > 0 else None
+    for name, record in index.ascending():
+        if len(selected) >= DUST_CONSOLIDATION_MAX_COINS:
+            break
+        if smallest_selected is not None and record.coin.amount >= smallest_selected:
+            # Only coins smaller than the ones that are spent anyway count as dust
+            break
+        if name in excluded or name in selected_names:
+            continue
+        selected.append(record)
+    return selected
+
+
+def select_coins_from_index(
+    index: CoinAmountIndex,
+    amount: int,
+    excluded: Set[bytes32],
+    strategy: CoinSelectionStrategy = DEFAULT_COIN_SELECTION_STRATEGY,
+) -> List[WalletCoinRecord]:
+    """
+    Selects coins from the index that add up to at least `amount`, skipping the coins named in `excluded`. At least one
+    coin is selected if there is any. The caller has to check that the selected coins cover the amount, which is not
+    the case if the wallet does not have enough spendable coins.
+    """
+    if strategy == CoinSelectionStrategy.LARGEST_FIRST:
+        return _largest_first(index, amount, excluded)
+    if strategy == CoinSelectionStrategy.SMALLEST_SUFFICIENT:
+        return _smallest_sufficient(index, amount, excluded)
+    if strategy == CoinSelectionStrategy.EXACT_MATCH:
+        fallback = _smallest_sufficient(index, amount, excluded)
+        max_coins = min(len(fallback) + EXACT_MATCH_EXTRA_COINS, EXACT_MATCH_MAX_COINS)
+        exact = _exact_match(index, amount, excluded, max_coins)
+        return fallback if exact is None else exact
+    if strategy == CoinSelectionStrategy.CONSOLIDATE_DUST:
+        return _consolidate_dust(index, amount, excluded)
+    raise ValueError(f"Unknown coin selection strategy {strategy}")
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from hddcoin.consensus.block_rewards import calculate_base_farmer_reward
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint32
+from hddcoin.wallet.transaction_record import TransactionRecord
+from hddcoin.wallet.util.transaction_type import TransactionType
+
+# Farming rewards are rolled up by day and by buckets of this many heights (about a day of blocks)
+FARMING_REWARD_HEIGHT_BUCKET = 4608
+SECONDS_PER_DAY = 24 * 3600
+
+# (wallet_id, transaction type, day, height bucket)
+RollupKey = Tuple[int, int, int, int]
+
+
+@dataclass
+class FarmingRewards:
+    """
+    Sums of a set of confirmed farming reward transactions. For fee rewards, base_farmer_reward is the part of the
+    amount that is the block reward, the rest are fees.
+    """
+
+    amount: int = 0
+    base_farmer_reward: int = 0
+    count: int = 0
+    last_height_farmed: int = 0
+
+    def add(self, other: "FarmingRewards") -> None:
+        self.amount += other.amount
+        self.base_farmer_reward += other.base_farmer_reward
+        self.count += other.count
+        self.last_height_farmed = max(self.last_height_farmed, other.last_height_farmed)
+
+    def subtract(self, other: "FarmingRewards") -> None:
+        # last_height_farmed can't be subtracted, the caller has to recompute it if needed
+        self.amount -= other.amount
+        self.base_farmer_reward -= other.base_farmer_reward
+        self.count -= other.count
+
+
+def is_farming_reward(record: TransactionRecord) -> bool:
+    return record.confirmed and (
+        record.type == TransactionType.COINBASE_REWARD or record.type == TransactionType.FEE_REWARD
+    )
+
+
+def farming_reward_rollup(
+    record: TransactionRecord, genesis_challenge: bytes32
+) -> Optional[Tuple[RollupKey, FarmingRewards]]:
+    """Returns the rollup the record counts towards and its contribution, or None if it's not a farming reward."""
+    if not is_farming_reward(record):
+        return None
+    height: Optional[int] = record.height_farmed(genesis_challenge)
+    if height is None:
+        height = record.confirmed_at_height
+    base_farmer_reward = 0
+    if record.type == TransactionType.FEE_REWARD:
+        base_farmer_reward = calculate_base_farmer_reward(uint32(height))
+    key: RollupKey = (
+        record.wallet_id,
+        record.type,
+        record.created_at_time // SECONDS_PER_DAY,
+        height // FARMING_REWARD_HEIGHT_BUCKET,
+    )
+    return key, FarmingRewards(record.amount, base_farmer_reward, 1, height)
+
+
+def farming_reward_totals(rollups: Dict[RollupKey, FarmingRewards]) -> Dict[Tuple[int, int], FarmingRewards]:
+    """Sums rollups by (wallet_id, transaction type)."""
+    totals: Dict[Tuple[int, int], FarmingRewards] = {}
+    for (wallet_id, type, _, _), rewards in rollups.items():
+        totals.setdefault((wallet_id, type), FarmingRewards()).add(rewards)
+    return totals
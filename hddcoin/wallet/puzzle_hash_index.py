@@ -0,0 +1,79 @@
+from typing import Iterable, Iterator, Set
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+
+# Bloom filter bits per expected puzzle hash, with BLOOM_PROBES probes this gives at most about 0.24% false positives
+# at the expected size, (1 - e^(-4/16))^4. The bits are rounded up to a power of two, which only lowers it
+BLOOM_BITS_PER_ENTRY = 16
+BLOOM_PROBES = 4
+# The filter is rebuilt when this share of the puzzle hashes it was built from has been removed
+BLOOM_REBUILD_STALE_SHARE = 0.5
+
+
+class PuzzleHashIndex:
+    """
+    In memory membership index of puzzle hashes. A fixed size Bloom filter rejects almost all the puzzle hashes that
+    are not in the index, the ones that pass it are checked in an exact set, so there are no false positives.
+    Puzzle hashes are hashes already, so the probe positions are read from their bytes instead of hashing them again.
+    """
+
+    _bits: bytearray
+    _mask: int
+    _puzzle_hashes: Set[bytes32]
+    # Removed puzzle hashes that still have bits set in the filter
+    _stale: int
+
+    def __init__(self, expected_size: int, puzzle_hashes: Iterable[bytes32] = ()) -> None:
+        num_bits = 8
+        while num_bits < expected_size * BLOOM_BITS_PER_ENTRY:
+            num_bits *= 2
+        self._bits = bytearray(num_bits // 8)
+        self._mask = num_bits - 1
+        self._puzzle_hashes = set()
+        self._stale = 0
+        self.update(puzzle_hashes)
+
+    def __len__(self) -> int:
+        return len(self._puzzle_hashes)
+
+    def __iter__(self) -> Iterator[bytes32]:
+        return iter(self._puzzle_hashes)
+
+    def __contains__(self, puzzle_hash: object) -> bool:
+        if not isinstance(puzzle_hash, bytes) or len(puzzle_hash) != 32:
+            return False
+        return self.may_contain(puzzle_hash) and puzzle_hash in self._puzzle_hashes
+
+    def _positions(self, puzzle_hash: bytes) -> Iterator[int]:
+        for i in range(BLOOM_PROBES):
+            yield int.from_bytes(puzzle_hash[i * 4 : i * 4 + 4], "little") & self._mask
+
+    def may_contain(self, puzzle_hash: bytes) -> bool:
+        """Bloom filter check only, False means the puzzle hash is certainly not in the index."""
+        bits = self._bits
+        for position in self._positions(puzzle_hash):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, puzzle_hash: bytes32) -> None:
+        self._puzzle_hashes.add(puzzle_hash)
+        for position in self._positions(puzzle_hash):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, puzzle_hashes: Iterable[bytes32]) -> None:
+        for puzzle_hash in puzzle_hashes:
+            self.add(puzzle_hash)
+
+    def discard(self, puzzle_hash: bytes32) -> None:
+        if puzzle_hash not in self._puzzle_hashes:
+            return
+        self._puzzle_hashes.remove(puzzle_hash)
+        # Bits can't be cleared, they could be shared with other puzzle hashes
+        self._stale += 1
+        if self._stale > len(self._puzzle_hashes) * BLOOM_REBUILD_STALE_SHARE:
+            self._bits = bytearray(len(self._bits))
+            self._stale = 0
+            for remaining in self._puzzle_hashes:
+                for position in self._positions(remaining):
+                    self._bits[position >> 3] |= 1 << (position & 7)
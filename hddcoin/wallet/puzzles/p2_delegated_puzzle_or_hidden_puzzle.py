@@ -21,6 +21,7 @@ from clvm.casts import int_from_bytes
 
 from hddcoin.types.blockchain_format.program import Program
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.hash import std_hash
 
 from .load_clvm import load_clvm
 from .p2_conditions import puzzle_for_conditions
@@ -38,6 +39,24 @@ PublicKeyProgram = Union[bytes, Program]
 GROUP_ORDER = 0x73EDA753299D7D483339D80809A1D80553BDA402FFFE5BFEFFFFFFFF00000001
 
 
+def _tree_hash_atom(atom: bytes) -> bytes32:
+    return std_hash(b"\1" + atom)
+
+
+def _tree_hash_pair(left: bytes32, right: bytes32) -> bytes32:
+    return std_hash(b"\2" + left + right)
+
+
+# `MOD.curry(pk)` is `(a (q . MOD) (c (q . pk) 1))`. Everything in that tree except the `pk` atom is the same for
+# every key, so the hashes of those parts are computed once here.
+_NIL_HASH = _tree_hash_atom(b"")
+_Q_HASH = _tree_hash_atom(b"\1")
+_ENV_TAIL_HASH = _tree_hash_pair(_tree_hash_atom(b"\1"), _NIL_HASH)
+_C_HASH = _tree_hash_atom(b"\4")
+_A_HASH = _tree_hash_atom(b"\2")
+_QUOTED_MOD_HASH = _tree_hash_pair(_Q_HASH, MOD.get_tree_hash())
+
+
 def calculate_synthetic_offset(public_key: G1Element, hidden_puzzle_hash: bytes32) -> int:
     blob = hashlib.sha256(bytes(public_key) + hidden_puzzle_hash).digest()
     offset = int_from_bytes(blob)
@@ -64,6 +83,16 @@ def puzzle_for_synthetic_public_key(synthetic_public_key: G1Element) -> Program:
     return MOD.curry(bytes(synthetic_public_key))
 
 
+def puzzle_hash_for_synthetic_public_key(synthetic_public_key: G1Element) -> bytes32:
+    """
+    Same as `puzzle_for_synthetic_public_key(synthetic_public_key).get_tree_hash()`, but only hashes the part of the
+    curried puzzle that depends on the key.
+    """
+    quoted_key_hash = _tree_hash_pair(_Q_HASH, _tree_hash_atom(bytes(synthetic_public_key)))
+    env_hash = _tree_hash_pair(_C_HASH, _tree_hash_pair(quoted_key_hash, _ENV_TAIL_HASH))
+    return _tree_hash_pair(_A_HASH, _tree_hash_pair(_QUOTED_MOD_HASH, _tree_hash_pair(env_hash, _NIL_HASH)))
+
+
 def puzzle_for_public_key_and_hidden_puzzle_hash(public_key: G1Element, hidden_puzzle_hash: bytes32) -> Program:
     synthetic_public_key = calculate_synthetic_public_key(public_key, hidden_puzzle_hash)
 
@@ -78,6 +107,16 @@ def puzzle_for_pk(public_key: G1Element) -> Program:
     return puzzle_for_public_key_and_hidden_puzzle_hash(public_key, DEFAULT_HIDDEN_PUZZLE_HASH)
 
 
+def puzzle_hash_for_pk(public_key: G1Element) -> bytes32:
+    """
+    Same as `puzzle_for_pk(public_key).get_tree_hash()`. The synthetic key is computed with blspy instead of by
+    running `calculate_synthetic_public_key.clvm`, and the curried puzzle is never built.
+    """
+    synthetic_offset = calculate_synthetic_offset(public_key, DEFAULT_HIDDEN_PUZZLE_HASH)
+    synthetic_public_key = public_key + PrivateKey.from_bytes(synthetic_offset.to_bytes(32, "big")).get_g1()
+    return puzzle_hash_for_synthetic_public_key(synthetic_public_key)
+
+
 def solution_for_delegated_puzzle(delegated_puzzle: Program, solution: Program) -> Program:
     return Program.to([[], delegated_puzzle, solution])
 
@@ -347,7 +347,7 @@ class TradeManager:
         return get_discrepancies_for_spend_bundle(trade_offer.spend_bundle)
 
     async def get_inner_puzzle_for_puzzle_hash(self, puzzle_hash) -> Program:
-        info = await self.wallet_state_manager.puzzle_store.get_derivation_record_for_puzzle_hash(puzzle_hash.hex())
+        info = await self.wallet_state_manager.puzzle_store.get_derivation_record_for_puzzle_hash(puzzle_hash)
         assert info is not None
         puzzle = self.wallet_state_manager.main_wallet.puzzle_for_pk(bytes(info.pubkey))
         return puzzle
@@ -428,7 +428,9 @@ class TradeManager:
                 if hddcoin_discrepancy is None:
                     hddcoin_discrepancy = get_output_discrepancy_for_puzzle_and_solution(coinsol.coin, puzzle, solution)
                 else:
-                    hddcoin_discrepancy += get_output_discrepancy_for_puzzle_and_solution(coinsol.coin, puzzle, solution)
+                    hddcoin_discrepancy += get_output_discrepancy_for_puzzle_and_solution(
+                        coinsol.coin, puzzle, solution
+                    )
                 coinsols.append(coinsol)
 
         hddcoin_spend_bundle: Optional[SpendBundle] = None
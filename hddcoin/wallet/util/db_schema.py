@@ -0,0 +1,69 @@
+from typing import Any, Callable, Sequence, Tuple
+
+import aiosqlite
+
+# Rows copied per batch when a table is migrated
+MIGRATION_BATCH_SIZE = 10000
+# Parameters per query when rows are looked up in batches, below SQLite's default limit of 999
+MAX_SQL_PARAMETERS = 900
+
+
+async def get_schema_version(db_connection: aiosqlite.Connection, table_name: str) -> int:
+    """
+    Returns the schema version of a wallet table: 0 if the table does not exist yet, 1 if it was created before
+    versions were recorded.
+    """
+    await db_connection.execute("CREATE TABLE IF NOT EXISTS schema_version(table_name text PRIMARY KEY, version int)")
+    cursor = await db_connection.execute("SELECT version from schema_version WHERE table_name=?", (table_name,))
+    row = await cursor.fetchone()
+    await cursor.close()
+    if row is not None:
+        return row[0]
+
+    cursor = await db_connection.execute("SELECT name from sqlite_master WHERE type='table' AND name=?", (table_name,))
+    row = await cursor.fetchone()
+    await cursor.close()
+    return 0 if row is None else 1
+
+
+async def set_schema_version(db_connection: aiosqlite.Connection, table_name: str, version: int) -> None:
+    cursor = await db_connection.execute(
+        "INSERT OR REPLACE INTO schema_version VALUES(?, ?)",
+        (table_name, version),
+    )
+    await cursor.close()
+
+
+async def migrate_table(
+    db_connection: aiosqlite.Connection,
+    table_name: str,
+    create_table: str,
+    convert_row: Callable[[Sequence[Any]], Tuple],
+) -> None:
+    """
+    Moves the rows of `table_name` into a new table created with the `create_table` statement, converting each row
+    with `convert_row`. The old table is dropped together with its indexes, so the caller has to create the indexes
+    of the new table afterwards. Runs in a transaction, which the caller commits.
+    """
+    if not db_connection.in_transaction:
+        cursor = await db_connection.execute("BEGIN TRANSACTION")
+        await cursor.close()
+    old_table_name = f"{table_name}_old"
+    cursor = await db_connection.execute(f"ALTER TABLE {table_name} RENAME TO {old_table_name}")
+    await cursor.close()
+    cursor = await db_connection.execute(create_table)
+    await cursor.close()
+
+    rows_cursor = await db_connection.execute(f"SELECT * from {old_table_name}")
+    while True:
+        converted = [convert_row(tuple(row)) for row in await rows_cursor.fetchmany(MIGRATION_BATCH_SIZE)]
+        if len(converted) == 0:
+            break
+        cursor = await db_connection.executemany(
+            f"INSERT OR REPLACE INTO {table_name} VALUES({', '.join('?' * len(converted[0]))})", converted
+        )
+        await cursor.close()
+    await rows_cursor.close()
+
+    cursor = await db_connection.execute(f"DROP TABLE {old_table_name}")
+    await cursor.close()
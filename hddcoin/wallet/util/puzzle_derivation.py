@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+from concurrent.futures.process import ProcessPoolExecutor
+from typing import List, Tuple
+
+from blspy import AugSchemeMPL, G1Element, PrivateKey
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import puzzle_hash_for_pk
+
+# Below this many indexes it is cheaper to derive in this process than to start worker processes
+MIN_INDEXES_FOR_PROCESS_POOL = 1000
+# Number of indexes handed to a worker process at a time
+DERIVATION_CHUNK_SIZE = 250
+
+
+def derive_pubkeys_and_puzzle_hashes(
+    intermediate_sk_bytes: bytes, hardened: bool, start: int, end: int
+) -> List[Tuple[bytes, bytes]]:
+    """
+    Derives the child public keys for indexes [start, end) of the wallet intermediate key, together with the standard
+    puzzle hash of each of them. Takes and returns plain bytes so that it can run in a worker process.
+    """
+    intermediate_sk = PrivateKey.from_bytes(intermediate_sk_bytes)
+    results: List[Tuple[bytes, bytes]] = []
+    for index in range(start, end):
+        if hardened:
+            pubkey: G1Element = AugSchemeMPL.derive_child_sk(intermediate_sk, index).get_g1()
+        else:
+            pubkey = AugSchemeMPL.derive_child_sk_unhardened(intermediate_sk, index).get_g1()
+        results.append((bytes(pubkey), bytes(puzzle_hash_for_pk(pubkey))))
+    return results
+
+
+def default_num_derivation_workers() -> int:
+    cpu_count = multiprocessing.cpu_count()
+    if cpu_count > 61:
+        cpu_count = 61  # Windows Server 2016 has an issue https://bugs.python.org/issue26903
+    return max(cpu_count - 2, 1)
+
+
+async def derive_pubkeys_and_puzzle_hashes_bulk(
+    intermediate_sk: PrivateKey, hardened: bool, start: int, end: int, num_workers: int
+) -> List[Tuple[G1Element, bytes32]]:
+    """
+    Same as `derive_pubkeys_and_puzzle_hashes`, but large ranges are split into chunks that are derived in a process
+    pool with `num_workers` processes. The pool only lives for the duration of the call.
+    """
+    if end <= start:
+        return []
+    sk_bytes = bytes(intermediate_sk)
+    if num_workers <= 1 or end - start < MIN_INDEXES_FOR_PROCESS_POOL:
+        results = derive_pubkeys_and_puzzle_hashes(sk_bytes, hardened, start, end)
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            loop = asyncio.get_running_loop()
+            chunk_results = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        derive_pubkeys_and_puzzle_hashes,
+                        sk_bytes,
+                        hardened,
+                        chunk_start,
+                        min(chunk_start + DERIVATION_CHUNK_SIZE, end),
+                    )
+                    for chunk_start in range(start, end, DERIVATION_CHUNK_SIZE)
+                ]
+            )
+        results = [result for chunk in chunk_results for result in chunk]
+    return [(G1Element.from_bytes(pubkey_bytes), bytes32(puzzle_hash)) for pubkey_bytes, puzzle_hash in results]
@@ -12,6 +12,7 @@ from hddcoin.protocols.wallet_protocol import (
 from hddcoin.types.blockchain_format.coin import hash_coin_list, Coin
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.full_block import FullBlock
+from hddcoin.util.ints import uint32
 from hddcoin.util.merkle_set import confirm_not_included_already_hashed, confirm_included_already_hashed, MerkleSet
 
 
@@ -121,24 +122,40 @@ def validate_removals(coins, proofs, root):
     return True
 
 
-async def request_and_validate_removals(peer, height, header_hash, coin_name, removals_root) -> bool:
-    removals_request = RequestRemovals(height, header_hash, [coin_name])
+async def request_and_validate_removals(
+    peer, height: uint32, header_hash: bytes32, coin_names: List[bytes32], removals_root: bytes32
+) -> bool:
+    """
+    Requests removal proofs for all the coin names at once, and validates them against the removals root. The
+    response must cover exactly the coin names that were requested.
+    """
+    removals_request = RequestRemovals(height, header_hash, coin_names)
 
     removals_res: Optional[Union[RespondRemovals, RejectRemovalsRequest]] = await peer.request_removals(
         removals_request
     )
     if removals_res is None or isinstance(removals_res, RejectRemovalsRequest):
         return False
+    if set(name for name, _ in removals_res.coins) != set(coin_names):
+        return False
     return validate_removals(removals_res.coins, removals_res.proofs, removals_root)
 
 
-async def request_and_validate_additions(peer, height, header_hash, puzzle_hash, additions_root):
-    additions_request = RequestAdditions(height, header_hash, [puzzle_hash])
+async def request_and_validate_additions(
+    peer, height: uint32, header_hash: bytes32, puzzle_hashes: List[bytes32], additions_root: bytes32
+) -> bool:
+    """
+    Requests addition proofs for all the puzzle hashes at once, and validates them against the additions root. The
+    response must cover exactly the puzzle hashes that were requested.
+    """
+    additions_request = RequestAdditions(height, header_hash, puzzle_hashes)
     additions_res: Optional[Union[RespondAdditions, RejectAdditionsRequest]] = await peer.request_additions(
         additions_request
     )
     if additions_res is None or isinstance(additions_res, RejectAdditionsRequest):
         return False
+    if set(puzzle_hash for puzzle_hash, _ in additions_res.coins) != set(puzzle_hashes):
+        return False
 
     validated = validate_additions(
         additions_res.coins,
@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+from typing import List
+
+from hddcoin.consensus.block_record import BlockRecord
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.blockchain_format.sub_epoch_summary import SubEpochSummary
+from hddcoin.types.weight_proof import WeightProof
+from hddcoin.util.streamable import Streamable, streamable
+
+
+@dataclass(frozen=True)
+@streamable
+class ValidatedWeightProof(Streamable):
+    """
+    What validating a weight proof yields, stored next to the weight proof so that it doesn't have to be validated
+    again. weight_proof_hash is the hash of the weight proof it was computed from.
+    """
+
+    weight_proof_hash: bytes32
+    summaries: List[SubEpochSummary]
+    block_records: List[BlockRecord]
+
+    def matches(self, weight_proof: WeightProof) -> bool:
+        return (
+            len(self.block_records) > 1
+            and self.block_records[-1].header_hash == weight_proof.recent_chain_data[-1].header_hash
+            and self.weight_proof_hash == weight_proof.get_hash()
+        )
@@ -1,6 +1,6 @@
 import logging
 import time
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, Iterator, List, Optional, Set
 
 from blspy import G1Element
 
@@ -16,6 +16,12 @@ from hddcoin.types.generator_types import BlockGenerator
 from hddcoin.types.spend_bundle import SpendBundle
 from hddcoin.util.ints import uint8, uint32, uint64, uint128
 from hddcoin.util.hash import std_hash
+from hddcoin.wallet.coin_selection import (
+    DEFAULT_COIN_SELECTION_STRATEGY,
+    CoinAmountIndex,
+    CoinSelectionStrategy,
+    select_coins_from_index,
+)
 from hddcoin.wallet.derivation_record import DerivationRecord
 from hddcoin.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import (
     DEFAULT_HIDDEN_PUZZLE_HASH,
@@ -64,14 +70,25 @@ class Wallet:
         return self
 
     async def get_max_send_amount(self, records=None):
-        spendable: List[WalletCoinRecord] = list(
-            await self.wallet_state_manager.get_spendable_coins_for_wallet(self.id(), records)
-        )
-        if len(spendable) == 0:
+        locked: Set[bytes32] = await self.wallet_state_manager.get_locked_coin_names_for_wallet(self.id())
+        if records is None:
+            index: CoinAmountIndex = self.wallet_state_manager.coin_store.get_unspent_amount_index_for_wallet(self.id())
+        else:
+            index = CoinAmountIndex()
+            for record in records:
+                index.add(record.name(), record)
+
+        def spendable() -> Iterator[WalletCoinRecord]:
+            # Largest coins first, only walked as far as the cost limit below allows
+            for name, coin_record in index.descending():
+                if name not in locked:
+                    yield coin_record
+
+        largest: Optional[WalletCoinRecord] = next(spendable(), None)
+        if largest is None:
             return 0
-        spendable.sort(reverse=True, key=lambda record: record.coin.amount)
         if self.cost_of_single_tx is None:
-            coin = spendable[0].coin
+            coin = largest.coin
             tx = await self.generate_signed_transaction(
                 coin.amount, coin.puzzle_hash, coins={coin}, ignore_max_send_amount=True
             )
@@ -93,7 +110,7 @@ class Wallet:
         current_cost = 0
         total_amount = 0
         total_coin_count = 0
-        for record in spendable:
+        for record in spendable():
             current_cost += self.cost_of_single_tx
             total_amount += record.coin.amount
             total_coin_count += 1
@@ -129,18 +146,11 @@ class Wallet:
             if not record.is_in_mempool():
                 self.log.warning(f"Record: {record} not in mempool, {record.sent_to}")
                 continue
-            our_spend = False
-            for coin in record.removals:
-                if await self.wallet_state_manager.does_coin_belong_to_wallet(coin, self.id()):
-                    our_spend = True
-                    break
-
-            if our_spend is not True:
+            additions, removals = await self.wallet_state_manager.get_unconfirmed_wallet_coins(record)
+            if len(removals) == 0:
                 continue
 
-            for coin in record.additions:
-                if await self.wallet_state_manager.does_coin_belong_to_wallet(coin, self.id()):
-                    addition_amount += coin.amount
+            addition_amount += sum(coin.amount for coin in additions)
 
         return uint64(addition_amount)
 
@@ -238,7 +248,9 @@ class Wallet:
         python_program[1].append(condition)
         return Program.to(python_program)
 
-    async def select_coins(self, amount, exclude: List[Coin] = None) -> Set[Coin]:
+    async def select_coins(
+        self, amount, exclude: List[Coin] = None, strategy: Optional[CoinSelectionStrategy] = None
+    ) -> Set[Coin]:
         """
         Returns a set of coins that can be used for generating a new transaction.
         Note: This must be called under a wallet state manager lock
@@ -256,28 +268,20 @@ class Wallet:
             self.log.warning(error_msg)
             raise ValueError(error_msg)
 
-        self.log.info(f"About to select coins for amount {amount}")
-        unspent: List[WalletCoinRecord] = list(
-            await self.wallet_state_manager.get_spendable_coins_for_wallet(self.id())
-        )
+        if strategy is None:
+            strategy = CoinSelectionStrategy(
+                self.wallet_state_manager.config.get("coin_selection_strategy", DEFAULT_COIN_SELECTION_STRATEGY.value)
+            )
+        self.log.info(f"About to select coins for amount {amount} using strategy {strategy.value}")
+
+        # Coins that are part of a pending transaction or a trade can't be used
+        excluded: Set[bytes32] = await self.wallet_state_manager.get_locked_coin_names_for_wallet(self.id())
+        excluded.update(coin.name() for coin in exclude)
+        index: CoinAmountIndex = self.wallet_state_manager.coin_store.get_unspent_amount_index_for_wallet(self.id())
+        selected: List[WalletCoinRecord] = select_coins_from_index(index, amount, excluded, strategy)
         sum_value = 0
         used_coins: Set = set()
-
-        # Use older coins first
-        unspent.sort(reverse=True, key=lambda r: r.coin.amount)
-
-        # Try to use coins from the store, if there isn't enough of "unused"
-        # coins use change coins that are not confirmed yet
-        unconfirmed_removals: Dict[bytes32, Coin] = await self.wallet_state_manager.unconfirmed_removals_for_wallet(
-            self.id()
-        )
-        for coinrecord in unspent:
-            if sum_value >= amount and len(used_coins) > 0:
-                break
-            if coinrecord.coin.name() in unconfirmed_removals:
-                continue
-            if coinrecord.coin in exclude:
-                continue
+        for coinrecord in selected:
             sum_value += coinrecord.coin.amount
             used_coins.add(coinrecord.coin)
             self.log.debug(f"Selected coin: {coinrecord.coin.name()} at height {coinrecord.confirmed_block_height}!")
@@ -8,11 +8,13 @@ from hddcoin.consensus.constants import ConsensusConstants
 from hddcoin.consensus.find_fork_point import find_fork_point_in_chain
 from hddcoin.consensus.full_block_to_block_record import block_to_block_record
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from hddcoin.types.header_block import HeaderBlock
 from hddcoin.types.weight_proof import WeightProof
 from hddcoin.util.errors import Err
 from hddcoin.util.ints import uint32, uint64
 from hddcoin.wallet.key_val_store import KeyValStore
+from hddcoin.wallet.validated_weight_proof import ValidatedWeightProof
 from hddcoin.wallet.wallet_weight_proof_handler import WalletWeightProofHandler
 
 log = logging.getLogger(__name__)
@@ -24,6 +26,7 @@ class WalletBlockchain(BlockchainInterface):
     _weight_proof_handler: WalletWeightProofHandler
 
     synced_weight_proof: Optional[WeightProof]
+    synced_weight_proof_state: Optional[ValidatedWeightProof]
 
     _peak: Optional[HeaderBlock]
     _height_to_hash: Dict[uint32, bytes32]
@@ -48,20 +51,40 @@ class WalletBlockchain(BlockchainInterface):
         self.CACHE_SIZE = constants.SUB_EPOCH_BLOCKS + 100
         self._weight_proof_handler = weight_proof_handler
         self.synced_weight_proof = await self._basic_store.get_object("SYNCED_WEIGHT_PROOF", WeightProof)
+        self.synced_weight_proof_state = None
         self._peak = None
         self._peak = await self.get_peak_block()
         self._latest_timestamp = uint64(0)
         self._height_to_hash = {}
         self._block_records = {}
+        self._sub_slot_iters = constants.SUB_SLOT_ITERS_STARTING
+        self._difficulty = constants.DIFFICULTY_STARTING
         if self.synced_weight_proof is not None:
-            await self.new_weight_proof(self.synced_weight_proof)
-        else:
-            self._sub_slot_iters = constants.SUB_SLOT_ITERS_STARTING
-            self._difficulty = constants.DIFFICULTY_STARTING
+            state: Optional[ValidatedWeightProof] = await self._basic_store.get_object(
+                "SYNCED_WEIGHT_PROOF_STATE", ValidatedWeightProof
+            )
+            if state is not None and state.matches(self.synced_weight_proof):
+                # The weight proof was validated before it was stored, its block records are loaded as they were
+                self.synced_weight_proof_state = state
+                latest_timestamp = self._add_weight_proof_records(state.block_records)
+                if self._peak is None or self._peak.weight < self.synced_weight_proof.recent_chain_data[-1].weight:
+                    await self.set_peak_block(self.synced_weight_proof.recent_chain_data[-1], latest_timestamp)
+                else:
+                    self._latest_timestamp = latest_timestamp
+                self.clean_block_records()
+            else:
+                if state is not None:
+                    log.warning("Stored weight proof state doesn't match the weight proof, validating it again")
+                await self.new_weight_proof(self.synced_weight_proof)
 
         return self
 
-    async def new_weight_proof(self, weight_proof: WeightProof, records: Optional[List[BlockRecord]] = None) -> None:
+    async def new_weight_proof(
+        self,
+        weight_proof: WeightProof,
+        records: Optional[List[BlockRecord]] = None,
+        summaries: Optional[List[SubEpochSummary]] = None,
+    ) -> None:
         peak: Optional[HeaderBlock] = await self.get_peak_block()
 
         if peak is not None and weight_proof.recent_chain_data[-1].weight <= peak.weight:
@@ -70,13 +93,22 @@ class WalletBlockchain(BlockchainInterface):
         self.synced_weight_proof = weight_proof
         await self._basic_store.set_object("SYNCED_WEIGHT_PROOF", weight_proof)
 
-        latest_timestamp = self._latest_timestamp
-
         if records is None:
-            success, _, _, records = await self._weight_proof_handler.validate_weight_proof(weight_proof, True)
+            success, _, summaries, records = await self._weight_proof_handler.validate_weight_proof(weight_proof, True)
             assert success
         assert records is not None and len(records) > 1
 
+        self.synced_weight_proof_state = ValidatedWeightProof(
+            weight_proof.get_hash(), summaries if summaries is not None else [], records
+        )
+        await self._basic_store.set_object("SYNCED_WEIGHT_PROOF_STATE", self.synced_weight_proof_state)
+        latest_timestamp = self._add_weight_proof_records(records)
+        await self.set_peak_block(weight_proof.recent_chain_data[-1], latest_timestamp)
+        self.clean_block_records()
+
+    def _add_weight_proof_records(self, records: List[BlockRecord]) -> uint64:
+        """Adds the block records of the recent chain of a weight proof, returns the latest timestamp"""
+        latest_timestamp = self._latest_timestamp
         for record in records:
             self._height_to_hash[record.height] = record.header_hash
             self.add_block_record(record)
@@ -87,8 +119,7 @@ class WalletBlockchain(BlockchainInterface):
 
         self._sub_slot_iters = records[-1].sub_slot_iters
         self._difficulty = uint64(records[-1].weight - records[-2].weight)
-        await self.set_peak_block(weight_proof.recent_chain_data[-1], latest_timestamp)
-        self.clean_block_records()
+        return latest_timestamp
 
     async def receive_block(self, block: HeaderBlock) -> Tuple[ReceiveBlockResult, Optional[Err]]:
         if self.contains_block(block.header_hash):
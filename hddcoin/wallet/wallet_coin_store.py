@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 import aiosqlite
 import sqlite3
@@ -6,10 +6,47 @@ import sqlite3
 from hddcoin.types.blockchain_format.coin import Coin
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.util.db_wrapper import DBWrapper
-from hddcoin.util.ints import uint32, uint64
+from hddcoin.util.ints import uint32, uint64, uint128
+from hddcoin.util.lru_cache import LRUCache
+from hddcoin.wallet.coin_selection import CoinAmountIndex
+from hddcoin.wallet.util.db_schema import (
+    MAX_SQL_PARAMETERS,
+    get_schema_version,
+    migrate_table,
+    set_schema_version,
+)
 from hddcoin.wallet.util.wallet_types import WalletType
 from hddcoin.wallet.wallet_coin_record import WalletCoinRecord
 
+COIN_RECORD_SCHEMA_VERSION = 2
+
+
+def spent_coin_record(record: WalletCoinRecord, height: uint32) -> WalletCoinRecord:
+    return WalletCoinRecord(
+        record.coin,
+        record.confirmed_block_height,
+        height,
+        True,
+        record.coinbase,
+        record.wallet_type,
+        record.wallet_id,
+    )
+
+
+def _coin_record_row_from_v1(row: Sequence[Any]) -> Tuple:
+    return (
+        bytes.fromhex(row[0]),
+        row[1],
+        row[2],
+        row[3],
+        row[4],
+        bytes.fromhex(row[5]),
+        bytes.fromhex(row[6]),
+        row[7],
+        row[8],
+        row[9],
+    )
+
 
 class WalletCoinStore:
     """
@@ -17,50 +54,71 @@ class WalletCoinStore:
     """
 
     db_connection: aiosqlite.Connection
-    # coin_record_cache keeps ALL coin records in memory. [record_name: record]
+    # coin_record_cache keeps ALL unspent coin records in memory. [record_name: record]
+    # The record objects are shared with the per wallet caches below.
     coin_record_cache: Dict[bytes32, WalletCoinRecord]
+    # spent_coin_cache keeps the most recently used spent coin records, the others are read from the DB
+    spent_coin_cache: LRUCache
     # unspent_coin_wallet_cache keeps ALL unspent coin records for wallet in memory [wallet_id: [record_name: record]]
     unspent_coin_wallet_cache: Dict[int, Dict[bytes32, WalletCoinRecord]]
+    # unspent_balance_cache keeps the sum of the unspent coin amounts for each wallet, in sync with
+    # unspent_coin_wallet_cache [wallet_id: balance]
+    unspent_balance_cache: Dict[int, int]
+    # unspent_amount_index keeps the unspent coin records of each wallet sorted by amount, in sync with
+    # unspent_coin_wallet_cache [wallet_id: index]
+    unspent_amount_index: Dict[int, CoinAmountIndex]
     db_wrapper: DBWrapper
 
     @classmethod
-    async def create(cls, wrapper: DBWrapper):
+    async def create(cls, wrapper: DBWrapper, cache_size: uint32 = uint32(10000)):
         self = cls()
 
         self.db_connection = wrapper.db
         self.db_wrapper = wrapper
-        await self.db_connection.execute(
-            (
+        version = await get_schema_version(self.db_connection, "coin_record")
+        if version < COIN_RECORD_SCHEMA_VERSION:
+            # The ids and hashes are stored as blobs since version 2, they used to be hex strings
+            create_table = (
                 "CREATE TABLE IF NOT EXISTS coin_record("
-                "coin_name text PRIMARY KEY,"
+                "coin_name blob PRIMARY KEY,"
                 " confirmed_height bigint,"
                 " spent_height bigint,"
                 " spent int,"
                 " coinbase int,"
-                " puzzle_hash text,"
-                " coin_parent text,"
+                " puzzle_hash blob,"
+                " coin_parent blob,"
                 " amount blob,"
                 " wallet_type int,"
                 " wallet_id int)"
+                " WITHOUT ROWID"
             )
-        )
+            if version == 0:
+                await self.db_connection.execute(create_table)
+            else:
+                await migrate_table(self.db_connection, "coin_record", create_table, _coin_record_row_from_v1)
+            await set_schema_version(self.db_connection, "coin_record", COIN_RECORD_SCHEMA_VERSION)
 
         # Useful for reorg lookups
         await self.db_connection.execute(
             "CREATE INDEX IF NOT EXISTS coin_confirmed_height on coin_record(confirmed_height)"
         )
         await self.db_connection.execute("CREATE INDEX IF NOT EXISTS coin_spent_height on coin_record(spent_height)")
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS coin_spent on coin_record(spent)")
 
         await self.db_connection.execute("CREATE INDEX IF NOT EXISTS coin_puzzlehash on coin_record(puzzle_hash)")
 
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS wallet_type on coin_record(wallet_type)")
+        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS coin_parent on coin_record(coin_parent)")
 
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS wallet_id on coin_record(wallet_id)")
+        # Only the unspent coins are loaded into the caches, spent coins are the bulk of the table
+        await self.db_connection.execute(
+            "CREATE INDEX IF NOT EXISTS coin_unspent_wallet_id on coin_record(wallet_id) WHERE spent=0"
+        )
 
         await self.db_connection.commit()
         self.coin_record_cache = {}
+        self.spent_coin_cache = LRUCache(cache_size)
         self.unspent_coin_wallet_cache = {}
+        self.unspent_balance_cache = {}
+        self.unspent_amount_index = {}
         await self.rebuild_wallet_cache()
         return self
 
@@ -70,60 +128,113 @@ class WalletCoinStore:
         await self.db_connection.commit()
 
     async def rebuild_wallet_cache(self):
-        # First update all coins that were reorged, then re-add coin_records
-        all_coins = await self.get_all_coins()
+        # Only unspent coins are kept in memory, spent ones are loaded when they are needed
+        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE spent=0")
+        rows = await cursor.fetchall()
+        await cursor.close()
         self.unspent_coin_wallet_cache = {}
+        self.unspent_balance_cache = {}
+        self.unspent_amount_index = {}
         self.coin_record_cache = {}
-        for coin_record in all_coins:
-            name = coin_record.name()
-            self.coin_record_cache[name] = coin_record
-            if coin_record.spent is False:
-                if coin_record.wallet_id not in self.unspent_coin_wallet_cache:
-                    self.unspent_coin_wallet_cache[coin_record.wallet_id] = {}
-                self.unspent_coin_wallet_cache[coin_record.wallet_id][name] = coin_record
+        self.spent_coin_cache = LRUCache(self.spent_coin_cache.capacity)
+        for row in rows:
+            coin_record = self.coin_record_from_row(row)
+            self._add_unspent_to_cache(coin_record.name(), coin_record)
+
+    def _cache_record(self, name: bytes32, record: WalletCoinRecord) -> None:
+        previous = self.coin_record_cache.get(name)
+        if previous is not None and previous.wallet_id != record.wallet_id:
+            self._remove_unspent_from_cache(name, previous.wallet_id)
+        if record.spent:
+            self._remove_unspent_from_cache(name, record.wallet_id)
+            self.spent_coin_cache.put(name, record)
+        else:
+            self._remove_spent_from_cache(name)
+            self._add_unspent_to_cache(name, record)
+
+    def _remove_spent_from_cache(self, name: bytes32) -> None:
+        if name in self.spent_coin_cache.cache:
+            self.spent_coin_cache.remove(name)
+
+    def _add_unspent_to_cache(self, name: bytes32, record: WalletCoinRecord) -> None:
+        wallet_coins = self.unspent_coin_wallet_cache.setdefault(record.wallet_id, {})
+        previous = wallet_coins.get(name)
+        balance = self.unspent_balance_cache.get(record.wallet_id, 0)
+        if previous is not None:
+            balance -= previous.coin.amount
+        wallet_coins[name] = record
+        self.coin_record_cache[name] = record
+        self.unspent_balance_cache[record.wallet_id] = balance + record.coin.amount
+        self.unspent_amount_index.setdefault(record.wallet_id, CoinAmountIndex()).add(name, record)
+
+    def _remove_unspent_from_cache(self, name: bytes32, wallet_id: int) -> None:
+        if wallet_id not in self.unspent_coin_wallet_cache:
+            return
+        previous = self.unspent_coin_wallet_cache[wallet_id].pop(name, None)
+        if previous is not None:
+            self.coin_record_cache.pop(name)
+            self.unspent_balance_cache[wallet_id] -= previous.coin.amount
+            self.unspent_amount_index[wallet_id].remove(name)
 
     # Store CoinRecord in DB and ram cache
     async def add_coin_record(self, record: WalletCoinRecord) -> None:
-        # update wallet cache
-        name = record.name()
-        self.coin_record_cache[name] = record
-        if record.wallet_id in self.unspent_coin_wallet_cache:
-            if record.spent and name in self.unspent_coin_wallet_cache[record.wallet_id]:
-                self.unspent_coin_wallet_cache[record.wallet_id].pop(name)
-            if not record.spent:
-                self.unspent_coin_wallet_cache[record.wallet_id][name] = record
-        else:
-            if not record.spent:
-                self.unspent_coin_wallet_cache[record.wallet_id] = {}
-                self.unspent_coin_wallet_cache[record.wallet_id][name] = record
+        await self._write_coin_records([record])
 
-        cursor = await self.db_connection.execute(
-            "INSERT OR REPLACE INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                name.hex(),
-                record.confirmed_block_height,
-                record.spent_block_height,
-                int(record.spent),
-                int(record.coinbase),
-                str(record.coin.puzzle_hash.hex()),
-                str(record.coin.parent_coin_info.hex()),
-                bytes(record.coin.amount),
-                record.wallet_type,
-                record.wallet_id,
-            ),
+    async def add_coin_records(self, records: List[WalletCoinRecord], in_transaction: bool = False) -> None:
+        """
+        Stores many coin records with a single statement, in one transaction unless the caller already holds one.
+        """
+        if len(records) == 0:
+            return
+        if not in_transaction:
+            await self.db_wrapper.lock.acquire()
+        try:
+            await self._write_coin_records(records)
+            if not in_transaction:
+                await self.db_connection.commit()
+        except BaseException:
+            if not in_transaction:
+                await self.db_connection.rollback()
+                await self.rebuild_wallet_cache()
+            raise
+        finally:
+            if not in_transaction:
+                self.db_wrapper.lock.release()
+
+    async def _write_coin_records(self, records: List[WalletCoinRecord]) -> None:
+        sql_records = []
+        for record in records:
+            # update wallet cache
+            name = record.name()
+            self._cache_record(name, record)
+            sql_records.append(
+                (
+                    name,
+                    record.confirmed_block_height,
+                    record.spent_block_height,
+                    int(record.spent),
+                    int(record.coinbase),
+                    record.coin.puzzle_hash,
+                    record.coin.parent_coin_info,
+                    bytes(record.coin.amount),
+                    record.wallet_type,
+                    record.wallet_id,
+                )
+            )
+
+        cursor = await self.db_connection.executemany(
+            "INSERT OR REPLACE INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sql_records
         )
         await cursor.close()
 
     # Sometimes we realize that a coin is actually not interesting to us so we need to delete it
     async def delete_coin_record(self, coin_name: bytes32) -> None:
         if coin_name in self.coin_record_cache:
-            coin_record = self.coin_record_cache.pop(coin_name)
-            if coin_record.wallet_id in self.unspent_coin_wallet_cache:
-                coin_cache = self.unspent_coin_wallet_cache[coin_record.wallet_id]
-                if coin_name in coin_cache:
-                    coin_cache.pop(coin_record.coin.name())
+            coin_record = self.coin_record_cache[coin_name]
+            self._remove_unspent_from_cache(coin_name, coin_record.wallet_id)
+        self._remove_spent_from_cache(coin_name)
 
-        c = await self.db_connection.execute("DELETE FROM coin_record WHERE coin_name=?", (coin_name.hex(),))
+        c = await self.db_connection.execute("DELETE FROM coin_record WHERE coin_name=?", (coin_name,))
         await c.close()
 
     # Update coin_record to be spent in DB
@@ -132,21 +243,26 @@ class WalletCoinStore:
         assert current is not None
         # assert current.spent is False
 
-        spent: WalletCoinRecord = WalletCoinRecord(
-            current.coin,
-            current.confirmed_block_height,
-            height,
-            True,
-            current.coinbase,
-            current.wallet_type,
-            current.wallet_id,
-        )
-
+        spent: WalletCoinRecord = spent_coin_record(current, height)
         await self.add_coin_record(spent)
         return spent
 
+    async def set_spent_many(
+        self, spends: List[Tuple[bytes32, uint32]], in_transaction: bool = False
+    ) -> List[WalletCoinRecord]:
+        """
+        Marks the coins as spent at the given heights, with a single write. All the coins have to be in the store.
+        """
+        current = await self.get_coin_records_by_names([coin_name for coin_name, _ in spends])
+        spent: List[WalletCoinRecord] = []
+        for coin_name, height in spends:
+            assert coin_name in current
+            spent.append(spent_coin_record(current[coin_name], height))
+        await self.add_coin_records(spent, in_transaction)
+        return spent
+
     def coin_record_from_row(self, row: sqlite3.Row) -> WalletCoinRecord:
-        coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
+        coin = Coin(bytes32(row[6]), bytes32(row[5]), uint64.from_bytes(row[7]))
         return WalletCoinRecord(
             coin, uint32(row[1]), uint32(row[2]), bool(row[3]), bool(row[4]), WalletType(row[8]), row[9]
         )
@@ -155,13 +271,44 @@ class WalletCoinStore:
         """Returns CoinRecord with specified coin id."""
         if coin_name in self.coin_record_cache:
             return self.coin_record_cache[coin_name]
-        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE coin_name=?", (coin_name.hex(),))
+        cached: Optional[WalletCoinRecord] = self.spent_coin_cache.get(coin_name)
+        if cached is not None:
+            return cached
+        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE coin_name=?", (coin_name,))
         row = await cursor.fetchone()
         await cursor.close()
 
         if row is None:
             return None
-        return self.coin_record_from_row(row)
+        record = self.coin_record_from_row(row)
+        if record.spent:
+            self.spent_coin_cache.put(coin_name, record)
+        return record
+
+    async def get_coin_records_by_names(self, coin_names: List[bytes32]) -> Dict[bytes32, WalletCoinRecord]:
+        """Returns the records of the coins that are in the store, reading the ones that are not cached in batches."""
+        result: Dict[bytes32, WalletCoinRecord] = {}
+        missing: List[bytes32] = []
+        for coin_name in coin_names:
+            record: Optional[WalletCoinRecord] = self.coin_record_cache.get(coin_name)
+            if record is None:
+                record = self.spent_coin_cache.get(coin_name)
+            if record is None:
+                missing.append(coin_name)
+            else:
+                result[coin_name] = record
+
+        for start in range(0, len(missing), MAX_SQL_PARAMETERS):
+            batch = missing[start : start + MAX_SQL_PARAMETERS]
+            cursor = await self.db_connection.execute(
+                f"SELECT * from coin_record WHERE coin_name in ({'?,' * (len(batch) - 1)}?)", batch
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+            for row in rows:
+                record = self.coin_record_from_row(row)
+                result[record.name()] = record
+        return result
 
     async def get_first_coin_height(self) -> Optional[uint32]:
         """Returns height of first confirmed coin"""
@@ -181,20 +328,15 @@ class WalletCoinStore:
         Finally, the coins must be confirmed at the height or less.
         """
         if height is None:
-            all_unspent = set()
-            for name, coin_record in self.coin_record_cache.items():
-                if coin_record.spent is False:
-                    all_unspent.add(coin_record)
-            return all_unspent
+            return set(self.coin_record_cache.values())
         else:
-            all_unspent = set()
-            for name, coin_record in self.coin_record_cache.items():
-                if (
-                    coin_record.spent is False
-                    or coin_record.spent_block_height > height >= coin_record.confirmed_block_height
-                ):
-                    all_unspent.add(coin_record)
-            return all_unspent
+            cursor = await self.db_connection.execute(
+                "SELECT * from coin_record WHERE spent=0 OR (spent_height>? AND confirmed_height<=?)",
+                (height, height),
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return set(self.coin_record_from_row(row) for row in rows)
 
     async def get_unspent_coins_for_wallet(self, wallet_id: int) -> Set[WalletCoinRecord]:
         """Returns set of CoinRecords that have not been spent yet for a wallet."""
@@ -204,6 +346,24 @@ class WalletCoinStore:
         else:
             return set()
 
+    def get_unspent_amount_index_for_wallet(self, wallet_id: int) -> CoinAmountIndex:
+        """Returns the unspent CoinRecords of a wallet sorted by amount. The index is updated as the store changes."""
+        return self.unspent_amount_index.setdefault(wallet_id, CoinAmountIndex())
+
+    async def get_unspent_coin_record_for_wallet(
+        self, wallet_id: int, coin_name: bytes32
+    ) -> Optional[WalletCoinRecord]:
+        """Returns the unspent CoinRecord with the given name if it belongs to the wallet."""
+        return self.unspent_coin_wallet_cache.get(wallet_id, {}).get(coin_name)
+
+    async def get_unspent_coin_count_for_wallet(self, wallet_id: int) -> int:
+        """Returns the number of coins that have not been spent yet for a wallet."""
+        return len(self.unspent_coin_wallet_cache.get(wallet_id, {}))
+
+    async def get_confirmed_balance_for_wallet(self, wallet_id: int) -> uint128:
+        """Returns the sum of the amounts of all the coins that have not been spent yet for a wallet."""
+        return uint128(self.unspent_balance_cache.get(wallet_id, 0))
+
     async def get_all_coins(self) -> Set[WalletCoinRecord]:
         """Returns set of all CoinRecords."""
         cursor = await self.db_connection.execute("SELECT * from coin_record")
@@ -229,7 +389,7 @@ class WalletCoinStore:
     # Checks DB and DiffStores for CoinRecords with puzzle_hash and returns them
     async def get_coin_records_by_puzzle_hash(self, puzzle_hash: bytes32) -> List[WalletCoinRecord]:
         """Returns a list of all coin records with the given puzzle hash"""
-        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE puzzle_hash=?", (puzzle_hash.hex(),))
+        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE puzzle_hash=?", (puzzle_hash,))
         rows = await cursor.fetchall()
         await cursor.close()
 
@@ -238,9 +398,7 @@ class WalletCoinStore:
     # Checks DB and DiffStores for CoinRecords with parent_coin_info and returns them
     async def get_coin_records_by_parent_id(self, parent_coin_info: bytes32) -> List[WalletCoinRecord]:
         """Returns a list of all coin records with the given parent id"""
-        cursor = await self.db_connection.execute(
-            "SELECT * from coin_record WHERE coin_parent=?", (parent_coin_info.hex(),)
-        )
+        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE coin_parent=?", (parent_coin_info,))
         rows = await cursor.fetchall()
         await cursor.close()
 
@@ -252,10 +410,19 @@ class WalletCoinStore:
         are removed from the LCA. All coins confirmed after this point are removed.
         All coins spent after this point are set to unspent. Can be -1 (rollback all)
         """
-        # Delete from storage
-        delete_queue: List[WalletCoinRecord] = []
-        for coin_name, coin_record in self.coin_record_cache.items():
-            if coin_record.spent_block_height > height:
+        # Only the coins confirmed or spent after this point are affected
+        cursor = await self.db_connection.execute(
+            "SELECT * from coin_record WHERE confirmed_height>? OR spent_height>?", (height, height)
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+        for row in rows:
+            coin_record = self.coin_record_from_row(row)
+            coin_name = coin_record.name()
+            if coin_record.confirmed_block_height > height:
+                self._remove_unspent_from_cache(coin_name, coin_record.wallet_id)
+                self._remove_spent_from_cache(coin_name)
+            else:
                 new_record = WalletCoinRecord(
                     coin_record.coin,
                     coin_record.confirmed_block_height,
@@ -265,18 +432,7 @@ class WalletCoinStore:
                     coin_record.wallet_type,
                     coin_record.wallet_id,
                 )
-                self.coin_record_cache[coin_record.coin.name()] = new_record
-                if coin_record.wallet_id in self.unspent_coin_wallet_cache:
-                    self.unspent_coin_wallet_cache[coin_record.wallet_id][coin_record.coin.name()] = new_record
-            if coin_record.confirmed_block_height > height:
-                delete_queue.append(coin_record)
-
-        for coin_record in delete_queue:
-            self.coin_record_cache.pop(coin_record.coin.name())
-            if coin_record.wallet_id in self.unspent_coin_wallet_cache:
-                coin_cache = self.unspent_coin_wallet_cache[coin_record.wallet_id]
-                if coin_record.coin.name() in coin_cache:
-                    coin_cache.pop(coin_record.coin.name())
+                self._cache_record(coin_name, new_record)
 
         c1 = await self.db_connection.execute("DELETE FROM coin_record WHERE confirmed_height>?", (height,))
         await c1.close()
@@ -4,6 +4,10 @@ import aiosqlite
 
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.wallet.puzzle_hash_index import PuzzleHashIndex
+
+# Number of interested puzzle hashes the membership index is sized for
+INTERESTED_PUZZLE_HASHES_EXPECTED_SIZE = 10000
 
 
 class WalletInterestedStore:
@@ -13,6 +17,8 @@ class WalletInterestedStore:
 
     db_connection: aiosqlite.Connection
     db_wrapper: DBWrapper
+    # Every puzzle hash in interested_puzzle_hashes, so that lookups of other puzzle hashes don't go to the DB
+    interested_puzzle_hash_index: PuzzleHashIndex
 
     @classmethod
     async def create(cls, wrapper: DBWrapper):
@@ -27,6 +33,10 @@ class WalletInterestedStore:
             "CREATE TABLE IF NOT EXISTS interested_puzzle_hashes(puzzle_hash text PRIMARY KEY, wallet_id integer)"
         )
         await self.db_connection.commit()
+        self.interested_puzzle_hash_index = PuzzleHashIndex(
+            INTERESTED_PUZZLE_HASHES_EXPECTED_SIZE,
+            [puzzle_hash for puzzle_hash, _ in await self.get_interested_puzzle_hashes()],
+        )
         return self
 
     async def _clear_database(self):
@@ -61,6 +71,8 @@ class WalletInterestedStore:
         return [(bytes32(bytes.fromhex(row[0])), row[1]) for row in rows_hex]
 
     async def get_interested_puzzle_hash_wallet_id(self, puzzle_hash: bytes32) -> Optional[int]:
+        if puzzle_hash not in self.interested_puzzle_hash_index:
+            return None
         cursor = await self.db_connection.execute(
             "SELECT wallet_id FROM interested_puzzle_hashes WHERE puzzle_hash=?", (puzzle_hash.hex(),)
         )
@@ -80,6 +92,7 @@ class WalletInterestedStore:
                 "INSERT OR REPLACE INTO interested_puzzle_hashes VALUES (?, ?)", (puzzle_hash.hex(), wallet_id)
             )
             await cursor.close()
+            self.interested_puzzle_hash_index.add(puzzle_hash)
         finally:
             if not in_transaction:
                 await self.db_connection.commit()
@@ -93,6 +106,7 @@ class WalletInterestedStore:
                 "DELETE FROM interested_puzzle_hashes WHERE puzzle_hash=?", (puzzle_hash.hex(),)
             )
             await cursor.close()
+            self.interested_puzzle_hash_index.discard(puzzle_hash)
         finally:
             if not in_transaction:
                 await self.db_connection.commit()
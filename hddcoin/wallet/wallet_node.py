@@ -733,7 +733,9 @@ class WalletNode:
                             or weight_proof.recent_chain_data[-1].weight
                             > self.wallet_state_manager.blockchain.synced_weight_proof.recent_chain_data[-1].weight
                         ):
-                            await self.wallet_state_manager.blockchain.new_weight_proof(weight_proof, block_records)
+                            await self.wallet_state_manager.blockchain.new_weight_proof(
+                                weight_proof, block_records, summaries
+                            )
 
                         self.synced_peers.add(peer.peer_node_id)
 
@@ -909,7 +911,7 @@ class WalletNode:
         for coin in additions:
             puzzle_store = self.wallet_state_manager.puzzle_store
             record_info: Optional[DerivationRecord] = await puzzle_store.get_derivation_record_for_puzzle_hash(
-                coin.puzzle_hash.hex()
+                coin.puzzle_hash
             )
             if record_info is not None and record_info.wallet_type == WalletType.COLOURED_COIN:
                 request_all_removals = True
@@ -970,8 +972,15 @@ class WalletNode:
         if weight_proof.recent_chain_data[-1].reward_chain_block.weight != peak.weight:
             return False, None, [], []
 
-        if weight_proof.get_hash() in self.valid_wp_cache:
-            valid, fork_point, summaries, block_records = self.valid_wp_cache[weight_proof.get_hash()]
+        # Weight proofs contain lists, so their hash isn't cached
+        wp_hash = weight_proof.get_hash()
+        # The state of the synced weight proof is stored, so it isn't validated again after a restart
+        synced_state = self.wallet_state_manager.blockchain.synced_weight_proof_state
+        if wp_hash in self.valid_wp_cache:
+            valid, fork_point, summaries, block_records = self.valid_wp_cache[wp_hash]
+        elif synced_state is not None and synced_state.weight_proof_hash == wp_hash and len(synced_state.summaries) > 0:
+            valid, fork_point = True, uint32(0)
+            summaries, block_records = synced_state.summaries, synced_state.block_records
         else:
             start_validation = time.time()
             (
@@ -981,7 +990,7 @@ class WalletNode:
                 block_records,
             ) = await self.wallet_state_manager.weight_proof_handler.validate_weight_proof(weight_proof)
             if valid:
-                self.valid_wp_cache[weight_proof.get_hash()] = valid, fork_point, summaries, block_records
+                self.valid_wp_cache[wp_hash] = valid, fork_point, summaries, block_records
 
         end_validation = time.time()
         self.log.info(f"It took {end_validation - start_validation} time to validate the weight proof")
@@ -1093,7 +1102,11 @@ class WalletNode:
         await self.wallet_state_manager.new_coin_state(validated_state, peer, weight_proof=weight_proof)
         end_time = time.time()
         duration = end_time - start_time
-        self.log.info(f"Sync duration was: {duration}")
+        num_states = len(peer_request_cache.states_validated)
+        self.log.info(
+            f"Sync duration was: {duration}, validated {num_states} coin states "
+            f"({num_states / max(duration, 1e-6):.1f} coins/sec)"
+        )
 
     async def validate_received_state_from_peer(
         self,
@@ -1109,18 +1122,20 @@ class WalletNode:
         """
         assert self.wallet_state_manager is not None
         all_validated_states = []
-        total = len(coin_states)
-        for coin_idx, coin_state in enumerate(coin_states):
-            looked_up_coin: Optional[WalletCoinRecord] = await self.wallet_state_manager.coin_store.get_coin_record(
+        newly_validated_states = []
+        to_validate: List[Tuple[CoinState, Optional[WalletCoinRecord]]] = []
+        wp_tip_height = weight_proof.recent_chain_data[-1].height
+        for coin_state in coin_states:
+            current: Optional[WalletCoinRecord] = await self.wallet_state_manager.coin_store.get_coin_record(
                 coin_state.coin.name()
             )
             if (
-                looked_up_coin is not None
+                current is not None
                 and coin_state.created_height is not None
-                and looked_up_coin.confirmed_block_height == coin_state.created_height
+                and current.confirmed_block_height == coin_state.created_height
             ):
-                if looked_up_coin.spent:
-                    if looked_up_coin.spent_block_height == coin_state.spent_height:
+                if current.spent:
+                    if current.spent_block_height == coin_state.spent_height:
                         # Both are spent and created at same height, no need to validate
                         if return_old_state:
                             all_validated_states.append(coin_state)
@@ -1134,13 +1149,9 @@ class WalletNode:
             if coin_state.get_hash() in peer_request_cache.states_validated:
                 all_validated_states.append(coin_state)
                 continue
-            self.log.info(f"Validating {coin_idx + 1} of {total}")
             spent_height = coin_state.spent_height
             confirmed_height = coin_state.created_height
 
-            current = await self.wallet_state_manager.coin_store.get_coin_record(coin_state.coin.name())
-            # if remote state is same as current local state we skip validation
-
             # CoinRecord unspent = height 0, coin state = None. We adjust for comparison bellow
             current_spent_height = None
             if current is not None and current.spent_block_height != 0:
@@ -1148,7 +1159,6 @@ class WalletNode:
 
             # It's possible that new state has been added before we finished validating weight proof
             # We'll just ignore it here, backward sync will pick it up
-            wp_tip_height = weight_proof.recent_chain_data[-1].height
             if (confirmed_height is not None and confirmed_height > wp_tip_height) or (
                 spent_height is not None and spent_height > wp_tip_height
             ):
@@ -1158,98 +1168,124 @@ class WalletNode:
                 and current_spent_height == spent_height
                 and current.confirmed_block_height == confirmed_height
             ):
+                # if remote state is same as current local state we skip validation
                 all_validated_states.append(coin_state)
-                continue
             else:
-                # Full info validation
                 if confirmed_height is None:
                     # We shouldn't receive state for non-existing coin unless we specifically ask for it
                     peer.close(9999)
                     raise ValueError("Should not receive state for non-existing coin")
+                to_validate.append((coin_state, current))
+                all_validated_states.append(coin_state)
+            newly_validated_states.append(coin_state)
+
+        if len(to_validate) > 0:
+            start_time = time.time()
+            await self.validate_coin_states_batch(to_validate, peer, weight_proof, peer_request_cache)
+            duration = max(time.time() - start_time, 1e-6)
+            self.log.info(
+                f"Validated {len(to_validate)} coin states in {duration:.2f}s "
+                f"({len(to_validate) / duration:.1f} coins/sec)"
+            )
+        for coin_state in newly_validated_states:
+            peer_request_cache.states_validated[coin_state.get_hash()] = coin_state
+        return all_validated_states
 
-                self.log.debug(f"Validating state: {coin_state}")
-                # request header block for created height
-                if confirmed_height in peer_request_cache.blocks:
-                    state_block: HeaderBlock = peer_request_cache.blocks[confirmed_height]
-                else:
-                    request = RequestHeaderBlocks(confirmed_height, confirmed_height)
-                    res = await peer.request_header_blocks(request)
-                    state_block = res.header_blocks[0]
-                    peer_request_cache.blocks[confirmed_height] = state_block
-
-                # get proof of inclusion
+    async def validate_coin_states_batch(
+        self,
+        to_validate: List[Tuple[CoinState, Optional[WalletCoinRecord]]],
+        peer,
+        weight_proof: WeightProof,
+        peer_request_cache: PeerRequestCache,
+    ) -> None:
+        """
+        Validates inclusion of the given coin states (paired with our current record of the coin, if any). States are
+        grouped by created and spent height, so that each height needs one header block, one additions request, one
+        removals request and one chain validation, regardless of how many coins were created or spent there. Heights
+        are validated concurrently, with at most `max_concurrent_sync_requests` in flight. Raises ValueError (and
+        closes the connection) if any of the states does not validate.
+        """
+        # height -> puzzle hashes of coins created at that height
+        additions_at_height: Dict[uint32, Set[bytes32]] = {}
+        # height -> names of coins spent at that height
+        removals_at_height: Dict[uint32, Set[bytes32]] = {}
+        for coin_state, current in to_validate:
+            assert coin_state.created_height is not None
+            self.log.debug(f"Validating state: {coin_state}")
+            additions_at_height.setdefault(coin_state.created_height, set()).add(coin_state.coin.puzzle_hash)
+            if coin_state.spent_height is None and current is not None and current.spent_block_height != 0:
+                # Peer is telling us that coin that was previously known to be spent is not spent anymore
+                # Check old state
+                removals_at_height.setdefault(current.spent_block_height, set()).add(coin_state.coin.name())
+            if coin_state.spent_height is not None:
+                removals_at_height.setdefault(coin_state.spent_height, set()).add(coin_state.coin.name())
+
+        all_heights: List[uint32] = sorted(set(additions_at_height.keys()) | set(removals_at_height.keys()))
+        semaphore = asyncio.Semaphore(self.config.get("max_concurrent_sync_requests", 10))
+        await self.fetch_header_blocks(all_heights, peer, peer_request_cache, semaphore)
+
+        async def validate_height(height: uint32) -> bool:
+            async with semaphore:
+                state_block: HeaderBlock = peer_request_cache.blocks[height]
                 assert state_block.foliage_transaction_block is not None
-                validate_additions_result = await request_and_validate_additions(
-                    peer,
-                    state_block.height,
-                    state_block.header_hash,
-                    coin_state.coin.puzzle_hash,
-                    state_block.foliage_transaction_block.additions_root,
-                )
-
-                if validate_additions_result is False:
-                    peer.close(9999)
-                    raise ValueError(f"Addition did not validate: {state_block}, {coin_state}")
-
+                if height in additions_at_height:
+                    if not await request_and_validate_additions(
+                        peer,
+                        state_block.height,
+                        state_block.header_hash,
+                        list(additions_at_height[height]),
+                        state_block.foliage_transaction_block.additions_root,
+                    ):
+                        self.log.error(f"Additions did not validate at height {height}")
+                        return False
+                if height in removals_at_height:
+                    if not await request_and_validate_removals(
+                        peer,
+                        state_block.height,
+                        state_block.header_hash,
+                        list(removals_at_height[height]),
+                        state_block.foliage_transaction_block.removals_root,
+                    ):
+                        self.log.error(f"Removals did not validate at height {height}")
+                        return False
                 # get blocks on top of this block
+                return await self.validate_state(weight_proof, state_block, peer, peer_request_cache)
 
-                validated = await self.validate_state(weight_proof, state_block, peer, peer_request_cache)
-                if not validated:
-                    raise ValueError("Validation failed")
+        results = await asyncio.gather(*[validate_height(height) for height in all_heights])
+        if not all(results):
+            peer.close(9999)
+            raise ValueError("Validation failed")
 
-                if spent_height is None and current is not None and current.spent_block_height != 0:
-                    # Peer is telling us that coin that was previously known to be spent is not spent anymore
-                    # Check old state
-                    if spent_height in peer_request_cache.blocks:
-                        spent_state_block: HeaderBlock = peer_request_cache.blocks[current.spent_block_height]
-                    else:
-                        request = RequestHeaderBlocks(current.spent_block_height, current.spent_block_height)
-                        res = await peer.request_header_blocks(request)
-                        spent_state_block = res.header_blocks[0]
-                        assert spent_state_block.height == current.spent_block_height
-                        peer_request_cache.blocks[current.spent_block_height] = spent_state_block
-                    assert spent_state_block.foliage_transaction_block is not None
-                    validate_removals_result: bool = await request_and_validate_removals(
-                        peer,
-                        current.spent_block_height,
-                        spent_state_block.header_hash,
-                        coin_state.coin.name(),
-                        spent_state_block.foliage_transaction_block.removals_root,
-                    )
-                    if validate_removals_result is False:
-                        peer.close(9999)
-                        raise ValueError("Validation failed")
-                    validated = await self.validate_state(weight_proof, spent_state_block, peer, peer_request_cache)
-                    if not validated:
-                        raise ValueError("Validation failed")
-
-                if spent_height is not None:
-                    # request header block for created height
-                    if spent_height in peer_request_cache.blocks:
-                        spent_state_block = peer_request_cache.blocks[spent_height]
-                    else:
-                        request = RequestHeaderBlocks(spent_height, spent_height)
-                        res = await peer.request_header_blocks(request)
-                        spent_state_block = res.header_blocks[0]
-                        assert spent_state_block.height == spent_height
-                        peer_request_cache.blocks[spent_height] = spent_state_block
-                    assert spent_state_block.foliage_transaction_block is not None
-                    validate_removals_result = await request_and_validate_removals(
-                        peer,
-                        spent_state_block.height,
-                        spent_state_block.header_hash,
-                        coin_state.coin.name(),
-                        spent_state_block.foliage_transaction_block.removals_root,
-                    )
-                    if validate_removals_result is False:
-                        peer.close(9999)
-                        raise ValueError(f"Removals did not validate {spent_state_block}, {coin_state}")
-                    validated = await self.validate_state(weight_proof, spent_state_block, peer, peer_request_cache)
-                    if not validated:
-                        raise ValueError("Validation failed")
-                all_validated_states.append(coin_state)
-            peer_request_cache.states_validated[coin_state.get_hash()] = coin_state
-        return all_validated_states
+    async def fetch_header_blocks(
+        self, heights: List[uint32], peer, peer_request_cache: PeerRequestCache, semaphore: asyncio.Semaphore
+    ) -> None:
+        """
+        Makes sure that the header blocks at all the given heights are in the peer request cache. Missing heights
+        are fetched in ranges of up to 32 blocks, with requests limited by the semaphore.
+        """
+        missing = sorted(set(h for h in heights if h not in peer_request_cache.blocks))
+        ranges: List[List[uint32]] = []
+        for height in missing:
+            if len(ranges) > 0 and height - ranges[-1][0] < 32:
+                ranges[-1].append(height)
+            else:
+                ranges.append([height])
+
+        async def fetch_range(range_heights: List[uint32]) -> None:
+            async with semaphore:
+                request = RequestHeaderBlocks(range_heights[0], range_heights[-1])
+                res = await peer.request_header_blocks(request)
+            if res is None or not isinstance(res, RespondHeaderBlocks):
+                peer.close(9999)
+                raise ValueError(f"Failed to fetch header blocks {range_heights[0]} - {range_heights[-1]}")
+            blocks_by_height: Dict[uint32, HeaderBlock] = {block.height: block for block in res.header_blocks}
+            for height in range_heights:
+                if height not in blocks_by_height:
+                    peer.close(9999)
+                    raise ValueError(f"Peer did not send header block at height {height}")
+                peer_request_cache.blocks[height] = blocks_by_height[height]
+
+        await asyncio.gather(*[fetch_range(range_heights) for range_heights in ranges])
 
     async def validate_state(
         self, weight_proof: WeightProof, block: HeaderBlock, peer, peer_request_cache: PeerRequestCache
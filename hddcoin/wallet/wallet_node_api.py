@@ -1,3 +1,4 @@
+from hddcoin.full_node.coin_state_updates import decompress_coin_state_update
 from hddcoin.protocols import full_node_protocol, introducer_protocol, wallet_protocol
 from hddcoin.server.outbound_message import NodeType
 from hddcoin.server.ws_connection import WSHDDcoinConnection
@@ -145,6 +146,13 @@ class WalletNodeAPI:
     async def coin_state_update(self, request: wallet_protocol.CoinStateUpdate, peer: WSHDDcoinConnection):
         await self.wallet_node.state_update_received(request, peer)
 
+    @peer_required
+    @api_request
+    async def compressed_coin_state_update(
+        self, request: wallet_protocol.CompressedCoinStateUpdate, peer: WSHDDcoinConnection
+    ):
+        await self.wallet_node.state_update_received(decompress_coin_state_update(request), peer)
+
     @api_request
     async def respond_to_ph_update(self, request: wallet_protocol.RespondToPhUpdates):
         pass
@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from typing import List, Optional, Set, Tuple
+from typing import Any, List, Optional, Sequence, Set, Tuple
 
 import aiosqlite
 from blspy import G1Element
@@ -9,10 +9,23 @@ from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.util.db_wrapper import DBWrapper
 from hddcoin.util.ints import uint32
 from hddcoin.wallet.derivation_record import DerivationRecord
+from hddcoin.wallet.puzzle_hash_index import PuzzleHashIndex
+from hddcoin.wallet.util.db_schema import (
+    MAX_SQL_PARAMETERS,
+    get_schema_version,
+    migrate_table,
+    set_schema_version,
+)
 from hddcoin.wallet.util.wallet_types import WalletType
 
 log = logging.getLogger(__name__)
 
+DERIVATION_PATHS_SCHEMA_VERSION = 2
+
+
+def _derivation_path_row_from_v1(row: Sequence[Any]) -> Tuple:
+    return (row[0], bytes.fromhex(row[1]), bytes.fromhex(row[2]), row[3], row[4], row[5], row[6])
+
 
 class WalletPuzzleStore:
     """
@@ -24,7 +37,8 @@ class WalletPuzzleStore:
     db_connection: aiosqlite.Connection
     lock: asyncio.Lock
     cache_size: uint32
-    all_puzzle_hashes: Set[bytes32]
+    # Every puzzle hash in the table, so that lookups of puzzle hashes that are not ours don't go to the DB
+    all_puzzle_hashes: PuzzleHashIndex
     db_wrapper: DBWrapper
 
     @classmethod
@@ -35,31 +49,36 @@ class WalletPuzzleStore:
 
         self.db_wrapper = db_wrapper
         self.db_connection = self.db_wrapper.db
-        await self.db_connection.execute(
-            (
+        version = await get_schema_version(self.db_connection, "derivation_paths")
+        if version < DERIVATION_PATHS_SCHEMA_VERSION:
+            # Since version 2 the pubkeys and puzzle hashes are stored as blobs, and the puzzle hash is the key
+            create_table = (
                 "CREATE TABLE IF NOT EXISTS derivation_paths("
                 "derivation_index int,"
-                " pubkey text,"
-                " puzzle_hash text PRIMARY_KEY,"
+                " pubkey blob,"
+                " puzzle_hash blob PRIMARY KEY,"
                 " wallet_type int,"
                 " wallet_id int,"
                 " used tinyint,"
                 " hardened tinyint)"
+                " WITHOUT ROWID"
             )
-        )
+            if version == 0:
+                await self.db_connection.execute(create_table)
+            else:
+                await migrate_table(self.db_connection, "derivation_paths", create_table, _derivation_path_row_from_v1)
+            await set_schema_version(self.db_connection, "derivation_paths", DERIVATION_PATHS_SCHEMA_VERSION)
+
         await self.db_connection.execute(
             "CREATE INDEX IF NOT EXISTS derivation_index_index on derivation_paths(derivation_index)"
         )
 
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS ph on derivation_paths(puzzle_hash)")
-
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS pubkey on derivation_paths(pubkey)")
-
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS wallet_type on derivation_paths(wallet_type)")
+        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS derivation_pubkey on derivation_paths(pubkey)")
 
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS wallet_id on derivation_paths(wallet_id)")
-
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS used on derivation_paths(wallet_type)")
+        await self.db_connection.execute(
+            "CREATE INDEX IF NOT EXISTS derivation_wallet_index"
+            " on derivation_paths(wallet_id, hardened, derivation_index)"
+        )
 
         await self.db_connection.commit()
         # Lock
@@ -71,7 +90,7 @@ class WalletPuzzleStore:
         await self.db_connection.close()
 
     async def _init_cache(self):
-        self.all_puzzle_hashes = await self.get_all_puzzle_hashes()
+        self.all_puzzle_hashes = PuzzleHashIndex(self.cache_size, await self.get_all_puzzle_hashes())
 
     async def _clear_database(self):
         cursor = await self.db_connection.execute("DELETE FROM derivation_paths")
@@ -96,8 +115,8 @@ class WalletPuzzleStore:
                 sql_records.append(
                     (
                         record.index,
-                        bytes(record.pubkey).hex(),
-                        record.puzzle_hash.hex(),
+                        bytes(record.pubkey),
+                        record.puzzle_hash,
                         record.wallet_type,
                         record.wallet_id,
                         0,
@@ -136,8 +155,8 @@ class WalletPuzzleStore:
         if row is not None and row[0] is not None:
             return DerivationRecord(
                 uint32(row[0]),
-                bytes32.fromhex(row[2]),
-                G1Element.from_bytes(bytes.fromhex(row[1])),
+                bytes32(row[2]),
+                G1Element.from_bytes(row[1]),
                 WalletType(row[3]),
                 uint32(row[4]),
                 bool(row[5]),
@@ -145,10 +164,12 @@ class WalletPuzzleStore:
 
         return None
 
-    async def get_derivation_record_for_puzzle_hash(self, puzzle_hash: str) -> Optional[DerivationRecord]:
+    async def get_derivation_record_for_puzzle_hash(self, puzzle_hash: bytes32) -> Optional[DerivationRecord]:
         """
         Returns the derivation record by index and wallet id.
         """
+        if puzzle_hash not in self.all_puzzle_hashes:
+            return None
         cursor = await self.db_connection.execute(
             "SELECT * FROM derivation_paths WHERE puzzle_hash=?;",
             (puzzle_hash,),
@@ -159,8 +180,8 @@ class WalletPuzzleStore:
         if row is not None and row[0] is not None:
             return DerivationRecord(
                 uint32(row[0]),
-                bytes32.fromhex(row[2]),
-                G1Element.from_bytes(bytes.fromhex(row[1])),
+                bytes32(row[2]),
+                G1Element.from_bytes(row[1]),
                 WalletType(row[3]),
                 uint32(row[4]),
                 bool(row[6]),
@@ -191,13 +212,7 @@ class WalletPuzzleStore:
         Checks if passed puzzle_hash is present in the db.
         """
 
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash.hex(),)
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        return row is not None
+        return puzzle_hash in self.all_puzzle_hashes
 
     async def one_of_puzzle_hashes_exists(self, puzzle_hashes: List[bytes32]) -> bool:
         """
@@ -215,8 +230,8 @@ class WalletPuzzleStore:
     def row_to_record(self, row) -> DerivationRecord:
         return DerivationRecord(
             uint32(row[0]),
-            bytes32.fromhex(row[2]),
-            G1Element.from_bytes(bytes.fromhex(row[1])),
+            bytes32(row[2]),
+            G1Element.from_bytes(row[1]),
             WalletType(row[3]),
             uint32(row[4]),
             bool(row[6]),
@@ -228,9 +243,7 @@ class WalletPuzzleStore:
         Returns None if not present.
         """
 
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE pubkey=?", (bytes(pubkey).hex(),)
-        )
+        cursor = await self.db_connection.execute("SELECT * from derivation_paths WHERE pubkey=?", (bytes(pubkey),))
         row = await cursor.fetchone()
         await cursor.close()
 
@@ -245,9 +258,7 @@ class WalletPuzzleStore:
         Returns None if not present.
         """
 
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE pubkey=?", (bytes(pubkey).hex(),)
-        )
+        cursor = await self.db_connection.execute("SELECT * from derivation_paths WHERE pubkey=?", (bytes(pubkey),))
         row = await cursor.fetchone()
         await cursor.close()
 
@@ -261,9 +272,9 @@ class WalletPuzzleStore:
         Returns the derivation path for the puzzle_hash.
         Returns None if not present.
         """
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash.hex(),)
-        )
+        if puzzle_hash not in self.all_puzzle_hashes:
+            return None
+        cursor = await self.db_connection.execute("SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash,))
         row = await cursor.fetchone()
         await cursor.close()
 
@@ -277,9 +288,9 @@ class WalletPuzzleStore:
         Returns the derivation path for the puzzle_hash.
         Returns None if not present.
         """
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash.hex(),)
-        )
+        if puzzle_hash not in self.all_puzzle_hashes:
+            return None
+        cursor = await self.db_connection.execute("SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash,))
         row = await cursor.fetchone()
         await cursor.close()
 
@@ -288,15 +299,38 @@ class WalletPuzzleStore:
 
         return None
 
+    async def max_index_for_puzzle_hashes(self, puzzle_hashes: List[bytes32]) -> Optional[uint32]:
+        """
+        Returns the largest derivation index of the passed puzzle hashes.
+        Returns None if none of them is present.
+        """
+        result: Optional[uint32] = None
+        puzzle_hashes = [puzzle_hash for puzzle_hash in puzzle_hashes if puzzle_hash in self.all_puzzle_hashes]
+        for start in range(0, len(puzzle_hashes), MAX_SQL_PARAMETERS):
+            batch = puzzle_hashes[start : start + MAX_SQL_PARAMETERS]
+            cursor = await self.db_connection.execute(
+                f"SELECT MAX(derivation_index) from derivation_paths WHERE puzzle_hash in ({'?,' * (len(batch) - 1)}?)",
+                batch,
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+
+            if row is not None and row[0] is not None and (result is None or row[0] > result):
+                result = uint32(row[0])
+
+        return result
+
     async def index_for_puzzle_hash_and_wallet(self, puzzle_hash: bytes32, wallet_id: uint32) -> Optional[uint32]:
         """
         Returns the derivation path for the puzzle_hash.
         Returns None if not present.
         """
+        if puzzle_hash not in self.all_puzzle_hashes:
+            return None
         cursor = await self.db_connection.execute(
             "SELECT * from derivation_paths WHERE puzzle_hash=? and wallet_id=?;",
             (
-                puzzle_hash.hex(),
+                puzzle_hash,
                 wallet_id,
             ),
         )
@@ -313,10 +347,10 @@ class WalletPuzzleStore:
         Returns the derivation path for the puzzle_hash.
         Returns None if not present.
         """
+        if puzzle_hash not in self.all_puzzle_hashes:
+            return None
 
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash.hex(),)
-        )
+        cursor = await self.db_connection.execute("SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash,))
         row = await cursor.fetchone()
         await cursor.close()
 
@@ -330,13 +364,13 @@ class WalletPuzzleStore:
         Return a set containing all puzzle_hashes we generated.
         """
 
-        cursor = await self.db_connection.execute("SELECT * from derivation_paths")
+        cursor = await self.db_connection.execute("SELECT puzzle_hash from derivation_paths")
         rows = await cursor.fetchall()
         await cursor.close()
         result: Set[bytes32] = set()
 
         for row in rows:
-            result.add(bytes32(bytes.fromhex(row[2])))
+            result.add(bytes32(row[0]))
 
         return result
 
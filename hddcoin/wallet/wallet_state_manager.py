@@ -31,13 +31,19 @@ from hddcoin.util.db_synchronous import db_synchronous_on
 from hddcoin.wallet.cc_wallet.cc_utils import match_cat_puzzle, construct_cc_puzzle
 from hddcoin.wallet.cc_wallet.cc_wallet import CCWallet
 from hddcoin.wallet.derivation_record import DerivationRecord
-from hddcoin.wallet.derive_keys import master_sk_to_wallet_sk, master_sk_to_wallet_sk_unhardened
+from hddcoin.wallet.derive_keys import (
+    master_sk_to_wallet_sk,
+    master_sk_to_wallet_sk_intermediate,
+    master_sk_to_wallet_sk_unhardened,
+    master_sk_to_wallet_sk_unhardened_intermediate,
+)
 from hddcoin.wallet.key_val_store import KeyValStore
 from hddcoin.wallet.puzzles.cc_loader import CC_MOD
 from hddcoin.wallet.rl_wallet.rl_wallet import RLWallet
 from hddcoin.wallet.settings.user_settings import UserSettings
 from hddcoin.wallet.trade_manager import TradeManager
 from hddcoin.wallet.transaction_record import TransactionRecord
+from hddcoin.wallet.util.puzzle_derivation import default_num_derivation_workers, derive_pubkeys_and_puzzle_hashes_bulk
 from hddcoin.wallet.util.transaction_type import TransactionType
 from hddcoin.wallet.util.wallet_types import WalletType
 from hddcoin.wallet.wallet import Wallet
@@ -45,7 +51,7 @@ from hddcoin.wallet.wallet_action import WalletAction
 from hddcoin.wallet.wallet_action_store import WalletActionStore
 from hddcoin.wallet.wallet_blockchain import WalletBlockchain
 from hddcoin.wallet.wallet_coin_record import WalletCoinRecord
-from hddcoin.wallet.wallet_coin_store import WalletCoinStore
+from hddcoin.wallet.wallet_coin_store import WalletCoinStore, spent_coin_record
 from hddcoin.wallet.wallet_info import WalletInfo
 from hddcoin.wallet.wallet_interested_store import WalletInterestedStore
 from hddcoin.wallet.wallet_puzzle_store import WalletPuzzleStore
@@ -147,8 +153,10 @@ class WalletStateManager:
         )
 
         self.db_wrapper = DBWrapper(self.db_connection)
-        self.coin_store = await WalletCoinStore.create(self.db_wrapper)
-        self.tx_store = await WalletTransactionStore.create(self.db_wrapper)
+        self.coin_store = await WalletCoinStore.create(
+            self.db_wrapper, uint32(self.config.get("spent_coin_cache_size", 10000))
+        )
+        self.tx_store = await WalletTransactionStore.create(self.db_wrapper, self.constants.GENESIS_CHALLENGE)
         self.puzzle_store = await WalletPuzzleStore.create(self.db_wrapper)
         self.user_store = await WalletUserStore.create(self.db_wrapper)
         self.action_store = await WalletActionStore.create(self.db_wrapper)
@@ -159,7 +167,9 @@ class WalletStateManager:
 
         self.wallet_node = wallet_node
         self.sync_mode = False
-        self.weight_proof_handler = WalletWeightProofHandler(self.constants)
+        self.weight_proof_handler = WalletWeightProofHandler(
+            self.constants, self.config.get("num_weight_proof_processes")
+        )
         self.blockchain = await WalletBlockchain.create(self.basic_store, self.constants, self.weight_proof_handler)
 
         self.state_changed_callback = None
@@ -272,13 +282,16 @@ class WalletStateManager:
         else:
             to_generate = self.config["initial_num_public_keys"]
 
+        start_time = time.time()
+        start_indexes: Dict[uint32, int] = {}
         for wallet_id in targets:
             target_wallet = self.wallets[wallet_id]
+            if WalletType(target_wallet.type()) == WalletType.POOLING_WALLET:
+                continue
 
             last: Optional[uint32] = await self.puzzle_store.get_last_derivation_path_for_wallet(wallet_id)
 
             start_index = 0
-            derivation_paths: List[DerivationRecord] = []
 
             if last is not None:
                 start_index = last + 1
@@ -286,47 +299,65 @@ class WalletStateManager:
             # If the key was replaced (from_zero=True), we should generate the puzzle hashes for the new key
             if from_zero:
                 start_index = 0
+            start_indexes[wallet_id] = start_index
 
-            for index in range(start_index, unused + to_generate):
-                if WalletType(target_wallet.type()) == WalletType.POOLING_WALLET:
-                    continue
+        end_index = unused + to_generate
+        derivation_paths: List[DerivationRecord] = []
+        if len(start_indexes) > 0 and min(start_indexes.values()) < end_index:
+            # The keys are the same for every wallet, so they are derived once for the whole range. Standard puzzle
+            # hashes are derived along with them, other wallets build their own puzzles below.
+            first_index = min(start_indexes.values())
+            num_workers = self.config.get("num_derivation_processes", default_num_derivation_workers())
+            hardened_keys = await derive_pubkeys_and_puzzle_hashes_bulk(
+                master_sk_to_wallet_sk_intermediate(self.private_key), True, first_index, end_index, num_workers
+            )
+            unhardened_keys = await derive_pubkeys_and_puzzle_hashes_bulk(
+                master_sk_to_wallet_sk_unhardened_intermediate(self.private_key),
+                False,
+                first_index,
+                end_index,
+                num_workers,
+            )
 
-                # Hardened
-                pubkey: G1Element = self.get_public_key(uint32(index))
-                puzzle: Program = target_wallet.puzzle_for_pk(bytes(pubkey))
-                if puzzle is None:
-                    self.log.error(f"Unable to create puzzles with wallet {target_wallet}")
-                    break
-                puzzlehash: bytes32 = puzzle.get_tree_hash()
-                self.log.info(f"Puzzle at index {index} wallet ID {wallet_id} puzzle hash {puzzlehash.hex()}")
-                derivation_paths.append(
-                    DerivationRecord(
-                        uint32(index), puzzlehash, pubkey, target_wallet.type(), uint32(target_wallet.id()), True
+            for wallet_id, start_index in start_indexes.items():
+                target_wallet = self.wallets[wallet_id]
+                is_standard = WalletType(target_wallet.type()) == WalletType.STANDARD_WALLET
+                for index in range(start_index, end_index):
+                    pubkey, puzzlehash = hardened_keys[index - first_index]
+                    pubkey_unhardened, puzzlehash_unhardened = unhardened_keys[index - first_index]
+                    if not is_standard:
+                        puzzle: Program = target_wallet.puzzle_for_pk(bytes(pubkey))
+                        if puzzle is None:
+                            self.log.error(f"Unable to create puzzles with wallet {target_wallet}")
+                            break
+                        puzzlehash = puzzle.get_tree_hash()
+                        puzzle_unhardened: Program = target_wallet.puzzle_for_pk(bytes(pubkey_unhardened))
+                        if puzzle_unhardened is None:
+                            self.log.error(f"Unable to create puzzles with wallet {target_wallet}")
+                            break
+                        puzzlehash_unhardened = puzzle_unhardened.get_tree_hash()
+                    derivation_paths.append(
+                        DerivationRecord(
+                            uint32(index), puzzlehash, pubkey, target_wallet.type(), uint32(target_wallet.id()), True
+                        )
                     )
-                )
-                # Unhardened
-                pubkey_unhardened: G1Element = self.get_public_key_unhardened(uint32(index))
-                puzzle_unhardened: Program = target_wallet.puzzle_for_pk(bytes(pubkey_unhardened))
-                if puzzle is None:
-                    self.log.error(f"Unable to create puzzles with wallet {target_wallet}")
-                    break
-                puzzlehash_unhardened: bytes32 = puzzle_unhardened.get_tree_hash()
-                self.log.info(
-                    f"Puzzle at index {index} wallet ID {wallet_id} puzzle hash {puzzlehash_unhardened.hex()}"
-                )
-                derivation_paths.append(
-                    DerivationRecord(
-                        uint32(index),
-                        puzzlehash_unhardened,
-                        pubkey_unhardened,
-                        target_wallet.type(),
-                        uint32(target_wallet.id()),
-                        False,
+                    derivation_paths.append(
+                        DerivationRecord(
+                            uint32(index),
+                            puzzlehash_unhardened,
+                            pubkey_unhardened,
+                            target_wallet.type(),
+                            uint32(target_wallet.id()),
+                            False,
+                        )
                     )
-                )
-            puzzle_hashes = [record.puzzle_hash for record in derivation_paths]
             await self.puzzle_store.add_derivation_paths(derivation_paths, in_transaction)
-            await self.subscribe_to_new_puzzle_hash(puzzle_hashes)
+            await self.subscribe_to_new_puzzle_hash([record.puzzle_hash for record in derivation_paths])
+            duration = max(time.time() - start_time, 1e-6)
+            self.log.info(
+                f"Derived {len(derivation_paths)} puzzle hashes for indexes {first_index} to {end_index - 1} in "
+                f"{duration:.2f}s ({len(derivation_paths) / duration:.1f} derivations/sec)"
+            )
         if unused > 0:
             await self.puzzle_store.set_used_up_to(uint32(unused - 1), in_transaction)
 
@@ -458,9 +489,19 @@ class WalletStateManager:
         Returns the balance amount of all coins that are spendable.
         """
 
+        if unspent_records is None:
+            # Start from the confirmed balance and take out the coins that are locked, without going through all the
+            # unspent coins of the wallet.
+            spendable_amount = await self.coin_store.get_confirmed_balance_for_wallet(wallet_id)
+            for coin_name in await self.get_locked_coin_names_for_wallet(wallet_id):
+                record = await self.coin_store.get_unspent_coin_record_for_wallet(wallet_id, coin_name)
+                if record is not None:
+                    spendable_amount = uint128(spendable_amount - record.coin.amount)
+            return spendable_amount
+
         spendable: Set[WalletCoinRecord] = await self.get_spendable_coins_for_wallet(wallet_id, unspent_records)
 
-        spendable_amount: uint128 = uint128(0)
+        spendable_amount = uint128(0)
         for record in spendable:
             spendable_amount = uint128(spendable_amount + record.coin.amount)
 
@@ -486,8 +527,7 @@ class WalletStateManager:
         # for example, in the create method of DID wallet
         if self.lock.locked() is False:
             raise AssertionError("expected wallet_state_manager to be locked")
-        unspent_coin_records = await self.coin_store.get_unspent_coins_for_wallet(wallet_id)
-        return get_balance_from_coin_records(unspent_coin_records)
+        return await self.coin_store.get_confirmed_balance_for_wallet(wallet_id)
 
     async def get_confirmed_balance_for_wallet(
         self,
@@ -497,9 +537,8 @@ class WalletStateManager:
         """
         Returns the confirmed balance, including coinbase rewards that are not spendable.
         """
-        # lock only if unspent_coin_records is None
         if unspent_coin_records is None:
-            unspent_coin_records = await self.coin_store.get_unspent_coins_for_wallet(wallet_id)
+            return await self.coin_store.get_confirmed_balance_for_wallet(wallet_id)
         amount: uint128 = uint128(0)
         for record in unspent_coin_records:
             amount = uint128(amount + record.coin.amount)
@@ -527,17 +566,40 @@ class WalletStateManager:
         addition_amount: int = 0
 
         for record in unconfirmed_tx:
-            for removal in record.removals:
-                if await self.does_coin_belong_to_wallet(removal, wallet_id):
-                    removal_amount += removal.amount
-            for addition in record.additions:
-                # This change or a self transaction
-                if await self.does_coin_belong_to_wallet(addition, wallet_id):
-                    addition_amount += addition.amount
+            # Additions are change or a self transaction
+            additions, removals = await self.get_unconfirmed_wallet_coins(record)
+            removal_amount += sum(removal.amount for removal in removals)
+            addition_amount += sum(addition.amount for addition in additions)
 
         result = (confirmed + addition_amount) - removal_amount
         return uint128(result)
 
+    async def get_unconfirmed_wallet_coins(self, record: TransactionRecord) -> Tuple[List[Coin], List[Coin]]:
+        """
+        Returns the additions and removals of an unconfirmed transaction that belong to the transaction's wallet.
+        The result is kept in the transaction store until the transaction is confirmed, so the puzzle store is only
+        queried once per transaction.
+        """
+        cached = self.tx_store.get_unconfirmed_wallet_coins(record.name)
+        if cached is not None:
+            return cached
+        additions = [coin for coin in record.additions if await self.does_coin_belong_to_wallet(coin, record.wallet_id)]
+        removals = [coin for coin in record.removals if await self.does_coin_belong_to_wallet(coin, record.wallet_id)]
+        self.tx_store.set_unconfirmed_wallet_coins(record.name, additions, removals)
+        return additions, removals
+
+    async def get_locked_coin_names_for_wallet(self, wallet_id: int) -> Set[bytes32]:
+        """
+        Returns the names of the coins of the wallet that are not spendable, because they are being spent by an
+        unconfirmed transaction, or are part of a trade.
+        """
+        locked: Set[bytes32] = set()
+        for tx in await self.tx_store.get_unconfirmed_for_wallet(wallet_id):
+            _, removals = await self.get_unconfirmed_wallet_coins(tx)
+            locked.update(coin.name() for coin in removals)
+        locked.update((await self.trade_manager.get_locked_coins()).keys())
+        return locked
+
     async def unconfirmed_additions_for_wallet(self, wallet_id: int) -> Dict[bytes32, Coin]:
         """
         Returns change coins for the wallet_id.
@@ -583,7 +645,9 @@ class WalletStateManager:
             hint_list = cs.hints()
             derivation_record = None
             for hint in hint_list:
-                derivation_record = await self.puzzle_store.get_derivation_record_for_puzzle_hash(hint.hex())
+                if len(hint) != 32:
+                    continue
+                derivation_record = await self.puzzle_store.get_derivation_record_for_puzzle_hash(bytes32(hint))
                 if derivation_record is not None:
                     break
 
@@ -611,6 +675,10 @@ class WalletStateManager:
         current_height: Optional[uint32] = None,
         weight_proof: Optional[WeightProof] = None,
     ) -> Tuple[List[WalletCoinRecord], List[CoinState]]:
+        """
+        Applies coin states received from a peer. Coin record writes and derivation index updates are collected and
+        stored together at the end, so that syncing many coins does not write them one by one.
+        """
         added: List[WalletCoinRecord] = []
         removed = []
         created_h_none = []
@@ -630,186 +698,202 @@ class WalletStateManager:
             # This only applies to trusted mode
             await self.reorg_rollback(fork_height)
 
-        for coin_state_idx, coin_state in enumerate(coin_states):
-            info = await self.puzzle_store.wallet_info_for_puzzle_hash(coin_state.coin.puzzle_hash)
-            interested_wallet_id = await self.interested_store.get_interested_puzzle_hash_wallet_id(
-                puzzle_hash=coin_state.coin.puzzle_hash
-            )
-            self.log.info(
-                f"new_coin_state received ({coin_state_idx + 1} / {len(coin_states)}): {coin_state.coin.name()}"
-            )
-
-            wallet_id = None
-            wallet_type = None
-            if info is not None:
-                wallet_id, wallet_type = info
-            elif interested_wallet_id is not None:
-                wallet_id = uint32(interested_wallet_id)
-                wallet_type = WalletType(self.wallets[wallet_id].type())
-            elif coin_state.created_height is not None:
-                wallet_id, wallet_type = await self.fetch_parent_and_check_for_cat(peer, coin_state)
-                if wallet_id is None or wallet_type is None:
-                    continue
-            else:
-                continue
-
-            if wallet_id in all_outgoing_per_wallet:
-                all_outgoing = all_outgoing_per_wallet[wallet_id]
-            else:
-                all_outgoing = await self.tx_store.get_all_transactions_for_wallet(
-                    wallet_id, TransactionType.OUTGOING_TX
+        # New and updated coin records [coin_name: record], and spends of coins that are already stored
+        # [coin_name: spent_height], written after all the coin states are processed
+        pending_coin_records: Dict[bytes32, WalletCoinRecord] = {}
+        pending_spends: Dict[bytes32, uint32] = {}
+        used_puzzle_hashes: List[bytes32] = []
+        try:
+            for coin_state_idx, coin_state in enumerate(coin_states):
+                info = await self.puzzle_store.wallet_info_for_puzzle_hash(coin_state.coin.puzzle_hash)
+                interested_wallet_id = await self.interested_store.get_interested_puzzle_hash_wallet_id(
+                    puzzle_hash=coin_state.coin.puzzle_hash
                 )
-                all_outgoing_per_wallet[wallet_id] = all_outgoing
-
-            if coin_state.created_height is None:
-                # TODO implements this coin got reorged
-                pass
-            elif coin_state.created_height is not None and coin_state.spent_height is None:
-                added_coin_record = await self.coin_added(
-                    coin_state.coin, coin_state.created_height, all_outgoing, wallet_id, wallet_type, trade_additions
+                self.log.info(
+                    f"new_coin_state received ({coin_state_idx + 1} / {len(coin_states)}): {coin_state.coin.name()}"
                 )
-                if added_coin_record is not None:
-                    added.append(added_coin_record)
-                derivation_index = await self.puzzle_store.index_for_puzzle_hash(coin_state.coin.puzzle_hash)
-                if derivation_index is not None:
-                    await self.puzzle_store.set_used_up_to(derivation_index, True)
-            elif coin_state.created_height is not None and coin_state.spent_height is not None:
-                if info is None:
-                    continue
-                record = await self.coin_store.get_coin_record(coin_state.coin.name())
-                derivation_index = await self.puzzle_store.index_for_puzzle_hash(coin_state.coin.puzzle_hash)
-                if derivation_index is not None:
-                    await self.puzzle_store.set_used_up_to(derivation_index, True)
-                if coin_state.coin.name() in trade_removals:
-                    trade_coin_removed.append(coin_state)
-                if record is None:
+
+                wallet_id = None
+                wallet_type = None
+                if info is not None:
                     wallet_id, wallet_type = info
+                elif interested_wallet_id is not None:
+                    wallet_id = uint32(interested_wallet_id)
+                    wallet_type = WalletType(self.wallets[wallet_id].type())
+                elif coin_state.created_height is not None:
+                    wallet_id, wallet_type = await self.fetch_parent_and_check_for_cat(peer, coin_state)
+                    if wallet_id is None or wallet_type is None:
+                        continue
+                else:
+                    continue
 
-                    farmer_reward = False
-                    pool_reward = False
-                    if self.is_farmer_reward(coin_state.created_height, coin_state.coin.parent_coin_info):
-                        farmer_reward = True
-                    elif self.is_pool_reward(coin_state.created_height, coin_state.coin.parent_coin_info):
-                        pool_reward = True
-                    record = WalletCoinRecord(
+                if wallet_id in all_outgoing_per_wallet:
+                    all_outgoing = all_outgoing_per_wallet[wallet_id]
+                else:
+                    all_outgoing = await self.tx_store.get_all_transactions_for_wallet(
+                        wallet_id, TransactionType.OUTGOING_TX
+                    )
+                    all_outgoing_per_wallet[wallet_id] = all_outgoing
+
+                if coin_state.created_height is None:
+                    # TODO implements this coin got reorged
+                    pass
+                elif coin_state.created_height is not None and coin_state.spent_height is None:
+                    added_coin_record = await self.coin_added(
                         coin_state.coin,
                         coin_state.created_height,
-                        coin_state.spent_height,
-                        True,
-                        farmer_reward or pool_reward,
-                        wallet_type,
+                        all_outgoing,
                         wallet_id,
+                        wallet_type,
+                        trade_additions,
+                        pending_coin_records,
                     )
-                    await self.coin_store.add_coin_record(record)
-                    # Coin first received
-                    coin_record: Optional[WalletCoinRecord] = await self.coin_store.get_coin_record(
-                        coin_state.coin.parent_coin_info
-                    )
-                    if coin_record is not None and wallet_type.value == coin_record.wallet_type:
-                        change = True
-                    else:
-                        change = False
-
-                    if not change:
-                        created_timestamp = await self.wallet_node.get_timestamp_for_height(coin_state.created_height)
-                        tx_record = TransactionRecord(
-                            confirmed_at_height=coin_state.created_height,
-                            created_at_time=uint64(created_timestamp),
-                            to_puzzle_hash=coin_state.coin.puzzle_hash,
-                            amount=uint64(coin_state.coin.amount),
-                            fee_amount=uint64(0),
-                            confirmed=True,
-                            sent=uint32(0),
-                            spend_bundle=None,
-                            additions=[coin_state.coin],
-                            removals=[],
-                            wallet_id=wallet_id,
-                            sent_to=[],
-                            trade_id=None,
-                            type=uint32(TransactionType.INCOMING_TX.value),
-                            name=token_bytes(),
-                            memos=[],
+                    if added_coin_record is not None:
+                        added.append(added_coin_record)
+                    used_puzzle_hashes.append(coin_state.coin.puzzle_hash)
+                elif coin_state.created_height is not None and coin_state.spent_height is not None:
+                    if info is None:
+                        continue
+                    record = await self._get_coin_record(coin_state.coin.name(), pending_coin_records)
+                    used_puzzle_hashes.append(coin_state.coin.puzzle_hash)
+                    if coin_state.coin.name() in trade_removals:
+                        trade_coin_removed.append(coin_state)
+                    if record is None:
+                        wallet_id, wallet_type = info
+
+                        farmer_reward = False
+                        pool_reward = False
+                        if self.is_farmer_reward(coin_state.created_height, coin_state.coin.parent_coin_info):
+                            farmer_reward = True
+                        elif self.is_pool_reward(coin_state.created_height, coin_state.coin.parent_coin_info):
+                            pool_reward = True
+                        record = WalletCoinRecord(
+                            coin_state.coin,
+                            coin_state.created_height,
+                            coin_state.spent_height,
+                            True,
+                            farmer_reward or pool_reward,
+                            wallet_type,
+                            wallet_id,
                         )
-                        await self.tx_store.add_transaction_record(tx_record, False)
-
-                    children: List[CoinState] = await self.wallet_node.fetch_children(
-                        peer, coin_state.coin.name(), weight_proof
-                    )
-                    additions = [state.coin for state in children]
-                    if len(children) > 0:
-                        cs: CoinSpend = await self.wallet_node.fetch_puzzle_solution(
-                            peer, coin_state.spent_height, coin_state.coin
+                        pending_coin_records[coin_state.coin.name()] = record
+                        # Coin first received
+                        coin_record: Optional[WalletCoinRecord] = await self._get_coin_record(
+                            coin_state.coin.parent_coin_info, pending_coin_records
                         )
+                        if coin_record is not None and wallet_type.value == coin_record.wallet_type:
+                            change = True
+                        else:
+                            change = False
 
-                        fee = cs.reserved_fee()
-
-                        to_puzzle_hash = None
-                        # Find coin that doesn't belong to us
-                        amount = 0
-                        for coin in additions:
-                            derivation_record = await self.puzzle_store.get_derivation_record_for_puzzle_hash(
-                                coin.puzzle_hash.hex()
+                        if not change:
+                            created_timestamp = await self.wallet_node.get_timestamp_for_height(
+                                coin_state.created_height
                             )
-                            if derivation_record is None:
-                                to_puzzle_hash = coin.puzzle_hash
-                                amount += coin.amount
-
-                        if to_puzzle_hash is None:
-                            to_puzzle_hash = additions[0].puzzle_hash
-
-                        spent_timestamp = await self.wallet_node.get_timestamp_for_height(coin_state.spent_height)
-
-                        # Reorg rollback adds reorged transactions so it's possible there is tx_record already
-                        # Even though we are just adding coin record to the db (after reorg)
-                        tx_records: List[TransactionRecord] = []
-                        for out_tx_record in all_outgoing:
-                            for rem_coin in out_tx_record.removals:
-                                if rem_coin.name() == coin_state.coin.name():
-                                    tx_records.append(out_tx_record)
-
-                        if len(tx_records) > 0:
-                            for tx_record in tx_records:
-                                await self.tx_store.set_confirmed(tx_record.name, coin_state.spent_height)
-                        else:
                             tx_record = TransactionRecord(
-                                confirmed_at_height=coin_state.spent_height,
-                                created_at_time=uint64(spent_timestamp),
-                                to_puzzle_hash=to_puzzle_hash,
-                                amount=uint64(int(amount)),
-                                fee_amount=uint64(fee),
+                                confirmed_at_height=coin_state.created_height,
+                                created_at_time=uint64(created_timestamp),
+                                to_puzzle_hash=coin_state.coin.puzzle_hash,
+                                amount=uint64(coin_state.coin.amount),
+                                fee_amount=uint64(0),
                                 confirmed=True,
                                 sent=uint32(0),
                                 spend_bundle=None,
-                                additions=additions,
-                                removals=[coin_state.coin],
+                                additions=[coin_state.coin],
+                                removals=[],
                                 wallet_id=wallet_id,
                                 sent_to=[],
                                 trade_id=None,
-                                type=uint32(TransactionType.OUTGOING_TX.value),
+                                type=uint32(TransactionType.INCOMING_TX.value),
                                 name=token_bytes(),
                                 memos=[],
                             )
-
                             await self.tx_store.add_transaction_record(tx_record, False)
-                else:
-                    await self.coin_store.set_spent(coin_state.coin.name(), coin_state.spent_height)
-                    rem_tx_records: List[TransactionRecord] = []
-                    for out_tx_record in all_outgoing:
-                        for rem_coin in out_tx_record.removals:
+
+                        children: List[CoinState] = await self.wallet_node.fetch_children(
+                            peer, coin_state.coin.name(), weight_proof
+                        )
+                        additions = [state.coin for state in children]
+                        if len(children) > 0:
+                            cs: CoinSpend = await self.wallet_node.fetch_puzzle_solution(
+                                peer, coin_state.spent_height, coin_state.coin
+                            )
+
+                            fee = cs.reserved_fee()
+
+                            to_puzzle_hash = None
+                            # Find coin that doesn't belong to us
+                            amount = 0
+                            for coin in additions:
+                                derivation_record = await self.puzzle_store.get_derivation_record_for_puzzle_hash(
+                                    coin.puzzle_hash
+                                )
+                                if derivation_record is None:
+                                    to_puzzle_hash = coin.puzzle_hash
+                                    amount += coin.amount
+
+                            if to_puzzle_hash is None:
+                                to_puzzle_hash = additions[0].puzzle_hash
+
+                            spent_timestamp = await self.wallet_node.get_timestamp_for_height(coin_state.spent_height)
+
+                            # Reorg rollback adds reorged transactions so it's possible there is tx_record already
+                            # Even though we are just adding coin record to the db (after reorg)
+                            tx_records: List[TransactionRecord] = []
+                            for out_tx_record in all_outgoing:
+                                for rem_coin in out_tx_record.removals:
+                                    if rem_coin.name() == coin_state.coin.name():
+                                        tx_records.append(out_tx_record)
+
+                            if len(tx_records) > 0:
+                                for tx_record in tx_records:
+                                    await self.tx_store.set_confirmed(tx_record.name, coin_state.spent_height)
+                            else:
+                                tx_record = TransactionRecord(
+                                    confirmed_at_height=coin_state.spent_height,
+                                    created_at_time=uint64(spent_timestamp),
+                                    to_puzzle_hash=to_puzzle_hash,
+                                    amount=uint64(int(amount)),
+                                    fee_amount=uint64(fee),
+                                    confirmed=True,
+                                    sent=uint32(0),
+                                    spend_bundle=None,
+                                    additions=additions,
+                                    removals=[coin_state.coin],
+                                    wallet_id=wallet_id,
+                                    sent_to=[],
+                                    trade_id=None,
+                                    type=uint32(TransactionType.OUTGOING_TX.value),
+                                    name=token_bytes(),
+                                    memos=[],
+                                )
+
+                                await self.tx_store.add_transaction_record(tx_record, False)
+                    else:
+                        if coin_state.coin.name() in pending_coin_records:
+                            pending_coin_records[coin_state.coin.name()] = spent_coin_record(
+                                record, coin_state.spent_height
+                            )
+                        else:
+                            pending_spends[coin_state.coin.name()] = coin_state.spent_height
+                        rem_tx_records: List[TransactionRecord] = []
+                        for out_tx_record in all_outgoing:
+                            for rem_coin in out_tx_record.removals:
+                                if rem_coin.name() == coin_state.coin.name():
+                                    rem_tx_records.append(out_tx_record)
+
+                        for tx_record in rem_tx_records:
+                            await self.tx_store.set_confirmed(tx_record.name, coin_state.spent_height)
+                    for unconfirmed_record in all_unconfirmed:
+                        for rem_coin in unconfirmed_record.removals:
                             if rem_coin.name() == coin_state.coin.name():
-                                rem_tx_records.append(out_tx_record)
-
-                    for tx_record in rem_tx_records:
-                        await self.tx_store.set_confirmed(tx_record.name, coin_state.spent_height)
-                    await self.coin_store.db_connection.commit()
-                for unconfirmed_record in all_unconfirmed:
-                    for rem_coin in unconfirmed_record.removals:
-                        if rem_coin.name() == coin_state.coin.name():
-                            self.log.info(f"Setting tx_id: {unconfirmed_record.name} to confirmed")
-                            await self.tx_store.set_confirmed(unconfirmed_record.name, coin_state.spent_height)
-                removed.append(coin_state)
-            else:
-                raise RuntimeError("All cases already handled")  # Logic error, all cases handled
+                                self.log.info(f"Setting tx_id: {unconfirmed_record.name} to confirmed")
+                                await self.tx_store.set_confirmed(unconfirmed_record.name, coin_state.spent_height)
+                    removed.append(coin_state)
+                else:
+                    raise RuntimeError("All cases already handled")  # Logic error, all cases handled
+        finally:
+            await self._write_coin_state_changes(pending_coin_records, pending_spends, used_puzzle_hashes)
 
         for coin_state_added in trade_adds:
             await self.trade_manager.coins_of_interest_farmed(coin_state_added)
@@ -818,6 +902,27 @@ class WalletStateManager:
 
         return added, removed
 
+    async def _write_coin_state_changes(
+        self,
+        pending_coin_records: Dict[bytes32, WalletCoinRecord],
+        pending_spends: Dict[bytes32, uint32],
+        used_puzzle_hashes: List[bytes32],
+    ) -> None:
+        async with self.db_wrapper.lock:
+            await self.coin_store.add_coin_records(list(pending_coin_records.values()), True)
+            await self.coin_store.set_spent_many(list(pending_spends.items()), True)
+            derivation_index = await self.puzzle_store.max_index_for_puzzle_hashes(used_puzzle_hashes)
+            if derivation_index is not None:
+                await self.puzzle_store.set_used_up_to(derivation_index, True)
+            await self.db_connection.commit()
+
+    async def _get_coin_record(
+        self, coin_name: bytes32, pending_coin_records: Optional[Dict[bytes32, WalletCoinRecord]]
+    ) -> Optional[WalletCoinRecord]:
+        if pending_coin_records is not None and coin_name in pending_coin_records:
+            return pending_coin_records[coin_name]
+        return await self.coin_store.get_coin_record(coin_name)
+
     def is_pool_reward(self, created_height, parent_id):
         for i in range(0, 30):
             try_height = created_height - i
@@ -859,15 +964,17 @@ class WalletStateManager:
         wallet_id: uint32,
         wallet_type: WalletType,
         trade_additions,
+        pending_coin_records: Optional[Dict[bytes32, WalletCoinRecord]] = None,
     ) -> Optional[WalletCoinRecord]:
         """
-        Adding coin to DB, return wallet coin record if it get's added
+        Adding coin to DB, return wallet coin record if it get's added. If pending_coin_records is passed, the record
+        is added to it instead, for the caller to store.
         """
-        existing: Optional[WalletCoinRecord] = await self.coin_store.get_coin_record(coin.name())
+        existing: Optional[WalletCoinRecord] = await self._get_coin_record(coin.name(), pending_coin_records)
         if existing is not None:
             return None
 
-        derivation_record = await self.puzzle_store.get_derivation_record_for_puzzle_hash(coin.puzzle_hash.hex())
+        derivation_record = await self.puzzle_store.get_derivation_record_for_puzzle_hash(coin.puzzle_hash)
         if derivation_record is None:
             return None
 
@@ -880,7 +987,9 @@ class WalletStateManager:
             pool_reward = True
 
         farm_reward = False
-        coin_record: Optional[WalletCoinRecord] = await self.coin_store.get_coin_record(coin.parent_coin_info)
+        coin_record: Optional[WalletCoinRecord] = await self._get_coin_record(
+            coin.parent_coin_info, pending_coin_records
+        )
         if coin_record is not None and wallet_type.value == coin_record.wallet_type:
             change = True
         else:
@@ -951,7 +1060,10 @@ class WalletStateManager:
         coin_record_1: WalletCoinRecord = WalletCoinRecord(
             coin, height, uint32(0), False, farm_reward, wallet_type, wallet_id
         )
-        await self.coin_store.add_coin_record(coin_record_1)
+        if pending_coin_records is None:
+            await self.coin_store.add_coin_record(coin_record_1)
+        else:
+            pending_coin_records[coin.name()] = coin_record_1
 
         if wallet_type == WalletType.COLOURED_COIN or wallet_type == WalletType.DISTRIBUTED_ID:
             wallet = self.wallets[wallet_id]
@@ -1079,23 +1191,12 @@ class WalletStateManager:
         if records is None:
             records = await self.coin_store.get_unspent_coins_for_wallet(wallet_id)
 
-        # Coins that are currently part of a transaction
-        unconfirmed_tx: List[TransactionRecord] = await self.tx_store.get_unconfirmed_for_wallet(wallet_id)
-        removal_dict: Dict[bytes32, Coin] = {}
-        for tx in unconfirmed_tx:
-            for coin in tx.removals:
-                # TODO, "if" might not be necessary once unconfirmed tx doesn't contain coins for other wallets
-                if await self.does_coin_belong_to_wallet(coin, wallet_id):
-                    removal_dict[coin.name()] = coin
-
-        # Coins that are part of the trade
-        offer_locked_coins: Dict[bytes32, WalletCoinRecord] = await self.trade_manager.get_locked_coins()
+        # Coins that are currently part of a transaction or a trade
+        locked: Set[bytes32] = await self.get_locked_coin_names_for_wallet(wallet_id)
 
         filtered = set()
         for record in records:
-            if record.coin.name() in offer_locked_coins:
-                continue
-            if record.coin.name() in removal_dict:
+            if record.coin.name() in locked:
                 continue
             filtered.add(record)
 
@@ -1,16 +1,32 @@
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 import aiosqlite
 
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.types.blockchain_format.coin import Coin
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.mempool_inclusion_status import MempoolInclusionStatus
 from hddcoin.util.db_wrapper import DBWrapper
 from hddcoin.util.errors import Err
 from hddcoin.util.ints import uint8, uint32
+from hddcoin.wallet.farming_rewards import (
+    FarmingRewards,
+    RollupKey,
+    farming_reward_rollup,
+    farming_reward_totals,
+    is_farming_reward,
+)
 from hddcoin.wallet.transaction_record import TransactionRecord
+from hddcoin.wallet.util.db_schema import get_schema_version, migrate_table, set_schema_version
 from hddcoin.wallet.util.transaction_type import TransactionType
 
+TRANSACTION_RECORD_SCHEMA_VERSION = 2
+
+
+def _transaction_record_row_from_v1(row: Sequence[Any]) -> Tuple:
+    return (*row[:4], bytes.fromhex(row[4]), *row[5:])
+
 
 class WalletTransactionStore:
     """
@@ -22,30 +38,51 @@ class WalletTransactionStore:
     tx_record_cache: Dict[bytes32, TransactionRecord]
     tx_submitted: Dict[bytes32, Tuple[int, int]]  # tx_id: [time submitted: count]
     unconfirmed_for_wallet: Dict[int, Dict[bytes32, TransactionRecord]]
+    # Additions and removals of unconfirmed transactions that belong to the transaction's wallet
+    # [tx_id: (additions, removals)]. Entries are dropped when the transaction is confirmed or deleted.
+    unconfirmed_wallet_coins: Dict[bytes32, Tuple[List[Coin], List[Coin]]]
+    # Sums of the confirmed farming rewards, mirrors the farming_reward_rollup table
+    reward_rollup_cache: Dict[RollupKey, FarmingRewards]
+    # reward_rollup_cache summed by [(wallet_id, transaction type): rewards]
+    reward_total_cache: Dict[Tuple[int, int], FarmingRewards]
+    # Height farmed of the confirmed farming rewards, by [rollup: tx_id: height farmed]. Used to recompute the last
+    # height farmed of a rollup when rewards are removed from it
+    reward_heights_cache: Dict[RollupKey, Dict[bytes32, int]]
+    genesis_challenge: bytes32
 
     @classmethod
-    async def create(cls, db_wrapper: DBWrapper):
+    async def create(cls, db_wrapper: DBWrapper, genesis_challenge: bytes32 = DEFAULT_CONSTANTS.GENESIS_CHALLENGE):
         self = cls()
 
+        self.genesis_challenge = genesis_challenge
         self.db_wrapper = db_wrapper
         self.db_connection = self.db_wrapper.db
-        await self.db_connection.execute(
-            (
+        version = await get_schema_version(self.db_connection, "transaction_record")
+        if version < TRANSACTION_RECORD_SCHEMA_VERSION:
+            # Since version 2 to_puzzle_hash is stored as a blob, it used to be a hex string. The table keeps its
+            # rowid, the rows hold whole transaction records.
+            create_table = (
                 "CREATE TABLE IF NOT EXISTS transaction_record("
                 " transaction_record blob,"
-                " bundle_id text PRIMARY KEY,"  # NOTE: bundle_id is being stored as bytes, not hex
+                " bundle_id blob PRIMARY KEY,"
                 " confirmed_at_height bigint,"
                 " created_at_time bigint,"
-                " to_puzzle_hash text,"
+                " to_puzzle_hash blob,"
                 " amount blob,"
                 " fee_amount blob,"
                 " confirmed int,"
                 " sent int,"
                 " wallet_id bigint,"
-                " trade_id text,"
+                " trade_id blob,"
                 " type int)"
             )
-        )
+            if version == 0:
+                await self.db_connection.execute(create_table)
+            else:
+                await migrate_table(
+                    self.db_connection, "transaction_record", create_table, _transaction_record_row_from_v1
+                )
+            await set_schema_version(self.db_connection, "transaction_record", TRANSACTION_RECORD_SCHEMA_VERSION)
 
         # Useful for reorg lookups
         await self.db_connection.execute(
@@ -60,23 +97,46 @@ class WalletTransactionStore:
 
         await self.db_connection.execute("CREATE INDEX IF NOT EXISTS tx_sent on transaction_record(sent)")
 
-        await self.db_connection.execute(
-            "CREATE INDEX IF NOT EXISTS tx_created_time on transaction_record(created_at_time)"
-        )
-
         await self.db_connection.execute("CREATE INDEX IF NOT EXISTS tx_type on transaction_record(type)")
 
         await self.db_connection.execute(
             "CREATE INDEX IF NOT EXISTS tx_to_puzzle_hash on transaction_record(to_puzzle_hash)"
         )
 
-        await self.db_connection.execute("CREATE INDEX IF NOT EXISTS wallet_id on transaction_record(wallet_id)")
+        # Keyset pagination of the transaction history of a wallet
+        await self.db_connection.execute(
+            "CREATE INDEX IF NOT EXISTS tx_wallet_created on transaction_record(wallet_id, created_at_time, bundle_id)"
+        )
+
+        # Confirmed farming rewards summed by wallet, type, day and height bucket, kept up to date as reward
+        # transactions are confirmed and reorged
+        await self.db_connection.execute(
+            (
+                "CREATE TABLE IF NOT EXISTS farming_reward_rollup("
+                " wallet_id bigint,"
+                " type int,"
+                " day bigint,"
+                " height_bucket bigint,"
+                " amount bigint,"
+                " base_farmer_reward bigint,"
+                " count bigint,"
+                " last_height_farmed bigint,"
+                " PRIMARY KEY(wallet_id, type, day, height_bucket))"
+            )
+        )
 
         await self.db_connection.commit()
         self.tx_record_cache = {}
         self.tx_submitted = {}
         self.unconfirmed_for_wallet = {}
+        self.unconfirmed_wallet_coins = {}
         await self.rebuild_tx_cache()
+
+        # Wallets created before the rollups existed, or rollups that are out of sync with the transactions
+        reward_count = sum(1 for record in self.tx_record_cache.values() if is_farming_reward(record))
+        if reward_count != sum(rewards.count for rewards in self.reward_rollup_cache.values()):
+            await self.rebuild_farming_rewards()
+            await self.db_connection.commit()
         return self
 
     async def rebuild_tx_cache(self):
@@ -84,14 +144,21 @@ class WalletTransactionStore:
         all_records = await self.get_all_transactions()
         self.tx_record_cache = {}
         self.unconfirmed_for_wallet = {}
+        self.unconfirmed_wallet_coins = {}
+        self.reward_heights_cache = {}
 
         for record in all_records:
             self.tx_record_cache[record.name] = record
+            rollup = farming_reward_rollup(record, self.genesis_challenge)
+            if rollup is not None:
+                self.reward_heights_cache.setdefault(rollup[0], {})[record.name] = rollup[1].last_height_farmed
             if record.wallet_id not in self.unconfirmed_for_wallet:
                 self.unconfirmed_for_wallet[record.wallet_id] = {}
             if not record.confirmed:
                 self.unconfirmed_for_wallet[record.wallet_id][record.name] = record
 
+        await self._load_farming_rewards()
+
     async def _clear_database(self):
         cursor = await self.db_connection.execute("DELETE FROM transaction_record")
         await cursor.close()
@@ -101,12 +168,15 @@ class WalletTransactionStore:
         """
         Store TransactionRecord in DB and Cache.
         """
+        previous: Optional[TransactionRecord] = self.tx_record_cache.get(record.name)
         self.tx_record_cache[record.name] = record
         if record.wallet_id not in self.unconfirmed_for_wallet:
             self.unconfirmed_for_wallet[record.wallet_id] = {}
         unconfirmed_dict = self.unconfirmed_for_wallet[record.wallet_id]
         if record.confirmed and record.name in unconfirmed_dict:
             unconfirmed_dict.pop(record.name)
+        if record.confirmed:
+            self.unconfirmed_wallet_coins.pop(record.name, None)
         if not record.confirmed:
             unconfirmed_dict[record.name] = record
 
@@ -120,7 +190,7 @@ class WalletTransactionStore:
                     record.name,
                     record.confirmed_at_height,
                     record.created_at_time,
-                    record.to_puzzle_hash.hex(),
+                    record.to_puzzle_hash,
                     bytes(record.amount),
                     bytes(record.fee_amount),
                     int(record.confirmed),
@@ -131,6 +201,7 @@ class WalletTransactionStore:
                 ),
             )
             await cursor.close()
+            await self._update_farming_rewards([] if previous is None else [previous], [record])
             if not in_transaction:
                 await self.db_connection.commit()
         except BaseException:
@@ -148,6 +219,8 @@ class WalletTransactionStore:
                 tx_cache = self.unconfirmed_for_wallet[tx_record.wallet_id]
                 if tx_id in tx_cache:
                     tx_cache.pop(tx_id)
+            await self._update_farming_rewards([tx_record], [])
+        self.unconfirmed_wallet_coins.pop(tx_id, None)
 
         c = await self.db_connection.execute("DELETE FROM transaction_record WHERE bundle_id=?", (tx_id,))
         await c.close()
@@ -347,6 +420,17 @@ class WalletTransactionStore:
         else:
             return []
 
+    def get_unconfirmed_wallet_coins(self, tx_id: bytes32) -> Optional[Tuple[List[Coin], List[Coin]]]:
+        """
+        Returns the additions and removals of an unconfirmed transaction that belong to its wallet, if they have been
+        recorded with set_unconfirmed_wallet_coins.
+        """
+        return self.unconfirmed_wallet_coins.get(tx_id)
+
+    def set_unconfirmed_wallet_coins(self, tx_id: bytes32, additions: List[Coin], removals: List[Coin]) -> None:
+        if tx_id in self.tx_record_cache and not self.tx_record_cache[tx_id].confirmed:
+            self.unconfirmed_wallet_coins[tx_id] = (additions, removals)
+
     async def get_transactions_between(self, wallet_id: int, start, end) -> List[TransactionRecord]:
         """Return a list of transaction between start and end index. List is in reverse chronological order.
         start = 0 is most recent transaction
@@ -369,6 +453,53 @@ class WalletTransactionStore:
 
         return records
 
+    async def get_transactions_page(
+        self,
+        wallet_id: int,
+        limit: int,
+        after: Optional[Tuple[int, bytes32]] = None,
+        types: Optional[List[int]] = None,
+        confirmed: Optional[bool] = None,
+        to_puzzle_hash: Optional[bytes32] = None,
+    ) -> List[TransactionRecord]:
+        """
+        Returns up to `limit` transactions of the wallet, most recent first, ordered by (created_at_time, tx_id).
+        `after` is the (created_at_time, tx_id) of the last transaction of the previous page. Pages start right after
+        it, so the cost of fetching a page does not depend on how deep into the history it is. The filters are
+        applied in the query.
+        """
+        query = "SELECT bundle_id from transaction_record WHERE wallet_id=?"
+        params: List[Any] = [wallet_id]
+        if after is not None:
+            # Row value comparison, so that sqlite seeks to the cursor in the tx_wallet_created index
+            query += " AND (created_at_time, bundle_id)<(?, ?)"
+            params.extend([after[0], after[1]])
+        if types is not None:
+            query += f" AND type IN ({','.join('?' * len(types))})"
+            params.extend(types)
+        if confirmed is not None:
+            query += " AND confirmed=?"
+            params.append(int(confirmed))
+        if to_puzzle_hash is not None:
+            query += " AND to_puzzle_hash=?"
+            params.append(to_puzzle_hash)
+        query += " ORDER BY created_at_time DESC, bundle_id DESC LIMIT ?"
+        params.append(limit)
+
+        cursor = await self.db_connection.execute(query, params)
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return await self._records_for_ids([bytes32(row[0]) for row in rows])
+
+    async def _records_for_ids(self, tx_ids: List[bytes32]) -> List[TransactionRecord]:
+        """Returns the records in the order of `tx_ids`, only decoding the ones that are not cached."""
+        records: List[TransactionRecord] = []
+        for tx_id in tx_ids:
+            record = await self.get_transaction_record(tx_id)
+            if record is not None:
+                records.append(record)
+        return records
+
     async def get_transaction_count_for_wallet(self, wallet_id) -> int:
         cursor = await self.db_connection.execute(
             "SELECT COUNT(*) FROM transaction_record where wallet_id=?", (wallet_id,)
@@ -387,11 +518,11 @@ class WalletTransactionStore:
         """
         if type is None:
             cursor = await self.db_connection.execute(
-                "SELECT * from transaction_record where wallet_id=?", (wallet_id,)
+                "SELECT bundle_id from transaction_record where wallet_id=?", (wallet_id,)
             )
         else:
             cursor = await self.db_connection.execute(
-                "SELECT * from transaction_record where wallet_id=? and type=?",
+                "SELECT bundle_id from transaction_record where wallet_id=? and type=?",
                 (
                     wallet_id,
                     type,
@@ -399,15 +530,8 @@ class WalletTransactionStore:
             )
         rows = await cursor.fetchall()
         await cursor.close()
-        records = []
 
-        cache_set = set()
-        for row in rows:
-            record = TransactionRecord.from_bytes(row[0])
-            records.append(record)
-            cache_set.add(record.name)
-
-        return records
+        return await self._records_for_ids([bytes32(row[0]) for row in rows])
 
     async def get_all_transactions(self) -> List[TransactionRecord]:
         """
@@ -448,6 +572,7 @@ class WalletTransactionStore:
                 to_delete.append(tx)
         for tx in to_delete:
             self.tx_record_cache.pop(tx.name)
+        await self._update_farming_rewards(to_delete, [])
 
         c1 = await self.db_connection.execute("DELETE FROM transaction_record WHERE confirmed_at_height>?", (height,))
         await c1.close()
@@ -457,3 +582,116 @@ class WalletTransactionStore:
             "DELETE FROM transaction_record WHERE confirmed=0 AND wallet_id=?", (wallet_id,)
         )
         await cursor.close()
+
+    async def _load_farming_rewards(self) -> None:
+        cursor = await self.db_connection.execute("SELECT * from farming_reward_rollup")
+        rows = await cursor.fetchall()
+        await cursor.close()
+        self.reward_rollup_cache = {}
+        for row in rows:
+            self.reward_rollup_cache[(row[0], row[1], row[2], row[3])] = FarmingRewards(row[4], row[5], row[6], row[7])
+        self.reward_total_cache = farming_reward_totals(self.reward_rollup_cache)
+
+    async def rebuild_farming_rewards(self) -> None:
+        """
+        Recomputes all the farming reward rollups from the transactions.
+        """
+        rollups: Dict[RollupKey, FarmingRewards] = {}
+        for record in self.tx_record_cache.values():
+            rollup = farming_reward_rollup(record, self.genesis_challenge)
+            if rollup is not None:
+                key, rewards = rollup
+                rollups.setdefault(key, FarmingRewards()).add(rewards)
+
+        cursor = await self.db_connection.execute("DELETE FROM farming_reward_rollup")
+        await cursor.close()
+        cursor = await self.db_connection.executemany(
+            "INSERT INTO farming_reward_rollup VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (*key, rewards.amount, rewards.base_farmer_reward, rewards.count, rewards.last_height_farmed)
+                for key, rewards in rollups.items()
+            ],
+        )
+        await cursor.close()
+        self.reward_rollup_cache = rollups
+        self.reward_total_cache = farming_reward_totals(rollups)
+
+    async def _update_farming_rewards(self, removed: List[TransactionRecord], added: List[TransactionRecord]) -> None:
+        """
+        Updates the farming reward rollups when the `removed` transactions are replaced by the `added` ones.
+        """
+        old_rollups = [farming_reward_rollup(record, self.genesis_challenge) for record in removed]
+        new_rollups = [farming_reward_rollup(record, self.genesis_challenge) for record in added]
+        if old_rollups == new_rollups:
+            return
+
+        changed: Set[RollupKey] = set()
+        # Rollups whose last farmed height might have been one of the removed rewards
+        stale_heights: Set[RollupKey] = set()
+        for record, old_rollup in zip(removed, old_rollups):
+            if old_rollup is None:
+                continue
+            key, rewards = old_rollup
+            heights = self.reward_heights_cache[key]
+            heights.pop(record.name, None)
+            if len(heights) == 0:
+                self.reward_heights_cache.pop(key)
+            rollup = self.reward_rollup_cache[key]
+            rollup.subtract(rewards)
+            self.reward_total_cache[(key[0], key[1])].subtract(rewards)
+            if rewards.last_height_farmed >= rollup.last_height_farmed:
+                stale_heights.add(key)
+            changed.add(key)
+
+        if len(stale_heights) > 0:
+            for key in stale_heights:
+                self.reward_rollup_cache[key].last_height_farmed = max(
+                    self.reward_heights_cache.get(key, {}).values(), default=0
+                )
+            for wallet_id, type in set((key[0], key[1]) for key in stale_heights):
+                self.reward_total_cache[(wallet_id, type)].last_height_farmed = max(
+                    (
+                        rollup.last_height_farmed
+                        for key, rollup in self.reward_rollup_cache.items()
+                        if key[0] == wallet_id and key[1] == type
+                    ),
+                    default=0,
+                )
+
+        for record, new_rollup in zip(added, new_rollups):
+            if new_rollup is None:
+                continue
+            key, rewards = new_rollup
+            self.reward_heights_cache.setdefault(key, {})[record.name] = rewards.last_height_farmed
+            self.reward_rollup_cache.setdefault(key, FarmingRewards()).add(rewards)
+            self.reward_total_cache.setdefault((key[0], key[1]), FarmingRewards()).add(rewards)
+            changed.add(key)
+
+        for key in changed:
+            await self._write_farming_rollup(key)
+
+    async def _write_farming_rollup(self, key: RollupKey) -> None:
+        rewards = self.reward_rollup_cache[key]
+        if rewards.count == 0:
+            self.reward_rollup_cache.pop(key)
+            cursor = await self.db_connection.execute(
+                "DELETE FROM farming_reward_rollup WHERE wallet_id=? AND type=? AND day=? AND height_bucket=?", key
+            )
+        else:
+            cursor = await self.db_connection.execute(
+                "INSERT OR REPLACE INTO farming_reward_rollup VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, rewards.amount, rewards.base_farmer_reward, rewards.count, rewards.last_height_farmed),
+            )
+        await cursor.close()
+
+    def get_farming_reward_totals(self) -> Dict[Tuple[int, int], FarmingRewards]:
+        """
+        Returns the confirmed farming rewards summed by (wallet_id, transaction type).
+        """
+        return self.reward_total_cache
+
+    def get_farming_reward_rollups(self) -> Dict[RollupKey, FarmingRewards]:
+        """
+        Returns the confirmed farming rewards summed by (wallet_id, transaction type, day, height bucket).
+        """
+        return self.reward_rollup_cache
@@ -1,29 +1,39 @@
 import asyncio
+import dataclasses
 import logging
+import math
+import multiprocessing
 import pathlib
 import random
 import tempfile
+import time
 from concurrent.futures.process import ProcessPoolExecutor
-from typing import IO, List, Tuple, Optional
+from typing import IO, Dict, List, Optional, Set, Tuple
 
 from hddcoin.consensus.block_record import BlockRecord
 from hddcoin.consensus.constants import ConsensusConstants
 from hddcoin.full_node.weight_proof import (
     _validate_sub_epoch_summaries,
-    vars_to_bytes,
     validate_sub_epoch_sampling,
-    _validate_sub_epoch_segments,
+    _sample_sub_epoch_segments,
+    _validate_sub_epochs_and_get_vdfs,
     _validate_recent_blocks_and_get_records,
     chunks,
+    init_weight_proof_worker,
+    vdf_batch_size,
     _validate_vdf_batch,
 )
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 
 from hddcoin.types.weight_proof import (
+    RecentChainData,
+    SubEpochSegments,
     WeightProof,
 )
 
-from hddcoin.util.ints import uint32
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.util.streamable import recurse_jsonify
 
 log = logging.getLogger(__name__)
 
@@ -32,6 +42,13 @@ def _create_shutdown_file() -> IO:
     return tempfile.NamedTemporaryFile(prefix="hddcoin_executor_shutdown_trigger")
 
 
+def default_num_weight_proof_processes() -> int:
+    cpu_count = multiprocessing.cpu_count()
+    if cpu_count > 61:
+        cpu_count = 61  # Windows Server 2016 has an issue https://bugs.python.org/issue26903
+    return max(cpu_count - 2, 1)
+
+
 class WalletWeightProofHandler:
 
     LAMBDA_L = 100
@@ -41,12 +58,26 @@ class WalletWeightProofHandler:
     def __init__(
         self,
         constants: ConsensusConstants,
+        num_processes: Optional[int] = None,
     ):
         self._constants = constants
-        self._num_processes = 4
+        self._num_processes = num_processes if num_processes is not None else default_num_weight_proof_processes()
         self._executor_shutdown_tempfile: IO = _create_shutdown_file()
-        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(self._num_processes)
+        # The workers get the constants once when they start, the tasks sent to them don't carry them
+        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(
+            self._num_processes,
+            initializer=init_weight_proof_worker,
+            initargs=(recurse_jsonify(dataclasses.asdict(constants)),),
+        )
         self._weight_proof_tasks: List[asyncio.Task] = []
+        # Results of the weight proofs validated before, so a weight proof that extends one of them only has its new
+        # parts validated: the hashes of the sub epoch summaries whose segments were validated, and the level and
+        # required iters of the blocks of the last recent chain
+        self._validated_summaries: Set[bytes32] = set()
+        self._validated_blocks: Dict[bytes32, Tuple[int, uint64]] = {}
+        # Seconds from the start of the last validation until each of its phases finished, the segments, VDFs and
+        # recent blocks are validated concurrently
+        self.validation_timings: Dict[str, float] = {}
 
     def cancel_weight_proof_tasks(self):
         for task in self._weight_proof_tasks:
@@ -74,6 +105,9 @@ class WalletWeightProofHandler:
         if len(weight_proof.sub_epochs) == 0:
             return False, uint32(0), [], []
 
+        start = time.time()
+        timings: Dict[str, float] = {}
+        self.validation_timings = timings
         peak_height = weight_proof.recent_chain_data[-1].reward_chain_block.height
         log.info(f"validate weight proof peak height {peak_height}")
 
@@ -87,56 +121,68 @@ class WalletWeightProofHandler:
         if not validate_sub_epoch_sampling(rng, sub_epoch_weight_list, weight_proof):
             log.error("failed weight proof sub epoch sample validation")
             return False, uint32(0), [], []
+        timings["summaries"] = time.time() - start
 
-        constants, summary_bytes, wp_segment_bytes, wp_recent_chain_bytes = vars_to_bytes(
-            self._constants, summaries, weight_proof
-        )
-
+        summary_bytes = [bytes(summary) for summary in summaries]
+        shutdown_file_path = pathlib.Path(self._executor_shutdown_tempfile.name)
+        loop = asyncio.get_running_loop()
+        segment_tasks: List[asyncio.Future] = []
         vdf_tasks: List[asyncio.Future] = []
         # TODO: remove hint overrides after https://github.com/python/typeshed/pull/6187
-        recent_blocks_validation_task: asyncio.Future = asyncio.get_running_loop().run_in_executor(
+        recent_blocks_validation_task: asyncio.Future = loop.run_in_executor(
             self._executor,
             _validate_recent_blocks_and_get_records,
-            constants,
-            wp_recent_chain_bytes,
+            None,
+            bytes(RecentChainData(weight_proof.recent_chain_data)),
             summary_bytes,
-            pathlib.Path(self._executor_shutdown_tempfile.name),
+            shutdown_file_path,
+            self._validated_blocks,
         )  # type: ignore[assignment]
         try:
             if not skip_segment_validation:
-                segments_validated, vdfs_to_validate = _validate_sub_epoch_segments(
-                    constants, rng, wp_segment_bytes, summary_bytes
+                # The sampling is drawn here in order, then the sub epochs are split between the workers
+                sampled = _sample_sub_epoch_segments(
+                    self._constants, rng, weight_proof.sub_epoch_segments, summaries, self._validated_summaries
                 )
-
-                if not segments_validated:
-                    return False, uint32(0), [], []
-
-                vdf_chunks = chunks(vdfs_to_validate, self._num_processes)
-                for chunk in vdf_chunks:
-                    byte_chunks = []
-                    for vdf_proof, classgroup, vdf_info in chunk:
-                        byte_chunks.append((bytes(vdf_proof), bytes(classgroup), bytes(vdf_info)))
-
-                    # TODO: remove hint overrides after https://github.com/python/typeshed/pull/6187
-                    vdf_task: asyncio.Future = asyncio.get_running_loop().run_in_executor(
+                for batch in chunks(sampled, math.ceil(len(sampled) / self._num_processes)):
+                    segments_bytes = bytes(SubEpochSegments([seg for _, segments, _, _ in batch for seg in segments]))
+                    sub_epochs = [(sub_epoch_n, index, prev_ssi) for sub_epoch_n, _, index, prev_ssi in batch]
+                    segment_task: asyncio.Future = loop.run_in_executor(
                         self._executor,
-                        _validate_vdf_batch,
-                        constants,
-                        byte_chunks,
-                        pathlib.Path(self._executor_shutdown_tempfile.name),
+                        _validate_sub_epochs_and_get_vdfs,
+                        None,
+                        summary_bytes,
+                        segments_bytes,
+                        sub_epochs,
+                        shutdown_file_path,
                     )  # type: ignore[assignment]
-                    vdf_tasks.append(vdf_task)
+                    segment_tasks.append(segment_task)
+
+                # The VDFs of the sub epochs validated first are validated while the others are
+                for next_segment_task in asyncio.as_completed(segment_tasks):
+                    segments_validated, vdfs_to_validate = await next_segment_task
+                    if not segments_validated:
+                        return False, uint32(0), [], []
+                    batch_size = vdf_batch_size(len(vdfs_to_validate) * len(segment_tasks), self._num_processes)
+                    for vdf_batch in chunks(vdfs_to_validate, batch_size):
+                        vdf_task: asyncio.Future = loop.run_in_executor(
+                            self._executor, _validate_vdf_batch, None, vdf_batch, shutdown_file_path
+                        )  # type: ignore[assignment]
+                        vdf_tasks.append(vdf_task)
+                timings["segments"] = time.time() - start
 
                 for vdf_task in vdf_tasks:
                     validated = await vdf_task
                     if not validated:
                         return False, uint32(0), [], []
+                timings["vdfs"] = time.time() - start
 
-            valid_recent_blocks, records_bytes = await recent_blocks_validation_task
+            valid_recent_blocks, records_bytes, validated_blocks = await recent_blocks_validation_task
+            timings["recent blocks"] = time.time() - start
         finally:
             recent_blocks_validation_task.cancel()
-            for vdf_task in vdf_tasks:
-                vdf_task.cancel()
+            for task in segment_tasks + vdf_tasks:
+                task.cancel()
 
         if not valid_recent_blocks:
             log.error("failed validating weight proof recent blocks")
@@ -145,6 +191,20 @@ class WalletWeightProofHandler:
 
         records = [BlockRecord.from_bytes(b) for b in records_bytes]
 
+        if not skip_segment_validation:
+            for segment in weight_proof.sub_epoch_segments:
+                self._validated_summaries.add(summaries[segment.sub_epoch_n].get_hash())
+        recent_hashes = {block.header_hash for block in weight_proof.recent_chain_data}
+        self._validated_blocks = {
+            header_hash: validated
+            for header_hash, validated in validated_blocks.items()
+            if header_hash in recent_hashes
+        }
+
+        log.info(
+            f"validated weight proof with {len(vdf_tasks)} VDF batches on {self._num_processes} processes, "
+            + ", ".join(f"{phase} done after {seconds:0.2f}s" for phase, seconds in timings.items())
+        )
         # TODO fix find fork point
         return True, uint32(0), summaries, records
 
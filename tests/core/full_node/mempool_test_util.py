@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from secrets import token_bytes
+from typing import List, Optional
+
+from blspy import G2Element
+
+from hddcoin.consensus.cost_calculator import NPCResult
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.full_node.mempool_manager import MempoolManager, get_npc_multiprocess
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.program import Program, SerializedProgram
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.coin_spend import CoinSpend
+from hddcoin.types.condition_opcodes import ConditionOpcode
+from hddcoin.types.mempool_inclusion_status import MempoolInclusionStatus
+from hddcoin.types.spend_bundle import SpendBundle
+from hddcoin.util.hash import std_hash
+from hddcoin.util.ints import uint32, uint64
+
+# Anyone can spend a coin with this puzzle, the solution is the list of conditions
+IDENTITY_PUZZLE = Program.to(1)
+IDENTITY_PUZZLE_HASH = IDENTITY_PUZZLE.get_tree_hash()
+
+
+@dataclass
+class PeakRecord:
+    """The fields of a BlockRecord that the mempool reads"""
+
+    height: uint32
+    timestamp: uint64
+    header_hash: bytes32
+    prev_transaction_block_hash: Optional[bytes32]
+    prev_transaction_block_height: uint32
+    is_transaction_block: bool = True
+
+
+def make_peak(height: int, prev: Optional[PeakRecord]) -> PeakRecord:
+    prev_hash = None if prev is None else prev.header_hash
+    return PeakRecord(uint32(height), uint64(1000 + height), std_hash(token_bytes(32)), prev_hash, uint32(height - 1))
+
+
+def make_spend(
+    coin: Optional[Coin] = None,
+    extra_conditions: List[List] = [],
+    fee: int = 10,
+    num_outputs: int = 1,
+    signature: G2Element = G2Element(),
+) -> SpendBundle:
+    """
+    Spends coin, or a new identity puzzle coin of 1000 mojos, to num_outputs coins: one mojo each but the last, which
+    gets the rest of the amount minus the fee.
+    """
+    if coin is None:
+        coin = Coin(token_bytes(32), IDENTITY_PUZZLE_HASH, uint64(1000))
+    conditions = [[ConditionOpcode.CREATE_COIN, std_hash(coin.name() + bytes([i])), 1] for i in range(num_outputs - 1)]
+    conditions.append([ConditionOpcode.CREATE_COIN, std_hash(coin.name()), coin.amount - fee - (num_outputs - 1)])
+    coin_spend = CoinSpend(
+        coin,
+        SerializedProgram.from_program(IDENTITY_PUZZLE),
+        SerializedProgram.from_program(Program.to(conditions + extra_conditions)),
+    )
+    return SpendBundle([coin_spend], signature)
+
+
+async def add_spend(mempool_manager: MempoolManager, spend_bundle: SpendBundle) -> MempoolInclusionStatus:
+    npc_result = NPCResult.from_bytes(
+        get_npc_multiprocess(
+            bytes(spend_bundle), DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM, DEFAULT_CONSTANTS.COST_PER_BYTE
+        )
+    )
+    spend_name = spend_bundle.name()
+    mempool_manager.add_and_maybe_pop_seen(spend_name)
+    _, status, _ = await mempool_manager.add_spendbundle(spend_bundle, npc_result, spend_name)
+    return status
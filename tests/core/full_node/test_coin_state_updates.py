@@ -0,0 +1,61 @@
+import zlib
+from secrets import token_bytes
+
+import pytest
+
+from hddcoin.full_node.coin_state_updates import (
+    COMPRESSION_THRESHOLD,
+    CoinStateUpdateEncoder,
+    decompress_coin_state_update,
+)
+from hddcoin.protocols.protocol_message_types import ProtocolMessageTypes
+from hddcoin.protocols.shared_protocol import Capability
+from hddcoin.protocols.wallet_protocol import CoinState, CoinStateUpdate, CompressedCoinStateUpdate
+from hddcoin.server.ws_connection import known_active_capabilities
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint16, uint32, uint64
+
+
+def coin_state(spent_height=None) -> CoinState:
+    coin = Coin(bytes32(token_bytes(32)), bytes32(token_bytes(32)), uint64(1000))
+    return CoinState(coin, spent_height, uint32(10))
+
+
+class TestCoinStateUpdates:
+    def test_encode(self):
+        peak_hash = bytes32(token_bytes(32))
+        encoder = CoinStateUpdateEncoder(uint32(12), uint32(9), peak_hash)
+        shared = [coin_state(), coin_state(uint32(11))]
+        for states in [shared, shared + [coin_state()], []]:
+            expected = CoinStateUpdate(uint32(12), uint32(9), peak_hash, states)
+            assert encoder.encode(states) == bytes(expected)
+            message = encoder.message(states, compress=True)
+            assert message.type == ProtocolMessageTypes.coin_state_update.value
+            assert CoinStateUpdate.from_bytes(message.data) == expected
+
+    def test_compression(self):
+        encoder = CoinStateUpdateEncoder(uint32(12), uint32(9), bytes32(token_bytes(32)))
+        # Coins of the same puzzle hash, as in the update of a wallet with many coins
+        puzzle_hash = bytes32(token_bytes(32))
+        states = [
+            CoinState(Coin(bytes32(token_bytes(32)), puzzle_hash, uint64(1000)), None, uint32(10))
+            for _ in range(COMPRESSION_THRESHOLD // 50)
+        ]
+        assert encoder.message(states, compress=False).type == ProtocolMessageTypes.coin_state_update.value
+
+        message = encoder.message(states, compress=True)
+        assert message.type == ProtocolMessageTypes.compressed_coin_state_update.value
+        update = decompress_coin_state_update(CompressedCoinStateUpdate.from_bytes(message.data))
+        assert update.items == states
+
+        with pytest.raises(ValueError):
+            decompress_coin_state_update(CompressedCoinStateUpdate(zlib.compress(bytes(50 * 1024 * 1024 + 1))))
+        with pytest.raises(ValueError):
+            decompress_coin_state_update(CompressedCoinStateUpdate(zlib.compress(encoder.encode(states))[:-10]))
+
+    def test_capabilities(self):
+        capabilities = [(uint16(1), "1"), (uint16(2), "0"), (uint16(1000), "1")]
+        assert known_active_capabilities(capabilities) == [Capability.BASE]
+        capabilities.append((uint16(Capability.ZLIB_COIN_STATE_UPDATES.value), "1"))
+        assert known_active_capabilities(capabilities) == [Capability.BASE, Capability.ZLIB_COIN_STATE_UPDATES]
@@ -0,0 +1,128 @@
+import asyncio
+from secrets import token_bytes
+
+import pytest
+
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.fee_estimator import FEE_RATE_BUCKETS, MIN_SAMPLES, FeeEstimator, fee_rate_bucket
+from hddcoin.full_node.mempool_manager import MempoolManager
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.coin_record import CoinRecord
+from hddcoin.types.mempool_inclusion_status import MempoolInclusionStatus
+from hddcoin.util.ints import uint32, uint64
+from tests.core.full_node.mempool_test_util import IDENTITY_PUZZLE_HASH, add_spend, make_peak, make_spend
+from tests.util.db_connection import DBConnection
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def rand_hash() -> bytes32:
+    return bytes32(token_bytes(32))
+
+
+class TestFeeEstimator:
+    def test_buckets(self):
+        assert fee_rate_bucket(0) == 0
+        assert fee_rate_bucket(0.5) == 0
+        assert fee_rate_bucket(1) == 1
+        assert FEE_RATE_BUCKETS[fee_rate_bucket(100)] <= 100 < FEE_RATE_BUCKETS[fee_rate_bucket(100) + 1]
+        assert fee_rate_bucket(10 ** 12) == len(FEE_RATE_BUCKETS) - 1
+
+    def test_estimates(self):
+        estimator = FeeEstimator(max_target=10)
+        assert estimator.estimate(1) is None
+        height = uint32(100)
+        for _ in range(5):
+            # High fee items are confirmed in the next block, low fee ones after 4 blocks
+            high = [rand_hash() for _ in range(MIN_SAMPLES)]
+            low = [rand_hash() for _ in range(MIN_SAMPLES)]
+            for name in high:
+                estimator.add_item(name, 1000, height)
+            for name in low:
+                estimator.add_item(name, 10, uint32(height - 3))
+            estimator.new_block(uint32(height + 1), high + low, [])
+            height = uint32(height + 1)
+
+        high_rate = FEE_RATE_BUCKETS[fee_rate_bucket(1000)]
+        low_rate = FEE_RATE_BUCKETS[fee_rate_bucket(10)]
+        assert estimator.estimate(1) == high_rate
+        assert estimator.estimate(3) == high_rate
+        assert estimator.estimate(4) == low_rate
+        assert estimator.estimate(100) == low_rate
+        # Targets under one block are answered as one block
+        assert estimator.estimate(0) == high_rate
+
+        # Low fee items stuck in the mempool for longer than the target fail it
+        stuck = [rand_hash() for _ in range(5 * MIN_SAMPLES)]
+        for name in stuck:
+            estimator.add_item(name, 10, uint32(height - 8))
+        estimator.new_block(uint32(height + 1), [], stuck)
+        assert estimator.estimate(4) == high_rate
+        assert estimator.estimate(10) == low_rate
+
+        # The items that left the mempool without being confirmed are no longer tracked
+        estimator.new_block(uint32(height + 2), [], [])
+        assert estimator._tracked == {}
+        assert estimator.estimate(4) == low_rate
+
+    def test_ring_buffer(self):
+        estimator = FeeEstimator(history_blocks=3, max_target=10)
+        names = [rand_hash() for _ in range(MIN_SAMPLES)]
+        for name in names:
+            estimator.add_item(name, 1000, uint32(1))
+        estimator.new_block(uint32(2), names, [])
+        assert estimator.estimate(1) == FEE_RATE_BUCKETS[fee_rate_bucket(1000)]
+        for height in range(3, 6):
+            estimator.new_block(uint32(height), [], [])
+        # The block that confirmed the items left the history
+        assert estimator.estimate(1) is None
+        assert all(count == 0 for counts in estimator._confirmed for count in counts)
+
+
+class TestMempoolFeeEstimate:
+    @pytest.mark.asyncio
+    async def test_new_peak(self):
+        async with DBConnection() as db_wrapper:
+            coin_store = await CoinStore.create(db_wrapper)
+            mempool_manager = MempoolManager(coin_store, DEFAULT_CONSTANTS)
+            try:
+                coins = [Coin(token_bytes(32), IDENTITY_PUZZLE_HASH, uint64(1000)) for _ in range(MIN_SAMPLES + 2)]
+                await coin_store._add_coin_records(
+                    [CoinRecord(coin, uint32(1), uint32(0), False, False, uint64(1001)) for coin in coins]
+                )
+                peak = make_peak(1, None)
+                await mempool_manager.new_peak(peak)
+                assert mempool_manager.get_fee_rate_estimate(1, 1000) == 0
+
+                spends = [make_spend(coin) for coin in coins]
+                for spend in spends:
+                    assert await add_spend(mempool_manager, spend) == MempoolInclusionStatus.SUCCESS
+                # The block confirms all the items but the last two. The coin of the one before last is spent by
+                # another transaction, its item is evicted without being confirmed
+                await coin_store._set_spent([coin.name() for coin in coins[:-1]], uint32(2))
+                await coin_store._add_coin_records(
+                    [
+                        CoinRecord(addition, uint32(2), uint32(0), False, False, uint64(1002))
+                        for spend in spends[:-2]
+                        for addition in spend.additions()
+                    ]
+                )
+                peak = make_peak(2, peak)
+                await mempool_manager.new_peak(peak)
+
+                assert mempool_manager.get_mempool_item(spends[-2].name()) is None
+                item = mempool_manager.get_mempool_item(spends[-1].name())
+                assert item is not None
+                assert mempool_manager.fee_estimator.height == 2
+                assert len(mempool_manager.fee_estimator._blocks[-1]) == MIN_SAMPLES
+                assert list(mempool_manager.fee_estimator._tracked.keys()) == [item.name]
+                expected = FEE_RATE_BUCKETS[fee_rate_bucket(item.fee_per_cost)]
+                assert mempool_manager.get_fee_rate_estimate(1, 1000) == expected
+            finally:
+                mempool_manager.shut_down()
@@ -0,0 +1,111 @@
+import asyncio
+import random
+from secrets import token_bytes
+from typing import List, Tuple
+
+import pytest
+
+from hddcoin.consensus.cost_calculator import NPCResult
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.fee_rate_index import SUBLIST_LOAD, FeeRateIndex
+from hddcoin.full_node.mempool_manager import MempoolManager, get_npc_multiprocess
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.coin_record import CoinRecord
+from hddcoin.types.mempool_inclusion_status import MempoolInclusionStatus
+from hddcoin.types.spend_bundle import SpendBundle
+from hddcoin.util.ints import uint32, uint64
+from tests.core.full_node.mempool_test_util import IDENTITY_PUZZLE_HASH, make_peak, make_spend
+from tests.util.db_connection import DBConnection
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def fee_rate_to_free(items: List[Tuple[float, int, bytes32, int]], cost: int) -> float:
+    """Walks the items in increasing fee per cost, like the mempool used to"""
+    for fee_per_cost, _, _, item_cost in sorted(items):
+        cost -= item_cost
+        if cost <= 0:
+            return fee_per_cost
+    raise ValueError()
+
+
+class TestFeeRateIndex:
+    def test_against_sorted_list(self):
+        rng = random.Random(1)
+        index = FeeRateIndex()
+        # (fee_per_cost, sequence number, name, cost)
+        items: List[Tuple[float, int, bytes32, int]] = []
+        for sequence in range(6 * SUBLIST_LOAD):
+            if len(items) > 0 and rng.random() < 0.3:
+                item = items.pop(rng.randrange(len(items)))
+                index.remove(item[2])
+            else:
+                # Few distinct rates, to have many items with the same one
+                item = (float(rng.randrange(50)), sequence, bytes32(token_bytes(32)), rng.randrange(1, 1000))
+                items.append(item)
+                index.add(item[2], item[0], item[3])
+
+            if sequence % 97 == 0:
+                ordered = [name for _, _, name, _ in sorted(items)]
+                assert list(index.ascending()) == ordered
+                assert list(index.descending()) == ordered[::-1]
+                assert index.lowest() == ordered[0]
+                assert index.total_cost == sum(item[3] for item in items) and len(index) == len(items)
+                for cost in [1, index.total_cost // 3, index.total_cost // 2, index.total_cost]:
+                    assert index.fee_rate_to_free(cost) == fee_rate_to_free(items, cost)
+                with pytest.raises(ValueError):
+                    index.fee_rate_to_free(index.total_cost + 1)
+        assert len(index._lists) > 1
+
+        for item in items:
+            index.remove(item[2])
+        assert len(index) == 0 and index.total_cost == 0 and index.lowest() is None
+
+
+class TestBlockBuilding:
+    @pytest.mark.asyncio
+    async def test_fill_block(self):
+        async with DBConnection() as db_wrapper:
+            coin_store = await CoinStore.create(db_wrapper)
+            mempool_manager = MempoolManager(coin_store, DEFAULT_CONSTANTS)
+            try:
+                coins = [Coin(token_bytes(32), IDENTITY_PUZZLE_HASH, uint64(10 ** 9)) for _ in range(3)]
+                await coin_store._add_coin_records(
+                    [CoinRecord(coin, uint32(1), uint32(0), False, False, uint64(1001)) for coin in coins]
+                )
+                peak = make_peak(1, None)
+                await mempool_manager.new_peak(peak)
+
+                # From the highest fee per cost: a large item, another large one, and a small one
+                spends = [
+                    make_spend(coins[0], fee=10 ** 8, num_outputs=5),
+                    make_spend(coins[1], fee=10 ** 7, num_outputs=5),
+                    make_spend(coins[2], fee=1),
+                ]
+                costs = []
+                for spend in spends:
+                    npc_result = NPCResult.from_bytes(
+                        get_npc_multiprocess(
+                            bytes(spend), DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM, DEFAULT_CONSTANTS.COST_PER_BYTE
+                        )
+                    )
+                    cost, status, _ = await mempool_manager.add_spendbundle(spend, npc_result, spend.name())
+                    assert status == MempoolInclusionStatus.SUCCESS
+                    costs.append(cost)
+                assert costs[2] < costs[1]
+
+                # The second item doesn't fit, the small one after it still does
+                mempool_manager.limit_factor = (costs[0] + costs[2]) / DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM
+                result = await mempool_manager.create_bundle_from_mempool(peak.header_hash)
+                assert result is not None
+                bundle, additions, removals = result
+                assert set(removals) == {coins[0], coins[2]}
+                assert bundle == SpendBundle.aggregate([spends[0], spends[2]])
+            finally:
+                mempool_manager.shut_down()
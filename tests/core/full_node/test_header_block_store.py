@@ -0,0 +1,78 @@
+import asyncio
+from pathlib import Path
+
+import aiosqlite
+import pytest
+
+from hddcoin.consensus.blockchain import Blockchain, ReceiveBlockResult
+from hddcoin.full_node.block_store import BlockStore
+from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.header_block_store import HeaderBlockStore
+from hddcoin.full_node.hint_store import HintStore
+from hddcoin.util.db_wrapper import DBWrapper
+from tests.setup_nodes import bt, test_constants
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestHeaderBlockStore:
+    @pytest.mark.asyncio
+    async def test_header_blocks_follow_peak(self):
+        blocks = bt.get_consecutive_blocks(10, guarantee_transaction_block=True)
+        db_filename = Path("header_block_store_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(connection)
+        coin_store = await CoinStore.create(db_wrapper)
+        block_store = await BlockStore.create(db_wrapper)
+        hint_store = await HintStore.create(db_wrapper)
+        header_block_store = await HeaderBlockStore.create(db_wrapper)
+        bc = await Blockchain.create(coin_store, block_store, test_constants, hint_store, header_block_store)
+        try:
+            for block in blocks:
+                result, err, _, _ = await bc.receive_block(block)
+                assert err is None and result == ReceiveBlockResult.NEW_PEAK
+
+            # The stored header blocks are the ones built from the full blocks and the coin store
+            stored = await header_block_store.get_header_blocks_in_range(0, 9)
+            assert len(stored) == 10
+            bc.header_block_store = None
+            built = await bc.get_header_blocks_in_range(0, 9)
+            assert stored == built
+            bc.header_block_store = header_block_store
+            assert await bc.get_header_blocks_in_range(0, 9) == built
+
+            # A heavier fork replaces the blocks above the fork point
+            fork_blocks = bt.get_consecutive_blocks(
+                7, blocks[:5], seed=b"header block store fork", guarantee_transaction_block=True
+            )
+            for block in fork_blocks[5:]:
+                await bc.receive_block(block)
+            assert bc.get_peak().header_hash == fork_blocks[-1].header_hash
+            stored = await header_block_store.get_header_blocks_in_range(0, 20)
+            assert set(stored.keys()) == {block.header_hash for block in fork_blocks}
+
+            # A removed header block, as after a compact proof replacement, is built and stored again
+            await header_block_store.remove_header_block(5)
+            await connection.commit()
+            assert fork_blocks[5].header_hash not in await header_block_store.get_header_blocks_in_range(0, 20)
+            assert set((await bc.get_header_blocks_in_range(0, 11)).keys()) == set(stored.keys())
+            assert await header_block_store.get_header_blocks_in_range(0, 20) == stored
+
+            # Missing header blocks are built and stored again
+            await header_block_store.rollback_to_block(2)
+            await connection.commit()
+            assert len(await header_block_store.get_header_blocks_in_range(0, 20)) == 3
+            assert set((await bc.get_header_blocks_in_range(0, 11)).keys()) == set(stored.keys())
+            assert await header_block_store.get_header_blocks_in_range(0, 20) == stored
+        finally:
+            bc.shut_down()
+            await connection.close()
+            db_filename.unlink()
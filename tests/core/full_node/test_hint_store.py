@@ -6,6 +6,7 @@ from clvm.casts import int_to_bytes
 from hddcoin.consensus.blockchain import Blockchain
 from hddcoin.full_node.hint_store import HintStore
 from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.condition_opcodes import ConditionOpcode
 from hddcoin.types.condition_with_args import ConditionWithArgs
 from hddcoin.types.spend_bundle import SpendBundle
@@ -50,6 +51,21 @@ class TestHintStore:
             coins_for_non_hint = await hint_store.get_coin_ids(not_existing_hint)
             assert coins_for_non_hint == []
 
+    @pytest.mark.asyncio
+    async def test_get_coin_ids_many(self):
+        async with DBConnection() as db_wrapper:
+            hint_store = await HintStore.create(db_wrapper)
+            # More hints than fit in a single query
+            hints = [i.to_bytes(32, "big") for i in range(2000)]
+            coin_hint_list = [(bytes32(hint[::-1]), hint) for hint in hints]
+            coin_hint_list.append((32 * b"\7", hints[0]))
+            await hint_store.add_hints(coin_hint_list)
+            await db_wrapper.commit_transaction()
+
+            coin_ids = await hint_store.get_coin_ids_many(hints[:1500] + [hints[0], 32 * b"\3"])
+            assert sorted(coin_ids) == sorted([coin_id for coin_id, hint in coin_hint_list if hint in hints[:1500]])
+            assert await hint_store.get_coin_ids_many([]) == []
+
     @pytest.mark.asyncio
     async def test_hints_in_blockchain(self, empty_blockchain):  # noqa: F811
         blockchain: Blockchain = empty_blockchain
@@ -0,0 +1,61 @@
+import asyncio
+from secrets import token_bytes
+
+import pytest
+
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.mempool_manager import MempoolManager
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.coin_record import CoinRecord
+from hddcoin.types.condition_opcodes import ConditionOpcode
+from hddcoin.types.mempool_inclusion_status import MempoolInclusionStatus
+from hddcoin.util.ints import uint32, uint64
+from tests.core.full_node.mempool_test_util import IDENTITY_PUZZLE_HASH, add_spend, make_peak, make_spend
+from tests.util.db_connection import DBConnection
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestMempoolNewPeak:
+    @pytest.mark.asyncio
+    async def test_new_peak(self):
+        async with DBConnection() as db_wrapper:
+            coin_store = await CoinStore.create(db_wrapper)
+            mempool_manager = MempoolManager(coin_store, DEFAULT_CONSTANTS)
+            try:
+                coins = [Coin(token_bytes(32), IDENTITY_PUZZLE_HASH, uint64(1000)) for _ in range(5)]
+                await coin_store._add_coin_records(
+                    [CoinRecord(coin, uint32(1), uint32(0), False, False, uint64(1001)) for coin in coins]
+                )
+                peak = make_peak(1, None)
+                await mempool_manager.new_peak(peak)
+
+                spends = [make_spend(coin) for coin in coins[:4]]
+                for spend in spends:
+                    assert await add_spend(mempool_manager, spend) == MempoolInclusionStatus.SUCCESS
+                # Can only get in once the chain is higher
+                locked = make_spend(coins[4], [[ConditionOpcode.ASSERT_HEIGHT_ABSOLUTE, 2]])
+                assert await add_spend(mempool_manager, locked) == MempoolInclusionStatus.PENDING
+
+                # The next block spends the coins of the first two items
+                await coin_store._set_spent([coins[0].name(), coins[1].name()], uint32(2))
+                peak = make_peak(2, peak)
+                added = await mempool_manager.new_peak(peak)
+                assert [spend_name for _, _, spend_name in added] == [locked.name()]
+                assert set(mempool_manager.mempool.spends.keys()) == {spend.name() for spend in spends[2:] + [locked]}
+                assert not mempool_manager.seen(spends[0].name())
+                assert mempool_manager.seen(spends[2].name())
+                assert set(mempool_manager.mempool.removals.keys()) == {coin.name() for coin in coins[2:]}
+
+                # After a reorg the items are validated again
+                await coin_store._set_spent([coins[2].name()], uint32(2))
+                peak = make_peak(2, None)
+                await mempool_manager.new_peak(peak)
+                assert set(mempool_manager.mempool.spends.keys()) == {spends[3].name(), locked.name()}
+            finally:
+                mempool_manager.shut_down()
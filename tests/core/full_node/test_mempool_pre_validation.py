@@ -0,0 +1,112 @@
+import asyncio
+from secrets import token_bytes
+
+import pytest
+from blspy import AugSchemeMPL
+
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.full_node.coin_store import CoinStore
+from hddcoin.full_node.mempool_manager import MempoolManager
+from hddcoin.full_node.transaction_queue import TransactionQueue
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.condition_opcodes import ConditionOpcode
+from hddcoin.util import cached_bls
+from hddcoin.util.errors import Err
+from tests.core.full_node.mempool_test_util import make_spend
+from tests.util.db_connection import DBConnection
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestTransactionQueue:
+    @pytest.mark.asyncio
+    async def test_fairness(self):
+        queue: TransactionQueue[str] = TransactionQueue(max_size=10, max_size_per_peer=4)
+        peer_1, peer_2 = bytes32(token_bytes(32)), bytes32(token_bytes(32))
+        for i in range(4):
+            queue.put(f"1-{i}", peer_1)
+        with pytest.raises(asyncio.QueueFull):
+            queue.put("1-4", peer_1)
+        queue.put("2-0", peer_2)
+        queue.put("local-0", None)
+        assert queue.size() == 6 and queue.peer_size(peer_1) == 4
+
+        # The peers are served in turn, whatever the order the transactions came in
+        assert queue.pop_batch(4) == ["1-0", "2-0", "local-0", "1-1"]
+        queue.put("2-1", peer_2)
+        assert queue.pop_batch(10) == ["1-2", "2-1", "1-3"]
+        assert queue.size() == 0 and queue.peer_size(peer_1) == 0
+        assert queue.pop_batch(10) == []
+
+        # Local transactions are only limited by the total size
+        for i in range(10):
+            queue.put(f"local-{i}", None)
+        with pytest.raises(asyncio.QueueFull):
+            queue.put("2-2", peer_2)
+        await asyncio.wait_for(queue.wait(), 1)
+        assert len(queue.pop_all()) == 10
+
+
+class TestMempoolPreValidation:
+    @pytest.mark.asyncio
+    async def test_pre_validate(self):
+        async with DBConnection() as db_wrapper:
+            coin_store = await CoinStore.create(db_wrapper)
+            mempool_manager = MempoolManager(coin_store, DEFAULT_CONSTANTS, num_workers=2)
+            try:
+                sk = AugSchemeMPL.key_gen(bytes([1] * 32))
+                message = token_bytes(32)
+                signed = make_spend(
+                    extra_conditions=[[ConditionOpcode.AGG_SIG_UNSAFE, bytes(sk.get_g1()), message]],
+                    signature=AugSchemeMPL.sign(sk, message),
+                )
+                bad_signature = make_spend(
+                    extra_conditions=[[ConditionOpcode.AGG_SIG_UNSAFE, bytes(sk.get_g1()), message]]
+                )
+                bad_puzzle = make_spend(extra_conditions=[[ConditionOpcode.CREATE_COIN, b"bad"]])
+                unsigned = [make_spend() for _ in range(20)]
+                spends = [signed, bad_signature, bad_puzzle] + unsigned
+
+                results = await asyncio.gather(
+                    *[
+                        mempool_manager.pre_validate_spendbundle(spend, spend.name(), bytes32(token_bytes(32)))
+                        for spend in spends
+                    ]
+                )
+                assert results[0].error is None and len(results[0].npc_list) == 1
+                assert results[1].error == Err.BAD_AGGREGATE_SIGNATURE.value
+                assert results[2].error is not None and results[2].error != Err.BAD_AGGREGATE_SIGNATURE.value
+                assert all(result.error is None for result in results[3:])
+
+                # The pairings of the valid signature were added to the cache used by block validation
+                assert cached_bls.get_pairings(cached_bls.LOCAL_CACHE, [sk.get_g1()], [message], False) != []
+                assert cached_bls.aggregate_verify([sk.get_g1()], [message], signed.aggregated_signature, True)
+
+                stats = mempool_manager.get_pre_validation_stats()
+                assert stats["queue_size"] == 0
+                assert stats["txs_per_sec"] == len(spends) / 60
+            finally:
+                mempool_manager.shut_down()
+
+    @pytest.mark.asyncio
+    async def test_queue_full(self):
+        async with DBConnection() as db_wrapper:
+            coin_store = await CoinStore.create(db_wrapper)
+            mempool_manager = MempoolManager(coin_store, DEFAULT_CONSTANTS, max_queue_size_per_peer=2)
+            try:
+                peer = bytes32(token_bytes(32))
+                spends = [make_spend() for _ in range(3)]
+                tasks = [
+                    asyncio.create_task(mempool_manager.pre_validate_spendbundle(spend, spend.name(), peer))
+                    for spend in spends
+                ]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                # The three are queued before the workers take any, the share of the peer is only two
+                assert all(not isinstance(result, Exception) for result in results[:2])
+                assert isinstance(results[2], asyncio.QueueFull)
+            finally:
+                mempool_manager.shut_down()
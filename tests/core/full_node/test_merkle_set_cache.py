@@ -0,0 +1,76 @@
+from secrets import token_bytes
+from typing import Dict, List
+
+import pytest
+
+from hddcoin.full_node.merkle_set_cache import BlockAdditions, BlockRemovals, MerkleSetCache
+from hddcoin.types.blockchain_format.coin import Coin, hash_coin_list
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.util.merkle_set import MerkleSet
+
+
+def rand_hash() -> bytes32:
+    return bytes32(token_bytes(32))
+
+
+def make_additions(height: int) -> BlockAdditions:
+    puzzle_hashes = [rand_hash() for _ in range(3)]
+    coins_map: Dict[bytes32, List[Coin]] = {}
+    for i in range(10):
+        puzzle_hash = puzzle_hashes[i % 3]
+        coins_map.setdefault(puzzle_hash, []).append(Coin(rand_hash(), puzzle_hash, uint64(i)))
+    merkle_set = MerkleSet()
+    for puzzle_hash, coins in coins_map.items():
+        merkle_set.add_already_hashed(puzzle_hash)
+        merkle_set.add_already_hashed(hash_coin_list(coins))
+    return BlockAdditions(uint32(height), merkle_set.get_root(), coins_map)
+
+
+def make_removals(height: int) -> BlockRemovals:
+    coins = [Coin(rand_hash(), rand_hash(), uint64(i)) for i in range(10)]
+    merkle_set = MerkleSet()
+    for coin in coins:
+        merkle_set.add_already_hashed(coin.name())
+    return BlockRemovals(uint32(height), merkle_set.get_root(), True, {coin.name(): coin for coin in coins})
+
+
+class TestMerkleSetCache:
+    def test_merkle_sets(self):
+        additions = make_additions(5)
+        merkle_set = additions.merkle_set()
+        assert additions.merkle_set() is merkle_set
+        for puzzle_hash, coins in additions.puzzlehash_coins_map.items():
+            assert merkle_set.is_included_already_hashed(puzzle_hash)[0]
+            assert merkle_set.is_included_already_hashed(hash_coin_list(coins))[0]
+        assert not merkle_set.is_included_already_hashed(rand_hash())[0]
+
+        removals = make_removals(5)
+        for coin_name in removals.removals.keys():
+            assert removals.merkle_set().is_included_already_hashed(coin_name)[0]
+
+        # The sets are checked against the roots of the block
+        wrong_root = BlockRemovals(uint32(5), rand_hash(), True, removals.removals)
+        with pytest.raises(AssertionError):
+            wrong_root.merkle_set()
+
+    def test_cache(self):
+        cache = MerkleSetCache(3)
+        header_hashes = [rand_hash() for _ in range(5)]
+        for height, header_hash in enumerate(header_hashes):
+            assert cache.get_additions(header_hash) is None
+            cache.add_additions(header_hash, make_additions(height))
+            cache.add_removals(header_hash, make_removals(height))
+
+        # Only the most recent blocks are kept
+        assert cache.get_additions(header_hashes[0]) is None
+        assert cache.get_additions(header_hashes[4]).height == 4
+        assert cache.get_removals(header_hashes[3]).height == 3
+        assert cache.additions_hits == 1 and cache.additions_misses == 6
+        assert cache.hit_rates() == {"additions": 1 / 7, "removals": 1.0}
+
+        # A reorg drops the blocks above the fork point
+        cache.remove_above(uint32(2))
+        assert cache.get_additions(header_hashes[2]) is not None
+        assert cache.get_additions(header_hashes[3]) is None
+        assert cache.get_removals(header_hashes[4]) is None
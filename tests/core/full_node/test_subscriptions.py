@@ -0,0 +1,73 @@
+from secrets import token_bytes
+
+from hddcoin.full_node.subscriptions import PeerSubscriptions
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.coin_record import CoinRecord
+from hddcoin.util.ints import uint32, uint64
+
+
+def rand_hash() -> bytes32:
+    return bytes32(token_bytes(32))
+
+
+def coin_record(puzzle_hash: bytes32) -> CoinRecord:
+    return CoinRecord(Coin(rand_hash(), puzzle_hash, uint64(1)), uint32(10), uint32(0), False, False, uint64(1000))
+
+
+class TestPeerSubscriptions:
+    def test_changes_for_peers(self):
+        subscriptions = PeerSubscriptions()
+        peer_1, peer_2 = rand_hash(), rand_hash()
+        puzzle_hash, hint, other_puzzle_hash = rand_hash(), rand_hash(), rand_hash()
+        by_puzzle_hash = coin_record(puzzle_hash)
+        by_coin_id = coin_record(other_puzzle_hash)
+        by_hint = coin_record(other_puzzle_hash)
+        not_subscribed = coin_record(other_puzzle_hash)
+
+        subscriptions.add_puzzle_hash_subscriptions(peer_1, [puzzle_hash, hint])
+        subscriptions.add_puzzle_hash_subscriptions(peer_2, [puzzle_hash])
+        subscriptions.add_coin_subscriptions(peer_2, [by_coin_id.name])
+
+        changes = subscriptions.changes_for_peers(
+            [by_puzzle_hash, by_coin_id, not_subscribed], {hint: {by_hint.name: by_hint}}
+        )
+        assert changes == {
+            peer_1: {by_puzzle_hash.coin_state, by_hint.coin_state},
+            peer_2: {by_puzzle_hash.coin_state, by_coin_id.coin_state},
+        }
+        assert subscriptions.changes_for_peers([not_subscribed], {}) == {}
+
+    def test_remove_peer(self):
+        subscriptions = PeerSubscriptions()
+        peer_1, peer_2 = rand_hash(), rand_hash()
+        puzzle_hash = rand_hash()
+        record = coin_record(puzzle_hash)
+        subscriptions.add_puzzle_hash_subscriptions(peer_1, [puzzle_hash])
+        subscriptions.add_puzzle_hash_subscriptions(peer_2, [puzzle_hash])
+        subscriptions.add_coin_subscriptions(peer_2, [record.name])
+
+        subscriptions.remove_peer(peer_2)
+        subscriptions.remove_peer(rand_hash())
+        assert subscriptions.subscription_count(peer_2) == 0
+        assert subscriptions.changes_for_peers([record], {}) == {peer_1: {record.coin_state}}
+
+        # Keys without subscribers are dropped
+        subscriptions.remove_peer(peer_1)
+        assert subscriptions._puzzle_hash_peers == {} and subscriptions._coin_id_peers == {}
+
+        # A peer that connects again subscribes from scratch
+        subscriptions.add_coin_subscriptions(peer_2, [record.name])
+        assert subscriptions.changes_for_peers([record], {}) == {peer_2: {record.coin_state}}
+
+    def test_limit(self):
+        subscriptions = PeerSubscriptions(max_subscriptions_per_peer=10)
+        peer = rand_hash()
+        puzzle_hashes = [rand_hash() for _ in range(8)]
+        subscriptions.add_puzzle_hash_subscriptions(peer, puzzle_hashes + puzzle_hashes)
+        assert subscriptions.subscription_count(peer) == 8
+        coin_ids = [rand_hash() for _ in range(5)]
+        subscriptions.add_coin_subscriptions(peer, coin_ids)
+        # Puzzle hash and coin subscriptions share the limit
+        assert subscriptions.subscription_count(peer) == 10
+        assert subscriptions._peer_coin_ids[subscriptions._peer_indexes[peer]] == set(coin_ids[:2])
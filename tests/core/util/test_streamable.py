@@ -8,11 +8,12 @@ from pytest import raises
 
 from hddcoin.protocols.wallet_protocol import RespondRemovals
 from hddcoin.types.blockchain_format.coin import Coin
-from hddcoin.types.blockchain_format.program import Program
+from hddcoin.types.blockchain_format.program import Program, SerializedProgram
 from hddcoin.types.blockchain_format.sized_bytes import bytes32
 from hddcoin.types.full_block import FullBlock
 from hddcoin.types.weight_proof import SubEpochChallengeSegment
-from hddcoin.util.ints import uint8, uint32
+from hddcoin.util.hash import std_hash
+from hddcoin.util.ints import int64, uint8, uint32, uint64, uint128
 from hddcoin.util.streamable import (
     Streamable,
     streamable,
@@ -25,6 +26,11 @@ from hddcoin.util.streamable import (
     parse_tuple,
     parse_size_hints,
     parse_str,
+    program_length,
+    view_parse_bool,
+    view_parse_bytes,
+    view_parse_str,
+    view_parse_uint32,
 )
 from tests.setup_nodes import bt, test_constants
 
@@ -373,6 +379,143 @@ class TestStreamable(unittest.TestCase):
         with raises(AssertionError):
             parse_str(io.BytesIO(b"\x00\x00\x02\x01" + b"a" * 512))
 
+    def test_view_parsers(self):
+        buf = memoryview(b"\x05\x00\x00\x00\x02ab\x01")
+        assert view_parse_uint32(buf, 1) == (2, 5)
+        assert view_parse_bytes(buf, 1) == (b"ab", 7)
+        assert view_parse_str(buf, 1) == ("ab", 7)
+        assert view_parse_bool(buf, 7) == (True, 8)
+
+        # EOF
+        with raises(AssertionError):
+            view_parse_uint32(buf, 5)
+        with raises(AssertionError):
+            view_parse_bytes(buf, 0)
+        with raises(AssertionError):
+            view_parse_bool(buf, 8)
+        with raises(ValueError):
+            view_parse_bool(buf, 0)
+
+    def test_program_length(self):
+        program = bytes(Program.to([b"a" * 5000, 1, [2, 3]]))
+        buf = memoryview(b"\x00" + program + b"\x00" * 10)
+        assert program_length(buf, 1) == len(program)
+        with raises(OSError):
+            program_length(memoryview(program[:-1]), 0)
+
+    def test_from_bytes_matches_parse(self):
+        @dataclass(frozen=True)
+        @streamable
+        class TestClassInner(Streamable):
+            a: uint64
+            b: Optional[bytes32]
+
+        @dataclass(frozen=True)
+        @streamable
+        class TestClass(Streamable):
+            a: int64
+            b: uint128
+            c: List[TestClassInner]
+            d: Tuple[uint8, str, bytes]
+            e: Optional[List[bool]]
+            f: SerializedProgram
+            g: Program
+            h: List[Coin]
+
+        class FieldByFieldStream(io.BytesIO):
+            pass
+
+        inner = [TestClassInner(uint64(i), None if i % 2 else bytes32([i] * 32)) for i in range(5)]
+        program = Program.to([1, 2, b"a" * 100])
+        coin = Coin(bytes32([1] * 32), bytes32([2] * 32), uint64(3))
+        a = TestClass(
+            int64(-5), uint128(2 ** 100), inner, (uint8(1), "abc", b"def"), [True, False], program, program, [coin]
+        )
+        blob = bytes(a)
+        assert TestClass.from_bytes(blob) == a
+        assert TestClass.parse(FieldByFieldStream(blob)) == a
+
+        # Parsing from a stream leaves it after the object
+        f = io.BytesIO(blob + b"\x01\x02")
+        assert TestClass.parse(f) == a
+        assert f.read() == b"\x01\x02"
+
+        with raises(AssertionError):
+            TestClass.from_bytes(blob + b"\x00")
+        for length in range(len(blob)):
+            with raises((AssertionError, OSError)):
+                TestClass.from_bytes(blob[:length])
+
+    def test_from_bytes_lazy(self):
+        @dataclass(frozen=True)
+        @streamable
+        class TestClass(Streamable):
+            a: List[Coin]
+            b: uint32
+            c: Optional[List[Coin]]
+
+        coins = [Coin(bytes32([i] * 32), bytes32([2] * 32), uint64(i)) for i in range(10)]
+        a = TestClass(coins, uint32(5), coins[:3])
+        blob = bytes(a)
+        b = TestClass.from_bytes_lazy(blob)
+        assert b.__dict__["b"] == 5
+        assert "a" not in b.__dict__
+        assert b.a == coins
+        assert "a" in b.__dict__
+        assert b == a
+        assert bytes(b) == blob
+
+        with raises(AttributeError):
+            b.d
+        with raises(AssertionError):
+            TestClass.from_bytes_lazy(blob[:-1])
+
+    def test_cached_serialization(self):
+        @dataclass(frozen=True)
+        @streamable
+        class TestClassInner(Streamable):
+            a: uint32
+            b: Optional[Tuple[bytes32, str]]
+
+        @dataclass(frozen=True)
+        @streamable
+        class TestClass(Streamable):
+            a: TestClassInner
+            b: List[TestClassInner]
+
+        inner = TestClassInner(uint32(1), (bytes32([1] * 32), "abc"))
+        blob = bytes(inner)
+        assert inner.__dict__["_cached_bytes"] is blob
+        assert bytes(inner) is blob
+        inner_hash = inner.get_hash()
+        assert inner.__dict__["_cached_hash"] is inner_hash
+        assert inner_hash == std_hash(blob)
+        parsed = TestClassInner.from_bytes(blob)
+        assert "_cached_bytes" not in parsed.__dict__
+        assert bytes(parsed) == blob
+
+        # A non canonical encoding of a program parses to an equal object, that serializes and hashes the same
+        @dataclass(frozen=True)
+        @streamable
+        class TestClassProgram(Streamable):
+            a: Program
+
+        canonical = bytes(TestClassProgram(Program.to(1)))
+        assert canonical == bytes.fromhex("01")
+        parsed_program = TestClassProgram.from_bytes(bytes.fromhex("8101"))
+        assert parsed_program == TestClassProgram.from_bytes(canonical)
+        assert bytes(parsed_program) == canonical
+        assert parsed_program.get_hash() == std_hash(canonical)
+
+        # Lists can be changed in place, so objects that contain them aren't cached
+        a = TestClass(inner, [inner])
+        blob = bytes(a)
+        assert "_cached_bytes" not in a.__dict__
+        a.b.append(inner)
+        assert bytes(a) != blob
+        assert TestClass.from_bytes(bytes(a)) == a
+        assert "_cached_bytes" not in TestClass.from_bytes(blob).__dict__
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+from pathlib import Path
+from secrets import token_bytes
+from typing import List, Tuple
+
+from blspy import G1Element
+
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.plotting.util import PlotFilterIndex, PlotInfo
+from hddcoin.types.blockchain_format.proof_of_space import ProofOfSpace
+
+
+class FakeProver:
+    def __init__(self, plot_id: bytes):
+        self.plot_id = plot_id
+
+    def get_id(self) -> bytes:
+        return self.plot_id
+
+
+def make_plots(count: int, prefix: str) -> List[Tuple[Path, PlotInfo]]:
+    plots: List[Tuple[Path, PlotInfo]] = []
+    for i in range(count):
+        prover = FakeProver(token_bytes(32))
+        plots.append((Path(f"{prefix}-{i}.plot"), PlotInfo(prover, None, None, G1Element(), 0, 0)))  # type: ignore
+    return plots
+
+
+class TestPlotFilterIndex:
+    def test_passing_plots(self):
+        plots = make_plots(5000, "a")
+        index = PlotFilterIndex([], b"").updated(set(), plots)
+        assert len(index) == 5000
+        for _ in range(20):
+            challenge_hash = token_bytes(32)
+            sp_hash = token_bytes(32)
+            expected = [
+                (path, plot_info)
+                for path, plot_info in plots
+                if ProofOfSpace.passes_plot_filter(
+                    DEFAULT_CONSTANTS, plot_info.prover.get_id(), challenge_hash, sp_hash
+                )
+            ]
+            assert index.passing_plots(DEFAULT_CONSTANTS, challenge_hash, sp_hash) == expected
+
+        no_filter = DEFAULT_CONSTANTS.replace(NUMBER_ZERO_BITS_PLOT_FILTER=0)
+        assert index.passing_plots(no_filter, token_bytes(32), token_bytes(32)) == plots
+        one_bit = DEFAULT_CONSTANTS.replace(NUMBER_ZERO_BITS_PLOT_FILTER=1)
+        challenge_hash = token_bytes(32)
+        sp_hash = token_bytes(32)
+        assert index.passing_plots(one_bit, challenge_hash, sp_hash) == [
+            (path, plot_info)
+            for path, plot_info in plots
+            if ProofOfSpace.passes_plot_filter(one_bit, plot_info.prover.get_id(), challenge_hash, sp_hash)
+        ]
+
+    def test_updated(self):
+        plots = make_plots(10, "a")
+        index = PlotFilterIndex([], b"").updated(set(), plots)
+        removed = {plots[0][0], plots[4][0], plots[9][0]}
+        added = make_plots(3, "b")
+        updated = index.updated(removed, added)
+
+        expected = [plot for plot in plots if plot[0] not in removed] + added
+        assert updated.plots == expected
+        assert updated.plot_ids == b"".join(plot_info.prover.get_id() for _, plot_info in expected)
+        # The index is replaced, not changed, readers can keep using the previous one
+        assert index.plots == plots
+        assert index.updated(set(), []) == index
@@ -349,6 +349,13 @@ class TestWalletRpc:
             transaction_count = await client.get_transaction_count("1")
             assert transaction_count == len(all_transactions)
 
+            first_page, cursor = await client.get_transactions_page("1", 3)
+            assert len(first_page) == 3
+            assert cursor is not None
+            streamed_transactions = [tx async for tx in client.iter_transactions("1", page_size=3)]
+            assert streamed_transactions[:3] == first_page
+            assert set(tx.name for tx in streamed_transactions) == set(tx.name for tx in all_transactions)
+
             pks = await client.get_public_keys()
             assert len(pks) == 1
 
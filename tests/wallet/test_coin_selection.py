@@ -0,0 +1,132 @@
+from secrets import token_bytes
+from typing import List
+
+import pytest
+
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.wallet.coin_selection import (
+    DEFAULT_COIN_SELECTION_STRATEGY,
+    DUST_CONSOLIDATION_MAX_COINS,
+    EXACT_MATCH_EXTRA_COINS,
+    CoinAmountIndex,
+    CoinSelectionStrategy,
+    select_coins_from_index,
+)
+from hddcoin.wallet.util.wallet_types import WalletType
+from hddcoin.wallet.wallet_coin_record import WalletCoinRecord
+
+
+def make_index(amounts: List[int]) -> CoinAmountIndex:
+    index = CoinAmountIndex()
+    for amount in amounts:
+        coin = Coin(token_bytes(32), token_bytes(32), uint64(amount))
+        record = WalletCoinRecord(coin, uint32(1), uint32(0), False, False, WalletType.STANDARD_WALLET, 1)
+        index.add(record.name(), record)
+    return index
+
+
+def amounts_of(records: List[WalletCoinRecord]) -> List[int]:
+    return sorted(record.coin.amount for record in records)
+
+
+class TestCoinSelection:
+    def test_index(self):
+        index = make_index([5, 1, 3, 3, 8])
+        assert len(index) == 5
+        assert [record.coin.amount for _, record in index.ascending()] == [1, 3, 3, 5, 8]
+        assert [record.coin.amount for _, record in index.ascending(4)] == [5, 8]
+        assert [record.coin.amount for _, record in index.descending()] == [8, 5, 3, 3, 1]
+        assert [record.coin.amount for _, record in index.descending(4)] == [3, 3, 1]
+
+        name, record = next(index.descending())
+        assert name in index
+        index.remove(name)
+        assert name not in index
+        assert [record.coin.amount for _, record in index.descending()] == [5, 3, 3, 1]
+        # Removing twice is a no-op
+        index.remove(name)
+        assert len(index) == 4
+
+    def test_largest_first(self):
+        index = make_index([1, 2, 4, 8, 16])
+        selected = select_coins_from_index(index, 20, set(), CoinSelectionStrategy.LARGEST_FIRST)
+        assert amounts_of(selected) == [8, 16]
+        # Amount 0 still selects a coin
+        selected = select_coins_from_index(index, 0, set(), CoinSelectionStrategy.LARGEST_FIRST)
+        assert amounts_of(selected) == [16]
+
+    def test_smallest_sufficient(self):
+        index = make_index([1, 2, 4, 8, 16])
+        selected = select_coins_from_index(index, 5, set(), CoinSelectionStrategy.SMALLEST_SUFFICIENT)
+        assert amounts_of(selected) == [8]
+        # Excluded coins are skipped
+        excluded = {name for name, record in index.ascending() if record.coin.amount == 8}
+        selected = select_coins_from_index(index, 5, excluded, CoinSelectionStrategy.SMALLEST_SUFFICIENT)
+        assert amounts_of(selected) == [16]
+        # No single coin is enough
+        selected = select_coins_from_index(index, 30, set(), CoinSelectionStrategy.SMALLEST_SUFFICIENT)
+        assert amounts_of(selected) == [2, 4, 8, 16]
+        # Not enough coins at all, the caller has to check the sum
+        selected = select_coins_from_index(index, 100, set(), CoinSelectionStrategy.SMALLEST_SUFFICIENT)
+        assert sum(amounts_of(selected)) == 31
+
+    def test_exact_match(self):
+        index = make_index([3, 5, 7, 11, 50])
+        selected = select_coins_from_index(index, 11, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [11]
+        selected = select_coins_from_index(index, 15, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [3, 5, 7]
+        selected = select_coins_from_index(index, 23, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [5, 7, 11]
+        # 3 + 5 + 7 + 11 is more coins than the cap allows over the single coin fallback
+        selected = select_coins_from_index(index, 26, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [50]
+        # No exact match, falls back to the smallest sufficient coin
+        selected = select_coins_from_index(index, 27, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [50]
+
+    def test_exact_match_many_equal_coins(self):
+        index = make_index([250] * 500 + [7])
+        selected = select_coins_from_index(index, 1007, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [7, 250, 250, 250, 250]
+        # Would need too many coins for an exact match, largest first is used instead
+        selected = select_coins_from_index(index, 250 * 200, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert len(selected) == 200
+
+    def test_exact_match_coin_cap(self):
+        # Fifty coins add up to the amount, but a single coin covers it
+        index = make_index([1] * 50 + [100])
+        selected = select_coins_from_index(index, 50, set(), CoinSelectionStrategy.EXACT_MATCH)
+        assert amounts_of(selected) == [100]
+        # An exact match with up to EXACT_MATCH_EXTRA_COINS more coins than the fallback is still used
+        index = make_index([1] * 50 + [50, 100])
+        selected = select_coins_from_index(
+            index, 50 + EXACT_MATCH_EXTRA_COINS, set(), CoinSelectionStrategy.EXACT_MATCH
+        )
+        assert len(selected) == 1 + EXACT_MATCH_EXTRA_COINS
+        assert sum(amounts_of(selected)) == 50 + EXACT_MATCH_EXTRA_COINS
+        selected = select_coins_from_index(
+            index, 50 + EXACT_MATCH_EXTRA_COINS + 1, set(), CoinSelectionStrategy.EXACT_MATCH
+        )
+        assert amounts_of(selected) == [100]
+
+    def test_default_strategy(self):
+        # Existing wallets keep selecting coins the way they always did
+        index = make_index([1] * 50 + [100])
+        assert amounts_of(select_coins_from_index(index, 50, set())) == [100]
+        assert DEFAULT_COIN_SELECTION_STRATEGY == CoinSelectionStrategy.LARGEST_FIRST
+
+    def test_consolidate_dust(self):
+        index = make_index([1, 1, 2, 100, 500])
+        selected = select_coins_from_index(index, 50, set(), CoinSelectionStrategy.CONSOLIDATE_DUST)
+        assert amounts_of(selected) == [1, 1, 2, 100]
+
+        index = make_index([1] * (DUST_CONSOLIDATION_MAX_COINS * 2) + [100])
+        selected = select_coins_from_index(index, 50, set(), CoinSelectionStrategy.CONSOLIDATE_DUST)
+        assert len(selected) == DUST_CONSOLIDATION_MAX_COINS
+        assert 100 in amounts_of(selected)
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            select_coins_from_index(make_index([1]), 1, set(), "largest_first")  # type: ignore
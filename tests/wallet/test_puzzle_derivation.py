@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from blspy import AugSchemeMPL
+
+from hddcoin.util.ints import uint32
+from hddcoin.wallet.derive_keys import (
+    master_sk_to_wallet_sk,
+    master_sk_to_wallet_sk_intermediate,
+    master_sk_to_wallet_sk_unhardened,
+    master_sk_to_wallet_sk_unhardened_intermediate,
+)
+from hddcoin.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import puzzle_for_pk
+from hddcoin.wallet.util.puzzle_derivation import (
+    MIN_INDEXES_FOR_PROCESS_POOL,
+    derive_pubkeys_and_puzzle_hashes_bulk,
+)
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestPuzzleDerivation:
+    @pytest.mark.asyncio
+    async def test_matches_single_derivation(self):
+        master_sk = AugSchemeMPL.key_gen(bytes([7] * 32))
+        hardened = await derive_pubkeys_and_puzzle_hashes_bulk(
+            master_sk_to_wallet_sk_intermediate(master_sk), True, 5, 15, 1
+        )
+        unhardened = await derive_pubkeys_and_puzzle_hashes_bulk(
+            master_sk_to_wallet_sk_unhardened_intermediate(master_sk), False, 5, 15, 1
+        )
+        assert len(hardened) == len(unhardened) == 10
+        for offset, index in enumerate(range(5, 15)):
+            pubkey = master_sk_to_wallet_sk(master_sk, uint32(index)).get_g1()
+            assert hardened[offset] == (pubkey, puzzle_for_pk(pubkey).get_tree_hash())
+            pubkey = master_sk_to_wallet_sk_unhardened(master_sk, uint32(index)).get_g1()
+            assert unhardened[offset] == (pubkey, puzzle_for_pk(pubkey).get_tree_hash())
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self):
+        intermediate_sk = master_sk_to_wallet_sk_intermediate(AugSchemeMPL.key_gen(bytes([8] * 32)))
+        end = MIN_INDEXES_FOR_PROCESS_POOL + 10
+        in_process = await derive_pubkeys_and_puzzle_hashes_bulk(intermediate_sk, True, 0, end, 1)
+        in_pool = await derive_pubkeys_and_puzzle_hashes_bulk(intermediate_sk, True, 0, end, 2)
+        assert in_process == in_pool
+        assert len(set(puzzle_hash for _, puzzle_hash in in_pool)) == end
@@ -0,0 +1,42 @@
+from secrets import token_bytes
+
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.wallet.puzzle_hash_index import PuzzleHashIndex
+
+
+def rand_hash() -> bytes32:
+    return bytes32(token_bytes(32))
+
+
+class TestPuzzleHashIndex:
+    def test_membership(self):
+        puzzle_hashes = [rand_hash() for _ in range(1000)]
+        index = PuzzleHashIndex(1000, puzzle_hashes[:500])
+        assert len(index) == 500
+        assert set(index) == set(puzzle_hashes[:500])
+        assert all(puzzle_hash in index for puzzle_hash in puzzle_hashes[:500])
+        assert not any(puzzle_hash in index for puzzle_hash in puzzle_hashes[500:])
+        assert b"not a puzzle hash" not in index
+        assert None not in index
+
+        index.update(puzzle_hashes[500:])
+        assert all(puzzle_hash in index for puzzle_hash in puzzle_hashes)
+
+    def test_prefilter(self):
+        index = PuzzleHashIndex(10000, [rand_hash() for _ in range(10000)])
+        # Sized for the puzzle hashes it holds, the filter rejects nearly everything else
+        passed = sum(1 for _ in range(100000) if index.may_contain(rand_hash()))
+        assert passed < 100
+
+    def test_discard(self):
+        puzzle_hashes = [rand_hash() for _ in range(100)]
+        index = PuzzleHashIndex(100, puzzle_hashes)
+        index.discard(rand_hash())
+        assert len(index) == 100
+        for puzzle_hash in puzzle_hashes[:80]:
+            index.discard(puzzle_hash)
+            assert puzzle_hash not in index
+        assert set(index) == set(puzzle_hashes[80:])
+        assert all(puzzle_hash in index for puzzle_hash in puzzle_hashes[80:])
+        # The filter was rebuilt without most of the removed puzzle hashes
+        assert sum(1 for puzzle_hash in puzzle_hashes[:80] if index.may_contain(puzzle_hash)) < 40
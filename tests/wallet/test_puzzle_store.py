@@ -90,6 +90,10 @@ class TestPuzzleStore:
             assert await db.get_last_derivation_path() == 999
             assert await db.get_unused_derivation_path() == 0
             assert await db.get_derivation_record(0, 2, False) == derivation_recs[1]
+            assert await db.max_index_for_puzzle_hashes([record.puzzle_hash for record in derivation_recs]) == 999
+            assert await db.max_index_for_puzzle_hashes([derivation_recs[20].puzzle_hash, 32 * bytes([1])]) == 10
+            assert await db.max_index_for_puzzle_hashes([32 * bytes([1])]) is None
+            assert await db.max_index_for_puzzle_hashes([]) is None
 
             # Indeces up to 250
             await db.set_used_up_to(249)
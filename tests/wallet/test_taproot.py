@@ -2,6 +2,8 @@ from hddcoin.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import (
     DEFAULT_HIDDEN_PUZZLE,
     calculate_synthetic_offset,
     calculate_synthetic_public_key,
+    puzzle_for_pk,
+    puzzle_hash_for_pk,
 )
 from tests.core.make_block_generator import int_to_public_key
 
@@ -18,3 +20,8 @@ class TestTaproot:
             assert spk1 == spk2
 
         return 0
+
+    def test_puzzle_hash_for_pk(self):
+        for main_secret_exponent in range(500, 520):
+            main_pubkey = int_to_public_key(main_secret_exponent)
+            assert puzzle_hash_for_pk(main_pubkey) == puzzle_for_pk(main_pubkey).get_tree_hash()
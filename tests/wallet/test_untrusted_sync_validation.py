@@ -0,0 +1,255 @@
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+from typing import Dict, List, Optional, Set, Tuple
+
+import pytest
+from blspy import G1Element, G2Element
+
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.protocols.wallet_protocol import (
+    CoinState,
+    RequestAdditions,
+    RequestHeaderBlocks,
+    RequestRemovals,
+    RespondAdditions,
+    RespondHeaderBlocks,
+    RespondRemovals,
+)
+from hddcoin.types.blockchain_format.classgroup import ClassgroupElement
+from hddcoin.types.blockchain_format.coin import Coin, hash_coin_list
+from hddcoin.types.blockchain_format.foliage import Foliage, FoliageBlockData, FoliageTransactionBlock
+from hddcoin.types.blockchain_format.pool_target import PoolTarget
+from hddcoin.types.blockchain_format.proof_of_space import ProofOfSpace
+from hddcoin.types.blockchain_format.reward_chain_block import RewardChainBlock
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.types.blockchain_format.vdf import VDFInfo, VDFProof
+from hddcoin.types.header_block import HeaderBlock
+from hddcoin.util.ints import uint8, uint32, uint64, uint128
+from hddcoin.util.merkle_set import MerkleSet
+from hddcoin.wallet.util.wallet_sync_utils import request_and_validate_additions, request_and_validate_removals
+from hddcoin.wallet.wallet_node import PeerRequestCache, WalletNode
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def rand_hash() -> bytes32:
+    return bytes32(token_bytes(32))
+
+
+def make_header_block(height: int, additions_root: bytes32, removals_root: bytes32) -> HeaderBlock:
+    """A transaction block at height, only its height and roots are meaningful"""
+    vdf_info = VDFInfo(rand_hash(), uint64(1), ClassgroupElement.get_default_element())
+    vdf_proof = VDFProof(uint8(0), b"", False)
+    proof_of_space = ProofOfSpace(rand_hash(), G1Element(), None, G1Element(), uint8(32), b"")
+    reward_chain_block = RewardChainBlock(
+        uint128(height + 1),
+        uint32(height),
+        uint128(height + 1),
+        uint8(0),
+        rand_hash(),
+        proof_of_space,
+        None,
+        G2Element(),
+        vdf_info,
+        None,
+        G2Element(),
+        vdf_info,
+        None,
+        True,
+    )
+    foliage_block_data = FoliageBlockData(
+        rand_hash(), PoolTarget(rand_hash(), uint32(0)), None, rand_hash(), rand_hash()
+    )
+    foliage = Foliage(rand_hash(), rand_hash(), foliage_block_data, G2Element(), rand_hash(), G2Element())
+    foliage_transaction_block = FoliageTransactionBlock(
+        rand_hash(), uint64(height), rand_hash(), additions_root, removals_root, rand_hash()
+    )
+    return HeaderBlock(
+        [],
+        reward_chain_block,
+        None,
+        vdf_proof,
+        None,
+        vdf_proof,
+        None,
+        foliage,
+        foliage_transaction_block,
+        b"",
+        None,
+    )
+
+
+class StubPeer:
+    """
+    A full node peer that answers with the header blocks, additions and removals of its chain, the way an honest full
+    node does without proofs: the full additions and removals of the block. Records the requests.
+    """
+
+    def __init__(self, additions: Dict[int, List[Coin]], removals: Dict[int, List[Coin]], num_blocks: int) -> None:
+        self.additions = additions
+        self.removals = removals
+        self.blocks: Dict[int, HeaderBlock] = {}
+        for height in range(num_blocks):
+            additions_set = MerkleSet()
+            for puzzle_hash, coins in self.puzzle_hash_coins(height):
+                additions_set.add_already_hashed(puzzle_hash)
+                additions_set.add_already_hashed(hash_coin_list(coins))
+            removals_set = MerkleSet()
+            for coin in removals.get(height, []):
+                removals_set.add_already_hashed(coin.name())
+            self.blocks[height] = make_header_block(height, additions_set.get_root(), removals_set.get_root())
+        # Heights whose header blocks are left out of the responses
+        self.omitted: Set[int] = set()
+        self.header_requests: List[Tuple[int, int]] = []
+        self.additions_requests: List[RequestAdditions] = []
+        self.removals_requests: List[RequestRemovals] = []
+        self.closed = False
+
+    def puzzle_hash_coins(self, height: int) -> List[Tuple[bytes32, List[Coin]]]:
+        by_puzzle_hash: Dict[bytes32, List[Coin]] = {}
+        for coin in self.additions.get(height, []):
+            by_puzzle_hash.setdefault(coin.puzzle_hash, []).append(coin)
+        return list(by_puzzle_hash.items())
+
+    async def request_header_blocks(self, request: RequestHeaderBlocks) -> RespondHeaderBlocks:
+        self.header_requests.append((request.start_height, request.end_height))
+        header_blocks = [
+            self.blocks[height]
+            for height in range(request.start_height, request.end_height + 1)
+            if height not in self.omitted
+        ]
+        return RespondHeaderBlocks(request.start_height, request.end_height, header_blocks)
+
+    async def request_additions(self, request: RequestAdditions) -> RespondAdditions:
+        self.additions_requests.append(request)
+        block = self.blocks[request.height]
+        return RespondAdditions(request.height, block.header_hash, self.puzzle_hash_coins(request.height), None)
+
+    async def request_removals(self, request: RequestRemovals) -> RespondRemovals:
+        self.removals_requests.append(request)
+        block = self.blocks[request.height]
+        coins: List[Tuple[bytes32, Optional[Coin]]] = [
+            (coin.name(), coin) for coin in self.removals.get(request.height, [])
+        ]
+        return RespondRemovals(request.height, block.header_hash, coins, None)
+
+    def close(self, code: int) -> None:
+        self.closed = True
+
+
+def make_coin() -> Coin:
+    return Coin(rand_hash(), rand_hash(), uint64(1000))
+
+
+def make_wallet_node() -> WalletNode:
+    return WalletNode({}, Path("."), DEFAULT_CONSTANTS)
+
+
+class TestUntrustedSyncValidation:
+    @pytest.mark.asyncio
+    async def test_header_block_ranges(self):
+        peer = StubPeer({}, {}, 200)
+        node = make_wallet_node()
+        cache = PeerRequestCache()
+        cache.blocks[uint32(40)] = peer.blocks[40]
+        heights = [uint32(height) for height in [5, 20, 36, 37, 40, 68, 150]]
+        await node.fetch_header_blocks(heights, peer, cache, asyncio.Semaphore(2))
+
+        # Ranges of up to 32 heights from their first missing height, the cached height is not requested
+        assert sorted(peer.header_requests) == [(5, 36), (37, 68), (150, 150)]
+        assert all(cache.blocks[height] == peer.blocks[height] for height in heights)
+        assert not peer.closed
+
+    @pytest.mark.asyncio
+    async def test_header_block_left_out(self):
+        peer = StubPeer({}, {}, 100)
+        peer.omitted.add(20)
+        node = make_wallet_node()
+        with pytest.raises(ValueError):
+            await node.fetch_header_blocks(
+                [uint32(10), uint32(20), uint32(30)], peer, PeerRequestCache(), asyncio.Semaphore(2)
+            )
+        assert peer.closed
+
+    @pytest.mark.asyncio
+    async def test_additions_must_match_request(self):
+        ours = make_coin()
+        other = make_coin()
+        peer = StubPeer({1: [ours, other]}, {}, 2)
+        block = peer.blocks[1]
+        assert block.foliage_transaction_block is not None
+        root = block.foliage_transaction_block.additions_root
+
+        assert await request_and_validate_additions(
+            peer, uint32(1), block.header_hash, [ours.puzzle_hash, other.puzzle_hash], root
+        )
+        # The response also has a puzzle hash that was not requested
+        assert not await request_and_validate_additions(peer, uint32(1), block.header_hash, [ours.puzzle_hash], root)
+        # The response is missing a requested puzzle hash
+        assert not await request_and_validate_additions(
+            peer, uint32(1), block.header_hash, [ours.puzzle_hash, other.puzzle_hash, rand_hash()], root
+        )
+
+    @pytest.mark.asyncio
+    async def test_removals_must_match_request(self):
+        ours = make_coin()
+        other = make_coin()
+        peer = StubPeer({}, {1: [ours, other]}, 2)
+        block = peer.blocks[1]
+        assert block.foliage_transaction_block is not None
+        root = block.foliage_transaction_block.removals_root
+
+        assert await request_and_validate_removals(
+            peer, uint32(1), block.header_hash, [ours.name(), other.name()], root
+        )
+        # The response also has a coin that was not requested
+        assert not await request_and_validate_removals(peer, uint32(1), block.header_hash, [ours.name()], root)
+        # The response is missing a requested coin
+        assert not await request_and_validate_removals(
+            peer, uint32(1), block.header_hash, [ours.name(), other.name(), rand_hash()], root
+        )
+
+    @pytest.mark.asyncio
+    async def test_one_request_per_height(self):
+        # Coins created at 10 and spent at 12, and a coin created and spent at 12
+        created = [make_coin() for _ in range(3)]
+        spent_later = created[0]
+        created_and_spent = make_coin()
+        peer = StubPeer({10: created, 12: [created_and_spent]}, {12: [spent_later, created_and_spent]}, 20)
+        node = make_wallet_node()
+        validated: List[int] = []
+
+        async def validate_state(weight_proof, block, peer, peer_request_cache) -> bool:
+            validated.append(block.height)
+            return True
+
+        node.validate_state = validate_state  # type: ignore
+        states = [
+            CoinState(spent_later, uint32(12), uint32(10)),
+            CoinState(created[1], None, uint32(10)),
+            CoinState(created[2], None, uint32(10)),
+            CoinState(created_and_spent, uint32(12), uint32(12)),
+        ]
+        await node.validate_coin_states_batch(
+            [(state, None) for state in states], peer, None, PeerRequestCache()  # type: ignore
+        )
+
+        assert peer.header_requests == [(10, 12)]
+        assert sorted(request.height for request in peer.additions_requests) == [10, 12]
+        assert [request.height for request in peer.removals_requests] == [12]
+        assert set(peer.removals_requests[0].coin_names) == {spent_later.name(), created_and_spent.name()}
+        assert sorted(validated) == [10, 12]
+        assert not peer.closed
+
+        # A peer that leaves out a coin spent at a height fails the whole batch
+        peer.removals[12] = [created_and_spent]
+        with pytest.raises(ValueError):
+            await node.validate_coin_states_batch(
+                [(state, None) for state in states], peer, None, PeerRequestCache()  # type: ignore
+            )
+        assert peer.closed
@@ -82,6 +82,19 @@ class TestWalletBlockchain:
             await chain.new_weight_proof(weight_proof_long)
             assert chain.get_peak_height() == 505
 
+            # The validated state is stored with the weight proof, a restart doesn't validate it again
+            handler = wallet_node.wallet_state_manager.weight_proof_handler
+            validate_weight_proof = handler.validate_weight_proof
+            handler.validate_weight_proof = None
+            try:
+                chain_2 = await WalletBlockchain.create(store, test_constants, handler)
+            finally:
+                handler.validate_weight_proof = validate_weight_proof
+            assert chain_2.get_peak_height() == 505
+            assert chain_2.synced_weight_proof_state is not None
+            assert chain_2.synced_weight_proof_state.matches(weight_proof_long)
+            assert chain_2.contains_block(default_1000_blocks[505].header_hash)
+
             header_blocks = []
             for block in default_1000_blocks:
                 header_block = get_block_header(block, [], [])
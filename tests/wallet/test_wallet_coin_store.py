@@ -0,0 +1,178 @@
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+
+import aiosqlite
+import pytest
+
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.wallet.util.wallet_types import WalletType
+from hddcoin.wallet.wallet_coin_record import WalletCoinRecord
+from hddcoin.wallet.wallet_coin_store import WalletCoinStore
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def make_record(amount: int, confirmed: int, spent: int = 0, wallet_id: int = 1) -> WalletCoinRecord:
+    coin = Coin(token_bytes(32), token_bytes(32), uint64(amount))
+    return WalletCoinRecord(
+        coin, uint32(confirmed), uint32(spent), spent != 0, False, WalletType.STANDARD_WALLET, wallet_id
+    )
+
+
+async def balance_from_records(store: WalletCoinStore, wallet_id: int) -> int:
+    return sum(record.coin.amount for record in await store.get_unspent_coins_for_wallet(wallet_id))
+
+
+class TestWalletCoinStore:
+    @pytest.mark.asyncio
+    async def test_balance_ledger(self):
+        db_filename = Path("wallet_coin_store_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(db_connection)
+        store = await WalletCoinStore.create(db_wrapper)
+        try:
+            record_1 = make_record(100, 5)
+            record_2 = make_record(200, 6)
+            record_3 = make_record(400, 7, wallet_id=2)
+            record_4 = make_record(800, 3, spent=4)
+            for record in [record_1, record_2, record_3, record_4]:
+                await store.add_coin_record(record)
+            # Adding the same record again does not count it twice
+            await store.add_coin_record(record_1)
+
+            assert await store.get_confirmed_balance_for_wallet(1) == 300
+            assert await store.get_confirmed_balance_for_wallet(2) == 400
+            assert await store.get_confirmed_balance_for_wallet(3) == 0
+            assert await store.get_unspent_coin_count_for_wallet(1) == 2
+
+            await store.set_spent(record_2.name(), uint32(8))
+            assert await store.get_confirmed_balance_for_wallet(1) == 100
+            assert await store.get_unspent_coin_record_for_wallet(1, record_2.name()) is None
+            assert await store.get_unspent_coin_record_for_wallet(1, record_1.name()) is not None
+
+            await store.delete_coin_record(record_3.name())
+            assert await store.get_confirmed_balance_for_wallet(2) == 0
+
+            # record_4 is unspent again, record_1 and record_2 were confirmed after height 3
+            await store.rollback_to_block(3)
+            assert await store.get_confirmed_balance_for_wallet(1) == 800
+            assert await store.get_unspent_coin_count_for_wallet(1) == 1
+
+            for wallet_id in [1, 2]:
+                assert await store.get_confirmed_balance_for_wallet(wallet_id) == await balance_from_records(
+                    store, wallet_id
+                )
+                # The amount index holds the same coins as the unspent cache
+                index = store.get_unspent_amount_index_for_wallet(wallet_id)
+                assert set(record for _, record in index.ascending()) == await store.get_unspent_coins_for_wallet(
+                    wallet_id
+                )
+
+            await store.rebuild_wallet_cache()
+            assert await store.get_confirmed_balance_for_wallet(1) == 800
+        finally:
+            await db_connection.close()
+            db_filename.unlink()
+
+    @pytest.mark.asyncio
+    async def test_spent_coins_not_resident(self):
+        db_filename = Path("wallet_coin_store_cache_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(db_connection)
+        store = await WalletCoinStore.create(db_wrapper, uint32(2))
+        try:
+            unspent = [make_record(10, height) for height in range(1, 6)]
+            spent = [make_record(20, height, spent=height + 10) for height in range(1, 6)]
+            for record in unspent + spent:
+                await store.add_coin_record(record)
+            await db_connection.commit()
+
+            store = await WalletCoinStore.create(db_wrapper, uint32(2))
+            assert set(store.coin_record_cache.keys()) == set(record.name() for record in unspent)
+            assert len(store.spent_coin_cache.cache) == 0
+
+            # Spent records are read from the DB, and only the most recent ones are kept
+            for record in spent:
+                assert await store.get_coin_record(record.name()) == record
+            assert len(store.spent_coin_cache.cache) == 2
+            assert await store.get_unspent_coins_at_height(None) == set(unspent)
+            assert await store.get_unspent_coins_at_height(uint32(12)) == set(unspent + spent[2:])
+
+            # Spending moves a record out of the resident set
+            await store.set_spent(unspent[0].name(), uint32(20))
+            assert unspent[0].name() not in store.coin_record_cache
+            assert (await store.get_coin_record(unspent[0].name())).spent
+
+            # Rolling back makes the coins spent after the height unspent again, and deletes the newer coins
+            await store.rollback_to_block(13)
+            expected_unspent = set(record.name() for record in unspent + spent[3:])
+            assert set(store.coin_record_cache.keys()) == expected_unspent
+            assert await store.get_coin_record(spent[2].name()) == spent[2]
+            assert (await store.get_coin_record(spent[3].name())).spent is False
+            assert await store.get_coin_record(unspent[0].name()) == unspent[0]
+            assert await store.get_confirmed_balance_for_wallet(1) == 5 * 10 + 2 * 20
+
+            await store.rollback_to_block(3)
+            assert set(store.coin_record_cache.keys()) == set(record.name() for record in unspent[:3] + spent[:3])
+            assert await store.get_coin_record(spent[4].name()) is None
+            assert await store.get_confirmed_balance_for_wallet(1) == 3 * 10 + 3 * 20
+        finally:
+            await db_connection.close()
+            db_filename.unlink()
+
+    @pytest.mark.asyncio
+    async def test_batch_writes(self):
+        db_filename = Path("wallet_coin_store_batch_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(db_connection)
+        store = await WalletCoinStore.create(db_wrapper, uint32(2))
+        try:
+            records = [make_record(10, height) for height in range(1, 2001)]
+            await store.add_coin_records(records)
+            await store.add_coin_records([])
+            assert await store.get_confirmed_balance_for_wallet(1) == 2000 * 10
+
+            spends = [(record.name(), uint32(3000)) for record in records[:1500]]
+            spent = await store.set_spent_many(spends)
+            assert [record.name() for record in spent] == [name for name, _ in spends]
+            assert all(record.spent and record.spent_block_height == 3000 for record in spent)
+            assert await store.get_confirmed_balance_for_wallet(1) == 500 * 10
+
+            # The writes were committed, and the records that are not cached are read in batches
+            store = await WalletCoinStore.create(db_wrapper, uint32(2))
+            assert await store.get_unspent_coin_count_for_wallet(1) == 500
+            names = [record.name() for record in records] + [bytes32(token_bytes(32))]
+            by_name = await store.get_coin_records_by_names(names)
+            assert by_name == {record.name(): record for record in spent + records[1500:]}
+
+            # A batch that fails partway is not committed, and the caches are left as they were
+            failing = [make_record(20, 4000) for _ in range(10)] + [make_record(20, 4000, wallet_id=2 ** 64)]
+            with pytest.raises(OverflowError):
+                await store.add_coin_records(failing)
+            assert await store.get_confirmed_balance_for_wallet(1) == 500 * 10
+            assert await store.get_coin_records_by_names([record.name() for record in failing]) == {}
+            store = await WalletCoinStore.create(db_wrapper, uint32(2))
+            assert await store.get_unspent_coin_count_for_wallet(1) == 500
+        finally:
+            await db_connection.close()
+            db_filename.unlink()
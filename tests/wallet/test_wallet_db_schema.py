@@ -0,0 +1,150 @@
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+
+import aiosqlite
+import pytest
+from blspy import AugSchemeMPL
+
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.wallet.transaction_record import TransactionRecord
+from hddcoin.wallet.util.db_schema import get_schema_version
+from hddcoin.wallet.util.transaction_type import TransactionType
+from hddcoin.wallet.util.wallet_types import WalletType
+from hddcoin.wallet.wallet_coin_store import WalletCoinStore
+from hddcoin.wallet.wallet_puzzle_store import WalletPuzzleStore
+from hddcoin.wallet.wallet_transaction_store import WalletTransactionStore
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+async def create_v1_tables(db_connection: aiosqlite.Connection) -> None:
+    """The wallet tables as they were created before schema versions were recorded"""
+    await db_connection.execute(
+        "CREATE TABLE coin_record(coin_name text PRIMARY KEY, confirmed_height bigint, spent_height bigint,"
+        " spent int, coinbase int, puzzle_hash text, coin_parent text, amount blob, wallet_type int, wallet_id int)"
+    )
+    await db_connection.execute("CREATE INDEX wallet_id on coin_record(wallet_id)")
+    await db_connection.execute(
+        "CREATE TABLE derivation_paths(derivation_index int, pubkey text, puzzle_hash text PRIMARY_KEY,"
+        " wallet_type int, wallet_id int, used tinyint, hardened tinyint)"
+    )
+    await db_connection.execute(
+        "CREATE TABLE transaction_record( transaction_record blob, bundle_id text PRIMARY KEY,"
+        " confirmed_at_height bigint, created_at_time bigint, to_puzzle_hash text, amount blob, fee_amount blob,"
+        " confirmed int, sent int, wallet_id bigint, trade_id text, type int)"
+    )
+
+
+class TestWalletDBSchema:
+    @pytest.mark.asyncio
+    async def test_migrate_v1(self):
+        db_filename = Path("wallet_db_schema_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(db_connection)
+        try:
+            await create_v1_tables(db_connection)
+            unspent = Coin(token_bytes(32), token_bytes(32), uint64(1000))
+            spent = Coin(token_bytes(32), token_bytes(32), uint64(2000))
+            for coin, spent_height in [(unspent, 0), (spent, 12)]:
+                await db_connection.execute(
+                    "INSERT INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        coin.name().hex(),
+                        10,
+                        spent_height,
+                        int(spent_height != 0),
+                        0,
+                        coin.puzzle_hash.hex(),
+                        coin.parent_coin_info.hex(),
+                        bytes(coin.amount),
+                        WalletType.STANDARD_WALLET,
+                        1,
+                    ),
+                )
+
+            pubkey = AugSchemeMPL.key_gen(token_bytes(32)).get_g1()
+            puzzle_hash = bytes32(token_bytes(32))
+            # The old table did not have a primary key, the same puzzle hash could be stored twice
+            for used in [0, 1]:
+                await db_connection.execute(
+                    "INSERT INTO derivation_paths VALUES(?, ?, ?, ?, ?, ?, ?)",
+                    (5, bytes(pubkey).hex(), puzzle_hash.hex(), WalletType.STANDARD_WALLET, 1, used, 0),
+                )
+
+            tx = TransactionRecord(
+                confirmed_at_height=uint32(10),
+                created_at_time=uint64(1000),
+                to_puzzle_hash=puzzle_hash,
+                amount=uint64(1000),
+                fee_amount=uint64(0),
+                confirmed=True,
+                sent=uint32(0),
+                spend_bundle=None,
+                additions=[unspent],
+                removals=[],
+                wallet_id=uint32(1),
+                sent_to=[],
+                trade_id=None,
+                type=uint32(TransactionType.INCOMING_TX.value),
+                name=bytes32(token_bytes(32)),
+                memos=[],
+            )
+            await db_connection.execute(
+                "INSERT INTO transaction_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    bytes(tx),
+                    tx.name,
+                    tx.confirmed_at_height,
+                    tx.created_at_time,
+                    tx.to_puzzle_hash.hex(),
+                    bytes(tx.amount),
+                    bytes(tx.fee_amount),
+                    1,
+                    0,
+                    tx.wallet_id,
+                    None,
+                    tx.type,
+                ),
+            )
+            await db_connection.commit()
+
+            coin_store = await WalletCoinStore.create(db_wrapper)
+            puzzle_store = await WalletPuzzleStore.create(db_wrapper)
+            tx_store = await WalletTransactionStore.create(db_wrapper)
+            for table_name in ["coin_record", "derivation_paths", "transaction_record"]:
+                assert await get_schema_version(db_connection, table_name) == 2
+
+            record = await coin_store.get_coin_record(unspent.name())
+            assert record is not None and record.coin == unspent and not record.spent
+            assert await coin_store.get_confirmed_balance_for_wallet(1) == 1000
+            spent_record = await coin_store.get_coin_record(spent.name())
+            assert spent_record is not None and spent_record.coin == spent and spent_record.spent_block_height == 12
+            assert [r.coin for r in await coin_store.get_coin_records_by_puzzle_hash(spent.puzzle_hash)] == [spent]
+
+            assert await puzzle_store.puzzle_hash_exists(puzzle_hash)
+            derivation_record = await puzzle_store.get_derivation_record_for_puzzle_hash(puzzle_hash)
+            assert derivation_record is not None and derivation_record.pubkey == pubkey
+            assert await puzzle_store.index_for_pubkey(pubkey) == 5
+            assert set(puzzle_store.all_puzzle_hashes) == {puzzle_hash}
+
+            assert await tx_store.get_transaction_record(tx.name) == tx
+            assert await tx_store.get_transactions_page(1, 10, to_puzzle_hash=puzzle_hash) == [tx]
+
+            # Opening the stores again does not migrate again
+            coin_store = await WalletCoinStore.create(db_wrapper)
+            assert await coin_store.get_confirmed_balance_for_wallet(1) == 1000
+        finally:
+            await db_connection.close()
+            db_filename.unlink()
@@ -0,0 +1,238 @@
+import asyncio
+from pathlib import Path
+from secrets import token_bytes
+from typing import List, Optional, Tuple
+
+import aiosqlite
+import pytest
+
+from hddcoin.consensus.block_rewards import calculate_base_farmer_reward
+from hddcoin.consensus.coinbase import farmer_parent_id, pool_parent_id
+from hddcoin.consensus.default_constants import DEFAULT_CONSTANTS
+from hddcoin.types.blockchain_format.coin import Coin
+from hddcoin.types.blockchain_format.sized_bytes import bytes32
+from hddcoin.util.db_wrapper import DBWrapper
+from hddcoin.util.ints import uint32, uint64
+from hddcoin.wallet.transaction_record import TransactionRecord
+from hddcoin.wallet.farming_rewards import FARMING_REWARD_HEIGHT_BUCKET
+from hddcoin.wallet.util.transaction_type import TransactionType
+from hddcoin.wallet.wallet_transaction_store import WalletTransactionStore
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def make_tx(created_at_time: int, type: TransactionType, confirmed: bool, to_puzzle_hash: bytes32) -> TransactionRecord:
+    return TransactionRecord(
+        confirmed_at_height=uint32(created_at_time if confirmed else 0),
+        created_at_time=uint64(created_at_time),
+        to_puzzle_hash=to_puzzle_hash,
+        amount=uint64(1000),
+        fee_amount=uint64(0),
+        confirmed=confirmed,
+        sent=uint32(0),
+        spend_bundle=None,
+        additions=[],
+        removals=[],
+        wallet_id=uint32(1),
+        sent_to=[],
+        trade_id=None,
+        type=uint32(type.value),
+        name=bytes32(token_bytes(32)),
+        memos=[],
+    )
+
+
+def make_reward(height: int, type: TransactionType, wallet_id: int = 1) -> TransactionRecord:
+    if type == TransactionType.COINBASE_REWARD:
+        parent = pool_parent_id(uint32(height), DEFAULT_CONSTANTS.GENESIS_CHALLENGE)
+        amount = 1750
+    else:
+        parent = farmer_parent_id(uint32(height), DEFAULT_CONSTANTS.GENESIS_CHALLENGE)
+        amount = calculate_base_farmer_reward(uint32(height)) + height
+    coin = Coin(parent, bytes32(token_bytes(32)), uint64(amount))
+    return TransactionRecord(
+        confirmed_at_height=uint32(height + 1),
+        created_at_time=uint64(height * 19),
+        to_puzzle_hash=coin.puzzle_hash,
+        amount=coin.amount,
+        fee_amount=uint64(0),
+        confirmed=True,
+        sent=uint32(0),
+        spend_bundle=None,
+        additions=[coin],
+        removals=[],
+        wallet_id=uint32(wallet_id),
+        sent_to=[],
+        trade_id=None,
+        type=uint32(type.value),
+        name=coin.name(),
+        memos=[],
+    )
+
+
+def expected_rewards(records: List[TransactionRecord]) -> Tuple[int, int, int, int]:
+    """Sums rewards the way get_farmed_amount used to, from the records"""
+    amount = fees = base = 0
+    last_height = 0
+    for record in records:
+        if not record.confirmed or record.type not in [
+            TransactionType.FEE_REWARD.value,
+            TransactionType.COINBASE_REWARD.value,
+        ]:
+            continue
+        height = record.height_farmed(DEFAULT_CONSTANTS.GENESIS_CHALLENGE)
+        assert height is not None
+        amount += record.amount
+        if record.type == TransactionType.FEE_REWARD:
+            base += calculate_base_farmer_reward(height)
+            fees += record.amount - calculate_base_farmer_reward(height)
+        last_height = max(last_height, height)
+    return amount, base, fees, last_height
+
+
+def store_rewards(store: WalletTransactionStore) -> Tuple[int, int, int, int]:
+    amount = base = 0
+    last_height = 0
+    for rewards in store.get_farming_reward_totals().values():
+        amount += rewards.amount
+        base += rewards.base_farmer_reward
+        last_height = max(last_height, rewards.last_height_farmed)
+    fees = sum(
+        rewards.amount - rewards.base_farmer_reward
+        for (_, type), rewards in store.get_farming_reward_totals().items()
+        if type == TransactionType.FEE_REWARD
+    )
+    return amount, base, fees, last_height
+
+
+class TestWalletTransactionStore:
+    @pytest.mark.asyncio
+    async def test_transactions_page(self):
+        db_filename = Path("wallet_transaction_store_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(db_connection)
+        store = await WalletTransactionStore.create(db_wrapper)
+        try:
+            puzzle_hash_1 = bytes32(token_bytes(32))
+            puzzle_hash_2 = bytes32(token_bytes(32))
+            txs: List[TransactionRecord] = []
+            for i in range(50):
+                # Several transactions share a creation time, the tx id breaks the tie
+                tx = make_tx(
+                    i // 3,
+                    TransactionType.INCOMING_TX if i % 2 == 0 else TransactionType.OUTGOING_TX,
+                    i % 5 != 0,
+                    puzzle_hash_1 if i % 7 == 0 else puzzle_hash_2,
+                )
+                await store.add_transaction_record(tx, False)
+                txs.append(tx)
+            expected = sorted(txs, key=lambda tx: (tx.created_at_time, tx.name), reverse=True)
+
+            async def all_pages(page_size: int, **filters) -> List[TransactionRecord]:
+                result: List[TransactionRecord] = []
+                after: Optional[Tuple[int, bytes32]] = None
+                while True:
+                    page = await store.get_transactions_page(1, page_size, after, **filters)
+                    assert len(page) <= page_size
+                    result.extend(page)
+                    if len(page) < page_size:
+                        return result
+                    after = (page[-1].created_at_time, page[-1].name)
+
+            for page_size in [1, 7, 50, 100]:
+                assert await all_pages(page_size) == expected
+
+            assert await all_pages(4, types=[TransactionType.INCOMING_TX.value]) == [
+                tx for tx in expected if tx.type == TransactionType.INCOMING_TX.value
+            ]
+            assert await all_pages(4, confirmed=False) == [tx for tx in expected if not tx.confirmed]
+            assert await all_pages(4, to_puzzle_hash=puzzle_hash_1, confirmed=True) == [
+                tx for tx in expected if tx.to_puzzle_hash == puzzle_hash_1 and tx.confirmed
+            ]
+            assert await store.get_transactions_page(2, 10) == []
+
+            # Records that are not cached are read from the database
+            store.tx_record_cache = {}
+            assert await all_pages(9) == expected
+        finally:
+            await db_connection.close()
+            db_filename.unlink()
+
+    @pytest.mark.asyncio
+    async def test_farming_reward_rollups(self):
+        db_filename = Path("wallet_transaction_store_rewards_test.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+
+        db_connection = await aiosqlite.connect(db_filename)
+        db_wrapper = DBWrapper(db_connection)
+        store = await WalletTransactionStore.create(db_wrapper)
+        try:
+            rewards: List[TransactionRecord] = []
+            for height in range(0, FARMING_REWARD_HEIGHT_BUCKET * 2, 500):
+                rewards.append(make_reward(height, TransactionType.COINBASE_REWARD))
+                rewards.append(make_reward(height, TransactionType.FEE_REWARD, wallet_id=2))
+            for record in rewards:
+                await store.add_transaction_record(record, False)
+            # Not a reward
+            await store.add_transaction_record(
+                make_tx(5, TransactionType.INCOMING_TX, True, bytes32(token_bytes(32))), False
+            )
+            assert store_rewards(store) == expected_rewards(rewards)
+
+            # Replacing a record with itself does not count it twice
+            await store.add_transaction_record(rewards[0], False)
+            assert store_rewards(store) == expected_rewards(rewards)
+
+            # A reorg unconfirms the latest reward
+            await store.tx_reorged(rewards[-1])
+            await db_connection.commit()
+            assert store_rewards(store) == expected_rewards(rewards[:-1])
+            await store.set_confirmed(rewards[-1].name, rewards[-1].confirmed_at_height)
+            await db_connection.commit()
+            assert store_rewards(store) == expected_rewards(rewards)
+
+            await store.delete_transaction_record(rewards[0].name)
+            assert store_rewards(store) == expected_rewards(rewards[1:])
+
+            await store.rollback_to_block(FARMING_REWARD_HEIGHT_BUCKET)
+            await db_connection.commit()
+            remaining = [record for record in rewards[1:] if record.confirmed_at_height <= FARMING_REWARD_HEIGHT_BUCKET]
+            assert store_rewards(store) == expected_rewards(remaining)
+
+            # Deleting the latest reward of a rollup that keeps other rewards brings its last height farmed back
+            latest = max(
+                (record for record in remaining if record.type == TransactionType.COINBASE_REWARD),
+                key=lambda record: record.confirmed_at_height,
+            )
+            await store.delete_transaction_record(latest.name)
+            await db_connection.commit()
+            remaining.remove(latest)
+            assert store_rewards(store) == expected_rewards(remaining)
+
+            rollups = dict(store.get_farming_reward_rollups())
+            assert sum(rewards.count for rewards in rollups.values()) == len(remaining)
+
+            # The rollups are persisted
+            store = await WalletTransactionStore.create(db_wrapper)
+            assert store_rewards(store) == expected_rewards(remaining)
+
+            # And rebuilt if they are missing
+            await db_connection.execute("DELETE FROM farming_reward_rollup")
+            await db_connection.commit()
+            store = await WalletTransactionStore.create(db_wrapper)
+            assert store_rewards(store) == expected_rewards(remaining)
+            # The updated rollups, with their last height farmed, are the same as the rebuilt ones
+            assert store.get_farming_reward_rollups() == rollups
+        finally:
+            await db_connection.close()
+            db_filename.unlink()
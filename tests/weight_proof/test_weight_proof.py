@@ -32,6 +32,7 @@ except ImportError:
 
 from hddcoin.consensus.pot_iterations import calculate_iterations_quality
 from hddcoin.full_node.weight_proof import (  # type: ignore
+    WEIGHT_PROOF_CACHE_SIZE,
     WeightProofHandler,
     _map_sub_epoch_summaries,
     _validate_sub_epoch_segments,
@@ -40,6 +41,7 @@ from hddcoin.full_node.weight_proof import (  # type: ignore
 from hddcoin.types.full_block import FullBlock
 from hddcoin.types.header_block import HeaderBlock
 from hddcoin.util.ints import uint32, uint64
+from hddcoin.wallet.wallet_weight_proof_handler import WalletWeightProofHandler
 
 
 @pytest.fixture(scope="session")
@@ -493,6 +495,82 @@ class TestWeightProof:
         assert valid
         assert fork_point != 0
 
+    @pytest.mark.asyncio
+    async def test_weight_proof_cache(self, default_1000_blocks):
+        blocks = default_1000_blocks
+        header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(blocks)
+        wpf = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        wp = await wpf.get_proof_of_weight(blocks[-10].header_hash)
+        assert wp is not None
+        assert await wpf.get_proof_of_weight(blocks[-10].header_hash) is wp
+
+        # The recent chain window slides with the tip, the proofs are the ones built from scratch
+        for block in blocks[-9:]:
+            wp = await wpf.get_proof_of_weight(block.header_hash)
+            assert wp is not None
+            assert wp.recent_chain_data[-1].header_hash == block.header_hash
+            wpf_new = WeightProofHandler(
+                test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries)
+            )
+            assert wp == await wpf_new.get_proof_of_weight(block.header_hash)
+        assert len(wpf._proofs.cache) == WEIGHT_PROOF_CACHE_SIZE
+        assert wpf._proofs.get(blocks[-1].header_hash) is wp
+        assert wpf._proofs.get(blocks[-10].header_hash) is None
+
+    @pytest.mark.asyncio
+    async def test_wallet_weight_proof_incremental(self, default_1000_blocks):
+        blocks = default_1000_blocks
+        header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(blocks)
+        wpf = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        wp = await wpf.get_proof_of_weight(blocks[-20].header_hash)
+        assert wp is not None
+        new_wp = await wpf._create_proof_of_weight(blocks[-1].header_hash)
+        assert new_wp is not None
+
+        wallet_wpf = WalletWeightProofHandler(test_constants)
+        try:
+            valid, _, wp_summaries, records = await wallet_wpf.validate_weight_proof(wp)
+            assert valid
+            assert len(wallet_wpf._validated_summaries) > 0
+            assert set(wallet_wpf._validated_blocks.keys()) <= {b.header_hash for b in wp.recent_chain_data}
+            assert len(wallet_wpf._validated_blocks) > 0
+
+            # The blocks shared with the previous recent chain and the sub epochs validated before are reused
+            valid, _, new_summaries, new_records = await wallet_wpf.validate_weight_proof(new_wp)
+            assert valid
+            assert new_records[-1].header_hash == blocks[-1].header_hash
+            assert set(wallet_wpf._validated_blocks.keys()) <= {b.header_hash for b in new_wp.recent_chain_data}
+
+            # Validating from scratch gives the same result
+            fresh_wpf = WalletWeightProofHandler(test_constants)
+            try:
+                valid, _, fresh_summaries, fresh_records = await fresh_wpf.validate_weight_proof(new_wp)
+                assert valid
+                assert fresh_summaries == new_summaries
+                assert fresh_records == new_records
+            finally:
+                fresh_wpf.cancel_weight_proof_tasks()
+        finally:
+            wallet_wpf.cancel_weight_proof_tasks()
+
+    @pytest.mark.asyncio
+    async def test_wallet_weight_proof_workers(self, default_1000_blocks):
+        blocks = default_1000_blocks
+        header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(blocks)
+        wpf = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        wp = await wpf.get_proof_of_weight(blocks[-1].header_hash)
+        assert wp is not None
+
+        for num_processes in (1, 3):
+            wallet_wpf = WalletWeightProofHandler(test_constants, num_processes)
+            try:
+                valid, _, _, records = await wallet_wpf.validate_weight_proof(wp)
+                assert valid
+                assert records[-1].header_hash == blocks[-1].header_hash
+                assert list(wallet_wpf.validation_timings.keys()) == ["summaries", "segments", "vdfs", "recent blocks"]
+            finally:
+                wallet_wpf.cancel_weight_proof_tasks()
+
     @pytest.mark.skip("used for debugging")
     @pytest.mark.asyncio
     async def test_weight_proof_from_database(self):